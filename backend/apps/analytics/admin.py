@@ -1,3 +1,33 @@
 from django.contrib import admin
+from .models import PlatformCounter, DailyRollup, ExportJob
 
-# Admin interfaces will be added in subsequent tasks
+
+@admin.register(PlatformCounter)
+class PlatformCounterAdmin(admin.ModelAdmin):
+    """Admin interface for PlatformCounter model."""
+    
+    list_display = ['name', 'value', 'updated_at']
+    search_fields = ['name']
+    readonly_fields = ['name', 'value', 'updated_at']
+    ordering = ['name']
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    """Admin interface for DailyRollup model."""
+    
+    list_display = ['date', 'metric', 'dimension', 'count', 'updated_at']
+    list_filter = ['metric', 'dimension']
+    readonly_fields = ['date', 'metric', 'dimension', 'count', 'updated_at']
+    ordering = ['-date', 'metric', 'dimension']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """Admin interface for ExportJob model."""
+    
+    list_display = ['id', 'export_type', 'status', 'requested_by', 'rows_written', 'total_rows', 'created_at']
+    list_filter = ['export_type', 'status', 'created_at']
+    search_fields = ['requested_by__email']
+    readonly_fields = ['created_at', 'started_at', 'completed_at', 'updated_at']
+    ordering = ['-created_at']
@@ -5,3 +5,14 @@ class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.analytics'
     label = 'analytics'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+        from .rollups import ROLLUP_SOURCES, rollup_source_deleted
+
+        for model, _ in ROLLUP_SOURCES.values():
+            post_delete.connect(
+                rollup_source_deleted,
+                sender=model,
+                dispatch_uid=f'rollups.{model._meta.label}'
+            )
@@ -0,0 +1,182 @@
+"""
+Incrementally maintained platform counters.
+
+Write paths in the service layer call CounterService inside their own
+transaction, so counters commit or roll back together with the change they
+describe. Writes that bypass the service layer (admin edits, cascades, raw
+ORM updates) are repaired by ``manage.py reconcile_counters``.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from apps.users.models import User, ProviderProfile
+from apps.services.models import Service
+from apps.requests.models import ServiceRequest
+from .models import PlatformCounter
+
+
+# Counter groups and the values tracked within each group
+USER_ROLES = ['REGULAR', 'PROVIDER', 'ADMIN']
+APPROVAL_STATUSES = ['PENDING', 'APPROVED', 'REJECTED']
+REQUEST_STATUSES = ['PENDING', 'ACCEPTED', 'REJECTED', 'COMPLETED']
+
+USERS_TOTAL = 'users.total'
+SERVICES_ACTIVE = 'services.active'
+
+
+def user_role_counter(role):
+    """Return the counter name for users with the given role."""
+    return f'users.{role}'
+
+
+def provider_status_counter(approval_status):
+    """Return the counter name for provider profiles with the given status."""
+    return f'provider_profiles.{approval_status}'
+
+
+def request_status_counter(status):
+    """Return the counter name for service requests with the given status."""
+    return f'service_requests.{status}'
+
+
+class CounterService:
+    """Service for maintaining and reading platform counters."""
+
+    @staticmethod
+    def increment(name, delta=1):
+        """
+        Atomically add delta to a counter, creating it if needed.
+
+        Args:
+            name: Counter name
+            delta: Amount to add (may be negative)
+        """
+        if not delta:
+            return
+
+        with transaction.atomic():
+            updated = PlatformCounter.objects.filter(name=name).update(value=F('value') + delta)
+            if updated:
+                return
+            try:
+                with transaction.atomic():
+                    PlatformCounter.objects.create(name=name, value=delta)
+            except IntegrityError:
+                # Created concurrently; fall back to an update
+                PlatformCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+    @classmethod
+    def transition(cls, old_name, new_name):
+        """
+        Move one unit from one counter to another.
+
+        Args:
+            old_name: Counter to decrement (skipped if None)
+            new_name: Counter to increment (skipped if None)
+        """
+        if old_name == new_name:
+            return
+
+        with transaction.atomic():
+            if old_name:
+                cls.increment(old_name, -1)
+            if new_name:
+                cls.increment(new_name, 1)
+
+    @classmethod
+    def record_user_created(cls, user):
+        """Count a newly created user."""
+        with transaction.atomic():
+            cls.increment(USERS_TOTAL)
+            cls.increment(user_role_counter(user.role))
+
+    @classmethod
+    def record_provider_status_change(cls, old_status, new_status):
+        """Count a provider profile creation (old_status=None) or status change."""
+        cls.transition(
+            provider_status_counter(old_status) if old_status else None,
+            provider_status_counter(new_status)
+        )
+
+    @classmethod
+    def record_request_status_change(cls, old_status, new_status):
+        """Count a service request creation (old_status=None) or status change."""
+        cls.transition(
+            request_status_counter(old_status) if old_status else None,
+            request_status_counter(new_status)
+        )
+
+    @classmethod
+    def record_service_active_change(cls, was_active, is_active):
+        """Count a service becoming active or inactive."""
+        if was_active != is_active:
+            cls.increment(SERVICES_ACTIVE, 1 if is_active else -1)
+
+    @staticmethod
+    def get_values():
+        """
+        Read all counters in one query.
+
+        Returns:
+            dict: Counter name to value
+        """
+        return dict(PlatformCounter.objects.values_list('name', 'value'))
+
+    @staticmethod
+    def compute_from_source():
+        """
+        Recompute every counter from the source tables.
+
+        Returns:
+            dict: Counter name to true value
+        """
+        values = {USERS_TOTAL: 0, SERVICES_ACTIVE: 0}
+        values.update({user_role_counter(role): 0 for role in USER_ROLES})
+        values.update({provider_status_counter(s): 0 for s in APPROVAL_STATUSES})
+        values.update({request_status_counter(s): 0 for s in REQUEST_STATUSES})
+
+        for row in User.objects.order_by().values('role').annotate(count=Count('id')):
+            values[user_role_counter(row['role'])] = row['count']
+            values[USERS_TOTAL] += row['count']
+
+        for row in ProviderProfile.objects.order_by().values('approval_status').annotate(count=Count('id')):
+            values[provider_status_counter(row['approval_status'])] = row['count']
+
+        for row in ServiceRequest.objects.order_by().values('status').annotate(count=Count('id')):
+            values[request_status_counter(row['status'])] = row['count']
+
+        values[SERVICES_ACTIVE] = Service.objects.filter(is_active=True).count()
+
+        return values
+
+    @classmethod
+    @transaction.atomic
+    def reconcile(cls, apply=True):
+        """
+        Compare stored counters against the source tables and optionally fix them.
+
+        Args:
+            apply: Whether to overwrite drifted counters with the true values
+
+        Returns:
+            dict: Counter name to (stored, actual) for every drifted counter
+        """
+        # Lock the counters before counting the source tables: a transition
+        # committed in between would otherwise be in stored but not in actual,
+        # and be "fixed" away. Concurrent increments wait until this commits.
+        stored = {
+            counter.name: counter.value
+            for counter in PlatformCounter.objects.select_for_update()
+        }
+        actual = cls.compute_from_source()
+
+        drift = {
+            name: (stored.get(name, 0), value)
+            for name, value in actual.items()
+            if stored.get(name, 0) != value
+        }
+
+        if apply:
+            for name, (_, value) in drift.items():
+                PlatformCounter.objects.update_or_create(name=name, defaults={'value': value})
+
+        return drift
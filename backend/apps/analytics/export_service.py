@@ -0,0 +1,177 @@
+"""
+Background export jobs for analytics reports.
+
+Jobs are queued in the database and picked up by ``manage.py run_export_worker``,
+which polls for pending jobs, so no message broker is needed. Each job writes a
+gzip-compressed CSV under EXPORT_ROOT/exports/, outside MEDIA_ROOT, so exports
+can only be fetched through the authenticated download endpoint.
+"""
+import gzip
+import os
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from core.exceptions import NotFoundException
+from .models import ExportJob
+from .services import ReportGenerationService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobService:
+    """Service for queueing and running background export jobs."""
+
+    # Rows written between progress updates
+    PROGRESS_INTERVAL = 5000
+
+    EXPORT_DIR = 'exports'
+
+    @staticmethod
+    def enqueue(user, export_type, filters=None):
+        """
+        Queue a new export job.
+
+        Args:
+            user: Admin user requesting the export
+            export_type: One of users, providers, requests, metrics
+            filters: Optional dict of start_date, end_date, role, status (strings)
+
+        Returns:
+            ExportJob: The queued job
+        """
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        job = ExportJob.objects.create(
+            requested_by=user,
+            export_type=export_type,
+            filters=filters
+        )
+        logger.info(f"Queued {export_type} export job {job.id} for {user.email}")
+        return job
+
+    @staticmethod
+    def get_job(job_id):
+        """
+        Get an export job by ID.
+
+        Raises:
+            NotFoundException: If the job does not exist
+        """
+        try:
+            return ExportJob.objects.get(id=job_id)
+        except ExportJob.DoesNotExist:
+            raise NotFoundException(f"Export job with ID {job_id} not found.")
+
+    @staticmethod
+    def claim_next():
+        """
+        Atomically claim the oldest pending job.
+
+        Uses a conditional UPDATE so concurrent workers never claim the same job,
+        on any database backend.
+
+        Returns:
+            ExportJob or None: The claimed job
+        """
+        for job_id in ExportJob.objects.filter(status='PENDING').order_by('created_at').values_list('id', flat=True)[:10]:
+            claimed = ExportJob.objects.filter(id=job_id, status='PENDING').update(
+                status='RUNNING',
+                started_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+            if claimed:
+                return ExportJob.objects.get(id=job_id)
+        return None
+
+    @staticmethod
+    def requeue_stale(max_age=timedelta(minutes=30)):
+        """
+        Return running jobs with no progress for max_age to the queue.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        return ExportJob.objects.filter(
+            status='RUNNING',
+            updated_at__lt=timezone.now() - max_age
+        ).update(status='PENDING', rows_written=0, updated_at=timezone.now())
+
+    @classmethod
+    def run_job(cls, job):
+        """
+        Write the export file for a claimed job.
+
+        Args:
+            job: ExportJob in RUNNING state
+
+        Returns:
+            ExportJob: The finished (COMPLETED or FAILED) job
+        """
+        filters = {
+            'start_date': parse_date(job.filters['start_date']) if job.filters.get('start_date') else None,
+            'end_date': parse_date(job.filters['end_date']) if job.filters.get('end_date') else None,
+            'role': job.filters.get('role'),
+            'status': job.filters.get('status'),
+        }
+
+        filename = f"{job.id}_{ReportGenerationService.REPORT_FILENAMES[job.export_type]}.gz"
+        relative_path = os.path.join(cls.EXPORT_DIR, filename)
+        full_path = job.file.storage.path(relative_path)
+        temp_path = f"{full_path}.part"
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        try:
+            job.total_rows = ReportGenerationService.count_rows(job.export_type, **filters)
+            job.rows_written = 0
+            job.save(update_fields=['total_rows', 'rows_written', 'updated_at'])
+
+            rows = ReportGenerationService.generate_csv(job.export_type, **filters)
+            with gzip.open(temp_path, 'wt', encoding='utf-8', newline='') as output:
+                for index, line in enumerate(ReportGenerationService.stream_csv(rows)):
+                    output.write(line)
+
+                    # Index 0 is the header row
+                    if index and index % cls.PROGRESS_INTERVAL == 0:
+                        job.rows_written = index
+                        job.save(update_fields=['rows_written', 'updated_at'])
+
+            os.replace(temp_path, full_path)
+
+            job.rows_written = index
+            job.file.name = relative_path
+            job.file_size = os.path.getsize(full_path)
+            job.status = 'COMPLETED'
+            job.completed_at = timezone.now()
+            job.save()
+            logger.info(f"Export job {job.id} completed: {job.rows_written} rows, {job.file_size} bytes")
+
+        except Exception as e:
+            logger.error(f"Export job {job.id} failed: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            job.status = 'FAILED'
+            job.error = str(e)
+            job.completed_at = timezone.now()
+            job.save()
+
+        return job
+
+    @classmethod
+    def run_pending(cls, max_jobs=None):
+        """
+        Claim and run pending jobs until the queue is empty.
+
+        Args:
+            max_jobs: Optional maximum number of jobs to run
+
+        Returns:
+            int: Number of jobs run
+        """
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            job = cls.claim_next()
+            if job is None:
+                break
+            cls.run_job(job)
+            processed += 1
+        return processed
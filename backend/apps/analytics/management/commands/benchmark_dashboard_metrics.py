@@ -0,0 +1,115 @@
+"""
+Benchmark dashboard metrics backends against a synthetic data set.
+
+Usage:
+    python manage.py benchmark_dashboard_metrics --requests 1000000
+"""
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from apps.users.models import User, ProviderProfile
+from apps.services.models import Service
+from apps.requests.models import ServiceRequest
+from apps.analytics.metrics import DEFAULT_METRICS_BACKEND, get_metrics_backend
+
+
+class Command(BaseCommand):
+    help = 'Measure queries-per-call and latency of dashboard metrics backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000000,
+                            help='Number of synthetic service requests to seed')
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Number of synthetic users to seed')
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Number of timed calls per backend')
+        parser.add_argument('--backend', action='append', dest='backends',
+                            help='Dotted path of a backend to benchmark (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        backends = options['backends'] or [DEFAULT_METRICS_BACKEND]
+
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            self._seed(options['users'], options['requests'], options['batch_size'])
+            for path in backends:
+                self._run(path, options['iterations'])
+            transaction.set_rollback(True)
+
+    def _seed(self, user_count, request_count, batch_size):
+        self.stdout.write(f'Seeding {user_count} users and {request_count} requests...')
+        run_id = int(time.time())
+        roles = ['REGULAR', 'PROVIDER']
+
+        users = User.objects.bulk_create([
+            User(
+                email=f'bench-{run_id}-{i}@example.com',
+                first_name='Bench',
+                last_name=str(i),
+                role=roles[i % 2],
+                password='!'
+            )
+            for i in range(user_count)
+        ], batch_size=batch_size)
+        regulars = [u for u in users if u.role == 'REGULAR']
+        providers = [u for u in users if u.role == 'PROVIDER']
+
+        ProviderProfile.objects.bulk_create([
+            ProviderProfile(
+                user=provider,
+                service_description='Benchmark provider',
+                approval_status=random.choice(['PENDING', 'APPROVED', 'REJECTED'])
+            )
+            for provider in providers
+        ], batch_size=batch_size)
+
+        services = Service.objects.bulk_create([
+            Service(
+                provider=provider,
+                name=f'Bench Service {provider.pk}',
+                description='Benchmark service',
+                location='Damascus',
+                cost=100
+            )
+            for provider in providers
+        ], batch_size=batch_size)
+
+        statuses = ['PENDING', 'ACCEPTED', 'REJECTED', 'COMPLETED']
+        created = 0
+        while created < request_count:
+            size = min(batch_size, request_count - created)
+            batch = []
+            for _ in range(size):
+                service = random.choice(services)
+                batch.append(ServiceRequest(
+                    service=service,
+                    requester=random.choice(regulars),
+                    provider_id=service.provider_id,
+                    status=random.choice(statuses)
+                ))
+            ServiceRequest.objects.bulk_create(batch, batch_size=batch_size)
+            created += size
+
+    def _run(self, path, iterations):
+        backend = get_metrics_backend(path)
+
+        # Warm-up call, also used to count queries
+        with CaptureQueriesContext(connection) as ctx:
+            backend.get_metrics()
+        query_count = len(ctx.captured_queries)
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            backend.get_metrics()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(self.style.SUCCESS(path))
+        self.stdout.write(f'  queries/call: {query_count}')
+        self.stdout.write(f'  mean: {statistics.mean(timings):.2f} ms')
+        self.stdout.write(f'  p50:  {statistics.median(timings):.2f} ms')
+        self.stdout.write(f'  max:  {max(timings):.2f} ms')
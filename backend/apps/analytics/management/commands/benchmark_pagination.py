@@ -0,0 +1,128 @@
+"""
+Benchmark page-number against keyset pagination on a deep result set.
+
+Usage:
+    python manage.py benchmark_pagination --rows 200000 --page 5000
+"""
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.users.models import User
+from apps.services.models import Service
+from apps.requests.models import ServiceRequest
+from core.pagination import KeysetPagination, StandardResultsSetPagination
+
+
+class Command(BaseCommand):
+    help = 'Compare first- and deep-page latency of page-number and keyset pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000,
+                            help='Number of synthetic service requests to seed')
+        parser.add_argument('--page', type=int, default=5000,
+                            help='Deep page number to compare against page 1')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Number of timed calls per case')
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        deep_page = options['page']
+        if deep_page * page_size > options['rows']:
+            raise CommandError('--rows must be at least --page x --page-size')
+
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            self._seed(options['rows'])
+            queryset = ServiceRequest.objects.all()
+
+            # The keyset cursor for page N points at the last row of page N - 1
+            anchor = queryset.order_by(*KeysetPagination.ordering)[(deep_page - 1) * page_size - 1]
+            cursor = KeysetPagination().encode_cursor('n', anchor)
+
+            cases = [
+                ('page-number, page 1', StandardResultsSetPagination, {}),
+                (f'page-number, page {deep_page}', StandardResultsSetPagination, {'page': deep_page}),
+                ('keyset, page 1', KeysetPagination, {'pagination': 'cursor'}),
+                (f'keyset, page {deep_page}', KeysetPagination, {'cursor': cursor}),
+                (f'keyset without count, page {deep_page}', KeysetPagination,
+                 {'cursor': cursor, 'count': 'false'}),
+            ]
+            for label, paginator_class, params in cases:
+                params = {**params, 'page_size': page_size}
+                self._run(label, paginator_class, queryset, params, options['iterations'])
+
+            transaction.set_rollback(True)
+
+    def _seed(self, row_count):
+        self.stdout.write(f'Seeding {row_count} requests...')
+        run_id = int(time.time())
+        requester = User.objects.create_user(
+            email=f'bench-requester-{run_id}@example.com',
+            password='!',
+            first_name='Bench',
+            last_name='Requester'
+        )
+        provider = User.objects.create_user(
+            email=f'bench-provider-{run_id}@example.com',
+            password='!',
+            first_name='Bench',
+            last_name='Provider',
+            role='PROVIDER'
+        )
+        service = Service.objects.create(
+            provider=provider,
+            name='Bench Service',
+            description='Benchmark service',
+            location='Damascus',
+            cost=100
+        )
+
+        # One row per second going back in time, so created_at is mostly distinct
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO service_requests
+                    (service_id, requester_id, provider_id, status, message, created_at, updated_at)
+                WITH RECURSIVE seq(n) AS (
+                    SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s
+                )
+                SELECT %s, %s, %s, 'PENDING', '', %s, %s FROM seq
+                """,
+                [row_count, service.id, requester.id, provider.id, now, now]
+            )
+            cursor.execute(
+                """
+                UPDATE service_requests
+                SET created_at = datetime(created_at, '-' || (id %% 86400) || ' seconds')
+                WHERE service_id = %s
+                """ if connection.vendor == 'sqlite' else
+                """
+                UPDATE service_requests
+                SET created_at = created_at - (id %% 86400) * interval '1 second'
+                WHERE service_id = %s
+                """,
+                [service.id]
+            )
+
+    def _run(self, label, paginator_class, queryset, params, iterations):
+        factory = APIRequestFactory()
+        request = Request(factory.get('/api/requests/', params, HTTP_HOST='localhost'))
+
+        timings = []
+        for _ in range(iterations):
+            paginator = paginator_class()
+            start = time.perf_counter()
+            page = paginator.paginate_queryset(queryset, request)
+            paginator.get_paginated_response([obj.id for obj in page])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  mean: {statistics.mean(timings):.2f} ms')
+        self.stdout.write(f'  p50:  {statistics.median(timings):.2f} ms')
+        self.stdout.write(f'  max:  {max(timings):.2f} ms')
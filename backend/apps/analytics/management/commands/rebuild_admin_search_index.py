@@ -0,0 +1,22 @@
+"""
+Recreate the admin search index and its triggers, and reindex every row.
+
+Run after restoring a database or after a schema change that rebuilt one of the
+source tables (SQLite drops triggers when a table is remade).
+
+Usage:
+    python manage.py rebuild_admin_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.analytics.search_index import AdminSearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Recreate the admin search index and reindex users, providers and requests'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            AdminSearchIndex.uninstall()
+            documents = AdminSearchIndex.install()
+        self.stdout.write(self.style.SUCCESS(f'Admin search index rebuilt: {documents} documents.'))
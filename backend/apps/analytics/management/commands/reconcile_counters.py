@@ -0,0 +1,31 @@
+"""
+Rebuild platform counters from the source tables and report drift.
+
+Usage:
+    python manage.py reconcile_counters [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+from apps.analytics.counters import CounterService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild platform counters from the source tables and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drift without updating the counters')
+
+    def handle(self, *args, **options):
+        drift = CounterService.reconcile(apply=not options['dry_run'])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All counters match the source tables.'))
+            return
+
+        for name, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f'{name}: stored={stored} actual={actual} drift={stored - actual:+d}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counter(s) drifted (dry run, nothing changed).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} counter(s) rebuilt.'))
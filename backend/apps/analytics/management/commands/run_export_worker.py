@@ -0,0 +1,42 @@
+"""
+Run background export jobs by polling the database.
+
+Usage:
+    python manage.py run_export_worker [--once] [--poll-interval 2]
+"""
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.analytics.export_service import ExportJobService
+
+
+class Command(BaseCommand):
+    help = 'Poll for queued analytics export jobs and run them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run all pending jobs and exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=30,
+                            help='Minutes without progress before a running job is requeued')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_after'])
+
+        while True:
+            close_old_connections()
+
+            requeued = ExportJobService.requeue_stale(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+
+            processed = ExportJobService.run_pending()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'Ran {processed} export job(s)'))
+
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,202 @@
+"""
+Dashboard metrics engine with pluggable backends.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils.module_loading import import_string
+from apps.users.models import User
+from apps.services.models import Service
+from apps.requests.models import ServiceRequest
+from .counters import (
+    CounterService,
+    USERS_TOTAL,
+    SERVICES_ACTIVE,
+    user_role_counter,
+    provider_status_counter,
+    request_status_counter,
+)
+from .models import PlatformCounter
+
+
+DEFAULT_METRICS_BACKEND = 'apps.analytics.metrics.AggregateMetricsBackend'
+
+# Order in which metrics are reported by the dashboard and CSV export
+METRIC_KEYS = [
+    'total_users',
+    'total_regular_users',
+    'total_providers',
+    'active_providers',
+    'pending_applications',
+    'pending_requests',
+    'accepted_requests',
+    'completed_requests',
+    'rejected_requests',
+    'total_services',
+]
+
+
+class BaseMetricsBackend:
+    """Base class for dashboard metrics backends."""
+
+    def get_metrics(self, start_date=None, end_date=None):
+        """
+        Compute dashboard metrics.
+
+        Args:
+            start_date: Optional start date for filtering user counts
+            end_date: Optional end date for filtering user counts
+
+        Returns:
+            dict: Metric name to value, keyed by METRIC_KEYS
+        """
+        raise NotImplementedError('Metrics backends must implement get_metrics()')
+
+    async def aget_metrics(self, start_date=None, end_date=None):
+        """
+        Compute dashboard metrics from async code.
+
+        Backends override this with async ORM queries; by default
+        get_metrics() runs in a worker thread.
+        """
+        return await sync_to_async(self.get_metrics)(start_date=start_date, end_date=end_date)
+
+
+def _date_filter(start_date=None, end_date=None):
+    """Filter on created_at for the optional date range."""
+    date_filter = Q()
+    if start_date:
+        date_filter &= Q(created_at__gte=start_date)
+    if end_date:
+        date_filter &= Q(created_at__lte=end_date)
+    return date_filter
+
+
+class AggregateMetricsBackend(BaseMetricsBackend):
+    """
+    Compute metrics from the source tables with conditional aggregates.
+
+    Each table group is counted in a single pass, so a call costs three
+    queries: users (joined to provider profiles), service requests and services.
+    """
+
+    def get_metrics(self, start_date=None, end_date=None):
+        """Compute dashboard metrics with one aggregate query per table group."""
+        user_metrics = User.objects.aggregate(**self._user_aggregates(start_date, end_date))
+        request_metrics = ServiceRequest.objects.aggregate(**self._request_aggregates())
+        total_services = Service.objects.filter(is_active=True).count()
+
+        metrics = {**user_metrics, **request_metrics, 'total_services': total_services}
+        return {key: metrics[key] for key in METRIC_KEYS}
+
+    async def aget_metrics(self, start_date=None, end_date=None):
+        """Compute dashboard metrics with the same queries, awaited."""
+        user_metrics = await User.objects.aaggregate(**self._user_aggregates(start_date, end_date))
+        request_metrics = await ServiceRequest.objects.aaggregate(**self._request_aggregates())
+        total_services = await Service.objects.filter(is_active=True).acount()
+
+        metrics = {**user_metrics, **request_metrics, 'total_services': total_services}
+        return {key: metrics[key] for key in METRIC_KEYS}
+
+    @staticmethod
+    def _user_aggregates(start_date, end_date):
+        # Date filters only apply to user counts, matching the dashboard contract
+        date_filter = _date_filter(start_date, end_date)
+
+        # Provider profiles are one-to-one with users, so the join does not fan out
+        return {
+            'total_users': Count('id', filter=date_filter),
+            'total_regular_users': Count('id', filter=date_filter & Q(role='REGULAR')),
+            'total_providers': Count('id', filter=date_filter & Q(role='PROVIDER')),
+            'active_providers': Count(
+                'provider_profile',
+                filter=Q(provider_profile__approval_status='APPROVED')
+            ),
+            'pending_applications': Count(
+                'provider_profile',
+                filter=Q(provider_profile__approval_status='PENDING')
+            ),
+        }
+
+    @staticmethod
+    def _request_aggregates():
+        return {
+            'pending_requests': Count('id', filter=Q(status='PENDING')),
+            'accepted_requests': Count('id', filter=Q(status='ACCEPTED')),
+            'completed_requests': Count('id', filter=Q(status='COMPLETED')),
+            'rejected_requests': Count('id', filter=Q(status='REJECTED')),
+        }
+
+
+class CounterMetricsBackend(BaseMetricsBackend):
+    """
+    Read metrics from the incrementally maintained PlatformCounter table.
+
+    Unfiltered calls cost one query regardless of table sizes. Date-filtered
+    user counts cannot be served from running totals, so they are computed
+    from the users table with a single aggregate.
+    """
+
+    # Date-filtered user counts, computed from the users table
+    USER_AGGREGATES = {
+        'total_users': Count('id'),
+        'total_regular_users': Count('id', filter=Q(role='REGULAR')),
+        'total_providers': Count('id', filter=Q(role='PROVIDER')),
+    }
+
+    def get_metrics(self, start_date=None, end_date=None):
+        """Read dashboard metrics from platform counters."""
+        metrics = self._from_counters(CounterService.get_values())
+
+        if start_date or end_date:
+            metrics.update(
+                User.objects.filter(_date_filter(start_date, end_date)).aggregate(**self.USER_AGGREGATES)
+            )
+
+        return metrics
+
+    async def aget_metrics(self, start_date=None, end_date=None):
+        """Read dashboard metrics from platform counters, awaited."""
+        counters = {name: value async for name, value in PlatformCounter.objects.values_list('name', 'value')}
+        metrics = self._from_counters(counters)
+
+        if start_date or end_date:
+            metrics.update(
+                await User.objects.filter(_date_filter(start_date, end_date)).aaggregate(**self.USER_AGGREGATES)
+            )
+
+        return metrics
+
+    @staticmethod
+    def _from_counters(counters):
+        return {
+            'total_users': counters.get(USERS_TOTAL, 0),
+            'total_regular_users': counters.get(user_role_counter('REGULAR'), 0),
+            'total_providers': counters.get(user_role_counter('PROVIDER'), 0),
+            'active_providers': counters.get(provider_status_counter('APPROVED'), 0),
+            'pending_applications': counters.get(provider_status_counter('PENDING'), 0),
+            'pending_requests': counters.get(request_status_counter('PENDING'), 0),
+            'accepted_requests': counters.get(request_status_counter('ACCEPTED'), 0),
+            'completed_requests': counters.get(request_status_counter('COMPLETED'), 0),
+            'rejected_requests': counters.get(request_status_counter('REJECTED'), 0),
+            'total_services': counters.get(SERVICES_ACTIVE, 0),
+        }
+
+
+_backend_cache = {}
+
+
+def get_metrics_backend(path=None):
+    """
+    Return the configured metrics backend instance.
+
+    Args:
+        path: Optional dotted path overriding ANALYTICS_METRICS_BACKEND
+
+    Returns:
+        BaseMetricsBackend: Backend instance, shared per dotted path
+    """
+    path = path or getattr(settings, 'ANALYTICS_METRICS_BACKEND', DEFAULT_METRICS_BACKEND)
+    if path not in _backend_cache:
+        _backend_cache[path] = import_string(path)()
+    return _backend_cache[path]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:15
+
+from django.db import migrations, models
+
+
+def install_search_index(apps, schema_editor):
+    from apps.analytics.search_index import AdminSearchIndex
+    AdminSearchIndex.install(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from apps.analytics.search_index import AdminSearchIndex
+    AdminSearchIndex.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_export_jobs'),
+        ('users', '0001_initial'),
+        ('services', '0003_service_search_index'),
+        ('requests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('USER', 'User'), ('PROVIDER', 'Provider Profile'), ('REQUEST', 'Service Request')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('text', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Admin Search Document',
+                'verbose_name_plural': 'Admin Search Documents',
+                'db_table': 'analytics_admin_search_documents',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='adminsearchdocument',
+            constraint=models.UniqueConstraint(fields=('entity_type', 'object_id'), name='unique_admin_search_document'),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:46
+
+import apps.analytics.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_admin_search_documents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=apps.analytics.models.PrivateExportStorage(), upload_to='exports/'),
+        ),
+    ]
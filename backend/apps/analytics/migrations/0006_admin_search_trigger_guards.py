@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def reinstall_triggers(apps, schema_editor):
+    from apps.analytics.search_index import AdminSearchIndex
+    AdminSearchIndex.reinstall_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_private_export_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_triggers, migrations.RunPython.noop),
+    ]
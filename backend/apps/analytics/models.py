@@ -1,3 +1,183 @@
+import os
 from django.db import models
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 
-# Models will be created in subsequent tasks (if needed)
+
+class PrivateExportStorage(FileSystemStorage):
+    """
+    Storage for export files under EXPORT_ROOT.
+    
+    The files have no URL; ExportJobDownloadView serves them to admins.
+    """
+    
+    @property
+    def base_location(self):
+        return getattr(settings, 'EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'private'))
+    
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+    
+    def url(self, name):
+        raise ValueError("Export files are only served by the export download endpoint.")
+
+
+class PlatformCounter(models.Model):
+    """Denormalized running total for a marketplace metric."""
+    
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'platform_counters'
+        verbose_name = 'Platform Counter'
+        verbose_name_plural = 'Platform Counters'
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class DailyRollup(models.Model):
+    """Per-day event count for an analytics metric and dimension."""
+    
+    date = models.DateField()
+    metric = models.CharField(max_length=50)
+    dimension = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'analytics_daily_rollups'
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        ordering = ['metric', 'date', 'dimension']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric', 'date', 'dimension'],
+                name='unique_daily_rollup'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.metric}[{self.dimension}] {self.date}: {self.count}"
+
+
+class RollupCheckpoint(models.Model):
+    """Tracks how far a metric has been rolled up."""
+    
+    metric = models.CharField(max_length=50, unique=True)
+    closed_through = models.DateField(
+        help_text='Last day whose counts are served from rollups'
+    )
+    refreshed_at = models.DateTimeField(
+        help_text='Start time of the last rollup run, used to find rows changed since'
+    )
+    
+    class Meta:
+        db_table = 'analytics_rollup_checkpoints'
+        verbose_name = 'Rollup Checkpoint'
+        verbose_name_plural = 'Rollup Checkpoints'
+    
+    def __str__(self):
+        return f"{self.metric} through {self.closed_through}"
+
+
+class ExportJob(models.Model):
+    """Background CSV export requested by an admin."""
+    
+    EXPORT_TYPE_CHOICES = [
+        ('users', 'Users'),
+        ('providers', 'Providers'),
+        ('requests', 'Service Requests'),
+        ('metrics', 'Dashboard Metrics'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs'
+    )
+    export_type = models.CharField(max_length=20, choices=EXPORT_TYPE_CHOICES)
+    filters = models.JSONField(
+        default=dict,
+        help_text='Export filters (start_date, end_date, role, status)'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        db_index=True
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', storage=PrivateExportStorage(), null=True, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'analytics_export_jobs'
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.export_type} export #{self.pk} ({self.status})"
+    
+    @property
+    def progress(self):
+        """Return completion percentage, or None while the total is unknown."""
+        if self.status == 'COMPLETED':
+            return 100
+        if not self.total_rows:
+            return None if self.total_rows is None else 0
+        return min(100, int(self.rows_written * 100 / self.total_rows))
+
+
+class AdminSearchDocument(models.Model):
+    """
+    Denormalized search text for one user, provider profile or service request.
+    
+    Rows are maintained by database triggers (see apps.analytics.search_index)
+    and queried through a trigram index.
+    """
+    
+    ENTITY_CHOICES = [
+        ('USER', 'User'),
+        ('PROVIDER', 'Provider Profile'),
+        ('REQUEST', 'Service Request'),
+    ]
+    
+    entity_type = models.CharField(max_length=10, choices=ENTITY_CHOICES)
+    object_id = models.BigIntegerField()
+    text = models.TextField()
+    
+    class Meta:
+        db_table = 'analytics_admin_search_documents'
+        verbose_name = 'Admin Search Document'
+        verbose_name_plural = 'Admin Search Documents'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['entity_type', 'object_id'],
+                name='unique_admin_search_document'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity_type} {self.object_id}"
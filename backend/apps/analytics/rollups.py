@@ -0,0 +1,266 @@
+"""
+Daily rollups for registration and service request time series.
+
+Closed days (before today) are served from DailyRollup rows; days after the
+metric's checkpoint are counted live from the source table. Reads therefore
+cost the same for a year-long chart as for a week-long one.
+
+refresh() finds changed closed days through updated_at. Deleted rows leave
+no such trace, so a post_delete receiver (connected in AnalyticsConfig)
+rebuilds the closed days they were created on once the transaction commits.
+"""
+import threading
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from apps.users.models import User
+from apps.requests.models import ServiceRequest
+from .models import DailyRollup, RollupCheckpoint
+
+
+USER_REGISTRATIONS = 'user_registrations'
+SERVICE_REQUESTS = 'service_requests'
+
+# Metric name -> (source model, dimension field)
+ROLLUP_SOURCES = {
+    USER_REGISTRATIONS: (User, 'role'),
+    SERVICE_REQUESTS: (ServiceRequest, 'status'),
+}
+
+
+def _day_start(day):
+    """Return the timezone-aware start of a calendar day."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class RollupService:
+    """Service for building and reading daily analytics rollups."""
+
+    @staticmethod
+    def _source(metric):
+        try:
+            return ROLLUP_SOURCES[metric]
+        except KeyError:
+            raise ValueError(f"Unknown rollup metric: {metric}")
+
+    @classmethod
+    def _aggregate(cls, metric, queryset):
+        """Group a source queryset into (date, dimension, count) rows."""
+        _, dimension_field = cls._source(metric)
+        return queryset.order_by().annotate(
+            day=TruncDate('created_at')
+        ).values('day', dimension_field).annotate(
+            total=Count('id')
+        ).values_list('day', dimension_field, 'total')
+
+    @classmethod
+    @transaction.atomic
+    def backfill(cls, metric):
+        """
+        Rebuild all closed-day rollups for a metric from the source table.
+
+        Args:
+            metric: Rollup metric name
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        model, _ = cls._source(metric)
+        started_at = timezone.now()
+        today = timezone.localdate(started_at)
+
+        rows = cls._aggregate(metric, model.objects.filter(created_at__lt=_day_start(today)))
+
+        DailyRollup.objects.filter(metric=metric).delete()
+        created = DailyRollup.objects.bulk_create([
+            DailyRollup(date=day, metric=metric, dimension=dimension, count=total)
+            for day, dimension, total in rows
+        ], batch_size=1000)
+
+        RollupCheckpoint.objects.update_or_create(
+            metric=metric,
+            defaults={
+                'closed_through': today - timedelta(days=1),
+                'refreshed_at': started_at,
+            }
+        )
+        return len(created)
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, metric):
+        """
+        Incrementally update rollups for a metric.
+
+        Rolls up the days that were still open at the previous run, plus any
+        closed day containing rows changed since then (e.g. a request whose
+        status moved). Falls back to a full backfill on first run.
+
+        Args:
+            metric: Rollup metric name
+
+        Returns:
+            int: Number of days recomputed, or None if a full backfill ran
+        """
+        model, _ = cls._source(metric)
+        checkpoint = RollupCheckpoint.objects.select_for_update().filter(metric=metric).first()
+        if checkpoint is None:
+            cls.backfill(metric)
+            return None
+
+        started_at = timezone.now()
+        today = timezone.localdate(started_at)
+        today_start = _day_start(today)
+
+        # Days that have closed since the last run
+        days = set()
+        day = checkpoint.closed_through + timedelta(days=1)
+        while day < today:
+            days.add(day)
+            day += timedelta(days=1)
+
+        # Closed days with rows modified since the last run
+        days.update(
+            model.objects.filter(
+                updated_at__gte=checkpoint.refreshed_at,
+                created_at__lt=today_start
+            ).order_by().annotate(
+                day=TruncDate('created_at')
+            ).values_list('day', flat=True).distinct()
+        )
+
+        cls._rebuild_days(metric, days)
+
+        checkpoint.closed_through = today - timedelta(days=1)
+        checkpoint.refreshed_at = started_at
+        checkpoint.save()
+        return len(days)
+
+    @classmethod
+    @transaction.atomic
+    def refresh_days(cls, metric, days):
+        """
+        Rebuild the rollups of closed days, e.g. after rows were deleted.
+
+        Args:
+            metric: Rollup metric name
+            days: Dates to rebuild; days not yet closed are ignored
+
+        Returns:
+            int: Number of days recomputed
+        """
+        checkpoint = RollupCheckpoint.objects.select_for_update().filter(metric=metric).first()
+        if checkpoint is None:
+            return 0
+        days = {day for day in days if day <= checkpoint.closed_through}
+        cls._rebuild_days(metric, days)
+        return len(days)
+
+    @classmethod
+    def _rebuild_days(cls, metric, days):
+        """Replace the rollup rows of the given days with fresh counts."""
+        if not days:
+            return
+        model, _ = cls._source(metric)
+        first_day, last_day = min(days), max(days)
+        rows = [
+            row for row in cls._aggregate(metric, model.objects.filter(
+                created_at__gte=_day_start(first_day),
+                created_at__lt=_day_start(last_day + timedelta(days=1))
+            ))
+            if row[0] in days
+        ]
+
+        DailyRollup.objects.filter(metric=metric, date__in=days).delete()
+        DailyRollup.objects.bulk_create([
+            DailyRollup(date=day, metric=metric, dimension=dimension, count=total)
+            for day, dimension, total in rows
+        ], batch_size=1000)
+
+    @classmethod
+    def get_daily_counts(cls, metric, start_date=None, end_date=None, dimension=None):
+        """
+        Get daily counts merged from rollups and a live query.
+
+        Args:
+            metric: Rollup metric name
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+            dimension: Optional dimension value filter (role or status)
+
+        Returns:
+            list: Dicts with 'date' and 'count' keys, ordered by date
+        """
+        model, dimension_field = cls._source(metric)
+        checkpoint = RollupCheckpoint.objects.filter(metric=metric).first()
+        counts = {}
+
+        if checkpoint is not None:
+            rollups = DailyRollup.objects.filter(
+                metric=metric,
+                date__lte=checkpoint.closed_through
+            )
+            if start_date:
+                rollups = rollups.filter(date__gte=start_date)
+            if end_date:
+                # created_at__lte=<date> compares against midnight, so the end day is exclusive
+                rollups = rollups.filter(date__lt=end_date)
+            if dimension:
+                rollups = rollups.filter(dimension=dimension)
+
+            for row in rollups.values('date').annotate(total=Sum('count')).order_by('date'):
+                counts[row['date']] = row['total']
+
+        # Live query for days not yet covered by rollups (normally just today)
+        queryset = model.objects.all()
+        if checkpoint is not None:
+            queryset = queryset.filter(
+                created_at__gte=_day_start(checkpoint.closed_through + timedelta(days=1))
+            )
+        if start_date:
+            queryset = queryset.filter(created_at__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(created_at__lte=end_date)
+        if dimension:
+            queryset = queryset.filter(**{dimension_field: dimension})
+
+        live = queryset.order_by().annotate(
+            date=TruncDate('created_at')
+        ).values('date').annotate(count=Count('id'))
+        for row in live:
+            counts[row['date']] = counts.get(row['date'], 0) + row['count']
+
+        return [{'date': day, 'count': counts[day]} for day in sorted(counts)]
+
+
+# Days of deleted rows awaiting a rebuild, per thread: {metric: {date}}
+_deleted_days = threading.local()
+
+
+def _rebuild_deleted_days():
+    pending = _deleted_days.__dict__.pop('days', {})
+    for metric, days in pending.items():
+        RollupService.refresh_days(metric, days)
+
+
+def rollup_source_deleted(sender, instance, **kwargs):
+    """
+    post_delete receiver for the rollup source models.
+
+    Collects the creation day of each deleted row and rebuilds the affected
+    days once per transaction, after it commits.
+    """
+    for metric, (model, _) in ROLLUP_SOURCES.items():
+        if sender is model:
+            break
+    else:
+        return
+    if instance.created_at is None:
+        return
+
+    pending = _deleted_days.__dict__.setdefault('days', {})
+    pending.setdefault(metric, set()).add(timezone.localdate(instance.created_at))
+    # Later callbacks of the same transaction find nothing left to do
+    transaction.on_commit(_rebuild_deleted_days)
@@ -0,0 +1,307 @@
+"""
+Admin search index for users, provider profiles and service requests.
+
+Each searchable row has an AdminSearchDocument holding its searchable fields,
+lowercased and joined by newlines. Admin searches become one substring lookup
+on that table instead of seven ``icontains`` predicates across three joins:
+
+- PostgreSQL: a ``pg_trgm`` GIN index serves ``LIKE '%term%'`` lookups. The
+  extension must be available to the database user running migrations.
+- SQLite: an FTS5 table with the trigram tokenizer over the documents.
+
+Documents are written by database triggers on the source tables, so every write
+path keeps them current, including renames that fan out (a user's new name is
+reindexed into their provider profile and their requests). Update triggers only
+fire when a watched column actually changes value; Django's save() writes every
+column, and a cost change must not reindex all requests for the service.
+"""
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+from .models import AdminSearchDocument
+
+
+USER = 'USER'
+PROVIDER = 'PROVIDER'
+REQUEST = 'REQUEST'
+
+TABLE = AdminSearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+# FTS5 trigram queries need at least three characters
+MIN_TRIGRAM_LENGTH = 3
+
+# Entity -> SELECT producing (entity_type, object_id, text) for rows matching {where}
+DOCUMENT_SELECTS = {
+    USER: """
+        SELECT 'USER', u.id, lower(u.email || {sep} || u.first_name || {sep} || u.last_name)
+        FROM users u WHERE {where}
+    """,
+    PROVIDER: """
+        SELECT 'PROVIDER', p.id, lower(
+            u.email || {sep} || u.first_name || {sep} || u.last_name || {sep} ||
+            coalesce(p.service_description, '')
+        )
+        FROM provider_profiles p JOIN users u ON u.id = p.user_id WHERE {where}
+    """,
+    REQUEST: """
+        SELECT 'REQUEST', r.id, lower(
+            s.name || {sep} ||
+            rq.email || {sep} || rq.first_name || {sep} || rq.last_name || {sep} ||
+            pv.email || {sep} || pv.first_name || {sep} || pv.last_name
+        )
+        FROM service_requests r
+        JOIN services s ON s.id = r.service_id
+        JOIN users rq ON rq.id = r.requester_id
+        JOIN users pv ON pv.id = r.provider_id
+        WHERE {where}
+    """,
+}
+
+# (source table, event, watched columns, [(entity, where)]) with {row} = new row
+SYNC_TRIGGERS = [
+    ('users', 'INSERT', None, [(USER, 'u.id = {row}.id')]),
+    ('users', 'UPDATE', 'email, first_name, last_name', [
+        (USER, 'u.id = {row}.id'),
+        (PROVIDER, 'p.user_id = {row}.id'),
+        (REQUEST, 'r.requester_id = {row}.id OR r.provider_id = {row}.id'),
+    ]),
+    ('provider_profiles', 'INSERT', None, [(PROVIDER, 'p.id = {row}.id')]),
+    ('provider_profiles', 'UPDATE', 'user_id, service_description', [(PROVIDER, 'p.id = {row}.id')]),
+    ('services', 'UPDATE', 'name', [(REQUEST, 'r.service_id = {row}.id')]),
+    ('service_requests', 'INSERT', None, [(REQUEST, 'r.id = {row}.id')]),
+    ('service_requests', 'UPDATE', 'service_id, requester_id, provider_id', [(REQUEST, 'r.id = {row}.id')]),
+]
+
+# Source table -> entity whose document is removed with the row
+DELETE_TRIGGERS = {
+    'users': USER,
+    'provider_profiles': PROVIDER,
+    'service_requests': REQUEST,
+}
+
+
+def _upsert(entity, where, sep):
+    select = DOCUMENT_SELECTS[entity].format(sep=sep, where=where)
+    return (
+        f"INSERT INTO {TABLE} (entity_type, object_id, text) {select} "
+        f"ON CONFLICT (entity_type, object_id) DO UPDATE SET text = excluded.text"
+    )
+
+
+def _changed(columns, operator):
+    """Condition that holds when any of the comma-separated columns changed value."""
+    return ' OR '.join(
+        f"old.{column} {operator} new.{column}" for column in columns.split(', ')
+    )
+
+
+def _trigger_name(table, event):
+    return f"admin_search_{table}_{event.lower()}"
+
+
+def _sqlite_install():
+    statements = [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            text, content='{TABLE}', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF text ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+        """,
+    ]
+
+    for table, event, columns, targets in SYNC_TRIGGERS:
+        body = ';\n'.join(
+            _upsert(entity, where.format(row='new'), 'char(10)') for entity, where in targets
+        )
+        of_columns = f" OF {columns}" if columns else ''
+        # IS NOT is SQLite's null-safe inequality
+        when = f" WHEN {_changed(columns, 'IS NOT')}" if columns else ''
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS {_trigger_name(table, event)}
+            AFTER {event}{of_columns} ON {table}{when} BEGIN
+                {body};
+            END
+        """)
+
+    for table, entity in DELETE_TRIGGERS.items():
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS {_trigger_name(table, 'DELETE')} AFTER DELETE ON {table} BEGIN
+                DELETE FROM {TABLE} WHERE entity_type = '{entity}' AND object_id = old.id;
+            END
+        """)
+    return statements
+
+
+def _sqlite_uninstall():
+    names = [f'{FTS_TABLE}_insert', f'{FTS_TABLE}_delete', f'{FTS_TABLE}_update']
+    names += [_trigger_name(table, event) for table, event, _, _ in SYNC_TRIGGERS]
+    names += [_trigger_name(table, 'DELETE') for table in DELETE_TRIGGERS]
+    statements = [f"DROP TRIGGER IF EXISTS {name}" for name in names]
+    statements.append(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    return statements
+
+
+def _postgresql_function(name, table, event, columns, body):
+    of_columns = f" OF {columns}" if columns else ''
+    when = f" WHEN ({_changed(columns, 'IS DISTINCT FROM')})" if columns else ''
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+        BEGIN
+            {body};
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {name} ON {table}",
+        f"""
+        CREATE TRIGGER {name} AFTER {event}{of_columns} ON {table}
+        FOR EACH ROW{when} EXECUTE FUNCTION {name}()
+        """,
+    ]
+
+
+def _postgresql_install():
+    statements = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS {TABLE}_trgm_idx ON {TABLE} USING GIN (text gin_trgm_ops)",
+    ]
+    for table, event, columns, targets in SYNC_TRIGGERS:
+        body = ';\n'.join(
+            _upsert(entity, where.format(row='NEW'), 'chr(10)') for entity, where in targets
+        )
+        statements += _postgresql_function(_trigger_name(table, event), table, event, columns, body)
+
+    for table, entity in DELETE_TRIGGERS.items():
+        body = f"DELETE FROM {TABLE} WHERE entity_type = '{entity}' AND object_id = OLD.id"
+        statements += _postgresql_function(_trigger_name(table, 'DELETE'), table, 'DELETE', None, body)
+    return statements
+
+
+def _postgresql_uninstall():
+    triggers = [(table, event) for table, event, _, _ in SYNC_TRIGGERS]
+    triggers += [(table, 'DELETE') for table in DELETE_TRIGGERS]
+    statements = []
+    for table, event in triggers:
+        name = _trigger_name(table, event)
+        statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        statements.append(f"DROP FUNCTION IF EXISTS {name}()")
+    statements.append(f"DROP INDEX IF EXISTS {TABLE}_trgm_idx")
+    return statements
+
+
+def _normalize(query):
+    """Lowercase a query and collapse runs of whitespace."""
+    return ' '.join(query.lower().split())
+
+
+class AdminSearchIndex:
+    """Build and query the admin search document table."""
+
+    @staticmethod
+    def install(conn=None):
+        """
+        Create the text index and sync triggers, then index every existing row.
+
+        Safe to re-run; used by the migration and by rebuild_admin_search_index.
+
+        Returns:
+            int: Number of documents written
+        """
+        conn = conn or connection
+        AdminSearchIndex._create(conn)
+        return AdminSearchIndex.rebuild(conn)
+
+    @staticmethod
+    def reinstall_triggers(conn=None):
+        """Recreate the sync triggers after their definition changed, keeping the documents."""
+        conn = conn or connection
+        if conn.vendor == 'sqlite':
+            # SQLite triggers are created only if missing
+            with conn.cursor() as cursor:
+                for table, event, _, _ in SYNC_TRIGGERS:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {_trigger_name(table, event)}")
+        AdminSearchIndex._create(conn)
+
+    @staticmethod
+    def _create(conn):
+        statements = {
+            'postgresql': _postgresql_install,
+            'sqlite': _sqlite_install,
+        }.get(conn.vendor, list)()
+        with conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    @staticmethod
+    def uninstall(conn=None):
+        """Drop the text index and sync triggers."""
+        conn = conn or connection
+        statements = {
+            'postgresql': _postgresql_uninstall,
+            'sqlite': _sqlite_uninstall,
+        }.get(conn.vendor, list)()
+        with conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    @staticmethod
+    def rebuild(conn=None):
+        """
+        Rewrite every search document from the source tables.
+
+        Returns:
+            int: Number of documents written
+        """
+        conn = conn or connection
+        sep = 'chr(10)' if conn.vendor == 'postgresql' else 'char(10)'
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            for entity in DOCUMENT_SELECTS:
+                cursor.execute(_upsert(entity, '1 = 1', sep))
+            cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def matching_ids(entity_type, query):
+        """
+        Get IDs of objects whose searchable fields contain the query.
+
+        Matches the query as a case-insensitive substring of any single field,
+        like the ``icontains`` filters it replaces.
+
+        Args:
+            entity_type: USER, PROVIDER or REQUEST
+            query: Search text
+
+        Returns:
+            QuerySet: object_id values, usable in an ``id__in`` filter
+        """
+        term = _normalize(query)
+        documents = AdminSearchDocument.objects.filter(entity_type=entity_type)
+
+        if connections[documents.db].vendor == 'sqlite' and len(term) >= MIN_TRIGRAM_LENGTH:
+            phrase = '"{}"'.format(term.replace('"', '""'))
+            documents = documents.filter(
+                id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [phrase])
+            )
+        else:
+            # Served by the trigram GIN index on PostgreSQL
+            documents = documents.filter(text__contains=term)
+
+        return documents.values('object_id')
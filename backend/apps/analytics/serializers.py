@@ -2,8 +2,10 @@
 Serializers for analytics data.
 """
 from rest_framework import serializers
+from django.urls import reverse
 from apps.users.models import User, ProviderProfile
 from apps.requests.models import ServiceRequest
+from .models import ExportJob
 
 
 class DashboardMetricsSerializer(serializers.Serializer):
@@ -101,3 +103,55 @@ class ServiceRequestSearchSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at'
         ]
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    """Serializer for queueing a background export job."""
+    type = serializers.ChoiceField(
+        choices=[choice for choice, _ in ExportJob.EXPORT_TYPE_CHOICES],
+        default='users'
+    )
+    start_date = serializers.DateField(required=False, allow_null=True)
+    end_date = serializers.DateField(required=False, allow_null=True)
+    role = serializers.ChoiceField(
+        choices=['REGULAR', 'PROVIDER', 'ADMIN'],
+        required=False,
+        allow_null=True
+    )
+    status = serializers.ChoiceField(
+        choices=['PENDING', 'ACCEPTED', 'REJECTED', 'COMPLETED'],
+        required=False,
+        allow_null=True
+    )
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Serializer for export job status."""
+    progress = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id',
+            'export_type',
+            'filters',
+            'status',
+            'total_rows',
+            'rows_written',
+            'progress',
+            'file_size',
+            'error',
+            'download_url',
+            'created_at',
+            'started_at',
+            'completed_at'
+        ]
+    
+    def get_download_url(self, obj):
+        """Get the download URL once the export file is ready."""
+        if obj.status != 'COMPLETED':
+            return None
+        url = reverse('export-job-download', kwargs={'job_id': obj.id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -1,13 +1,17 @@
 """
 Analytics service for aggregating platform metrics and statistics.
 """
+import csv
 from django.db.models import Count, Q, F
-from django.db.models.functions import TruncDate
 from django.utils import timezone
 from datetime import datetime, timedelta
 from apps.users.models import User, ProviderProfile
 from apps.services.models import Service
 from apps.requests.models import ServiceRequest
+from .metrics import METRIC_KEYS, get_metrics_backend
+from .rollups import RollupService, USER_REGISTRATIONS, SERVICE_REQUESTS
+from . import search_index
+from .search_index import AdminSearchIndex
 
 
 class AnalyticsService:
@@ -25,49 +29,28 @@ class AnalyticsService:
         Returns:
             dict: Dashboard metrics including total users, active providers, pending requests
         """
-        # Build date filter
-        date_filter = Q()
-        if start_date:
-            date_filter &= Q(created_at__gte=start_date)
-        if end_date:
-            date_filter &= Q(created_at__lte=end_date)
-        
-        # Calculate metrics
-        total_users = User.objects.filter(date_filter).count()
-        total_regular_users = User.objects.filter(date_filter, role='REGULAR').count()
-        total_providers = User.objects.filter(date_filter, role='PROVIDER').count()
-        
-        # Active providers (approved)
-        active_providers = ProviderProfile.objects.filter(
-            approval_status='APPROVED'
-        ).count()
-        
-        # Pending provider applications
-        pending_applications = ProviderProfile.objects.filter(
-            approval_status='PENDING'
-        ).count()
-        
-        # Service request metrics
-        pending_requests = ServiceRequest.objects.filter(status='PENDING').count()
-        accepted_requests = ServiceRequest.objects.filter(status='ACCEPTED').count()
-        completed_requests = ServiceRequest.objects.filter(status='COMPLETED').count()
-        rejected_requests = ServiceRequest.objects.filter(status='REJECTED').count()
-        
-        # Total services
-        total_services = Service.objects.filter(is_active=True).count()
-        
-        return {
-            'total_users': total_users,
-            'total_regular_users': total_regular_users,
-            'total_providers': total_providers,
-            'active_providers': active_providers,
-            'pending_applications': pending_applications,
-            'pending_requests': pending_requests,
-            'accepted_requests': accepted_requests,
-            'completed_requests': completed_requests,
-            'rejected_requests': rejected_requests,
-            'total_services': total_services,
-        }
+        # Delegate to the configured metrics backend (see ANALYTICS_METRICS_BACKEND)
+        return get_metrics_backend().get_metrics(
+            start_date=start_date,
+            end_date=end_date
+        )
+    
+    @staticmethod
+    async def aget_dashboard_metrics(start_date=None, end_date=None):
+        """
+        Get real-time dashboard metrics from async code.
+        
+        Args:
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+            
+        Returns:
+            dict: Same metrics as get_dashboard_metrics()
+        """
+        return await get_metrics_backend().aget_metrics(
+            start_date=start_date,
+            end_date=end_date
+        )
     
     @staticmethod
     def get_user_registration_stats(start_date=None, end_date=None, role=None):
@@ -82,24 +65,13 @@ class AnalyticsService:
         Returns:
             list: Daily user registration counts
         """
-        queryset = User.objects.all()
-        
-        # Apply filters
-        if start_date:
-            queryset = queryset.filter(created_at__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__lte=end_date)
-        if role:
-            queryset = queryset.filter(role=role)
-        
-        # Group by date and count
-        stats = queryset.annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-        
-        return list(stats)
+        # Closed days come from rollups, open days from a live query
+        return RollupService.get_daily_counts(
+            USER_REGISTRATIONS,
+            start_date=start_date,
+            end_date=end_date,
+            dimension=role
+        )
     
     @staticmethod
     def get_service_request_stats(start_date=None, end_date=None, status=None):
@@ -114,24 +86,13 @@ class AnalyticsService:
         Returns:
             list: Daily service request counts
         """
-        queryset = ServiceRequest.objects.all()
-        
-        # Apply filters
-        if start_date:
-            queryset = queryset.filter(created_at__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__lte=end_date)
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        # Group by date and count
-        stats = queryset.annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-        
-        return list(stats)
+        # Closed days come from rollups, open days from a live query
+        return RollupService.get_daily_counts(
+            SERVICE_REQUESTS,
+            start_date=start_date,
+            end_date=end_date,
+            dimension=status
+        )
     
     @staticmethod
     def get_provider_activity_stats(start_date=None, end_date=None):
@@ -196,11 +157,7 @@ class AnalyticsService:
         queryset = User.objects.all()
         
         if query:
-            queryset = queryset.filter(
-                Q(email__icontains=query) |
-                Q(first_name__icontains=query) |
-                Q(last_name__icontains=query)
-            )
+            queryset = queryset.filter(id__in=AdminSearchIndex.matching_ids(search_index.USER, query))
         
         if role:
             queryset = queryset.filter(role=role)
@@ -221,12 +178,7 @@ class AnalyticsService:
         queryset = ProviderProfile.objects.select_related('user').all()
         
         if query:
-            queryset = queryset.filter(
-                Q(user__email__icontains=query) |
-                Q(user__first_name__icontains=query) |
-                Q(user__last_name__icontains=query) |
-                Q(service_description__icontains=query)
-            )
+            queryset = queryset.filter(id__in=AdminSearchIndex.matching_ids(search_index.PROVIDER, query))
         
         return queryset.order_by('-created_at')
     
@@ -249,15 +201,7 @@ class AnalyticsService:
         ).all()
         
         if query:
-            queryset = queryset.filter(
-                Q(service__name__icontains=query) |
-                Q(requester__email__icontains=query) |
-                Q(requester__first_name__icontains=query) |
-                Q(requester__last_name__icontains=query) |
-                Q(provider__email__icontains=query) |
-                Q(provider__first_name__icontains=query) |
-                Q(provider__last_name__icontains=query)
-            )
+            queryset = queryset.filter(id__in=AdminSearchIndex.matching_ids(search_index.REQUEST, query))
         
         if status:
             queryset = queryset.filter(status=status)
@@ -266,33 +210,136 @@ class AnalyticsService:
 
 
 
+class Echo:
+    """File-like object that returns written values instead of buffering them."""
+    
+    def write(self, value):
+        return value
+
+
+def _format_datetime(value):
+    """Format a datetime for CSV output."""
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else 'N/A'
+
+
 class ReportGenerationService:
     """Service for generating CSV reports from analytics data."""
     
+    # Rows fetched from the database per round trip while exporting
+    EXPORT_CHUNK_SIZE = 2000
+    
+    # Export type -> download filename
+    REPORT_FILENAMES = {
+        'users': 'users_report.csv',
+        'providers': 'providers_report.csv',
+        'requests': 'requests_report.csv',
+        'metrics': 'metrics_report.csv',
+    }
+    
     @staticmethod
-    def generate_users_csv(start_date=None, end_date=None, role=None):
+    def get_report_queryset(export_type, start_date=None, end_date=None, role=None, status=None):
         """
-        Generate CSV report for users.
+        Get the filtered queryset backing a row-based report.
         
         Args:
+            export_type: One of users, providers, requests
             start_date: Optional start date for filtering
             end_date: Optional end date for filtering
-            role: Optional role filter
+            role: Optional role filter (users only)
+            status: Optional status filter (requests only)
             
         Returns:
-            list: CSV rows with user data
+            QuerySet: Filtered report rows
         """
-        users = AnalyticsService.search_users(query='', role=role)
+        if export_type == 'users':
+            queryset = AnalyticsService.search_users(query='', role=role)
+        elif export_type == 'providers':
+            queryset = AnalyticsService.search_providers(query='')
+        elif export_type == 'requests':
+            queryset = AnalyticsService.search_requests(query='', status=status)
+        else:
+            raise ValueError(f"Unknown report type: {export_type}")
         
         # Apply date filters
         if start_date:
-            users = users.filter(created_at__gte=start_date)
+            queryset = queryset.filter(created_at__gte=start_date)
         if end_date:
-            users = users.filter(created_at__lte=end_date)
+            queryset = queryset.filter(created_at__lte=end_date)
         
-        # Prepare CSV data
-        csv_data = []
-        csv_data.append([
+        return queryset
+    
+    @classmethod
+    def generate_csv(cls, export_type, start_date=None, end_date=None, role=None, status=None):
+        """
+        Generate CSV rows for any export type.
+        
+        Args:
+            export_type: One of users, providers, requests, metrics
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+            role: Optional role filter (users only)
+            status: Optional status filter (requests only)
+            
+        Returns:
+            iterator: CSV rows, header first
+        """
+        if export_type == 'users':
+            return cls.generate_users_csv(start_date=start_date, end_date=end_date, role=role)
+        if export_type == 'providers':
+            return cls.generate_providers_csv(start_date=start_date, end_date=end_date)
+        if export_type == 'requests':
+            return cls.generate_requests_csv(start_date=start_date, end_date=end_date, status=status)
+        if export_type == 'metrics':
+            return cls.generate_dashboard_metrics_csv(start_date=start_date, end_date=end_date)
+        raise ValueError(f"Unknown report type: {export_type}")
+    
+    @classmethod
+    def count_rows(cls, export_type, start_date=None, end_date=None, role=None, status=None):
+        """
+        Count the data rows (excluding the header) a report will contain.
+        
+        Returns:
+            int: Number of data rows
+        """
+        if export_type == 'metrics':
+            return len(METRIC_KEYS)
+        return cls.get_report_queryset(
+            export_type, start_date, end_date, role=role, status=status
+        ).order_by().count()
+    
+    @staticmethod
+    def stream_csv(rows):
+        """
+        Encode CSV rows one line at a time.
+        
+        Args:
+            rows: Iterable of CSV rows
+            
+        Yields:
+            str: CSV-encoded line
+        """
+        writer = csv.writer(Echo())
+        for row in rows:
+            yield writer.writerow(row)
+    
+    @staticmethod
+    def generate_users_csv(start_date=None, end_date=None, role=None):
+        """
+        Generate CSV report for users.
+        
+        Args:
+            start_date: Optional start date for filtering
+            end_date: Optional end date for filtering
+            role: Optional role filter
+            
+        Yields:
+            list: CSV rows with user data, header first
+        """
+        users = ReportGenerationService.get_report_queryset(
+            'users', start_date, end_date, role=role
+        )
+        
+        yield [
             'ID',
             'Email',
             'First Name',
@@ -300,20 +347,22 @@ class ReportGenerationService:
             'Role',
             'Is Active',
             'Created At'
-        ])
-        
-        for user in users:
-            csv_data.append([
-                user.id,
-                user.email,
-                user.first_name,
-                user.last_name,
-                user.role,
-                'Yes' if user.is_active else 'No',
-                user.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        return csv_data
+        ]
+        
+        rows = users.values_list(
+            'id', 'email', 'first_name', 'last_name', 'role', 'is_active', 'created_at'
+        ).iterator(chunk_size=ReportGenerationService.EXPORT_CHUNK_SIZE)
+        
+        for user_id, email, first_name, last_name, role, is_active, created_at in rows:
+            yield [
+                user_id,
+                email,
+                first_name,
+                last_name,
+                role,
+                'Yes' if is_active else 'No',
+                _format_datetime(created_at)
+            ]
     
     @staticmethod
     def generate_providers_csv(start_date=None, end_date=None):
@@ -324,20 +373,14 @@ class ReportGenerationService:
             start_date: Optional start date for filtering
             end_date: Optional end date for filtering
             
-        Returns:
-            list: CSV rows with provider data
+        Yields:
+            list: CSV rows with provider data, header first
         """
-        providers = AnalyticsService.search_providers(query='')
-        
-        # Apply date filters
-        if start_date:
-            providers = providers.filter(created_at__gte=start_date)
-        if end_date:
-            providers = providers.filter(created_at__lte=end_date)
+        providers = ReportGenerationService.get_report_queryset(
+            'providers', start_date, end_date
+        )
         
-        # Prepare CSV data
-        csv_data = []
-        csv_data.append([
+        yield [
             'ID',
             'Email',
             'First Name',
@@ -346,21 +389,21 @@ class ReportGenerationService:
             'Approval Status',
             'Created At',
             'Approved At'
-        ])
-        
-        for provider in providers:
-            csv_data.append([
-                provider.id,
-                provider.user.email,
-                provider.user.first_name,
-                provider.user.last_name,
-                provider.service_description,
-                provider.approval_status,
-                provider.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                provider.approved_at.strftime('%Y-%m-%d %H:%M:%S') if provider.approved_at else 'N/A'
-            ])
-        
-        return csv_data
+        ]
+        
+        rows = providers.values_list(
+            'id',
+            'user__email',
+            'user__first_name',
+            'user__last_name',
+            'service_description',
+            'approval_status',
+            'created_at',
+            'approved_at'
+        ).iterator(chunk_size=ReportGenerationService.EXPORT_CHUNK_SIZE)
+        
+        for row in rows:
+            yield [*row[:6], _format_datetime(row[6]), _format_datetime(row[7])]
     
     @staticmethod
     def generate_requests_csv(start_date=None, end_date=None, status=None):
@@ -372,20 +415,14 @@ class ReportGenerationService:
             end_date: Optional end date for filtering
             status: Optional status filter
             
-        Returns:
-            list: CSV rows with request data
+        Yields:
+            list: CSV rows with request data, header first
         """
-        requests = AnalyticsService.search_requests(query='', status=status)
-        
-        # Apply date filters
-        if start_date:
-            requests = requests.filter(created_at__gte=start_date)
-        if end_date:
-            requests = requests.filter(created_at__lte=end_date)
+        requests = ReportGenerationService.get_report_queryset(
+            'requests', start_date, end_date, status=status
+        )
         
-        # Prepare CSV data
-        csv_data = []
-        csv_data.append([
+        yield [
             'ID',
             'Service Name',
             'Requester Email',
@@ -396,23 +433,39 @@ class ReportGenerationService:
             'Message',
             'Created At',
             'Updated At'
-        ])
-        
-        for request in requests:
-            csv_data.append([
-                request.id,
-                request.service.name,
-                request.requester.email,
-                request.requester.full_name,
-                request.provider.email,
-                request.provider.full_name,
-                request.status,
-                request.message,
-                request.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                request.updated_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        return csv_data
+        ]
+        
+        # Fetch plain tuples instead of model instances with related objects
+        rows = requests.values_list(
+            'id',
+            'service__name',
+            'requester__email',
+            'requester__first_name',
+            'requester__last_name',
+            'provider__email',
+            'provider__first_name',
+            'provider__last_name',
+            'status',
+            'message',
+            'created_at',
+            'updated_at'
+        ).iterator(chunk_size=ReportGenerationService.EXPORT_CHUNK_SIZE)
+        
+        for (request_id, service_name, requester_email, requester_first, requester_last,
+             provider_email, provider_first, provider_last, req_status, message,
+             created_at, updated_at) in rows:
+            yield [
+                request_id,
+                service_name,
+                requester_email,
+                f"{requester_first} {requester_last}",
+                provider_email,
+                f"{provider_first} {provider_last}",
+                req_status,
+                message,
+                _format_datetime(created_at),
+                _format_datetime(updated_at)
+            ]
     
     @staticmethod
     def generate_dashboard_metrics_csv(start_date=None, end_date=None):
@@ -423,21 +476,17 @@ class ReportGenerationService:
             start_date: Optional start date for filtering
             end_date: Optional end date for filtering
             
-        Returns:
-            list: CSV rows with metrics data
+        Yields:
+            list: CSV rows with metrics data, header first
         """
         metrics = AnalyticsService.get_dashboard_metrics(
             start_date=start_date,
             end_date=end_date
         )
         
-        # Prepare CSV data
-        csv_data = []
-        csv_data.append(['Metric', 'Value'])
+        yield ['Metric', 'Value']
         
         for key, value in metrics.items():
             # Convert snake_case to Title Case
             metric_name = key.replace('_', ' ').title()
-            csv_data.append([metric_name, value])
-        
-        return csv_data
+            yield [metric_name, value]
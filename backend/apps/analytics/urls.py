@@ -1,5 +1,7 @@
 from django.urls import path
+from core.async_views import select_view
 from .views import (
+    AsyncDashboardMetricsView,
     DashboardMetricsView,
     UserRegistrationStatsView,
     ServiceRequestStatsView,
@@ -7,12 +9,18 @@ from .views import (
     UserSearchView,
     ProviderSearchView,
     RequestSearchView,
-    ExportCSVView
+    ExportCSVView,
+    ExportJobStatusView,
+    ExportJobDownloadView
 )
 
 urlpatterns = [
     # Dashboard metrics
-    path('dashboard/', DashboardMetricsView.as_view(), name='dashboard-metrics'),
+    path(
+        'dashboard/',
+        select_view(DashboardMetricsView.as_view(), AsyncDashboardMetricsView.as_view()),
+        name='dashboard-metrics'
+    ),
     
     # Statistics endpoints
     path('users/registrations/', UserRegistrationStatsView.as_view(), name='user-registration-stats'),
@@ -26,4 +34,6 @@ urlpatterns = [
     
     # Export endpoint
     path('export/', ExportCSVView.as_view(), name='export-csv'),
+    path('export/jobs/<int:job_id>/', ExportJobStatusView.as_view(), name='export-job-status'),
+    path('export/jobs/<int:job_id>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
 ]
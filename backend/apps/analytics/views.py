@@ -6,18 +6,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils.dateparse import parse_date
+from core.async_views import AsyncAPIView
+from core.http import ranged_file_response, streaming_content
+from core.pagination import get_paginator
 from core.permissions import IsAdmin
-from .services import AnalyticsService
+from .export_service import ExportJobService
+from .services import AnalyticsService, ReportGenerationService
 from .serializers import (
     DashboardMetricsSerializer,
     DateCountSerializer,
     ProviderActivitySerializer,
     UserSearchSerializer,
     ProviderSearchSerializer,
-    ServiceRequestSearchSerializer
+    ServiceRequestSearchSerializer,
+    ExportJobCreateSerializer,
+    ExportJobSerializer
 )
 
 
+# CSV lines read per worker thread hop when streaming under ASGI
+CSV_STREAM_BATCH_SIZE = 500
+
+
 class DashboardMetricsView(APIView):
     """
     API endpoint for dashboard metrics.
@@ -46,6 +56,27 @@ class DashboardMetricsView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class AsyncDashboardMetricsView(AsyncAPIView):
+    """
+    DashboardMetricsView for ASGI servers, with async ORM queries.
+    GET /api/analytics/dashboard/
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    async def get(self, request):
+        """Get real-time dashboard metrics."""
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        
+        metrics = await AnalyticsService.aget_dashboard_metrics(
+            start_date=parse_date(start_date) if start_date else None,
+            end_date=parse_date(end_date) if end_date else None
+        )
+        
+        serializer = DashboardMetricsSerializer(metrics)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class UserRegistrationStatsView(APIView):
     """
     API endpoint for user registration statistics.
@@ -183,9 +214,7 @@ class UserSearchView(APIView):
     def paginator(self):
         """Get paginator instance."""
         if not hasattr(self, '_paginator'):
-            from rest_framework.pagination import PageNumberPagination
-            self._paginator = PageNumberPagination()
-            self._paginator.page_size = 20
+            self._paginator = get_paginator(self.request)
         return self._paginator
     
     def paginate_queryset(self, queryset):
@@ -224,9 +253,7 @@ class ProviderSearchView(APIView):
     def paginator(self):
         """Get paginator instance."""
         if not hasattr(self, '_paginator'):
-            from rest_framework.pagination import PageNumberPagination
-            self._paginator = PageNumberPagination()
-            self._paginator.page_size = 20
+            self._paginator = get_paginator(self.request)
         return self._paginator
     
     def paginate_queryset(self, queryset):
@@ -273,9 +300,7 @@ class RequestSearchView(APIView):
     def paginator(self):
         """Get paginator instance."""
         if not hasattr(self, '_paginator'):
-            from rest_framework.pagination import PageNumberPagination
-            self._paginator = PageNumberPagination()
-            self._paginator.page_size = 20
+            self._paginator = get_paginator(self.request)
         return self._paginator
     
     def paginate_queryset(self, queryset):
@@ -291,15 +316,14 @@ class RequestSearchView(APIView):
 class ExportCSVView(APIView):
     """
     API endpoint for exporting analytics data as CSV.
-    GET /api/analytics/export/
+    GET /api/analytics/export/ - stream the CSV in the response
+    POST /api/analytics/export/ - queue a background export job
     """
     permission_classes = [IsAuthenticated, IsAdmin]
     
     def get(self, request):
-        """Export analytics data as CSV file."""
-        import csv
-        from django.http import HttpResponse
-        from .services import ReportGenerationService
+        """Export analytics data as a streamed CSV file."""
+        from django.http import StreamingHttpResponse
         
         # Get export type
         export_type = request.query_params.get('type', 'users')
@@ -362,12 +386,72 @@ class ExportCSVView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
+        # Stream rows as they are read so memory stays flat for large exports,
+        # under ASGI a few hundred lines per thread hop
+        response = StreamingHttpResponse(
+            streaming_content(ReportGenerationService.stream_csv(csv_data), batch_size=CSV_STREAM_BATCH_SIZE),
+            content_type='text/csv'
+        )
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
-        writer = csv.writer(response)
-        for row in csv_data:
-            writer.writerow(row)
-        
         return response
+
+    
+    def post(self, request):
+        """Queue a background export job producing a gzip-compressed CSV."""
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        data = serializer.validated_data
+        filters = {
+            'start_date': data['start_date'].isoformat() if data.get('start_date') else None,
+            'end_date': data['end_date'].isoformat() if data.get('end_date') else None,
+            'role': data.get('role') if data['type'] == 'users' else None,
+            'status': data.get('status') if data['type'] == 'requests' else None,
+        }
+        
+        job = ExportJobService.enqueue(request.user, data['type'], filters)
+        
+        response_serializer = ExportJobSerializer(job, context={'request': request})
+        return Response(response_serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobStatusView(APIView):
+    """
+    API endpoint for polling a background export job.
+    GET /api/analytics/export/jobs/{id}/
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request, job_id):
+        """Get export job status and progress."""
+        job = ExportJobService.get_job(job_id)
+        serializer = ExportJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ExportJobDownloadView(APIView):
+    """
+    API endpoint for downloading a finished export.
+    GET /api/analytics/export/jobs/{id}/download/
+    Supports Range requests so interrupted downloads can resume.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request, job_id):
+        """Download the export file."""
+        job = ExportJobService.get_job(job_id)
+        
+        if job.status != 'COMPLETED' or not job.file:
+            return Response(
+                {'error': f'Export is not ready (status: {job.status}).'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return ranged_file_response(
+            request,
+            job.file.path,
+            filename=f"{ReportGenerationService.REPORT_FILENAMES[job.export_type]}.gz",
+            content_type='application/gzip',
+            etag=f"export-{job.id}-{job.file_size}"
+        )
@@ -0,0 +1,40 @@
+from django.contrib import admin
+from .models import DigestItem, NotificationPreference, OutboxEmail
+from .outbox import EmailOutboxService
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Admin interface for OutboxEmail model."""
+    
+    list_display = ['id', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['status', 'template_name', 'created_at']
+    search_fields = ['recipient', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'updated_at', 'claim_token']
+    ordering = ['-created_at']
+    actions = ['requeue']
+    
+    @admin.action(description='Requeue selected dead emails')
+    def requeue(self, request, queryset):
+        count = EmailOutboxService.requeue_dead(ids=list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'Requeued {count} email(s).')
+
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    """Admin interface for NotificationPreference model."""
+    
+    list_display = ['user', 'new_request_delivery', 'digest_window_minutes', 'updated_at']
+    list_filter = ['new_request_delivery']
+    search_fields = ['user__email']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(DigestItem)
+class DigestItemAdmin(admin.ModelAdmin):
+    """Admin interface for DigestItem model."""
+    
+    list_display = ['id', 'recipient', 'service_request', 'created_at']
+    search_fields = ['recipient__email']
+    readonly_fields = ['recipient', 'service_request', 'context', 'created_at']
+    ordering = ['-created_at']
@@ -0,0 +1,102 @@
+"""
+Benchmark email rendering by sending notifications to the locmem mail backend.
+
+Compares rendering each email with ``render_to_string`` plus ``strip_tags`` on
+the output against the precompiled HTML and plaintext templates.
+
+Usage:
+    python manage.py benchmark_email_rendering --emails 10000
+"""
+import time
+from django.conf import settings
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from core.email_templates import EmailTemplateRenderer
+
+
+TEMPLATE_NAME = 'service_request_notification'
+
+
+def _render_to_string(template_name, context):
+    html = render_to_string(f'emails/{template_name}.html', context)
+    return html, strip_tags(html)
+
+
+def _render_precompiled(template_name, context):
+    return EmailTemplateRenderer.render(template_name, context)
+
+
+class Command(BaseCommand):
+    help = 'Measure email rendering cost by sending notifications to the locmem backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=10000,
+                            help='Number of notifications to send per strategy')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Messages passed to each send_messages call')
+
+    def handle(self, *args, **options):
+        strategies = [
+            ('render_to_string + strip_tags', _render_to_string),
+            ('precompiled templates', _render_precompiled),
+        ]
+        results = {}
+        for label, render in strategies:
+            results[label] = self._run(label, render, options['emails'], options['batch_size'])
+
+        (baseline_total, baseline_render), (cached_total, cached_render) = results.values()
+        self.stdout.write(
+            f'Speedup: {baseline_render / cached_render:.1f}x rendering, '
+            f'{baseline_total / cached_total:.1f}x end to end'
+        )
+
+    def _context(self, index):
+        return {
+            'provider_name': f'Provider {index % 50}',
+            'service_name': f'Home Cleaning #{index}',
+            'requester_name': f"Requester O'Neil {index}",
+            'dashboard_url': f'{settings.FRONTEND_URL}/provider/dashboard',
+        }
+
+    def _run(self, label, render, count, batch_size):
+        connection = get_connection('django.core.mail.backends.locmem.EmailBackend')
+        mail.outbox = []
+
+        # Warm-up render so template loading is not timed
+        render(TEMPLATE_NAME, self._context(0))
+
+        render_seconds = 0.0
+        start = time.perf_counter()
+        batch = []
+        for index in range(count):
+            render_start = time.perf_counter()
+            html, text = render(TEMPLATE_NAME, self._context(index))
+            render_seconds += time.perf_counter() - render_start
+
+            message = EmailMultiAlternatives(
+                subject='New Service Request',
+                body=text,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[f'provider{index % 50}@example.com'],
+                connection=connection
+            )
+            message.attach_alternative(html, 'text/html')
+            batch.append(message)
+            if len(batch) >= batch_size:
+                connection.send_messages(batch)
+                batch = []
+        if batch:
+            connection.send_messages(batch)
+        elapsed = time.perf_counter() - start
+
+        sent = len(mail.outbox)
+        mail.outbox = []
+
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  sent:       {sent}')
+        self.stdout.write(f'  total:      {elapsed * 1000:.0f} ms ({sent / elapsed:.0f} emails/s)')
+        self.stdout.write(f'  render:     {render_seconds * 1000:.0f} ms ({render_seconds * 1e6 / count:.1f} us/email)')
+        return elapsed, render_seconds
@@ -0,0 +1,64 @@
+"""
+Deliver queued outbox emails by polling the database.
+
+Each poll also sends notification digests whose window has elapsed.
+
+Usage:
+    python manage.py run_email_worker [--once] [--batch-size 100] [--poll-interval 2]
+"""
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.notifications.outbox import EmailOutboxService
+from apps.notifications.services import NotificationDigestService
+
+
+class Command(BaseCommand):
+    help = 'Poll the email outbox and send due emails in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Send all due emails and exit')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Emails sent per connection (default: EMAIL_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the outbox is empty')
+        parser.add_argument('--stale-after', type=int, default=10,
+                            help='Minutes before an email stuck in SENDING is requeued')
+        parser.add_argument('--purge-after', type=int, default=7,
+                            help='Days to keep sent emails before deleting them (0 keeps them)')
+        parser.add_argument('--requeue-dead', action='store_true',
+                            help='Give dead-lettered emails a fresh set of attempts first')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_after'])
+
+        if options['requeue_dead']:
+            requeued = EmailOutboxService.requeue_dead()
+            self.stdout.write(f'Requeued {requeued} dead email(s)')
+
+        while True:
+            close_old_connections()
+
+            requeued = EmailOutboxService.requeue_stale(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale email(s)'))
+
+            digests, notifications = NotificationDigestService.flush_due()
+            if digests:
+                self.stdout.write(f'Queued {digests} digest(s) covering {notifications} notification(s)')
+
+            sent, failed = EmailOutboxService.run_pending(batch_size=options['batch_size'])
+            if sent:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} email(s)'))
+            if failed:
+                self.stdout.write(self.style.WARNING(f'{failed} email(s) failed and were rescheduled or dead-lettered'))
+
+            if options['purge_after']:
+                EmailOutboxService.purge_sent(timedelta(days=options['purge_after']))
+
+            if options['once']:
+                break
+            if not sent and not failed:
+                time.sleep(options['poll_interval'])
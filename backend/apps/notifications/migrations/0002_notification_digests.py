@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        ('requests', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('new_request_delivery', models.CharField(choices=[('IMMEDIATE', 'Immediate'), ('DIGEST', 'Digest')], default='IMMEDIATE', help_text='How providers are notified of new service requests', max_length=10)),
+                ('digest_window_minutes', models.PositiveIntegerField(blank=True, help_text='Minutes to collect notifications before a digest is sent; defaults to NOTIFICATION_DIGEST_WINDOW_MINUTES', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_preference', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notification Preference',
+                'verbose_name_plural': 'Notification Preferences',
+                'db_table': 'notification_preferences',
+            },
+        ),
+        migrations.CreateModel(
+            name='DigestItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('context', models.JSONField(default=dict, help_text='service_request_notification template data')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_items', to=settings.AUTH_USER_MODEL)),
+                ('service_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='digest_items', to='requests.servicerequest')),
+            ],
+            options={
+                'verbose_name': 'Digest Item',
+                'verbose_name_plural': 'Digest Items',
+                'db_table': 'notification_digest_items',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['recipient', 'created_at'], name='notificatio_recipie_79ba30_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEmail(models.Model):
+    """Email queued for delivery by the outbox worker."""
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('DEAD', 'Dead'),
+    ]
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField(help_text='Plain text part')
+    html_body = models.TextField(blank=True, help_text='HTML alternative part')
+    from_email = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=100, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        db_index=True
+    )
+    claim_token = models.CharField(
+        max_length=32,
+        blank=True,
+        help_text='Identifies the worker batch that claimed the email'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = 'Outbox Email'
+        verbose_name_plural = 'Outbox Emails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+
+class NotificationPreference(models.Model):
+    """Per-user email notification settings."""
+
+    DELIVERY_CHOICES = [
+        ('IMMEDIATE', 'Immediate'),
+        ('DIGEST', 'Digest'),
+    ]
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_preference'
+    )
+    new_request_delivery = models.CharField(
+        max_length=10,
+        choices=DELIVERY_CHOICES,
+        default='IMMEDIATE',
+        help_text='How providers are notified of new service requests'
+    )
+    digest_window_minutes = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Minutes to collect notifications before a digest is sent; '
+                  'defaults to NOTIFICATION_DIGEST_WINDOW_MINUTES'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notification_preferences'
+        verbose_name = 'Notification Preference'
+        verbose_name_plural = 'Notification Preferences'
+
+    def __str__(self):
+        return f"{self.user.email}: {self.new_request_delivery}"
+
+
+class DigestItem(models.Model):
+    """New-request notification waiting to be sent in a digest."""
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='digest_items'
+    )
+    service_request = models.ForeignKey(
+        'requests.ServiceRequest',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='digest_items'
+    )
+    context = models.JSONField(
+        default=dict,
+        help_text='service_request_notification template data'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_digest_items'
+        verbose_name = 'Digest Item'
+        verbose_name_plural = 'Digest Items'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Digest item for {self.recipient_id} ({self.created_at})"
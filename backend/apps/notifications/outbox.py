@@ -0,0 +1,286 @@
+"""
+Transactional email outbox.
+
+Emails are written to the ``notification_outbox`` table in the caller's
+transaction, so a notification exists if and only if the change that caused it
+was committed, and no SMTP traffic happens while row locks are held.
+
+``manage.py run_email_worker`` claims due emails in batches and sends each batch
+over one reused mail connection. Failed sends are retried with exponential
+backoff and moved to DEAD once EMAIL_OUTBOX_MAX_ATTEMPTS is reached.
+
+With EMAIL_OUTBOX_SEND_ON_COMMIT enabled (the development default), each email
+is also sent from an ``on_commit`` hook as soon as its transaction commits, so a
+worker is not needed locally.
+"""
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboxEmail
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 6
+
+# Seconds before the first retry; doubled for each further attempt
+DEFAULT_RETRY_DELAY = 60
+DEFAULT_MAX_RETRY_DELAY = 3600
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class EmailOutboxService:
+    """Service for queueing and delivering outbox emails."""
+
+    @staticmethod
+    def enqueue(recipient, subject, body, html_body='', template_name='', from_email=None):
+        """
+        Queue an email in the current transaction.
+
+        Args:
+            recipient: Recipient email address
+            subject: Subject line
+            body: Plain text part
+            html_body: Optional HTML alternative
+            template_name: Template the email was rendered from, for reference
+            from_email: Sender; defaults to DEFAULT_FROM_EMAIL
+
+        Returns:
+            OutboxEmail: The queued email
+        """
+        email = OutboxEmail.objects.create(
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            template_name=template_name,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL
+        )
+
+        if _setting('EMAIL_OUTBOX_SEND_ON_COMMIT', False):
+            transaction.on_commit(lambda: EmailOutboxService.send_now(email.id))
+        return email
+
+    @staticmethod
+    def retry_delay(attempts):
+        """
+        Get the backoff before the next attempt after a failure.
+
+        Args:
+            attempts: Number of attempts made so far (1 after the first failure)
+
+        Returns:
+            timedelta: Delay before the email is due again
+        """
+        base = _setting('EMAIL_OUTBOX_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+        cap = _setting('EMAIL_OUTBOX_MAX_RETRY_DELAY', DEFAULT_MAX_RETRY_DELAY)
+        return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+    @staticmethod
+    def claim_batch(batch_size=None, ids=None):
+        """
+        Atomically claim due emails for sending.
+
+        One conditional UPDATE tags the batch with a fresh token, so concurrent
+        workers never claim the same email, on any database backend.
+
+        Args:
+            batch_size: Maximum number of emails to claim
+            ids: Optional IDs to restrict the claim to
+
+        Returns:
+            list: Claimed OutboxEmail instances in SENDING state
+        """
+        batch_size = batch_size or _setting('EMAIL_OUTBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        now = timezone.now()
+
+        due = OutboxEmail.objects.filter(status='PENDING', next_attempt_at__lte=now)
+        if ids is not None:
+            due = due.filter(id__in=ids)
+        candidates = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        OutboxEmail.objects.filter(id__in=candidates, status='PENDING').update(
+            status='SENDING',
+            claim_token=token,
+            updated_at=now
+        )
+        return list(OutboxEmail.objects.filter(claim_token=token, status='SENDING').order_by('id'))
+
+    @staticmethod
+    def _build_message(email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=[email.recipient],
+            connection=connection
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+
+    @classmethod
+    def _record_failure(cls, email, error):
+        max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        email.attempts += 1
+        email.last_error = error
+        email.claim_token = ''
+        if email.attempts >= max_attempts:
+            email.status = 'DEAD'
+            logger.error(f"Email {email.id} to {email.recipient} dead-lettered after {email.attempts} attempts: {error}")
+        else:
+            email.status = 'PENDING'
+            email.next_attempt_at = timezone.now() + cls.retry_delay(email.attempts)
+            logger.warning(f"Email {email.id} to {email.recipient} failed (attempt {email.attempts}): {error}")
+        email.save(update_fields=['attempts', 'last_error', 'claim_token', 'status', 'next_attempt_at', 'updated_at'])
+
+    @classmethod
+    def send_batch(cls, emails):
+        """
+        Send claimed emails over a single mail connection.
+
+        Messages go through ``connection.send_messages`` one at a time on the
+        open connection, so one rejected recipient does not fail the batch. If
+        a send fails, the connection is reopened for the remaining messages.
+
+        Args:
+            emails: OutboxEmail instances in SENDING state
+
+        Returns:
+            tuple: (sent, failed) counts
+        """
+        if not emails:
+            return 0, 0
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            for email in emails:
+                cls._record_failure(email, f"Connection failed: {str(e)}")
+            return 0, len(emails)
+
+        sent_ids = []
+        failed = 0
+        try:
+            for email in emails:
+                try:
+                    connection.send_messages([cls._build_message(email, connection)])
+                    sent_ids.append(email.id)
+                except Exception as e:
+                    failed += 1
+                    cls._record_failure(email, str(e))
+                    try:
+                        connection.close()
+                        connection.open()
+                    except Exception:
+                        pass
+        finally:
+            connection.close()
+
+        if sent_ids:
+            now = timezone.now()
+            OutboxEmail.objects.filter(id__in=sent_ids).update(
+                status='SENT',
+                attempts=F('attempts') + 1,
+                last_error='',
+                claim_token='',
+                sent_at=now,
+                updated_at=now
+            )
+        return len(sent_ids), failed
+
+    @classmethod
+    def send_now(cls, email_id):
+        """
+        Send one email immediately if it is still pending.
+
+        Used by the on_commit hook; a worker that claimed it first wins.
+
+        Returns:
+            bool: True if the email was sent
+        """
+        sent, _ = cls.send_batch(cls.claim_batch(batch_size=1, ids=[email_id]))
+        return bool(sent)
+
+    @classmethod
+    def run_pending(cls, batch_size=None, max_batches=None):
+        """
+        Claim and send due emails until none are left.
+
+        Args:
+            batch_size: Emails per batch (one connection per batch)
+            max_batches: Optional maximum number of batches
+
+        Returns:
+            tuple: (sent, failed) counts
+        """
+        total_sent = total_failed = batches = 0
+        while max_batches is None or batches < max_batches:
+            emails = cls.claim_batch(batch_size)
+            if not emails:
+                break
+            sent, failed = cls.send_batch(emails)
+            total_sent += sent
+            total_failed += failed
+            batches += 1
+        return total_sent, total_failed
+
+    @staticmethod
+    def requeue_stale(max_age=timedelta(minutes=10)):
+        """
+        Return emails stuck in SENDING for max_age to the queue.
+
+        A worker that dies mid-batch leaves its claim behind; such emails may
+        have been delivered, so this trades a possible duplicate for no loss.
+
+        Returns:
+            int: Number of emails requeued
+        """
+        return OutboxEmail.objects.filter(
+            status='SENDING',
+            updated_at__lt=timezone.now() - max_age
+        ).update(status='PENDING', claim_token='', updated_at=timezone.now())
+
+    @staticmethod
+    def requeue_dead(ids=None):
+        """
+        Give dead-lettered emails a fresh set of attempts.
+
+        Args:
+            ids: Optional IDs to requeue; all dead emails if omitted
+
+        Returns:
+            int: Number of emails requeued
+        """
+        dead = OutboxEmail.objects.filter(status='DEAD')
+        if ids is not None:
+            dead = dead.filter(id__in=ids)
+        now = timezone.now()
+        return dead.update(status='PENDING', attempts=0, next_attempt_at=now, updated_at=now)
+
+    @staticmethod
+    def purge_sent(older_than=timedelta(days=7)):
+        """
+        Delete sent emails older than older_than.
+
+        Returns:
+            int: Number of emails deleted
+        """
+        deleted, _ = OutboxEmail.objects.filter(
+            status='SENT',
+            sent_at__lt=timezone.now() - older_than
+        ).delete()
+        return deleted
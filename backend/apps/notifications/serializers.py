@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import NotificationPreference
+
+
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    """Serializer for reading and updating notification preferences."""
+    digest_window_minutes = serializers.IntegerField(
+        min_value=5,
+        max_value=24 * 60,
+        required=False,
+        allow_null=True
+    )
+    
+    class Meta:
+        model = NotificationPreference
+        fields = [
+            'new_request_delivery',
+            'digest_window_minutes',
+            'updated_at'
+        ]
+        read_only_fields = ['updated_at']
@@ -0,0 +1,209 @@
+"""
+Service layer for notification preferences and digests.
+
+Providers who choose digest delivery do not get one email per new service
+request. Each notification is stored as a DigestItem instead, and once the
+oldest pending item for a provider is older than their digest window, all of
+their pending items are sent as one summary email through the outbox.
+``manage.py run_email_worker`` flushes due digests on every poll.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from core.email_service import EmailNotificationService
+from .models import DigestItem, NotificationPreference
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_DIGEST_WINDOW_MINUTES = 60
+
+# Requests listed individually in a digest; the rest are summarized as a count
+MAX_DIGEST_ITEMS = 50
+
+
+class NotificationPreferenceService:
+    """Service for reading and updating notification preferences."""
+
+    @staticmethod
+    def get_preference(user):
+        """
+        Get a user's notification preference.
+
+        Args:
+            user: User instance
+
+        Returns:
+            NotificationPreference: Stored preference, or an unsaved default
+        """
+        try:
+            return NotificationPreference.objects.get(user=user)
+        except NotificationPreference.DoesNotExist:
+            return NotificationPreference(user=user)
+
+    @staticmethod
+    def update_preference(user, **fields):
+        """
+        Update a user's notification preference.
+
+        Switching from digest to immediate delivery sends any pending digest
+        right away.
+
+        Args:
+            user: User instance
+            **fields: new_request_delivery and/or digest_window_minutes
+
+        Returns:
+            NotificationPreference: The saved preference
+        """
+        with transaction.atomic():
+            preference, _ = NotificationPreference.objects.update_or_create(user=user, defaults=fields)
+            if preference.new_request_delivery == 'IMMEDIATE':
+                NotificationDigestService.flush_recipient(user.id)
+        return preference
+
+    @staticmethod
+    def wants_digest(user):
+        """Return True if new-request notifications for user should be digested."""
+        return NotificationPreference.objects.filter(user=user, new_request_delivery='DIGEST').exists()
+
+    @staticmethod
+    def digest_window(minutes=None):
+        """
+        Get a digest window, falling back to NOTIFICATION_DIGEST_WINDOW_MINUTES.
+
+        Args:
+            minutes: A preference's digest_window_minutes, or None
+
+        Returns:
+            timedelta: The window
+        """
+        if minutes is None:
+            minutes = getattr(settings, 'NOTIFICATION_DIGEST_WINDOW_MINUTES', DEFAULT_DIGEST_WINDOW_MINUTES)
+        return timedelta(minutes=minutes)
+
+
+class NotificationDigestService:
+    """Service for collecting and sending notification digests."""
+
+    @staticmethod
+    def add(recipient, context, service_request=None):
+        """
+        Hold a new-request notification for the recipient's next digest.
+
+        Args:
+            recipient: Provider User receiving the notification
+            context: service_request_notification data (service_name, requester_name)
+            service_request: Optional ServiceRequest the notification is about
+
+        Returns:
+            DigestItem: The pending item
+        """
+        return DigestItem.objects.create(
+            recipient=recipient,
+            service_request=service_request,
+            context=context
+        )
+
+    @staticmethod
+    def due_recipients(now=None):
+        """
+        Get recipients whose oldest pending item has outlived their digest window.
+
+        Args:
+            now: Optional reference time
+
+        Returns:
+            list: Recipient user IDs
+        """
+        now = now or timezone.now()
+        oldest = dict(
+            DigestItem.objects.values('recipient').annotate(oldest=Min('created_at')).values_list('recipient', 'oldest')
+        )
+        if not oldest:
+            return []
+
+        windows = dict(
+            NotificationPreference.objects.filter(user_id__in=oldest).values_list('user_id', 'digest_window_minutes')
+        )
+        return [
+            recipient_id for recipient_id, created_at in oldest.items()
+            if created_at <= now - NotificationPreferenceService.digest_window(windows.get(recipient_id))
+        ]
+
+    @staticmethod
+    def flush_recipient(recipient_id):
+        """
+        Send all pending items for a recipient as one email.
+
+        A single pending item is sent as the regular new-request notification.
+        Items are deleted in the same transaction that queues the email, so
+        concurrent flushes cannot send them twice, and an email that fails to
+        queue leaves them pending for the next flush.
+
+        Args:
+            recipient_id: ID of the recipient user
+
+        Returns:
+            int: Number of notifications sent in the email (0 if none were pending)
+        """
+        with transaction.atomic():
+            items = list(
+                DigestItem.objects.filter(recipient_id=recipient_id).select_related('recipient').order_by('created_at', 'id')
+            )
+            if not items:
+                return 0
+
+            deleted, _ = DigestItem.objects.filter(id__in=[item.id for item in items]).delete()
+            if deleted != len(items):
+                # Another worker flushed some of these first
+                transaction.set_rollback(True)
+                return 0
+
+            recipient = items[0].recipient
+            if len(items) == 1:
+                context = items[0].context
+                queued = EmailNotificationService.send_service_request_notification(
+                    provider_email=recipient.email,
+                    provider_name=recipient.full_name,
+                    service_name=context.get('service_name', ''),
+                    requester_name=context.get('requester_name', '')
+                )
+            else:
+                queued = EmailNotificationService.send_service_request_digest(
+                    provider_email=recipient.email,
+                    provider_name=recipient.full_name,
+                    requests=[item.context for item in items[:MAX_DIGEST_ITEMS]],
+                    more_count=max(len(items) - MAX_DIGEST_ITEMS, 0)
+                )
+
+            if not queued:
+                # Keep the items for the next flush
+                transaction.set_rollback(True)
+                logger.warning(f"Digest for {recipient.email} not queued; {len(items)} notification(s) kept")
+                return 0
+
+        logger.info(f"Sent digest of {len(items)} notification(s) to {recipient.email}")
+        return len(items)
+
+    @classmethod
+    def flush_due(cls, now=None):
+        """
+        Send digests for every recipient whose window has elapsed.
+
+        Args:
+            now: Optional reference time
+
+        Returns:
+            tuple: (emails, notifications) counts
+        """
+        emails = notifications = 0
+        for recipient_id in cls.due_recipients(now):
+            sent = cls.flush_recipient(recipient_id)
+            if sent:
+                emails += 1
+                notifications += sent
+        return emails, notifications
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('preferences/', views.notification_preferences, name='notification-preferences'),
+]
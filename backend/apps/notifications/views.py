@@ -0,0 +1,44 @@
+"""
+Views for notification preferences API.
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .serializers import NotificationPreferenceSerializer
+from .services import NotificationPreferenceService
+
+
+@api_view(['GET', 'PATCH'])
+@permission_classes([IsAuthenticated])
+def notification_preferences(request):
+    """
+    Get (GET) or update (PATCH) the authenticated user's notification preferences.
+    
+    GET /api/notifications/preferences/
+    
+    PATCH /api/notifications/preferences/
+    Body: {
+        "new_request_delivery": "IMMEDIATE" | "DIGEST",
+        "digest_window_minutes": 60
+    }
+    """
+    if request.method == 'GET':
+        preference = NotificationPreferenceService.get_preference(request.user)
+        return Response(NotificationPreferenceSerializer(preference).data, status=status.HTTP_200_OK)
+    
+    serializer = NotificationPreferenceSerializer(data=request.data, partial=True)
+    if not serializer.is_valid():
+        return Response(
+            {
+                'error': {
+                    'code': 'VALIDATION_ERROR',
+                    'message': 'Invalid notification preferences',
+                    'details': serializer.errors
+                }
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    preference = NotificationPreferenceService.update_preference(request.user, **serializer.validated_data)
+    return Response(NotificationPreferenceSerializer(preference).data, status=status.HTTP_200_OK)
@@ -1,15 +1,15 @@
 from django.contrib import admin
-from .models import ProblemReport
+from .models import AudioUpload, ProblemReport, RecommendationCacheEntry
 
 
 @admin.register(ProblemReport)
 class ProblemReportAdmin(admin.ModelAdmin):
     """Admin interface for ProblemReport model."""
     
-    list_display = ['id', 'user', 'input_type', 'problem_text_preview', 'created_at']
-    list_filter = ['input_type', 'created_at']
+    list_display = ['id', 'user', 'input_type', 'status', 'problem_text_preview', 'created_at']
+    list_filter = ['input_type', 'status', 'created_at']
     search_fields = ['user__email', 'problem_text']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['original_audio_size', 'audio_size', 'created_at', 'updated_at']
     ordering = ['-created_at']
     
     fieldsets = (
@@ -17,10 +17,10 @@ class ProblemReportAdmin(admin.ModelAdmin):
             'fields': ('user',)
         }),
         ('Problem Details', {
-            'fields': ('input_type', 'problem_text', 'audio_file')
+            'fields': ('input_type', 'problem_text', 'audio_file', 'original_audio_size', 'audio_size')
         }),
         ('AI Recommendations', {
-            'fields': ('recommendations',)
+            'fields': ('status', 'error', 'recommendations')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
@@ -34,3 +34,25 @@ class ProblemReportAdmin(admin.ModelAdmin):
         return obj.problem_text
     
     problem_text_preview.short_description = 'Problem Preview'
+
+
+
+@admin.register(RecommendationCacheEntry)
+class RecommendationCacheEntryAdmin(admin.ModelAdmin):
+    """Admin interface for cached AI recommendations."""
+    
+    list_display = ['id', 'normalized_text', 'hits', 'created_at', 'last_used_at']
+    search_fields = ['normalized_text']
+    readonly_fields = ['key', 'normalized_text', 'signature', 'hits', 'created_at', 'last_used_at']
+    ordering = ['-last_used_at']
+
+
+
+@admin.register(AudioUpload)
+class AudioUploadAdmin(admin.ModelAdmin):
+    """Admin interface for chunked audio uploads."""
+    
+    list_display = ['id', 'user', 'filename', 'audio_format', 'offset', 'size', 'status', 'updated_at']
+    list_filter = ['status', 'audio_format']
+    search_fields = ['user__email', 'filename']
+    readonly_fields = ['id', 'offset', 'audio_format', 'problem_report', 'created_at', 'updated_at']
@@ -1,9 +1,26 @@
 """
 AI Recommendation Service for problem analysis and solution generation.
+
+OpenAI calls go through the 'openai-chat' guard in resilience.py: while its
+circuit is open, or too many calls are in flight, recommendations come
+straight from the fallback rules without waiting on the API.
+
+stream_recommendations() reads the completion token by token and yields each
+recommendation as soon as it is complete; see streaming.py.
+
+agenerate_recommendations() and astream_recommendations() are used by the
+ASGI views: the API call is awaited on the shared AsyncOpenAI client instead
+of blocking a thread.
 """
 import time
-from typing import List, Dict
+from typing import AsyncIterator, Iterator, List, Dict, Tuple
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from .fallback_rules import get_fallback_rules
+from .openai_client import get_async_openai_client, get_openai_client
+from .recommendation_cache import get_recommendation_cache
+from .resilience import CallRejected, get_ai_dependency
+from .streaming import RecommendationStreamParser
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,9 +29,12 @@ logger = logging.getLogger(__name__)
 class AIRecommendationService:
     """Service for generating AI-powered recommendations for user problems."""
     
+    CHAT_MODEL = "gpt-3.5-turbo"
+    
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
         self.max_response_time = 5  # seconds
+        self.response_margin = 1  # seconds kept for processing after the API call
         
     def generate_recommendations(self, problem_text: str) -> List[Dict[str, str]]:
         """
@@ -33,8 +53,9 @@ class AIRecommendationService:
         
         try:
             if self.api_key:
-                # Use OpenAI API for recommendations
-                recommendations = self._generate_with_openai(problem_text)
+                # Use OpenAI API for recommendations, reusing answers to the same problem
+                deadline = start_time + self.max_response_time - self.response_margin
+                recommendations = self._generate_with_cache(problem_text, deadline)
             else:
                 # Fallback to rule-based recommendations
                 logger.warning("OpenAI API key not configured, using fallback recommendations")
@@ -49,60 +70,347 @@ class AIRecommendationService:
             
             return recommendations
             
+        except CallRejected as e:
+            # Degraded or saturated API; answer from the rules without waiting
+            logger.warning(f"Skipped OpenAI call: {str(e)}")
+            return self._generate_fallback_recommendations(problem_text)
         except Exception as e:
             logger.error(f"Error generating recommendations: {str(e)}")
             # Return fallback recommendations on error
             return self._generate_fallback_recommendations(problem_text)
     
-    def _generate_with_openai(self, problem_text: str) -> List[Dict[str, str]]:
+    async def agenerate_recommendations(self, problem_text: str) -> List[Dict[str, str]]:
+        """
+        Generate solution recommendations from async code.
+        
+        Same as generate_recommendations(), with the cache lookup and store
+        run in a worker thread and the OpenAI call awaited.
+        
+        Args:
+            problem_text: The problem description from the user
+            
+        Returns:
+            List of recommendation dictionaries with 'title' and 'description' keys
+        """
+        start_time = time.time()
+        
+        try:
+            if self.api_key:
+                deadline = start_time + self.max_response_time - self.response_margin
+                recommendations = await self._agenerate_with_cache(problem_text, deadline)
+            else:
+                logger.warning("OpenAI API key not configured, using fallback recommendations")
+                recommendations = self._generate_fallback_recommendations(problem_text)
+            
+            elapsed_time = time.time() - start_time
+            logger.info(f"Generated recommendations in {elapsed_time:.2f} seconds")
+            
+            if elapsed_time > self.max_response_time:
+                logger.warning(f"Recommendation generation took {elapsed_time:.2f}s, exceeding {self.max_response_time}s limit")
+            
+            return recommendations
+            
+        except CallRejected as e:
+            logger.warning(f"Skipped OpenAI call: {str(e)}")
+            return self._generate_fallback_recommendations(problem_text)
+        except Exception as e:
+            logger.error(f"Error generating recommendations: {str(e)}")
+            return self._generate_fallback_recommendations(problem_text)
+    
+    def stream_recommendations(self, problem_text: str) -> Iterator[Tuple[str, object]]:
+        """
+        Generate recommendations, yielding them as they are completed.
+        
+        Yields ('token', text) for each piece of the completion and
+        ('recommendation', dict) for each recommendation. The recommendation
+        events make up the final list: cached answers and the rule-based
+        fallback are yielded as recommendation events too. If the stream
+        fails before any recommendation is complete, the fallback is used.
+        
+        Args:
+            problem_text: The problem description from the user
+            
+        Yields:
+            tuple: (event name, payload)
+        """
+        if not self.api_key:
+            logger.warning("OpenAI API key not configured, using fallback recommendations")
+            for recommendation in self._generate_fallback_recommendations(problem_text):
+                yield 'recommendation', recommendation
+            return
+        
+        cache = get_recommendation_cache()
+        if cache is not None:
+            try:
+                recommendations, tier = cache.lookup(problem_text)
+            except Exception as e:
+                logger.error(f"Recommendation cache lookup failed: {str(e)}")
+                recommendations = None
+            if recommendations is not None:
+                logger.info(f"Recommendation cache {tier} hit")
+                for recommendation in recommendations:
+                    yield 'recommendation', recommendation
+                return
+        
+        parser = RecommendationStreamParser()
+        completed = False
+        try:
+            with get_ai_dependency('openai-chat').attempt(count_slow=False) as timeout:
+                stream = get_openai_client().chat.completions.create(
+                    model=self.CHAT_MODEL,
+                    messages=self._create_messages(problem_text),
+                    max_tokens=500,
+                    temperature=0.7,
+                    stream=True,
+                    timeout=timeout
+                )
+                try:
+                    for chunk in stream:
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if not text:
+                            continue
+                        yield 'token', text
+                        for recommendation in parser.feed(text):
+                            yield 'recommendation', recommendation
+                    for recommendation in parser.close():
+                        yield 'recommendation', recommendation
+                    completed = True
+                finally:
+                    stream.response.close()
+        except CallRejected as e:
+            logger.warning(f"Skipped OpenAI call: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error streaming recommendations: {str(e)}")
+        
+        if completed and cache is not None:
+            try:
+                cache.store(problem_text, parser.recommendations)
+            except Exception as e:
+                logger.error(f"Recommendation cache store failed: {str(e)}")
+        elif not parser.recommendations:
+            for recommendation in self._generate_fallback_recommendations(problem_text):
+                yield 'recommendation', recommendation
+    
+    async def astream_recommendations(self, problem_text: str) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Generate recommendations from async code, yielding them as they are completed.
+        
+        Same as stream_recommendations(), with the cache lookup and store run
+        in a worker thread and the completion read from the shared AsyncOpenAI
+        client.
+        
+        Args:
+            problem_text: The problem description from the user
+            
+        Yields:
+            tuple: (event name, payload)
+        """
+        if not self.api_key:
+            logger.warning("OpenAI API key not configured, using fallback recommendations")
+            for recommendation in self._generate_fallback_recommendations(problem_text):
+                yield 'recommendation', recommendation
+            return
+        
+        cache = get_recommendation_cache()
+        if cache is not None:
+            try:
+                recommendations, tier = await sync_to_async(cache.lookup)(problem_text)
+            except Exception as e:
+                logger.error(f"Recommendation cache lookup failed: {str(e)}")
+                recommendations = None
+            if recommendations is not None:
+                logger.info(f"Recommendation cache {tier} hit")
+                for recommendation in recommendations:
+                    yield 'recommendation', recommendation
+                return
+        
+        parser = RecommendationStreamParser()
+        completed = False
+        try:
+            with get_ai_dependency('openai-chat').attempt(count_slow=False) as timeout:
+                stream = await get_async_openai_client().chat.completions.create(
+                    model=self.CHAT_MODEL,
+                    messages=self._create_messages(problem_text),
+                    max_tokens=500,
+                    temperature=0.7,
+                    stream=True,
+                    timeout=timeout
+                )
+                try:
+                    async for chunk in stream:
+                        text = chunk.choices[0].delta.content if chunk.choices else None
+                        if not text:
+                            continue
+                        yield 'token', text
+                        for recommendation in parser.feed(text):
+                            yield 'recommendation', recommendation
+                    for recommendation in parser.close():
+                        yield 'recommendation', recommendation
+                    completed = True
+                finally:
+                    await stream.response.aclose()
+        except CallRejected as e:
+            logger.warning(f"Skipped OpenAI call: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error streaming recommendations: {str(e)}")
+        
+        if completed and cache is not None:
+            try:
+                await sync_to_async(cache.store)(problem_text, parser.recommendations)
+            except Exception as e:
+                logger.error(f"Recommendation cache store failed: {str(e)}")
+        elif not parser.recommendations:
+            for recommendation in self._generate_fallback_recommendations(problem_text):
+                yield 'recommendation', recommendation
+    
+    def _generate_with_cache(self, problem_text: str, deadline: float = None) -> List[Dict[str, str]]:
+        """
+        Generate recommendations through the recommendation cache.
+        
+        Only answers from OpenAI are cached, never the rule-based fallback.
+        
+        Args:
+            problem_text: The problem description
+            deadline: time.time() by which the OpenAI call must finish
+            
+        Returns:
+            List of recommendation dictionaries
+            
+        Raises:
+            CallRejected: If OpenAI was not called
+        """
+        cache = get_recommendation_cache()
+        if cache is None:
+            return self._call_openai(problem_text, deadline)
+        
+        try:
+            recommendations, tier = cache.lookup(problem_text)
+        except Exception as e:
+            logger.error(f"Recommendation cache lookup failed: {str(e)}")
+            recommendations, tier = None, 'miss'
+        if recommendations is not None:
+            logger.info(f"Recommendation cache {tier} hit")
+            return recommendations
+        
+        recommendations = self._call_openai(problem_text, deadline)
+        try:
+            cache.store(problem_text, recommendations)
+        except Exception as e:
+            logger.error(f"Recommendation cache store failed: {str(e)}")
+        return recommendations
+    
+    def _call_openai(self, problem_text: str, deadline: float = None) -> List[Dict[str, str]]:
+        """
+        Call OpenAI through its circuit breaker, within the time left.
+        
+        Raises:
+            CallRejected: If the circuit is open, too many calls are in
+                flight, or the deadline has passed
+        """
+        budget = deadline - time.time() if deadline is not None else None
+        return get_ai_dependency('openai-chat').call(
+            lambda timeout: self._generate_with_openai(problem_text, timeout=timeout),
+            budget=budget
+        )
+    
+    async def _agenerate_with_cache(self, problem_text: str, deadline: float = None) -> List[Dict[str, str]]:
+        """
+        Async version of _generate_with_cache().
+        
+        Raises:
+            CallRejected: If OpenAI was not called
+        """
+        cache = get_recommendation_cache()
+        if cache is None:
+            return await self._acall_openai(problem_text, deadline)
+        
+        # Cache backends may query the database
+        try:
+            recommendations, tier = await sync_to_async(cache.lookup)(problem_text)
+        except Exception as e:
+            logger.error(f"Recommendation cache lookup failed: {str(e)}")
+            recommendations, tier = None, 'miss'
+        if recommendations is not None:
+            logger.info(f"Recommendation cache {tier} hit")
+            return recommendations
+        
+        recommendations = await self._acall_openai(problem_text, deadline)
+        try:
+            await sync_to_async(cache.store)(problem_text, recommendations)
+        except Exception as e:
+            logger.error(f"Recommendation cache store failed: {str(e)}")
+        return recommendations
+    
+    async def _acall_openai(self, problem_text: str, deadline: float = None) -> List[Dict[str, str]]:
+        """
+        Await OpenAI through its circuit breaker, within the time left.
+        
+        Raises:
+            CallRejected: If the circuit is open, too many calls are in
+                flight, or the deadline has passed
+        """
+        budget = deadline - time.time() if deadline is not None else None
+        with get_ai_dependency('openai-chat').attempt(budget) as timeout:
+            response = await get_async_openai_client().chat.completions.create(
+                model=self.CHAT_MODEL,
+                messages=self._create_messages(problem_text),
+                max_tokens=500,
+                temperature=0.7,
+                timeout=timeout
+            )
+        return self._parse_openai_response(response.choices[0].message.content or '')
+    
+    def _generate_with_openai(self, problem_text: str, timeout: float = 4) -> List[Dict[str, str]]:
         """
         Generate recommendations using OpenAI API.
         
         Args:
             problem_text: The problem description
+            timeout: Seconds the API call may take
             
         Returns:
             List of recommendation dictionaries
         """
         try:
-            import openai
-            
-            openai.api_key = self.api_key
-            
-            # Create a prompt for problem analysis
-            prompt = self._create_prompt(problem_text)
-            
-            # Call OpenAI API with timeout
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that provides practical solutions to service-related problems. Provide 3-5 actionable recommendations."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            response = get_openai_client().chat.completions.create(
+                model=self.CHAT_MODEL,
+                messages=self._create_messages(problem_text),
                 max_tokens=500,
                 temperature=0.7,
-                timeout=4  # Leave 1 second buffer for processing
+                timeout=timeout
             )
             
             # Parse the response
-            content = response.choices[0].message.content
+            content = response.choices[0].message.content or ''
             recommendations = self._parse_openai_response(content)
             
             return recommendations
             
-        except ImportError:
-            logger.error("OpenAI library not installed. Install with: pip install openai")
-            raise
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
             raise
     
+    def _create_messages(self, problem_text: str) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a problem.
+        
+        Args:
+            problem_text: The problem description
+            
+        Returns:
+            List of chat message dictionaries
+        """
+        return [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that provides practical solutions to service-related problems. Provide 3-5 actionable recommendations."
+            },
+            {
+                "role": "user",
+                "content": self._create_prompt(problem_text)
+            }
+        ]
+    
     def _create_prompt(self, problem_text: str) -> str:
         """
         Create a structured prompt for the AI model.
@@ -141,106 +449,21 @@ Focus on solutions that are:
         Returns:
             List of recommendation dictionaries
         """
-        recommendations = []
-        lines = content.strip().split('\n')
-        
-        current_rec = {}
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('Title:'):
-                current_rec['title'] = line.replace('Title:', '').strip()
-            elif line.startswith('Description:'):
-                current_rec['description'] = line.replace('Description:', '').strip()
-                
-                # If we have both title and description, add to list
-                if 'title' in current_rec and 'description' in current_rec:
-                    recommendations.append(current_rec)
-                    current_rec = {}
-        
-        # If parsing failed, create a single recommendation from the entire content
-        if not recommendations:
-            recommendations = [{
-                'title': 'AI Recommendation',
-                'description': content.strip()
-            }]
-        
-        return recommendations
+        parser = RecommendationStreamParser()
+        parser.feed(content)
+        parser.close()
+        return parser.recommendations
     
     def _generate_fallback_recommendations(self, problem_text: str) -> List[Dict[str, str]]:
         """
         Generate rule-based fallback recommendations when AI is unavailable.
         
+        Rules are loaded from PROBLEM_FALLBACK_RULES; see fallback_rules.py.
+        
         Args:
             problem_text: The problem description
             
         Returns:
             List of generic recommendation dictionaries
         """
-        problem_lower = problem_text.lower()
-        
-        recommendations = []
-        
-        # Generic recommendations based on keywords
-        if any(word in problem_lower for word in ['late', 'delay', 'time', 'slow']):
-            recommendations.append({
-                'title': 'Contact the Service Provider',
-                'description': 'Reach out to the service provider directly to discuss the timing issue and request an updated schedule or explanation for the delay.'
-            })
-            recommendations.append({
-                'title': 'Set Clear Expectations',
-                'description': 'Communicate your time constraints clearly and ask for a realistic timeline that works for both parties.'
-            })
-        
-        if any(word in problem_lower for word in ['quality', 'poor', 'bad', 'unsatisfied']):
-            recommendations.append({
-                'title': 'Document the Issues',
-                'description': 'Take photos or detailed notes of the quality issues to share with the service provider for resolution.'
-            })
-            recommendations.append({
-                'title': 'Request Corrections',
-                'description': 'Politely explain the quality concerns and request that the provider address them or redo the work to meet your expectations.'
-            })
-        
-        if any(word in problem_lower for word in ['cost', 'price', 'expensive', 'charge']):
-            recommendations.append({
-                'title': 'Review the Agreement',
-                'description': 'Check your original service agreement or quote to verify the pricing and identify any discrepancies.'
-            })
-            recommendations.append({
-                'title': 'Negotiate or Clarify',
-                'description': 'Discuss the pricing concerns with the provider and ask for a detailed breakdown of charges.'
-            })
-        
-        if any(word in problem_lower for word in ['communication', 'respond', 'contact', 'reply']):
-            recommendations.append({
-                'title': 'Try Multiple Contact Methods',
-                'description': 'Attempt to reach the provider through different channels (email, phone, platform messaging) to ensure your message is received.'
-            })
-            recommendations.append({
-                'title': 'Set Communication Expectations',
-                'description': 'Request a preferred method and timeframe for communication to avoid future issues.'
-            })
-        
-        # If no specific keywords matched, provide general recommendations
-        if not recommendations:
-            recommendations = [
-                {
-                    'title': 'Contact the Service Provider',
-                    'description': 'Reach out to the service provider directly to discuss your concerns and work towards a resolution.'
-                },
-                {
-                    'title': 'Document Everything',
-                    'description': 'Keep detailed records of all communications, agreements, and issues for reference and potential dispute resolution.'
-                },
-                {
-                    'title': 'Review Platform Policies',
-                    'description': 'Check the platform\'s terms of service and dispute resolution procedures for guidance on handling service issues.'
-                },
-                {
-                    'title': 'Provide Constructive Feedback',
-                    'description': 'Share specific, actionable feedback with the provider to help them understand and address your concerns.'
-                }
-            ]
-        
-        return recommendations[:5]  # Return maximum 5 recommendations
+        return get_fallback_rules().recommend(problem_text)
@@ -0,0 +1,171 @@
+"""
+Audio helpers for voice problem reports.
+
+- sniff_audio_format identifies a recording from its leading bytes, so the
+  format no longer depends on the client-supplied content type.
+- plan_wav_segments splits long PCM WAV recordings on silence, so segments can
+  be transcribed in parallel and stitched back together. Other formats are
+  transcribed whole.
+"""
+import math
+import operator
+import sys
+import wave
+from array import array
+from typing import List, Optional, Tuple
+
+
+# Format -> content type passed on to transcription
+AUDIO_CONTENT_TYPES = {
+    'wav': 'audio/wav',
+    'mp3': 'audio/mpeg',
+    'ogg': 'audio/ogg',
+    'webm': 'audio/webm',
+    'm4a': 'audio/mp4',
+    'flac': 'audio/flac',
+}
+
+# Bytes needed by sniff_audio_format
+SNIFF_BYTES = 16
+
+# Analysis window and what counts as a pause between sentences
+WINDOW_MS = 30
+MIN_SILENCE_MS = 300
+SILENCE_THRESHOLD_DBFS = -40
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """
+    Identify an audio format from its magic bytes.
+
+    Args:
+        header: At least the first SNIFF_BYTES bytes of the file
+
+    Returns:
+        str: Key of AUDIO_CONTENT_TYPES, or None if not recognized
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:4] == b'OggS':
+        return 'ogg'
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        # EBML header; Matroska audio is accepted as WebM
+        return 'webm'
+    if header[4:8] == b'ftyp':
+        return 'm4a'
+    if header[:3] == b'ID3':
+        return 'mp3'
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0:
+        # MPEG audio frame sync
+        return 'mp3'
+    return None
+
+
+def _window_rms(frames: bytes, sample_width: int) -> float:
+    """Root mean square of a window of PCM frames, as a fraction of full scale."""
+    if sample_width == 2:
+        samples = array('h', frames)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        full_scale = 32768
+    else:
+        # 8-bit WAV is unsigned
+        samples = array('b', bytes(byte ^ 0x80 for byte in frames))
+        full_scale = 128
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples)) / full_scale
+
+
+def plan_wav_segments(
+    wav_file,
+    target_seconds: float,
+    max_seconds: float
+) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Choose where to split a PCM WAV recording.
+
+    Once a segment is at least target_seconds long it ends in the next pause
+    of MIN_SILENCE_MS; a segment with no pause is cut at max_seconds. Only
+    8- and 16-bit PCM is analysed; other sample widths yield one segment.
+
+    Args:
+        wav_file: Seekable WAV file object
+        target_seconds: Preferred segment length
+        max_seconds: Longest segment
+
+    Returns:
+        tuple: ([(start_frame, end_frame)], frame_rate)
+    """
+    wav_file.seek(0)
+    with wave.open(wav_file, 'rb') as reader:
+        frame_rate = reader.getframerate()
+        total_frames = reader.getnframes()
+        sample_width = reader.getsampwidth()
+
+        if sample_width not in (1, 2) or total_frames <= target_seconds * frame_rate:
+            return [(0, total_frames)], frame_rate
+
+        window_frames = max(1, frame_rate * WINDOW_MS // 1000)
+        min_silence_windows = max(1, MIN_SILENCE_MS // WINDOW_MS)
+        threshold = 10 ** (SILENCE_THRESHOLD_DBFS / 20)
+        target_frames = int(target_seconds * frame_rate)
+        max_frames = int(max_seconds * frame_rate)
+
+        segments = []
+        segment_start = 0
+        silent_windows = 0
+        position = 0
+        while position < total_frames:
+            frames = reader.readframes(window_frames)
+            if not frames:
+                break
+            position += len(frames) // (sample_width * reader.getnchannels())
+
+            if _window_rms(frames, sample_width) < threshold:
+                silent_windows += 1
+            else:
+                silent_windows = 0
+
+            length = position - segment_start
+            if silent_windows == min_silence_windows and length >= target_frames:
+                # Cut in the middle of the pause
+                cut = position - (min_silence_windows * window_frames) // 2
+                segments.append((segment_start, cut))
+                segment_start = cut
+            elif length >= max_frames:
+                segments.append((segment_start, position))
+                segment_start = position
+                silent_windows = 0
+
+        if segment_start < total_frames:
+            segments.append((segment_start, total_frames))
+        return segments, frame_rate
+
+
+def write_wav_segment(wav_file, start_frame: int, end_frame: int, destination) -> None:
+    """
+    Copy a range of frames from a WAV file into a new WAV file.
+
+    Args:
+        wav_file: Seekable source WAV file object
+        start_frame: First frame to copy
+        end_frame: Frame after the last one to copy
+        destination: Writable file object
+    """
+    wav_file.seek(0)
+    with wave.open(wav_file, 'rb') as reader:
+        with wave.open(destination, 'wb') as writer:
+            writer.setnchannels(reader.getnchannels())
+            writer.setsampwidth(reader.getsampwidth())
+            writer.setframerate(reader.getframerate())
+            reader.setpos(start_frame)
+            remaining = end_frame - start_frame
+            while remaining > 0:
+                frames = reader.readframes(min(remaining, 64 * 1024))
+                if not frames:
+                    break
+                writer.writeframes(frames)
+                remaining -= len(frames) // (reader.getsampwidth() * reader.getnchannels())
@@ -0,0 +1,100 @@
+"""
+Offline stand-ins for the AI services, for tests and local development.
+
+Enable them with:
+
+    PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+    PROBLEM_TRANSCRIPTION_BACKEND = 'apps.problems.fakes.FakeTranscriptionService'
+
+Neither makes network calls. FAKE_AI_LATENCY (seconds, default 0) adds a delay
+to every call to simulate a slow upstream API; async calls await it, so under
+ASGI the delay does not hold a thread. FakeTranscriptionEngine is also
+registered as the 'fake' transcription engine, so the real service can be
+routed to it with TRANSCRIPTION_SHORT_ENGINES/TRANSCRIPTION_LONG_ENGINES.
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from django.conf import settings
+from .ai_service import AIRecommendationService
+from .streaming import RecommendationStreamParser
+from .transcription_engines import TranscriptionEngine
+from .transcription_service import VoiceTranscriptionService
+
+
+def _simulate_latency():
+    delay = getattr(settings, 'FAKE_AI_LATENCY', 0)
+    if delay:
+        time.sleep(delay)
+
+
+async def _asimulate_latency():
+    delay = getattr(settings, 'FAKE_AI_LATENCY', 0)
+    if delay:
+        await asyncio.sleep(delay)
+
+
+class FakeAIRecommendationService(AIRecommendationService):
+    """Return the rule-based recommendations without calling an API."""
+
+    # Characters per streamed token
+    STREAM_CHUNK_SIZE = 16
+
+    def generate_recommendations(self, problem_text: str) -> List[Dict[str, str]]:
+        _simulate_latency()
+        return self._generate_fallback_recommendations(problem_text)
+
+    async def agenerate_recommendations(self, problem_text: str) -> List[Dict[str, str]]:
+        await _asimulate_latency()
+        return self._generate_fallback_recommendations(problem_text)
+
+    def stream_recommendations(self, problem_text: str) -> Iterator[Tuple[str, object]]:
+        """Stream the rule-based recommendations in the format asked of the model."""
+        _simulate_latency()
+        yield from self._stream_events(problem_text)
+
+    async def astream_recommendations(self, problem_text: str) -> AsyncIterator[Tuple[str, object]]:
+        await _asimulate_latency()
+        for event in self._stream_events(problem_text):
+            yield event
+
+    def _stream_events(self, problem_text):
+        content = ''.join(
+            f"RECOMMENDATION {number}:\nTitle: {recommendation['title']}\n"
+            f"Description: {recommendation['description']}\n\n"
+            for number, recommendation in enumerate(self._generate_fallback_recommendations(problem_text), 1)
+        )
+        parser = RecommendationStreamParser()
+        for start in range(0, len(content), self.STREAM_CHUNK_SIZE):
+            text = content[start:start + self.STREAM_CHUNK_SIZE]
+            yield 'token', text
+            for recommendation in parser.feed(text):
+                yield 'recommendation', recommendation
+        for recommendation in parser.close():
+            yield 'recommendation', recommendation
+
+
+class FakeTranscriptionEngine(TranscriptionEngine):
+    """
+    Transcribe audio by decoding its bytes as UTF-8 text.
+
+    Uploading a text file as the "recording" therefore yields that text, which
+    makes voice submissions deterministic in tests.
+    """
+
+    name = 'fake'
+
+    FALLBACK_TEXT = 'Fake transcription of a voice problem report'
+
+    def transcribe(self, audio_file) -> str:
+        _simulate_latency()
+        audio_file.seek(0)
+        text = audio_file.read().decode('utf-8', errors='ignore').strip()
+        return text or self.FALLBACK_TEXT
+
+
+class FakeTranscriptionService(VoiceTranscriptionService):
+    """Transcribe every recording with FakeTranscriptionEngine."""
+
+    def engine_names(self, duration: Optional[float]) -> List[str]:
+        return ['fake']
@@ -0,0 +1,235 @@
+"""
+Rule-based recommendations used when the AI service is unavailable.
+
+Rules live in a data file (``fallback_rules.json`` next to this module, or the
+file named by PROBLEM_FALLBACK_RULES; ``.yaml`` files work if PyYAML is
+installed). Each rule maps keywords to weights and lists the recommendations
+it contributes:
+
+    {
+      "max_recommendations": 5,
+      "rules": [
+        {"id": "pricing", "keywords": {"price": 3, "overcharged": 3, "fee": 2},
+         "recommendations": [{"title": "...", "description": "..."}]}
+      ],
+      "default": [{"title": "...", "description": "..."}]
+    }
+
+All keywords of all rules are compiled once into a single regular expression,
+factored as a trie and anchored on word boundaries, so "time" no longer
+matches "sometimes" and the text is scanned in one pass however many rules
+there are. Each rule scores the
+summed weight of the distinct keywords it matched; matching rules contribute
+their recommendations from the highest score down (ties keep file order). Text
+matching no rule gets the default recommendations.
+"""
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+DEFAULT_RULES_FILE = Path(__file__).resolve().parent / 'fallback_rules.json'
+DEFAULT_MAX_RECOMMENDATIONS = 5
+MAX_COMBINED_ORDERS = 1024
+
+
+class FallbackRule(NamedTuple):
+    """A compiled rule."""
+    id: str
+    recommendations: List[Dict[str, str]]
+
+
+def _normalize_keyword(keyword):
+    return ' '.join(keyword.lower().split())
+
+
+def _trie_pattern(keywords):
+    """
+    Build a regular expression matching any keyword, factored as a trie.
+
+    Python's regex engine tries every branch of a flat alternation at each
+    position; sharing prefixes ("charge|charged|charges" becomes
+    "charge(?:d|s)?") lets it reject most positions after one character.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        branches = [
+            # Words of multi-word keywords may be separated by any whitespace
+            (r'\s+' if char == ' ' else re.escape(char)) + emit(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # Greedy, so the longest keyword is preferred
+            pattern = f'(?:{pattern})?'
+        return pattern
+
+    return emit(trie)
+
+
+class FallbackRuleSet:
+    """Keyword rules compiled into one matcher."""
+
+    def __init__(self, rules, default, max_recommendations=DEFAULT_MAX_RECOMMENDATIONS):
+        """
+        Compile rule definitions.
+
+        Args:
+            rules: List of rule dicts with id, keywords ({keyword: weight}) and recommendations
+            default: Recommendations for text matching no rule
+            max_recommendations: Most recommendations returned
+
+        Raises:
+            ImproperlyConfigured: If a rule is malformed
+        """
+        self.rules = []
+        self.default = list(default)
+        self.max_recommendations = max_recommendations
+        # keyword -> [(rule index, weight)]
+        self.keywords: Dict[str, List[Tuple[int, float]]] = {}
+
+        for index, rule in enumerate(rules):
+            try:
+                rule_id = rule.get('id', str(index))
+                keywords = rule['keywords']
+                recommendations = list(rule['recommendations'])
+            except (AttributeError, KeyError, TypeError) as e:
+                raise ImproperlyConfigured(f'Fallback rule {index} is missing {e}')
+            if isinstance(keywords, list):
+                keywords = dict.fromkeys(keywords, 1)
+            self.rules.append(FallbackRule(rule_id, recommendations))
+            for keyword, weight in keywords.items():
+                keyword = _normalize_keyword(keyword)
+                if keyword:
+                    self.keywords.setdefault(keyword, []).append((index, float(weight)))
+
+        # Recommendations per rule order; few orders occur in practice
+        self._combined = {}
+
+        self.pattern = None
+        if self.keywords:
+            self.pattern = re.compile(r'\b' + _trie_pattern(self.keywords) + r'\b')
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Load rules from a JSON or YAML file.
+
+        Args:
+            path: Path to the rules file
+
+        Returns:
+            FallbackRuleSet: The compiled rules
+
+        Raises:
+            ImproperlyConfigured: If the file cannot be read or parsed
+        """
+        path = Path(path)
+        try:
+            with open(path, encoding='utf-8') as rules_file:
+                if path.suffix in ('.yaml', '.yml'):
+                    try:
+                        import yaml
+                    except ImportError:
+                        raise ImproperlyConfigured('PyYAML is required for YAML fallback rules. Install with: pip install pyyaml')
+                    data = yaml.safe_load(rules_file)
+                else:
+                    data = json.load(rules_file)
+        except (OSError, ValueError) as e:
+            raise ImproperlyConfigured(f'Could not load fallback rules from {path}: {e}')
+
+        return cls(
+            data.get('rules', []),
+            data.get('default', []),
+            data.get('max_recommendations', DEFAULT_MAX_RECOMMENDATIONS)
+        )
+
+    def score(self, text) -> Dict[str, float]:
+        """
+        Score every rule against text.
+
+        Args:
+            text: Problem description
+
+        Returns:
+            dict: Rule ID -> summed weight of distinct matched keywords, for
+            matching rules only
+        """
+        return {self.rules[index].id: score for index, score in self._scores(text)}
+
+    def _scores(self, text):
+        if self.pattern is None:
+            return []
+        scores = {}
+        for keyword in set(self.pattern.findall(text.lower())):
+            if keyword not in self.keywords:
+                # Multi-word keyword matched across other whitespace
+                keyword = _normalize_keyword(keyword)
+            for index, weight in self.keywords[keyword]:
+                scores[index] = scores.get(index, 0) + weight
+        # Highest score first; ties keep file order
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def recommend(self, text) -> List[Dict[str, str]]:
+        """
+        Get recommendations for a problem.
+
+        Args:
+            text: Problem description
+
+        Returns:
+            List of recommendation dictionaries, shared between calls (do not
+            modify them)
+        """
+        order = tuple(index for index, _ in self._scores(text))
+        recommendations = self._combined.get(order)
+        if recommendations is None:
+            recommendations = []
+            for index in order:
+                recommendations.extend(self.rules[index].recommendations)
+            recommendations = tuple((recommendations or self.default)[:self.max_recommendations])
+            if len(self._combined) < MAX_COMBINED_ORDERS:
+                self._combined[order] = recommendations
+        return list(recommendations)
+
+
+_rule_sets = {}
+_rule_sets_lock = threading.Lock()
+
+
+def get_fallback_rules(path=None):
+    """
+    Return the compiled rules, loading them on first use.
+
+    Args:
+        path: Optional rules file overriding PROBLEM_FALLBACK_RULES
+
+    Returns:
+        FallbackRuleSet: Rules shared per file path
+    """
+    path = str(path or getattr(settings, 'PROBLEM_FALLBACK_RULES', '') or DEFAULT_RULES_FILE)
+    rule_set = _rule_sets.get(path)
+    if rule_set is None:
+        with _rule_sets_lock:
+            rule_set = _rule_sets.get(path)
+            if rule_set is None:
+                rule_set = _rule_sets[path] = FallbackRuleSet.from_file(path)
+    return rule_set
+
+
+def clear_fallback_rules():
+    """Forget compiled rules so edited files are reloaded."""
+    with _rule_sets_lock:
+        _rule_sets.clear()
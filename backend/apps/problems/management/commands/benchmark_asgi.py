@@ -0,0 +1,262 @@
+"""
+Compare WSGI workers with a single ASGI worker under concurrent load.
+
+Starts each server in turn, drives one endpoint at increasing concurrency
+with an async HTTP client, and samples the memory of the whole server
+process tree. For each server it reports the highest concurrency sustained
+without errors and with p95 latency under --slo-ms, and that concurrency
+per GB of memory.
+
+Memory is the proportional set size (PSS) where /proc provides it, so pages
+shared by forked workers are not counted twice; otherwise RSS.
+
+The servers default to gunicorn sync workers and uvicorn, which are not
+project requirements; install them or pass --wsgi-command/--asgi-command.
+To measure the server models rather than the OpenAI API, point both at the
+fakes, e.g. --env PROBLEM_AI_BACKEND=apps.problems.fakes.FakeAIRecommendationService
+--env FAKE_AI_LATENCY=1. Requests go to the configured database, so problem
+creation leaves its reports behind.
+
+Usage:
+    python manage.py benchmark_asgi --email user@example.com --workers 4 \\
+        --concurrency 10 --concurrency 50 --concurrency 200
+"""
+import asyncio
+import json
+import os
+import shlex
+import shutil
+import signal
+import socket
+import subprocess
+import time
+import httpx
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+DEFAULT_WSGI_COMMAND = 'gunicorn config.wsgi:application --workers {workers} --bind 127.0.0.1:{port}'
+DEFAULT_ASGI_COMMAND = 'uvicorn config.asgi:application --workers 1 --host 127.0.0.1 --port {port}'
+DEFAULT_BODY = json.dumps({'input_type': 'TEXT', 'problem_text': 'The plumber did not show up'})
+
+# Seconds between memory samples while a level runs
+SAMPLE_INTERVAL = 0.2
+
+
+def _process_memory(pid):
+    """PSS of a process in bytes, or RSS where smaps_rollup is unavailable."""
+    for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return 0
+
+
+def _tree_memory(pid):
+    """Memory of a process and all of its descendants, in bytes."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; fields resume after ')'
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _process_memory(current)
+        pending.extend(children.get(current, []))
+    return total
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrency per memory of WSGI workers and a single ASGI worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True,
+                            help='User whose access token authenticates the requests')
+        parser.add_argument('--path', default='/api/problems/create/')
+        parser.add_argument('--method', default='POST')
+        parser.add_argument('--body', default=DEFAULT_BODY, help='JSON request body')
+        parser.add_argument('--concurrency', type=int, action='append', dest='levels',
+                            help='Requests in flight at once (repeatable)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per concurrency level (at least one per client)')
+        parser.add_argument('--slo-ms', type=float, default=2000,
+                            help='p95 latency a level must stay under to count as sustained')
+        parser.add_argument('--workers', type=int, default=4, help='WSGI worker processes')
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--server', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--wsgi-command', default=DEFAULT_WSGI_COMMAND)
+        parser.add_argument('--asgi-command', default=DEFAULT_ASGI_COMMAND)
+        parser.add_argument('--env', action='append', default=[],
+                            help='KEY=VALUE set in the servers\' environment (repeatable)')
+        parser.add_argument('--startup-timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        extra_env = {}
+        for item in options['env']:
+            key, separator, value = item.partition('=')
+            if not separator:
+                raise CommandError(f'--env expects KEY=VALUE, got {item!r}')
+            extra_env[key] = value
+
+        servers = []
+        if options['server'] in ('wsgi', 'both'):
+            servers.append(('wsgi', options['wsgi_command'], {'ASYNC_VIEWS': 'False'}))
+        if options['server'] in ('asgi', 'both'):
+            servers.append(('asgi', options['asgi_command'], {'ASYNC_VIEWS': 'True'}))
+
+        headers = {
+            'Authorization': f'Bearer {AccessToken.for_user(user)}',
+            'Content-Type': 'application/json',
+        }
+        levels = sorted(set(options['levels'] or [10, 50, 100]))
+
+        summaries = []
+        for name, command, env in servers:
+            argv = shlex.split(command.format(workers=options['workers'], port=options['port']))
+            if shutil.which(argv[0]) is None:
+                raise CommandError(f'{argv[0]} not found; install it or pass --{name}-command')
+
+            self.stdout.write(self.style.SUCCESS(f'{name}: {" ".join(argv)}'))
+            results = self._run_server(argv, {**env, **extra_env}, headers, levels, options)
+            summaries.append((name, self._sustained(results, options['slo_ms'])))
+
+        self.stdout.write('')
+        for name, (level, memory) in summaries:
+            if level is None:
+                self.stdout.write(f'{name}: no level sustained under {options["slo_ms"]:.0f} ms p95')
+                continue
+            self.stdout.write(
+                f'{name}: sustained {level} concurrent requests in {memory / 2**20:.0f} MB '
+                f'({level / (memory / 2**30):.0f} per GB)'
+            )
+
+    def _run_server(self, argv, env, headers, levels, options):
+        process = subprocess.Popen(
+            argv,
+            env={**os.environ, **env},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        try:
+            self._wait_for_port(process, options['port'], options['startup_timeout'])
+            url = f"http://127.0.0.1:{options['port']}{options['path']}"
+
+            results = []
+            for level in levels:
+                total = max(options['requests'], level)
+                result = asyncio.run(self._load(
+                    process.pid, url, options['method'], headers, options['body'], level, total
+                ))
+                results.append(result)
+                self.stdout.write(
+                    f"  c={level:<5} {result['throughput']:8.1f} req/s  "
+                    f"p50 {result['p50'] * 1000:7.0f} ms  p95 {result['p95'] * 1000:7.0f} ms  "
+                    f"errors {result['errors']:<4}  memory {result['memory'] / 2**20:7.1f} MB"
+                )
+            return results
+        finally:
+            # Stop the server and every worker it forked
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                process.wait(timeout=10)
+            except ProcessLookupError:
+                pass
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+    @staticmethod
+    def _wait_for_port(process, port, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'Server exited with status {process.returncode} during startup')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not listen on port {port} within {timeout:.0f} seconds')
+
+    @staticmethod
+    async def _load(pid, url, method, headers, body, concurrency, total):
+        """Send total requests with concurrency in flight; sample memory meanwhile."""
+        latencies = []
+        errors = 0
+        peak_memory = _tree_memory(pid)
+        remaining = iter(range(total))
+
+        async def client_loop(client):
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, headers=headers, content=body)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        async def sample_memory():
+            nonlocal peak_memory
+            while True:
+                peak_memory = max(peak_memory, _tree_memory(pid))
+                await asyncio.sleep(SAMPLE_INTERVAL)
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            sampler = asyncio.create_task(sample_memory())
+            start = time.perf_counter()
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            sampler.cancel()
+
+        latencies.sort()
+        return {
+            'concurrency': concurrency,
+            'throughput': len(latencies) / elapsed if elapsed else 0,
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95),
+            'errors': errors,
+            'memory': peak_memory,
+        }
+
+    @staticmethod
+    def _sustained(results, slo_ms):
+        """Highest concurrency without errors and within the SLO, with its memory."""
+        sustained = [
+            result for result in results
+            if not result['errors'] and result['p95'] * 1000 <= slo_ms
+        ]
+        if not sustained:
+            return None, 0
+        best = max(sustained, key=lambda result: result['concurrency'])
+        return best['concurrency'], best['memory']
@@ -0,0 +1,112 @@
+"""
+Benchmark the rule-based fallback recommendations on synthetic problem texts.
+
+Compares the compiled keyword matcher in apps/problems/fallback_rules.py with
+substring scans, both of the previous hardcoded keyword lists and of the
+keywords in the current rules file (same scoring, no word boundaries).
+
+Usage:
+    python manage.py benchmark_fallback_recommendations --texts 100000
+"""
+import random
+import time
+from django.core.management.base import BaseCommand
+from apps.problems.fallback_rules import get_fallback_rules
+
+
+LEGACY_RULES = [
+    (['late', 'delay', 'time', 'slow'], ['Contact the Service Provider', 'Set Clear Expectations']),
+    (['quality', 'poor', 'bad', 'unsatisfied'], ['Document the Issues', 'Request Corrections']),
+    (['cost', 'price', 'expensive', 'charge'], ['Review the Agreement', 'Negotiate or Clarify']),
+    (['communication', 'respond', 'contact', 'reply'], ['Try Multiple Contact Methods', 'Set Communication Expectations']),
+]
+LEGACY_DEFAULT = ['Contact the Service Provider', 'Document Everything', 'Review Platform Policies', 'Provide Constructive Feedback']
+
+FILLER = (
+    'the a my provider cleaner plumber technician job work house kitchen yesterday today '
+    'sometimes again really very was is were did not never come came finished left '
+    'apartment booking service order asked told said week morning evening customer'
+).split()
+KEYWORDS = (
+    'late delayed slow waiting quality poor bad unsatisfied price expensive overcharged '
+    'charged fee reply respond ignored communication contact'
+).split()
+
+
+def _legacy_recommend(problem_text):
+    problem_lower = problem_text.lower()
+    titles = []
+    for words, rule_titles in LEGACY_RULES:
+        if any(word in problem_lower for word in words):
+            titles.extend(rule_titles)
+    return (titles or LEGACY_DEFAULT)[:5]
+
+
+def _substring_recommend(problem_text):
+    rule_set = get_fallback_rules()
+    problem_lower = problem_text.lower()
+    scores = {}
+    for keyword, targets in rule_set.keywords.items():
+        if keyword in problem_lower:
+            for index, weight in targets:
+                scores[index] = scores.get(index, 0) + weight
+    titles = []
+    for index, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+        titles.extend(recommendation['title'] for recommendation in rule_set.rules[index].recommendations)
+    return (titles or [recommendation['title'] for recommendation in rule_set.default])[:rule_set.max_recommendations]
+
+
+def _compiled_recommend(problem_text):
+    return [recommendation['title'] for recommendation in get_fallback_rules().recommend(problem_text)]
+
+
+class Command(BaseCommand):
+    help = 'Measure fallback recommendation throughput on synthetic problem texts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--texts', type=int, default=100000, help='Number of synthetic problem texts')
+        parser.add_argument('--max-words', type=int, default=60, help='Longest synthetic text in words')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        texts = self._texts(options['texts'], options['max_words'], options['seed'])
+        # Compile the rules before timing
+        get_fallback_rules()
+
+        strategies = [
+            ('substring scans, previous keywords', _legacy_recommend),
+            ('substring scans, current rules', _substring_recommend),
+            ('compiled matcher, current rules', _compiled_recommend),
+        ]
+        results = {}
+        for label, recommend in strategies:
+            start = time.perf_counter()
+            titles = [recommend(text) for text in texts]
+            elapsed = time.perf_counter() - start
+            results[label] = (elapsed, titles)
+            self.stdout.write(self.style.SUCCESS(label))
+            self.stdout.write(f'  total:      {elapsed * 1000:.0f} ms ({len(texts) / elapsed:.0f} texts/s)')
+            self.stdout.write(f'  per text:   {elapsed * 1e6 / len(texts):.1f} us')
+
+        (legacy_seconds, legacy), (substring_seconds, _), (compiled_seconds, compiled) = results.values()
+        differing = sum(1 for before, after in zip(legacy, compiled) if before != after)
+        self.stdout.write(
+            f'Speedup over substring scans of the same rules: {substring_seconds / compiled_seconds:.2f}x '
+            f'({legacy_seconds / compiled_seconds:.2f}x against the previous 16 keywords)'
+        )
+        self.stdout.write(
+            f'{differing} of {len(texts)} texts get different recommendations than before '
+            '(word-boundary matching, added keywords, weighted ordering)'
+        )
+
+    @staticmethod
+    def _texts(count, max_words, seed):
+        rng = random.Random(seed)
+        texts = []
+        for _ in range(count):
+            words = rng.choices(FILLER, k=rng.randint(3, max_words))
+            for _ in range(rng.randint(0, 3)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORDS))
+            text = ' '.join(words)
+            texts.append(text[0].upper() + text[1:] + '.')
+        return texts
@@ -0,0 +1,27 @@
+"""
+Finish problem reports left PROCESSING by a server that stopped mid-report.
+
+Background processing runs on an in-process thread pool, so reports queued in
+a process that exits before finishing stay PROCESSING. Run this periodically
+(e.g. from cron) to complete them. Reports a worker has claimed are left to
+it until the claim lapses (PROBLEM_REPORT_CLAIM_TIMEOUT), so long
+transcriptions are never processed twice.
+
+Usage:
+    python manage.py process_stale_problem_reports [--stale-after 5]
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.problems.services import ProblemReportService
+
+
+class Command(BaseCommand):
+    help = 'Process problem reports stuck in PROCESSING'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=5,
+                            help='Minutes without progress before a report is reprocessed')
+
+    def handle(self, *args, **options):
+        processed = ProblemReportService().process_stale_reports(timedelta(minutes=options['stale_after']))
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} stale problem report(s)'))
@@ -0,0 +1,22 @@
+"""
+Abort chunked audio uploads that stopped receiving chunks and delete their data.
+
+Usage:
+    python manage.py purge_audio_uploads [--older-than 24]
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.problems.uploads import AudioUploadService
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned chunked audio uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=None,
+                            help='Hours without a chunk (default: AUDIO_UPLOAD_EXPIRY_HOURS)')
+
+    def handle(self, *args, **options):
+        max_age = timedelta(hours=options['older_than']) if options['older_than'] is not None else None
+        purged = AudioUploadService.purge_expired(max_age)
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} abandoned audio upload(s)'))
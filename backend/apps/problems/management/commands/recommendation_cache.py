@@ -0,0 +1,52 @@
+"""
+Show or reset the AI recommendation cache.
+
+Only shared backends (Django cache, database) can be inspected; the LocMem
+backend lives in each server process.
+
+Usage:
+    python manage.py recommendation_cache [--clear] [--reset-stats] [--prune]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.problems.recommendation_cache import get_recommendation_cache
+
+
+class Command(BaseCommand):
+    help = 'Show AI recommendation cache hit rates, or clear the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Remove every cached entry')
+        parser.add_argument('--reset-stats', action='store_true', help='Zero the hit and miss counts')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete expired and excess entries (database backend only)')
+
+    def handle(self, *args, **options):
+        cache = get_recommendation_cache()
+        if cache is None:
+            raise CommandError('The recommendation cache is disabled (RECOMMENDATION_CACHE_BACKEND is empty)')
+        if cache.backend.process_local:
+            # A new process would only see, and clear, its own empty cache
+            raise CommandError(
+                f'{type(cache.backend).__name__} keeps entries in each server process, '
+                'where this command cannot reach them; restart the servers to clear it'
+            )
+
+        if options['clear']:
+            cache.backend.clear()
+            self.stdout.write(self.style.SUCCESS('Cleared the recommendation cache'))
+        if options['reset_stats']:
+            cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Reset recommendation cache statistics'))
+        if options['prune']:
+            if not hasattr(cache.backend, 'prune'):
+                raise CommandError(f'{type(cache.backend).__name__} does not support pruning')
+            self.stdout.write(self.style.SUCCESS(f'Pruned {cache.backend.prune()} entries'))
+
+        stats = cache.stats()
+        hit_rate = 'n/a' if stats['hit_rate'] is None else f"{stats['hit_rate']:.1%}"
+        self.stdout.write(f"Backend:    {type(cache.backend).__name__}")
+        self.stdout.write(f"Entries:    {'unknown' if stats['entries'] is None else stats['entries']}")
+        self.stdout.write(f"Exact hits: {stats['exact_hits']}")
+        self.stdout.write(f"Near hits:  {stats['near_hits']}")
+        self.stdout.write(f"Misses:     {stats['misses']}")
+        self.stdout.write(f"Hit rate:   {hit_rate}")
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problemreport',
+            name='error',
+            field=models.TextField(blank=True, help_text='Why background processing failed'),
+        ),
+        migrations.AddField(
+            model_name='problemreport',
+            name='status',
+            field=models.CharField(choices=[('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='COMPLETED', help_text='PROCESSING while transcription and recommendations run in the background', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='problemreport',
+            name='problem_text',
+            field=models.TextField(blank=True, help_text='The problem description (from text input or transcribed from voice)'),
+        ),
+        migrations.AddIndex(
+            model_name='problemreport',
+            index=models.Index(fields=['status', 'updated_at'], name='problem_rep_status_cd4e9f_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0002_async_processing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='SHA-256 of the normalized problem text', max_length=64, unique=True)),
+                ('normalized_text', models.TextField()),
+                ('signature', models.JSONField(default=list, help_text='MinHash signature used for near-duplicate matching')),
+                ('recommendations', models.JSONField(default=list)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Recommendation Cache Entry',
+                'verbose_name_plural': 'Recommendation Cache Entries',
+                'db_table': 'problem_recommendation_cache',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationCacheBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band_key', models.CharField(db_index=True, max_length=24)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='problems.recommendationcacheentry')),
+            ],
+            options={
+                'db_table': 'problem_recommendation_cache_bands',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0004_audio_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problemreport',
+            name='audio_size',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Size in bytes of the stored recording after normalization', null=True),
+        ),
+        migrations.AddField(
+            model_name='problemreport',
+            name='original_audio_size',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Size in bytes of the recording as uploaded', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0005_audio_sizes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationcacheentry',
+            name='signature_version',
+            field=models.PositiveSmallIntegerField(default=1, help_text='recommendation_cache.SIGNATURE_VERSION the signature was built with'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('problems', '0006_recommendation_signature_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problemreport',
+            name='claim_token',
+            field=models.UUIDField(blank=True, help_text='Identifies the run holding the claim; only it may save the result', null=True),
+        ),
+        migrations.AddField(
+            model_name='problemreport',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a worker last claimed the report for processing', null=True),
+        ),
+    ]
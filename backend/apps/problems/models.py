@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 
@@ -10,6 +11,12 @@ class ProblemReport(models.Model):
         ('VOICE', 'Voice'),
     ]
     
+    STATUS_CHOICES = [
+        ('PROCESSING', 'Processing'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -21,6 +28,7 @@ class ProblemReport(models.Model):
         default='TEXT'
     )
     problem_text = models.TextField(
+        blank=True,
         help_text='The problem description (from text input or transcribed from voice)'
     )
     audio_file = models.FileField(
@@ -29,10 +37,40 @@ class ProblemReport(models.Model):
         blank=True,
         help_text='Voice recording file (if input_type is VOICE)'
     )
+    original_audio_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text='Size in bytes of the recording as uploaded'
+    )
+    audio_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        help_text='Size in bytes of the stored recording after normalization'
+    )
     recommendations = models.JSONField(
         default=list,
         help_text='AI-generated recommendations as a list of solutions'
     )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='COMPLETED',
+        help_text='PROCESSING while transcription and recommendations run in the background'
+    )
+    error = models.TextField(
+        blank=True,
+        help_text='Why background processing failed'
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When a worker last claimed the report for processing'
+    )
+    claim_token = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text='Identifies the run holding the claim; only it may save the result'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -44,7 +82,98 @@ class ProblemReport(models.Model):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['input_type']),
+            models.Index(fields=['status', 'updated_at']),
         ]
     
     def __str__(self):
         return f"Problem by {self.user.email} - {self.input_type} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
+
+
+class RecommendationCacheEntry(models.Model):
+    """Cached AI recommendations for a normalized problem text."""
+    
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text='SHA-256 of the normalized problem text'
+    )
+    normalized_text = models.TextField()
+    signature = models.JSONField(
+        default=list,
+        help_text='MinHash signature used for near-duplicate matching'
+    )
+    signature_version = models.PositiveSmallIntegerField(
+        help_text='recommendation_cache.SIGNATURE_VERSION the signature was built with'
+    )
+    recommendations = models.JSONField(default=list)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(db_index=True)
+    last_used_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        db_table = 'problem_recommendation_cache'
+        verbose_name = 'Recommendation Cache Entry'
+        verbose_name_plural = 'Recommendation Cache Entries'
+    
+    def __str__(self):
+        return self.normalized_text[:50]
+
+
+class RecommendationCacheBand(models.Model):
+    """LSH band key of a cache entry's signature."""
+    
+    entry = models.ForeignKey(
+        RecommendationCacheEntry,
+        on_delete=models.CASCADE,
+        related_name='bands'
+    )
+    band_key = models.CharField(max_length=24, db_index=True)
+    
+    class Meta:
+        db_table = 'problem_recommendation_cache_bands'
+
+
+class AudioUpload(models.Model):
+    """A resumable voice recording upload, assembled in a temporary file."""
+    
+    STATUS_CHOICES = [
+        ('UPLOADING', 'Uploading'),
+        ('COMPLETED', 'Completed'),
+        ('ABORTED', 'Aborted'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='audio_uploads'
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text='Total size declared by the client')
+    offset = models.PositiveBigIntegerField(default=0, help_text='Bytes received so far')
+    audio_format = models.CharField(
+        max_length=10,
+        blank=True,
+        help_text='Format detected from the magic bytes'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='UPLOADING')
+    problem_report = models.ForeignKey(
+        ProblemReport,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'problem_audio_uploads'
+        verbose_name = 'Audio Upload'
+        verbose_name_plural = 'Audio Uploads'
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes)"
@@ -0,0 +1,331 @@
+"""
+Normalization of voice recordings before storage and transcription.
+
+Speech needs neither stereo nor CD sample rates, so recordings are reduced to
+mono 16 kHz, the rate speech recognition works at:
+
+- ffmpeg: if the binary is available (AUDIO_FFMPEG_BINARY), any input format
+  is re-encoded to Opus in an Ogg container at AUDIO_OPUS_BITRATE, typically
+  a tenth of the size of an MP3 and a hundredth of a CD-quality WAV.
+- Pure Python: without ffmpeg, 8/16-bit PCM WAV is downmixed and resampled to
+  a mono 16 kHz 16-bit WAV, with a moving-average anti-alias filter. Other
+  formats cannot be decoded and pass through.
+- Passthrough: recordings that cannot be normalized, or would not get
+  smaller, are kept as uploaded.
+
+AUDIO_NORMALIZATION selects 'auto' (ffmpeg when available, else pure Python),
+'ffmpeg', 'python' or 'off'.
+"""
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from array import array
+from typing import NamedTuple
+from django.conf import settings
+from django.core.files import File
+from .audio import SNIFF_BYTES, sniff_audio_format
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+TARGET_RATE = 16000
+DEFAULT_OPUS_BITRATE = '24k'
+
+# Seconds ffmpeg may take per recording
+FFMPEG_TIMEOUT = 120
+
+# Frames converted per read in the pure-Python path
+BLOCK_FRAMES = 64 * 1024
+
+
+class NormalizedAudio(NamedTuple):
+    """Result of normalizing a recording."""
+    file: File
+    name: str
+    audio_format: str
+    original_size: int
+    size: int
+    method: str  # 'ffmpeg', 'python' or 'passthrough'
+
+
+def _source_size(source):
+    size = getattr(source, 'size', None)
+    if size is None:
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+    return size
+
+
+def _rename(name, audio_format):
+    stem = os.path.splitext(os.path.basename(name or ''))[0] or 'recording'
+    return f'{stem}.{audio_format}'
+
+
+def ffmpeg_binary():
+    """Path of the ffmpeg binary, or None if it is not installed."""
+    return shutil.which(getattr(settings, 'AUDIO_FFMPEG_BINARY', 'ffmpeg') or 'ffmpeg')
+
+
+def _mono_16bit(frames, channels, sample_width):
+    """Convert interleaved PCM frames to mono 16-bit samples."""
+    if sample_width == 1:
+        samples = array('h', ((byte - 128) << 8 for byte in frames))
+    else:
+        samples = array('h', frames)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+    if channels == 1:
+        return samples
+    return array('h', (sum(frame) // channels for frame in zip(*(samples[channel::channels] for channel in range(channels)))))
+
+
+def _run_ffmpeg(source, name, suffix, codec_args):
+    """
+    Convert a recording to mono 16 kHz with ffmpeg.
+
+    Args:
+        source: Seekable binary file
+        name: File name, whose extension hints the input format
+        suffix: Extension of the output file, which selects its container
+        codec_args: ffmpeg output codec options
+
+    Returns:
+        NamedTemporaryFile holding the output, which the caller must close
+
+    Raises:
+        OSError, subprocess.SubprocessError: If ffmpeg fails
+    """
+    source_path = getattr(source, 'temporary_file_path', None)
+    copy = None
+    if source_path:
+        source_path = source_path()
+    else:
+        # ffmpeg needs a path; copy in chunks rather than reading the file whole
+        source.seek(0)
+        copy = tempfile.NamedTemporaryFile(suffix=os.path.splitext(name)[1])
+        shutil.copyfileobj(source, copy, 64 * 1024)
+        copy.flush()
+        source_path = copy.name
+
+    output = tempfile.NamedTemporaryFile(suffix=suffix)
+    try:
+        subprocess.run(
+            [
+                ffmpeg_binary(), '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+                '-i', source_path,
+                '-vn', '-ac', '1', '-ar', str(TARGET_RATE),
+                *codec_args,
+                output.name
+            ],
+            check=True,
+            capture_output=True,
+            timeout=FFMPEG_TIMEOUT
+        )
+    except Exception:
+        output.close()
+        raise
+    finally:
+        if copy is not None:
+            copy.close()
+    output.seek(0)
+    return output
+
+
+def decode_to_wav(source, name=None):
+    """
+    Decode any recording to mono 16 kHz 16-bit PCM WAV with ffmpeg.
+
+    Used to split compressed recordings that are too large to transcribe
+    whole; check ffmpeg_binary() first.
+
+    Args:
+        source: Seekable binary file
+        name: File name; defaults to source.name
+
+    Returns:
+        NamedTemporaryFile holding the WAV, which the caller must close
+
+    Raises:
+        OSError, subprocess.SubprocessError: If ffmpeg is missing or fails
+    """
+    name = name or getattr(source, 'name', None) or 'recording'
+    return _run_ffmpeg(source, name, '.wav', ['-c:a', 'pcm_s16le'])
+
+
+class _LinearResampler:
+    """
+    Streaming linear-interpolation resampler for mono 16-bit samples.
+
+    When downsampling, samples first pass through a moving average as wide as
+    the rate ratio, whose first null falls at or below the output rate. This
+    damps content above the new Nyquist frequency that would otherwise fold
+    back into the speech band as noise. A moving average is a gentle low-pass
+    filter: it also softens the top of the band and lets some aliasing
+    through, which speech recognition tolerates; ffmpeg's resampler is used
+    instead whenever it is installed.
+    """
+
+    def __init__(self, in_rate, out_rate):
+        self.step = in_rate / out_rate
+        # Position of the next output sample, in input samples
+        self.position = 0.0
+        # Input index of buffer[0]; buffer keeps the last sample of the previous block
+        self.base = 0
+        self.buffer = array('h')
+        # Anti-alias filter width, and the last width - 1 inputs it has seen
+        self.width = math.ceil(self.step) if self.step > 1 else 1
+        self.history = None
+
+    def _smooth(self, samples):
+        """Moving average of the last width samples, one output per input."""
+        width = self.width
+        if width == 1 or not samples:
+            return samples
+        if self.history is None:
+            # Pad the start with the first sample rather than fading in from silence
+            self.history = array('h', [samples[0]] * (width - 1))
+        window = self.history + samples
+        out = array('h')
+        total = sum(window[:width - 1])
+        for index in range(width - 1, len(window)):
+            total += window[index]
+            out.append(total // width)
+            total -= window[index - width + 1]
+        self.history = window[len(window) - (width - 1):]
+        return out
+
+    def feed(self, samples):
+        buffer = self.buffer + self._smooth(samples)
+        out = array('h')
+        position, base, step = self.position, self.base, self.step
+        last = base + len(buffer) - 1
+        while position < last:
+            index = int(position)
+            left = buffer[index - base]
+            out.append(int(left + (buffer[index - base + 1] - left) * (position - index)))
+            position += step
+        self.position = position
+        self.base = last
+        self.buffer = buffer[-1:]
+        return out
+
+    def flush(self):
+        if self.buffer and self.position <= self.base:
+            return array('h', self.buffer)
+        return array('h')
+
+
+class AudioNormalizer:
+    """Normalize recordings to mono 16 kHz."""
+
+    def __init__(self, mode=None):
+        self.mode = mode or getattr(settings, 'AUDIO_NORMALIZATION', 'auto')
+
+    def normalize(self, source, name=None) -> NormalizedAudio:
+        """
+        Normalize a recording.
+
+        The returned file is a temporary file the caller must close, unless
+        the recording passed through, in which case it is the source itself.
+
+        Args:
+            source: Seekable binary file (UploadedFile, FieldFile, ...)
+            name: File name; defaults to source.name
+
+        Returns:
+            NormalizedAudio
+        """
+        name = name or getattr(source, 'name', None) or 'recording'
+        original_size = _source_size(source)
+        source.seek(0)
+        audio_format = sniff_audio_format(source.read(SNIFF_BYTES))
+        source.seek(0)
+
+        normalized = None
+        if audio_format and self.mode != 'off':
+            try:
+                if self.mode in ('auto', 'ffmpeg') and ffmpeg_binary():
+                    normalized = self._with_ffmpeg(source, name, original_size)
+                elif self.mode == 'ffmpeg':
+                    logger.warning("AUDIO_NORMALIZATION is 'ffmpeg' but ffmpeg is not installed")
+                elif audio_format == 'wav':
+                    normalized = self._with_python(source, name, original_size)
+            except (OSError, EOFError, wave.Error, subprocess.SubprocessError) as e:
+                logger.warning(f"Could not normalize {name}, storing it as uploaded: {str(e)}")
+                normalized = None
+
+        if normalized is not None and normalized.size >= original_size:
+            # Already compact; keep the original
+            normalized.file.close()
+            normalized = None
+        if normalized is None:
+            source.seek(0)
+            return NormalizedAudio(
+                source, os.path.basename(name), audio_format or '', original_size, original_size, 'passthrough'
+            )
+
+        logger.info(
+            f"Normalized {name} with {normalized.method}: {original_size} -> {normalized.size} bytes"
+        )
+        return normalized
+
+    def _with_ffmpeg(self, source, name, original_size):
+        """Re-encode to mono 16 kHz Opus with ffmpeg."""
+        output = _run_ffmpeg(
+            source, name, '.ogg',
+            ['-c:a', 'libopus', '-b:a', getattr(settings, 'AUDIO_OPUS_BITRATE', DEFAULT_OPUS_BITRATE),
+             '-application', 'voip']
+        )
+        output.seek(0, os.SEEK_END)
+        size = output.tell()
+        output.seek(0)
+        new_name = _rename(name, 'ogg')
+        return NormalizedAudio(File(output, name=new_name), new_name, 'ogg', original_size, size, 'ffmpeg')
+
+    def _with_python(self, source, name, original_size):
+        """Downmix and resample PCM WAV to mono 16 kHz 16-bit WAV."""
+        source.seek(0)
+        with wave.open(source, 'rb') as reader:
+            channels = reader.getnchannels()
+            sample_width = reader.getsampwidth()
+            rate = reader.getframerate()
+            if sample_width not in (1, 2):
+                return None
+            if channels == 1 and sample_width == 2 and rate == TARGET_RATE:
+                return None
+
+            output = tempfile.TemporaryFile()
+            resampler = _LinearResampler(rate, TARGET_RATE) if rate != TARGET_RATE else None
+            with wave.open(output, 'wb') as writer:
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(TARGET_RATE)
+                while True:
+                    frames = reader.readframes(BLOCK_FRAMES)
+                    if not frames:
+                        break
+                    samples = _mono_16bit(frames, channels, sample_width)
+                    if resampler is not None:
+                        samples = resampler.feed(samples)
+                    writer.writeframes(self._to_bytes(samples))
+                if resampler is not None:
+                    writer.writeframes(self._to_bytes(resampler.flush()))
+
+        output.seek(0, os.SEEK_END)
+        size = output.tell()
+        output.seek(0)
+        new_name = _rename(name, 'wav')
+        return NormalizedAudio(File(output, name=new_name), new_name, 'wav', original_size, size, 'python')
+
+    @staticmethod
+    def _to_bytes(samples):
+        if sys.byteorder == 'big':
+            samples = array('h', samples)
+            samples.byteswap()
+        return samples.tobytes()
+
@@ -0,0 +1,136 @@
+"""
+Process-wide OpenAI clients with pooled keep-alive connections.
+
+Both AI services share one client per API key, so calls reuse open TLS
+connections instead of handshaking each time. The client (an openai 1.x
+OpenAI instance over an httpx connection pool) is thread-safe.
+
+- AI_HTTP_MAX_CONNECTIONS: connections per pool
+- AI_HTTP_KEEPALIVE_CONNECTIONS: idle connections kept open
+- AI_HTTP_KEEPALIVE_SECONDS: how long an idle connection is kept
+- OPENAI_MAX_RETRIES: retries by the client itself; 0 by default, since
+  the circuit breakers in resilience.py and the caller's latency budget
+  decide what happens after a failure
+- OPENAI_BASE_URL: optional API base URL (proxies, compatible servers)
+
+get_async_openai_client() returns an AsyncOpenAI client for ASGI code. An
+async connection pool belongs to the event loop that created it, so there
+is one async client per running loop.
+"""
+import asyncio
+import threading
+import weakref
+from django.conf import settings
+import logging
+
+try:
+    import httpx
+    import openai
+except ImportError:  # pragma: no cover - openai is a pinned requirement
+    httpx = openai = None
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_SECONDS = 60
+DEFAULT_MAX_RETRIES = 0
+
+# Connect timeout; read timeouts are set per request by the callers
+CONNECT_TIMEOUT = 2
+
+
+class OpenAINotConfigured(Exception):
+    """The openai package is missing or no API key is set."""
+
+
+def _client_options():
+    if openai is None:
+        logger.error("OpenAI library not installed. Install with: pip install openai")
+        raise OpenAINotConfigured("OpenAI library not installed")
+    if not settings.OPENAI_API_KEY:
+        raise OpenAINotConfigured("OpenAI API key not configured")
+    return {
+        'api_key': settings.OPENAI_API_KEY,
+        'base_url': getattr(settings, 'OPENAI_BASE_URL', '') or None,
+        'max_retries': getattr(settings, 'OPENAI_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+    }
+
+
+def _http_options():
+    return {
+        'limits': httpx.Limits(
+            max_connections=getattr(settings, 'AI_HTTP_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS),
+            max_keepalive_connections=getattr(settings, 'AI_HTTP_KEEPALIVE_CONNECTIONS', DEFAULT_KEEPALIVE_CONNECTIONS),
+            keepalive_expiry=getattr(settings, 'AI_HTTP_KEEPALIVE_SECONDS', DEFAULT_KEEPALIVE_SECONDS)
+        ),
+        'timeout': httpx.Timeout(60, connect=CONNECT_TIMEOUT),
+        'follow_redirects': True,
+    }
+
+
+def _cache_key(options):
+    return (options['api_key'], options['base_url'], options['max_retries'])
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Event loop -> {cache key: AsyncOpenAI}
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_openai_client():
+    """
+    Return the shared OpenAI client for the configured API key.
+
+    Returns:
+        openai.OpenAI
+
+    Raises:
+        OpenAINotConfigured: If openai is not installed or OPENAI_API_KEY is empty
+    """
+    options = _client_options()
+    key = _cache_key(options)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = openai.OpenAI(**options, http_client=httpx.Client(**_http_options()))
+            _clients[key] = client
+        return client
+
+
+def get_async_openai_client():
+    """
+    Return the AsyncOpenAI client of the running event loop.
+
+    Must be called from a coroutine.
+
+    Returns:
+        openai.AsyncOpenAI
+
+    Raises:
+        OpenAINotConfigured: If openai is not installed or OPENAI_API_KEY is empty
+        RuntimeError: If no event loop is running
+    """
+    options = _client_options()
+    key = _cache_key(options)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = openai.AsyncOpenAI(**options, http_client=httpx.AsyncClient(**_http_options()))
+            clients[key] = client
+        return client
+
+
+def reset_openai_clients():
+    """Close the shared synchronous clients and forget every client."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,557 @@
+"""
+Cache of AI recommendations keyed on normalized problem text.
+
+Users submit the same few problems over and over, so answers from the language
+model are reused:
+
+1. Exact tier: problem text is normalized (Unicode-folded, lowercased,
+   punctuation dropped, whitespace collapsed) and hashed. Equal hashes reuse
+   the stored answer.
+2. Near-duplicate tier: each entry carries a MinHash signature of its word
+   shingles (stopwords removed, words and word pairs). Signatures are split
+   into bands for locality-sensitive hashing, so only entries sharing a band
+   are compared. A candidate is reused if its estimated Jaccard similarity is
+   at least RECOMMENDATION_CACHE_SIMILARITY and it has as many negations as
+   the problem, so "did not clean" never reuses the answer to "did clean".
+   Entries record the SIGNATURE_VERSION they were built with; signatures
+   from an older version are never near hits, so changing the shingling
+   needs no manual cache flush.
+
+MinHash needs no model download or native dependency, which suits short
+problem statements that mostly differ by filler words.
+
+Storage is pluggable through RECOMMENDATION_CACHE_BACKEND:
+
+- LocMemRecommendationCacheBackend: per-process LRU with TTL (default)
+- DjangoCacheRecommendationCacheBackend: the Django ``default`` cache, shared
+  between processes if that cache is
+- DatabaseRecommendationCacheBackend: the problem_recommendation_cache table,
+  with TTL expiry and least-recently-used pruning
+
+Hit and miss counts are kept in the Django cache; see
+``manage.py recommendation_cache``, which cannot reach the per-process
+LocMem backend.
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from typing import NamedTuple, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BACKEND = 'apps.problems.recommendation_cache.LocMemRecommendationCacheBackend'
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_SIMILARITY = 0.75
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+# Mersenne prime for the universal hash family used to simulate permutations
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Fixed seed: signatures must agree between processes sharing a backend
+_rng = random.Random(20240101)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# Negations and modal verbs are kept: "did not show up" and "did show up"
+# need different answers
+STOPWORDS = frozenset("""
+a an the is are was were be been being am i me my we our you your he she it its
+they them their this that these those to of in on at by for with from and or but
+so very really just too also do does did has have had please there here about as
+into than then again still
+""".split())
+
+# "didn't" normalizes to "didn t"
+NEGATIONS = frozenset("""
+not no never nor none nothing nobody nowhere cannot without t
+""".split())
+
+# Bump whenever shingling (STOPWORDS, NEGATIONS, ...) or hashing changes
+SIGNATURE_VERSION = 2
+
+STATS_KEY_PREFIX = 'recommendation-cache:stats'
+STATS = ('exact_hits', 'near_hits', 'misses')
+
+
+class CacheEntry(NamedTuple):
+    """A cached answer."""
+    key: str
+    normalized_text: str
+    signature: Tuple[int, ...]
+    recommendations: list
+    # Entries stored before signatures were versioned are version 1
+    signature_version: int = 1
+
+
+def normalize_problem_text(text):
+    """
+    Normalize problem text for exact matching.
+
+    "The provider is LATE!!" and "the provider is late" normalize alike.
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def text_key(normalized_text):
+    """Return the exact-tier key for normalized text."""
+    return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+
+
+def _shingles(normalized_text):
+    words = [word for word in normalized_text.split() if word not in STOPWORDS]
+    if not words:
+        words = normalized_text.split()
+    shingles = set(words)
+    shingles.update(f'{first} {second}' for first, second in zip(words, words[1:]))
+    return shingles
+
+
+def negation_count(normalized_text):
+    """Count the negation words in normalized text."""
+    return sum(1 for word in normalized_text.split() if word in NEGATIONS)
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash_signature(normalized_text):
+    """
+    Compute the MinHash signature of a text's shingles.
+
+    Returns:
+        tuple: NUM_PERMUTATIONS integers
+    """
+    hashes = [_hash64(shingle) for shingle in _shingles(normalized_text)]
+    if not hashes:
+        return tuple([MERSENNE_PRIME] * NUM_PERMUTATIONS)
+    return tuple(
+        min((a * value + b) % MERSENNE_PRIME for value in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def band_keys(signature):
+    """Split a signature into LSH band keys."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rows).encode('ascii'), digest_size=8).hexdigest()
+        keys.append(f'{band}:{digest}')
+    return keys
+
+
+def estimated_similarity(first, second):
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERMUTATIONS
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class BaseRecommendationCacheBackend:
+    """Base class for recommendation cache storage."""
+
+    # Entries live in each server process, out of reach of management commands
+    process_local = False
+
+    def __init__(self):
+        self.ttl = _setting('RECOMMENDATION_CACHE_TTL', DEFAULT_TTL)
+        self.max_entries = _setting('RECOMMENDATION_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+
+    def get(self, key) -> Optional[CacheEntry]:
+        """Return the live entry stored under an exact key, or None."""
+        raise NotImplementedError('Recommendation cache backends must implement get()')
+
+    def candidates(self, bands):
+        """Return live entries sharing at least one LSH band key."""
+        raise NotImplementedError('Recommendation cache backends must implement candidates()')
+
+    def set(self, entry, bands):
+        """Store an entry and index it under its band keys."""
+        raise NotImplementedError('Recommendation cache backends must implement set()')
+
+    def clear(self):
+        """Remove every entry."""
+        raise NotImplementedError('Recommendation cache backends must implement clear()')
+
+    def size(self):
+        """Return the number of stored entries, or None if unknown."""
+        return None
+
+
+class LocMemRecommendationCacheBackend(BaseRecommendationCacheBackend):
+    """Per-process LRU cache with TTL expiry."""
+
+    process_local = True
+
+    def __init__(self):
+        super().__init__()
+        self._entries = OrderedDict()
+        self._bands = {}
+        self._lock = threading.Lock()
+
+    def _expired(self, stored_at):
+        return self.ttl and time.monotonic() - stored_at > self.ttl
+
+    def _remove(self, key):
+        entry, _, bands = self._entries.pop(key)
+        for band in bands:
+            keys = self._bands.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._bands[band]
+
+    def get(self, key):
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is None:
+                return None
+            if self._expired(stored[1]):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return stored[0]
+
+    def candidates(self, bands):
+        with self._lock:
+            keys = set()
+            for band in bands:
+                keys.update(self._bands.get(band, ()))
+            entries = []
+            for key in keys:
+                entry, stored_at, _ = self._entries[key]
+                if self._expired(stored_at):
+                    self._remove(key)
+                else:
+                    entries.append(entry)
+            return entries
+
+    def set(self, entry, bands):
+        with self._lock:
+            if entry.key in self._entries:
+                self._remove(entry.key)
+            self._entries[entry.key] = (entry, time.monotonic(), bands)
+            for band in bands:
+                self._bands.setdefault(band, set()).add(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def mark_used(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class DjangoCacheRecommendationCacheBackend(BaseRecommendationCacheBackend):
+    """
+    Store entries in the Django ``default`` cache.
+
+    Eviction is left to the cache itself (TTL via the timeout, LRU by the
+    cache backend). Each band key holds the most recent BAND_CAPACITY entry keys.
+
+    Keys include a generation number stored in the cache; clear() moves to
+    the next generation, so the old entries are never read again and expire,
+    while the rest of the default cache is left alone.
+    """
+
+    KEY_PREFIX = 'recommendation-cache'
+    BAND_CAPACITY = 20
+
+    def _generation_key(self):
+        return f'{self.KEY_PREFIX}:generation'
+
+    def _generation(self):
+        generation = cache.get(self._generation_key())
+        if generation is None:
+            # Start from the clock, so a generation key evicted from the
+            # cache never comes back as one whose entries are still stored
+            cache.add(self._generation_key(), time.time_ns(), None)
+            generation = cache.get(self._generation_key())
+        return generation
+
+    def _entry_key(self, key, generation):
+        return f'{self.KEY_PREFIX}:v{generation}:entry:{key}'
+
+    def _band_key(self, band, generation):
+        return f'{self.KEY_PREFIX}:v{generation}:band:{band}'
+
+    def _timeout(self):
+        return self.ttl or None
+
+    def get(self, key):
+        stored = cache.get(self._entry_key(key, self._generation()))
+        return CacheEntry(*stored) if stored else None
+
+    def candidates(self, bands):
+        generation = self._generation()
+        band_entries = cache.get_many([self._band_key(band, generation) for band in bands])
+        keys = set()
+        for entry_keys in band_entries.values():
+            keys.update(entry_keys)
+        stored = cache.get_many([self._entry_key(key, generation) for key in keys])
+        return [CacheEntry(*value) for value in stored.values()]
+
+    def set(self, entry, bands):
+        generation = self._generation()
+        cache.set(self._entry_key(entry.key, generation), tuple(entry), self._timeout())
+        band_entries = cache.get_many([self._band_key(band, generation) for band in bands])
+        updates = {}
+        for band in bands:
+            keys = [key for key in band_entries.get(self._band_key(band, generation), []) if key != entry.key]
+            updates[self._band_key(band, generation)] = [entry.key] + keys[:self.BAND_CAPACITY - 1]
+        cache.set_many(updates, self._timeout())
+
+    def clear(self):
+        # Entries cannot be enumerated in a generic cache; orphan them and let them expire
+        try:
+            cache.incr(self._generation_key())
+        except ValueError:
+            # No generation stored yet, or it was evicted
+            cache.set(self._generation_key(), time.time_ns(), None)
+
+
+class DatabaseRecommendationCacheBackend(BaseRecommendationCacheBackend):
+    """
+    Store entries in the problem_recommendation_cache table.
+
+    Band keys are rows of an indexed side table, so near-duplicate lookups are
+    a single indexed join. Expired entries are ignored and deleted on write;
+    beyond RECOMMENDATION_CACHE_MAX_ENTRIES the least recently used are pruned.
+    """
+
+    def _live(self):
+        from .models import RecommendationCacheEntry
+        entries = RecommendationCacheEntry.objects.all()
+        if self.ttl:
+            entries = entries.filter(created_at__gte=timezone.now() - timedelta(seconds=self.ttl))
+        return entries
+
+    @staticmethod
+    def _to_entry(row):
+        return CacheEntry(
+            row.key, row.normalized_text, tuple(row.signature), row.recommendations, row.signature_version
+        )
+
+    def get(self, key):
+        row = self._live().filter(key=key).first()
+        return self._to_entry(row) if row else None
+
+    def candidates(self, bands):
+        rows = self._live().filter(
+            bands__band_key__in=bands, signature_version=SIGNATURE_VERSION
+        ).distinct()
+        return [self._to_entry(row) for row in rows]
+
+    def mark_used(self, key):
+        from django.db.models import F
+        from .models import RecommendationCacheEntry
+        RecommendationCacheEntry.objects.filter(key=key).update(
+            hits=F('hits') + 1,
+            last_used_at=timezone.now()
+        )
+
+    def set(self, entry, bands):
+        from .models import RecommendationCacheBand, RecommendationCacheEntry
+        with transaction.atomic():
+            row, _ = RecommendationCacheEntry.objects.update_or_create(
+                key=entry.key,
+                defaults={
+                    'normalized_text': entry.normalized_text,
+                    'signature': list(entry.signature),
+                    'signature_version': entry.signature_version,
+                    'recommendations': entry.recommendations,
+                    'created_at': timezone.now(),
+                    'last_used_at': timezone.now(),
+                }
+            )
+            row.bands.all().delete()
+            RecommendationCacheBand.objects.bulk_create([
+                RecommendationCacheBand(entry=row, band_key=band) for band in bands
+            ])
+        self.prune()
+
+    def prune(self):
+        """
+        Delete expired entries and the least recently used beyond max_entries.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        from .models import RecommendationCacheEntry
+        deleted = 0
+        if self.ttl:
+            _, counts = RecommendationCacheEntry.objects.filter(
+                created_at__lt=timezone.now() - timedelta(seconds=self.ttl)
+            ).delete()
+            deleted += counts.get(RecommendationCacheEntry._meta.label, 0)
+        excess = RecommendationCacheEntry.objects.count() - self.max_entries
+        if excess > 0:
+            stale_ids = list(
+                RecommendationCacheEntry.objects.order_by('last_used_at').values_list('id', flat=True)[:excess]
+            )
+            _, counts = RecommendationCacheEntry.objects.filter(id__in=stale_ids).delete()
+            deleted += counts.get(RecommendationCacheEntry._meta.label, 0)
+        return deleted
+
+    def clear(self):
+        from .models import RecommendationCacheEntry
+        RecommendationCacheEntry.objects.all().delete()
+
+    def size(self):
+        from .models import RecommendationCacheEntry
+        return RecommendationCacheEntry.objects.count()
+
+
+class RecommendationCache:
+    """Two-tier lookup over a storage backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.similarity = _setting('RECOMMENDATION_CACHE_SIMILARITY', DEFAULT_SIMILARITY)
+
+    def lookup(self, problem_text):
+        """
+        Find cached recommendations for a problem.
+
+        Args:
+            problem_text: The problem description
+
+        Returns:
+            tuple: (recommendations or None, tier) where tier is 'exact',
+            'near' or 'miss'
+        """
+        normalized = normalize_problem_text(problem_text)
+        key = text_key(normalized)
+
+        entry = self.backend.get(key)
+        if entry is not None:
+            self._mark_used(key)
+            self._record('exact_hits')
+            return entry.recommendations, 'exact'
+
+        signature = minhash_signature(normalized)
+        negations = negation_count(normalized)
+        best, best_similarity = None, 0.0
+        for candidate in self.backend.candidates(band_keys(signature)):
+            if candidate.signature_version != SIGNATURE_VERSION:
+                # Built with older shingling; not comparable
+                continue
+            if negation_count(candidate.normalized_text) != negations:
+                continue
+            similarity = estimated_similarity(signature, candidate.signature)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+
+        if best is not None and best_similarity >= self.similarity:
+            self._mark_used(best.key)
+            self._record('near_hits')
+            logger.info(f"Recommendation cache near hit ({best_similarity:.2f}): '{normalized[:60]}' ~ '{best.normalized_text[:60]}'")
+            return best.recommendations, 'near'
+
+        self._record('misses')
+        return None, 'miss'
+
+    def store(self, problem_text, recommendations):
+        """Cache recommendations generated for a problem."""
+        normalized = normalize_problem_text(problem_text)
+        if not normalized:
+            return
+        signature = minhash_signature(normalized)
+        entry = CacheEntry(text_key(normalized), normalized, signature, recommendations, SIGNATURE_VERSION)
+        self.backend.set(entry, band_keys(signature))
+
+    def _mark_used(self, key):
+        mark_used = getattr(self.backend, 'mark_used', None)
+        if mark_used:
+            mark_used(key)
+
+    @staticmethod
+    def _record(stat):
+        key = f'{STATS_KEY_PREFIX}:{stat}'
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr
+            cache.set(key, 1, None)
+
+    def stats(self):
+        """
+        Get hit and miss counts.
+
+        Returns:
+            dict: exact_hits, near_hits, misses, hit_rate (None before any
+            lookup) and entries (None if the backend cannot count)
+        """
+        counts = cache.get_many([f'{STATS_KEY_PREFIX}:{stat}' for stat in STATS])
+        stats = {stat: counts.get(f'{STATS_KEY_PREFIX}:{stat}', 0) for stat in STATS}
+        lookups = sum(stats.values())
+        hits = stats['exact_hits'] + stats['near_hits']
+        stats['hit_rate'] = round(hits / lookups, 4) if lookups else None
+        stats['entries'] = self.backend.size()
+        return stats
+
+    @staticmethod
+    def reset_stats():
+        """Zero the hit and miss counts."""
+        cache.delete_many([f'{STATS_KEY_PREFIX}:{stat}' for stat in STATS])
+
+
+_cache_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_recommendation_cache(path=None):
+    """
+    Return the configured recommendation cache.
+
+    Args:
+        path: Optional dotted backend path overriding RECOMMENDATION_CACHE_BACKEND
+
+    Returns:
+        RecommendationCache or None: Cache shared per backend path, or None if
+        RECOMMENDATION_CACHE_BACKEND is empty
+    """
+    path = path if path is not None else _setting('RECOMMENDATION_CACHE_BACKEND', DEFAULT_BACKEND)
+    if not path:
+        return None
+    with _instances_lock:
+        if path not in _cache_instances:
+            _cache_instances[path] = RecommendationCache(import_string(path)())
+        return _cache_instances[path]
+
+
+def reset_recommendation_caches():
+    """Drop every cache instance, e.g. after settings change in tests."""
+    with _instances_lock:
+        _cache_instances.clear()
@@ -0,0 +1,418 @@
+"""
+Circuit breakers, concurrency limits and latency budgets for outbound AI calls.
+
+Every call to an external AI API goes through an AIDependency:
+
+- Circuit breaker: after AI_CIRCUIT_FAILURE_THRESHOLD consecutive failures
+  (errors, or calls slower than their timeout) the circuit opens and calls are
+  rejected at once for AI_CIRCUIT_RECOVERY_SECONDS. Then one probe call is
+  let through (half-open); its success closes the circuit, its failure opens
+  it again.
+- Concurrency limit: at most AI_MAX_CONCURRENT_CALLS calls per dependency are
+  in flight in a process. Further calls are rejected rather than queued, so
+  a slow API cannot tie up every worker, unless the caller passes a wait:
+  the parallel segments of one recording queue for a slot instead.
+- Latency budget: callers pass the time they have left; the call's timeout
+  is capped to it, and a call with no budget left is not made.
+
+Rejected calls raise CallRejected, which callers answer with their fallback
+(rule-based recommendations, another transcription engine).
+
+State is per process. dependency_snapshots() reports each dependency's
+circuit state, counters and latency histogram.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_SECONDS = 30
+DEFAULT_MAX_CONCURRENT_CALLS = 8
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+# Dependency name -> default timeout in seconds
+DEFAULT_TIMEOUTS = {
+    'openai-chat': 4,
+    'openai-audio': 60,
+}
+
+
+class CallRejected(Exception):
+    """A call was not made; the caller should fall back."""
+
+
+class CircuitOpenError(CallRejected):
+    """The dependency's circuit is open."""
+
+
+class ConcurrencyLimitExceeded(CallRejected):
+    """Too many calls to the dependency are in flight."""
+
+
+class BudgetExhausted(CallRejected):
+    """No latency budget is left for the call."""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker with half-open probing."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_seconds: float = DEFAULT_RECOVERY_SECONDS,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.recovery_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info(f"Circuit {self.name} half-open; probing")
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may be made now.
+
+        In the half-open state only half_open_max_calls probes are allowed
+        until one of them reports back.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self._failures} consecutive failures")
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probes = 0
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe whose call was abandoned without a result."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def reset(self) -> None:
+        """Close the circuit and forget past failures."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == OPEN:
+                retry_in = max(0.0, self.recovery_seconds - (self.clock() - self._opened_at))
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_in_seconds': retry_in,
+            }
+
+
+class LatencyHistogram:
+    """Thread-safe cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # One count per bucket, plus one for slower calls
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._count += 1
+            self._sum += seconds
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of calls, or None."""
+        with self._lock:
+            return self._percentile(fraction)
+
+    def _percentile(self, fraction):
+        if not self._count:
+            return None
+        rank = fraction * self._count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self._counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[f'{bound:g}'] = cumulative
+            buckets['+Inf'] = self._count
+            return {
+                'buckets': buckets,
+                'count': self._count,
+                'sum': round(self._sum, 6),
+                'p50': self._percentile(0.5),
+                'p95': self._percentile(0.95),
+            }
+
+
+class AIDependency:
+    """
+    An external AI API guarded by a circuit breaker and a concurrency limit.
+
+    Args:
+        name: Dependency name, e.g. 'openai-chat'
+        timeout: Longest a call may take, in seconds; slower calls count as
+            failures
+        max_concurrent_calls: Calls allowed in flight at once
+        breaker: CircuitBreaker; one is created from settings if omitted
+        ignored_exceptions: Exceptions that say nothing about the
+            dependency's health (e.g. an empty transcription) and are not
+            counted as failures
+    """
+
+    COUNTERS = ('calls', 'successes', 'failures', 'slow_calls', 'rejected_open', 'rejected_busy', 'rejected_budget')
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_concurrent_calls: int = DEFAULT_MAX_CONCURRENT_CALLS,
+        breaker: CircuitBreaker = None,
+        ignored_exceptions: Tuple[Type[BaseException], ...] = (ValueError,)
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_concurrent_calls = max_concurrent_calls
+        self.breaker = breaker or CircuitBreaker(
+            name,
+            failure_threshold=getattr(settings, 'AI_CIRCUIT_FAILURE_THRESHOLD', DEFAULT_FAILURE_THRESHOLD),
+            recovery_seconds=getattr(settings, 'AI_CIRCUIT_RECOVERY_SECONDS', DEFAULT_RECOVERY_SECONDS)
+        )
+        self.ignored_exceptions = ignored_exceptions
+        self.latency = LatencyHistogram()
+        self._slots = threading.BoundedSemaphore(max_concurrent_calls)
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._in_flight = 0
+
+    def _count(self, counter, delta=1):
+        with self._lock:
+            self._counters[counter] += delta
+
+    def is_available(self) -> bool:
+        """False while the circuit is open, so callers can route elsewhere."""
+        return self.breaker.state != OPEN
+
+    def call(self, fn: Callable[[float], object], budget: float = None, wait: float = 0):
+        """
+        Make a guarded call.
+
+        Args:
+            fn: Makes the call; receives the timeout in seconds to apply
+            budget: Seconds the caller has left, or None for no limit
+            wait: Seconds to wait for a free slot; 0 rejects at once
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            CallRejected: If the call was not made
+            Exception: Whatever fn raises
+        """
+        with self.attempt(budget, wait=wait) as timeout:
+            return fn(timeout)
+
+    @contextmanager
+    def attempt(self, budget: float = None, count_slow: bool = True, wait: float = 0):
+        """
+        Guard a call made in the with block, e.g. a streamed response.
+
+        Args:
+            budget: Seconds the caller has left, or None for no limit
+            count_slow: Count blocks outlasting the timeout as failures; pass
+                False for streams, where the timeout applies to each read
+            wait: Seconds to wait for a free slot, at most the budget; 0
+                rejects at once. Time spent waiting comes out of the budget.
+
+        Yields:
+            float: The timeout to apply
+
+        Raises:
+            CallRejected: If the call must not be made
+        """
+        timeout = self.timeout if budget is None else min(self.timeout, budget)
+        if timeout <= 0:
+            self._count('rejected_budget')
+            raise BudgetExhausted(f'No time left to call {self.name}')
+        if budget is not None:
+            wait = min(wait, budget)
+        if wait > 0:
+            waited = time.monotonic()
+            acquired = self._slots.acquire(timeout=wait)
+            waited = time.monotonic() - waited
+        else:
+            acquired = self._slots.acquire(blocking=False)
+            waited = 0
+        if not acquired:
+            self._count('rejected_busy')
+            raise ConcurrencyLimitExceeded(f'{self.max_concurrent_calls} calls to {self.name} already in flight')
+        try:
+            if budget is not None and waited:
+                timeout = min(timeout, budget - waited)
+                if timeout <= 0:
+                    self._count('rejected_budget')
+                    raise BudgetExhausted(f'No time left to call {self.name}')
+            if not self.breaker.allow_request():
+                self._count('rejected_open')
+                raise CircuitOpenError(f'Circuit for {self.name} is open')
+
+            with self._lock:
+                self._counters['calls'] += 1
+                self._in_flight += 1
+            start = time.monotonic()
+            try:
+                yield timeout
+            except self.ignored_exceptions:
+                self.latency.observe(time.monotonic() - start)
+                self._count('successes')
+                self.breaker.record_success()
+                raise
+            except Exception:
+                self.latency.observe(time.monotonic() - start)
+                self._count('failures')
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # E.g. a stream closed by a disconnecting client
+                self.breaker.release_probe()
+                raise
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+            elapsed = time.monotonic() - start
+            self.latency.observe(elapsed)
+            if count_slow and elapsed > timeout:
+                # The answer is still used, but the dependency is degraded
+                self._count('slow_calls')
+                self.breaker.record_failure()
+            else:
+                self._count('successes')
+                self.breaker.record_success()
+        finally:
+            self._slots.release()
+
+    def reset(self) -> None:
+        """Close the circuit and zero the counters and histogram."""
+        self.breaker.reset()
+        self.latency.reset()
+        with self._lock:
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        return {
+            'name': self.name,
+            'timeout': self.timeout,
+            'max_concurrent_calls': self.max_concurrent_calls,
+            'in_flight': in_flight,
+            'circuit': self.breaker.snapshot(),
+            **counters,
+            'latency': self.latency.snapshot(),
+        }
+
+
+_dependencies = {}
+_dependencies_lock = threading.Lock()
+
+
+def get_ai_dependency(name: str) -> AIDependency:
+    """
+    Return the process-wide guard for a dependency, creating it from settings.
+
+    Timeouts come from AI_TIMEOUTS (name -> seconds), defaulting to
+    DEFAULT_TIMEOUTS.
+    """
+    with _dependencies_lock:
+        if name not in _dependencies:
+            timeouts = {**DEFAULT_TIMEOUTS, **getattr(settings, 'AI_TIMEOUTS', {})}
+            _dependencies[name] = AIDependency(
+                name,
+                timeout=timeouts.get(name, DEFAULT_TIMEOUTS['openai-chat']),
+                max_concurrent_calls=getattr(settings, 'AI_MAX_CONCURRENT_CALLS', DEFAULT_MAX_CONCURRENT_CALLS)
+            )
+        return _dependencies[name]
+
+
+def dependency_snapshots() -> List[Dict]:
+    """State of every dependency called in this process."""
+    with _dependencies_lock:
+        dependencies = list(_dependencies.values())
+    return [dependency.snapshot() for dependency in sorted(dependencies, key=lambda dependency: dependency.name)]
+
+
+def reset_ai_dependencies() -> None:
+    """Drop every guard, e.g. after settings change in tests."""
+    with _dependencies_lock:
+        _dependencies.clear()
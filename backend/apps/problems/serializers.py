@@ -2,7 +2,7 @@
 Serializers for problem reporting.
 """
 from rest_framework import serializers
-from .models import ProblemReport
+from .models import AudioUpload, ProblemReport
 
 
 class ProblemReportCreateSerializer(serializers.ModelSerializer):
@@ -45,6 +45,14 @@ class ProblemReportCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class ProblemReportStreamSerializer(serializers.Serializer):
+    """Text problem whose recommendations are streamed."""
+    
+    problem_text = serializers.CharField(
+        error_messages={'blank': 'Problem text is required for text input type.'}
+    )
+
+
 class ProblemReportSerializer(serializers.ModelSerializer):
     """Serializer for retrieving problem reports."""
     
@@ -61,11 +69,18 @@ class ProblemReportSerializer(serializers.ModelSerializer):
             'input_type',
             'problem_text',
             'audio_file',
+            'original_audio_size',
+            'audio_size',
             'recommendations',
+            'status',
+            'error',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'recommendations', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'user', 'original_audio_size', 'audio_size', 'recommendations', 'status', 'error',
+            'created_at', 'updated_at'
+        ]
 
 
 class ProblemReportListSerializer(serializers.ModelSerializer):
@@ -82,6 +97,7 @@ class ProblemReportListSerializer(serializers.ModelSerializer):
             'input_type',
             'problem_text',
             'recommendation_count',
+            'status',
             'created_at'
         ]
         read_only_fields = ['id', 'created_at']
@@ -89,3 +105,65 @@ class ProblemReportListSerializer(serializers.ModelSerializer):
     def get_recommendation_count(self, obj):
         """Get the number of recommendations."""
         return len(obj.recommendations) if obj.recommendations else 0
+
+
+class ProblemBatchItemSerializer(serializers.Serializer):
+    """One problem in a batch import."""
+    
+    problem_text = serializers.CharField(max_length=5000)
+    user_email = serializers.EmailField(
+        required=False,
+        help_text='Customer the report belongs to (defaults to the importing user)'
+    )
+    reference = serializers.CharField(
+        required=False,
+        max_length=100,
+        help_text='Caller-side identifier echoed back in the result'
+    )
+
+
+class ProblemBatchCreateSerializer(serializers.Serializer):
+    """
+    Envelope of a batch import.
+    
+    Items are only checked to be objects here; each is validated with
+    ProblemBatchItemSerializer so one bad item does not reject the batch.
+    """
+    
+    problems = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False
+    )
+    
+    def validate_problems(self, value):
+        """Enforce PROBLEM_BATCH_MAX_ITEMS."""
+        max_items = self.context.get('max_items')
+        if max_items and len(value) > max_items:
+            raise serializers.ValidationError(f'A batch may contain at most {max_items} problems.')
+        return value
+
+
+class AudioUploadCreateSerializer(serializers.Serializer):
+    """Start a chunked audio upload."""
+    
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1, help_text='Total size in bytes')
+
+
+class AudioUploadSerializer(serializers.ModelSerializer):
+    """Progress of a chunked audio upload."""
+    
+    class Meta:
+        model = AudioUpload
+        fields = [
+            'id',
+            'filename',
+            'size',
+            'offset',
+            'audio_format',
+            'status',
+            'problem_report',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
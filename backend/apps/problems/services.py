@@ -1,22 +1,108 @@
 """
 Business logic services for problem reporting.
+
+Reports are processed either inside the request (create_problem_report, or
+acreate_problem_report in ASGI views) or in the background
+(submit_problem_report). Background reports are saved at once
+with status PROCESSING; transcription and recommendations then run on an
+in-process thread pool once the transaction commits, and clients poll the
+detail endpoint until the status is COMPLETED or FAILED.
+
+A run claims a report before processing it and saves its result only while
+it still holds the claim, so a pool worker and the stale sweep never process
+the same report twice.
 """
-from typing import Dict, Any
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
 from django.core.files.uploadedfile import UploadedFile
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
 from .models import ProblemReport
 from .ai_service import AIRecommendationService
+from .normalization import AudioNormalizer
+from .recommendation_cache import normalize_problem_text
 from .transcription_service import VoiceTranscriptionService
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_CONCURRENCY = 4
+DEFAULT_CLAIM_TIMEOUT = 30 * 60
+
+# Shown to users when background processing fails for an unexpected reason
+PROCESSING_ERROR_MESSAGE = 'Failed to process problem report. Please try again.'
+
+
+class ProblemReportWorkerPool:
+    """Process-wide thread pool for background problem report processing."""
+    
+    _executor = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def submit(cls, report_id):
+        """
+        Process a report in the background.
+        
+        With PROBLEM_REPORT_WORKERS set to 0 the report is processed inline,
+        which keeps tests and single-threaded servers deterministic.
+        
+        Args:
+            report_id: ID of a PROCESSING problem report
+        """
+        workers = getattr(settings, 'PROBLEM_REPORT_WORKERS', DEFAULT_WORKERS)
+        if workers <= 0:
+            ProblemReportService().process_problem_report(report_id)
+            return
+        
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='problem-report')
+        cls._executor.submit(cls._run, report_id)
+    
+    @staticmethod
+    def _run(report_id):
+        close_old_connections()
+        try:
+            ProblemReportService().process_problem_report(report_id)
+        except Exception as e:
+            logger.error(f"Background processing of problem report {report_id} crashed: {str(e)}")
+        finally:
+            # Worker threads own their connections; do not leak them
+            connection.close()
+    
+    @classmethod
+    def shutdown(cls, wait=True):
+        """Stop the pool, optionally waiting for queued reports to finish."""
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
 class ProblemReportService:
     """Service for managing problem reports."""
     
     def __init__(self):
-        self.ai_service = AIRecommendationService()
-        self.transcription_service = VoiceTranscriptionService()
+        self.ai_service = self._load_backend('PROBLEM_AI_BACKEND', AIRecommendationService)
+        self.transcription_service = self._load_backend('PROBLEM_TRANSCRIPTION_BACKEND', VoiceTranscriptionService)
+        self.normalizer = AudioNormalizer()
+    
+    @staticmethod
+    def _load_backend(setting_name, default_class):
+        """Instantiate the class named by a dotted-path setting, or the default."""
+        path = getattr(settings, setting_name, None)
+        return import_string(path)() if path else default_class()
     
     def create_problem_report(
         self,
@@ -43,25 +129,42 @@ class ProblemReportService:
         """
         try:
             # Process based on input type
+            normalized = None
             if input_type == 'VOICE':
+                is_valid, error_message = self.transcription_service.validate_audio_file(audio_file)
+                if not is_valid:
+                    raise ValueError(error_message)
+                
+                # Store and transcribe the compact mono 16 kHz version
+                normalized = self.normalizer.normalize(audio_file)
+                
                 # Transcribe audio to text
                 logger.info(f"Transcribing audio file for user {user.email}")
-                problem_text = self.transcription_service.transcribe_audio(audio_file)
+                problem_text = self.transcription_service.transcribe_audio(normalized.file, validate=False)
                 logger.info(f"Transcription successful: {problem_text[:100]}...")
             
-            # Generate AI recommendations
-            logger.info(f"Generating recommendations for problem: {problem_text[:100]}...")
-            recommendations = self.ai_service.generate_recommendations(problem_text)
-            logger.info(f"Generated {len(recommendations)} recommendations")
-            
-            # Create problem report
-            problem_report = ProblemReport.objects.create(
-                user=user,
-                input_type=input_type,
-                problem_text=problem_text,
-                audio_file=audio_file if input_type == 'VOICE' else None,
-                recommendations=recommendations
-            )
+            try:
+                # Generate AI recommendations
+                logger.info(f"Generating recommendations for problem: {problem_text[:100]}...")
+                recommendations = self.ai_service.generate_recommendations(problem_text)
+                logger.info(f"Generated {len(recommendations)} recommendations")
+                
+                # Create problem report
+                problem_report = ProblemReport(
+                    user=user,
+                    input_type=input_type,
+                    problem_text=problem_text,
+                    recommendations=recommendations
+                )
+                if normalized is not None:
+                    normalized.file.seek(0)
+                    problem_report.audio_file.save(normalized.name, normalized.file, save=False)
+                    problem_report.original_audio_size = normalized.original_size
+                    problem_report.audio_size = normalized.size
+                problem_report.save()
+            finally:
+                if normalized is not None and normalized.method != 'passthrough':
+                    normalized.file.close()
             
             logger.info(f"Created problem report {problem_report.id} for user {user.email}")
             return problem_report
@@ -75,6 +178,492 @@ class ProblemReportService:
             logger.error(f"Error creating problem report: {str(e)}")
             raise Exception(f"Failed to process problem report: {str(e)}")
     
+    async def acreate_problem_report(
+        self,
+        user,
+        input_type: str,
+        problem_text: str = None,
+        audio_file: UploadedFile = None
+    ) -> ProblemReport:
+        """
+        Create a new problem report with AI recommendations, from async code.
+        
+        Text reports await the recommendations and save the report with the
+        async ORM. Voice reports are normalized and transcribed, which is
+        CPU-bound or blocking, so create_problem_report() handles them in a
+        worker thread.
+        
+        Args:
+            user: The user submitting the report
+            input_type: 'TEXT' or 'VOICE'
+            problem_text: The problem description (for TEXT type)
+            audio_file: The audio file (for VOICE type)
+            
+        Returns:
+            Created ProblemReport instance
+            
+        Raises:
+            ValueError: If validation fails
+            Exception: If processing fails
+        """
+        if input_type == 'VOICE':
+            return await sync_to_async(self.create_problem_report)(
+                user, input_type, problem_text=problem_text, audio_file=audio_file
+            )
+        
+        try:
+            logger.info(f"Generating recommendations for problem: {problem_text[:100]}...")
+            recommendations = await self.ai_service.agenerate_recommendations(problem_text)
+            logger.info(f"Generated {len(recommendations)} recommendations")
+            
+            problem_report = await ProblemReport.objects.acreate(
+                user=user,
+                input_type=input_type,
+                problem_text=problem_text,
+                recommendations=recommendations
+            )
+        except Exception as e:
+            logger.error(f"Error creating problem report: {str(e)}")
+            raise Exception(f"Failed to process problem report: {str(e)}")
+        
+        logger.info(f"Created problem report {problem_report.id} for user {user.email}")
+        return problem_report
+    
+    def submit_problem_report(
+        self,
+        user,
+        input_type: str,
+        problem_text: str = None,
+        audio_file: UploadedFile = None
+    ) -> ProblemReport:
+        """
+        Save a problem report and process it in the background.
+        
+        Audio is validated here so bad uploads are still rejected in the
+        request; transcription and recommendations run after commit.
+        
+        Args:
+            user: The user submitting the report
+            input_type: 'TEXT' or 'VOICE'
+            problem_text: The problem description (for TEXT type)
+            audio_file: The audio file (for VOICE type)
+            
+        Returns:
+            ProblemReport instance with status PROCESSING
+            
+        Raises:
+            ValueError: If validation fails
+        """
+        if input_type == 'VOICE':
+            is_valid, error_message = self.transcription_service.validate_audio_file(audio_file)
+            if not is_valid:
+                raise ValueError(error_message)
+        
+        problem_report = ProblemReport.objects.create(
+            user=user,
+            input_type=input_type,
+            problem_text=problem_text if input_type == 'TEXT' else '',
+            audio_file=audio_file if input_type == 'VOICE' else None,
+            status='PROCESSING'
+        )
+        transaction.on_commit(lambda: ProblemReportWorkerPool.submit(problem_report.id))
+        
+        logger.info(f"Queued problem report {problem_report.id} for user {user.email}")
+        return problem_report
+    
+    def stream_problem_report(self, user, problem_text: str) -> Iterator[Tuple[str, object]]:
+        """
+        Create a text problem report, yielding its recommendations as they arrive.
+        
+        The report is saved PROCESSING before the first event and completed
+        with the streamed recommendations after the last. If the client goes
+        away part way, it stays PROCESSING and process_stale_reports
+        finishes it later.
+        
+        Args:
+            user: The user submitting the report
+            problem_text: The problem description
+            
+        Yields:
+            tuple: (event name, payload) for the 'report', 'token',
+            'recommendation' and 'done' events
+        """
+        problem_report = ProblemReport.objects.create(
+            user=user,
+            input_type='TEXT',
+            problem_text=problem_text,
+            status='PROCESSING'
+        )
+        logger.info(f"Streaming recommendations for problem report {problem_report.id} for user {user.email}")
+        yield 'report', {'id': problem_report.id, 'status': problem_report.status}
+        
+        recommendations = []
+        try:
+            for event, payload in self.ai_service.stream_recommendations(problem_text):
+                if event == 'recommendation':
+                    recommendations.append(payload)
+                    payload = {'index': len(recommendations) - 1, **payload}
+                yield event, payload
+            problem_report.status = 'COMPLETED'
+            problem_report.error = ''
+        except Exception as e:
+            problem_report.status = 'FAILED'
+            problem_report.error = PROCESSING_ERROR_MESSAGE
+            logger.error(f"Error streaming problem report {problem_report.id}: {str(e)}")
+        
+        problem_report.recommendations = recommendations
+        problem_report.save(update_fields=['recommendations', 'status', 'error', 'updated_at'])
+        yield 'done', {
+            'id': problem_report.id,
+            'status': problem_report.status,
+            'error': problem_report.error,
+            'recommendations': recommendations
+        }
+    
+    async def astream_problem_report(self, user, problem_text: str) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Create a text problem report from async code, yielding its recommendations as they arrive.
+        
+        Same as stream_problem_report(), with the report saved by the async
+        ORM and the recommendations read from astream_recommendations().
+        
+        Args:
+            user: The user submitting the report
+            problem_text: The problem description
+            
+        Yields:
+            tuple: (event name, payload)
+        """
+        problem_report = await ProblemReport.objects.acreate(
+            user=user,
+            input_type='TEXT',
+            problem_text=problem_text,
+            status='PROCESSING'
+        )
+        logger.info(f"Streaming recommendations for problem report {problem_report.id} for user {user.email}")
+        yield 'report', {'id': problem_report.id, 'status': problem_report.status}
+        
+        recommendations = []
+        try:
+            async for event, payload in self.ai_service.astream_recommendations(problem_text):
+                if event == 'recommendation':
+                    recommendations.append(payload)
+                    payload = {'index': len(recommendations) - 1, **payload}
+                yield event, payload
+            problem_report.status = 'COMPLETED'
+            problem_report.error = ''
+        except Exception as e:
+            problem_report.status = 'FAILED'
+            problem_report.error = PROCESSING_ERROR_MESSAGE
+            logger.error(f"Error streaming problem report {problem_report.id}: {str(e)}")
+        
+        problem_report.recommendations = recommendations
+        await problem_report.asave(update_fields=['recommendations', 'status', 'error', 'updated_at'])
+        yield 'done', {
+            'id': problem_report.id,
+            'status': problem_report.status,
+            'error': problem_report.error,
+            'recommendations': recommendations
+        }
+    
+    def submit_recording(self, user, recording, name: str, process_async: bool = True) -> ProblemReport:
+        """
+        Save a voice report for a recording that was already validated.
+        
+        Used for chunked uploads, whose format was detected from the file
+        contents and whose size may exceed VoiceTranscriptionService.MAX_FILE_SIZE.
+        
+        Args:
+            user: The user submitting the report
+            recording: Open binary file with the recording
+            name: File name to store it under
+            process_async: Queue processing after commit; otherwise the caller
+                processes it with process_problem_report
+            
+        Returns:
+            ProblemReport instance with status PROCESSING
+        """
+        problem_report = ProblemReport(user=user, input_type='VOICE', problem_text='', status='PROCESSING')
+        problem_report.audio_file.save(name, File(recording), save=False)
+        problem_report.save()
+        if process_async:
+            transaction.on_commit(lambda: ProblemReportWorkerPool.submit(problem_report.id))
+        
+        logger.info(f"Saved uploaded recording as problem report {problem_report.id} for user {user.email}")
+        return problem_report
+    
+    def process_problem_report(self, report_id: int) -> ProblemReport:
+        """
+        Transcribe and generate recommendations for a PROCESSING report.
+        
+        The report is claimed first; reports claimed by another run within
+        PROBLEM_REPORT_CLAIM_TIMEOUT are left to that run.
+        
+        Args:
+            report_id: The problem report ID
+            
+        Returns:
+            ProblemReport instance with status COMPLETED or FAILED, or None if
+            the report no longer exists, was already processed or is claimed
+            by another run
+        """
+        token = self._claim_report(report_id)
+        if token is None:
+            return None
+        report = ProblemReport.objects.filter(id=report_id).first()
+        if report is None:
+            return None
+        
+        try:
+            if report.input_type == 'VOICE' and report.audio_file and report.original_audio_size is None:
+                if not self._normalize_stored_audio(report, token):
+                    return None
+            if report.input_type == 'VOICE' and not report.problem_text:
+                with report.audio_file.open('rb') as audio_file:
+                    report.problem_text = self.transcription_service.transcribe_audio(audio_file, validate=False)
+            
+            report.recommendations = self.ai_service.generate_recommendations(report.problem_text)
+            report.status = 'COMPLETED'
+            report.error = ''
+            logger.info(f"Processed problem report {report.id}: {len(report.recommendations)} recommendations")
+            
+        except ValueError as e:
+            report.status = 'FAILED'
+            report.error = str(e)
+            logger.error(f"Validation error processing problem report {report.id}: {str(e)}")
+        except Exception as e:
+            report.status = 'FAILED'
+            report.error = PROCESSING_ERROR_MESSAGE
+            logger.error(f"Error processing problem report {report.id}: {str(e)}")
+        
+        if not self._save_claimed(report, token, ['problem_text', 'recommendations', 'status', 'error']):
+            return None
+        return report
+    
+    @staticmethod
+    def _claim_timeout() -> timedelta:
+        return timedelta(seconds=getattr(settings, 'PROBLEM_REPORT_CLAIM_TIMEOUT', DEFAULT_CLAIM_TIMEOUT))
+    
+    def _claimable(self, now):
+        """Q for reports that are unclaimed or whose claim has lapsed."""
+        return Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - self._claim_timeout())
+    
+    def _claim_report(self, report_id: int) -> Optional[uuid.UUID]:
+        """
+        Claim a PROCESSING report for this run.
+        
+        Returns:
+            The claim token, or None if the report cannot be claimed
+        """
+        now = timezone.now()
+        token = uuid.uuid4()
+        claimed = ProblemReport.objects.filter(self._claimable(now), id=report_id, status='PROCESSING').update(
+            claimed_at=now, claim_token=token, updated_at=now
+        )
+        return token if claimed else None
+    
+    @staticmethod
+    def _save_claimed(report: ProblemReport, token: uuid.UUID, fields: List[str]) -> bool:
+        """
+        Save fields of a report if this run still holds its claim.
+        
+        Returns:
+            False if another run took the report over, in which case nothing
+            is saved
+        """
+        report.updated_at = timezone.now()
+        saved = ProblemReport.objects.filter(id=report.id, status='PROCESSING', claim_token=token).update(
+            updated_at=report.updated_at, **{field: getattr(report, field) for field in fields}
+        )
+        if not saved:
+            logger.warning(f"Problem report {report.id} was taken over by another run; discarding this result")
+        return bool(saved)
+    
+    def _normalize_stored_audio(self, report: ProblemReport, token: uuid.UUID) -> bool:
+        """
+        Replace a report's stored recording with its normalized version.
+        
+        Reports processed in the background are stored as uploaded so the
+        request returns quickly; the worker normalizes them before
+        transcription. The sizes are recorded even when the recording passes
+        through, so it is not normalized again on a retry.
+        
+        The original is deleted only once the report points at the new file,
+        which happens only while this run holds the claim.
+        
+        Args:
+            report: A VOICE report whose recording was not normalized yet
+            token: This run's claim token
+            
+        Returns:
+            False if another run took the report over
+        """
+        old_name = report.audio_file.name
+        storage = report.audio_file.storage
+        with storage.open(old_name, 'rb') as audio_file:
+            normalized = self.normalizer.normalize(audio_file, old_name)
+            try:
+                if normalized.method != 'passthrough':
+                    report.audio_file.save(normalized.name, normalized.file, save=False)
+            finally:
+                if normalized.method != 'passthrough':
+                    normalized.file.close()
+        report.original_audio_size = normalized.original_size
+        report.audio_size = normalized.size
+        if not self._save_claimed(report, token, ['audio_file', 'original_audio_size', 'audio_size']):
+            if report.audio_file.name != old_name:
+                storage.delete(report.audio_file.name)
+            return False
+        if report.audio_file.name != old_name:
+            storage.delete(old_name)
+        return True
+    
+    def process_stale_reports(self, max_age=timedelta(minutes=5)) -> int:
+        """
+        Process reports left PROCESSING by a worker that exited.
+        
+        Reports still queued in a pool are taken over (the pool skips them
+        once they are claimed); reports a run is working on are left alone
+        until its claim lapses.
+        
+        Args:
+            max_age: Minimum time since the report was last updated
+            
+        Returns:
+            int: Number of reports processed
+        """
+        now = timezone.now()
+        report_ids = list(
+            ProblemReport.objects.filter(
+                self._claimable(now),
+                status='PROCESSING',
+                updated_at__lt=now - max_age
+            ).values_list('id', flat=True)
+        )
+        return sum(1 for report_id in report_ids if self.process_problem_report(report_id) is not None)
+    
+    def create_problem_report_batch(self, user, items) -> List[Dict[str, Any]]:
+        """
+        Create text problem reports in bulk.
+        
+        Identical texts (after normalization) get one recommendation call,
+        and repeated texts for the same customer get one report. Unique texts
+        are sent to the AI service on at most PROBLEM_BATCH_CONCURRENCY
+        threads, and all reports are saved with one bulk insert.
+        
+        Args:
+            user: The importing user
+            items: Validated items with problem_text and optional user_email
+                and reference
+            
+        Returns:
+            List of per-item results in input order, each with index,
+            reference and status ('created', 'duplicate', 'failed' or
+            'invalid'), plus id and recommendations for saved and duplicate
+            items ('duplicate_of' gives the index of the item that was
+            saved), error for failed ones and errors for invalid ones
+        """
+        owners = self._resolve_batch_owners(user, items)
+        
+        results = []
+        first_index = {}  # (owner id, normalized text) -> index of the item saved
+        texts = {}  # normalized text -> text sent to the AI service
+        for index, item in enumerate(items):
+            result = {'index': index, 'reference': item.get('reference')}
+            results.append(result)
+            owner = owners.get(item['user_email']) if item.get('user_email') else user
+            if owner is None:
+                result.update(status='invalid', errors={'user_email': ['No user with this email address.']})
+                continue
+            
+            normalized = normalize_problem_text(item['problem_text'])
+            key = (owner.id, normalized)
+            if key in first_index:
+                result.update(status='duplicate', duplicate_of=first_index[key])
+                continue
+            first_index[key] = index
+            texts.setdefault(normalized, item['problem_text'].strip())
+            result.update(status='created', owner=owner, normalized=normalized)
+        
+        recommendations = self._generate_batch_recommendations(texts)
+        
+        reports = []
+        for result in results:
+            if result['status'] != 'created':
+                continue
+            generated = recommendations[result['normalized']]
+            if generated is None:
+                result['status'] = 'failed'
+            reports.append(ProblemReport(
+                user=result['owner'],
+                input_type='TEXT',
+                problem_text=items[result['index']]['problem_text'].strip(),
+                recommendations=generated or [],
+                status='COMPLETED' if generated is not None else 'FAILED',
+                error='' if generated is not None else PROCESSING_ERROR_MESSAGE
+            ))
+        with transaction.atomic():
+            ProblemReport.objects.bulk_create(reports)
+        
+        saved = iter(reports)
+        for result in results:
+            if result['status'] in ('created', 'failed'):
+                report = next(saved)
+                del result['owner'], result['normalized']
+                result.update(id=report.id, recommendations=report.recommendations)
+                if report.error:
+                    result['error'] = report.error
+        for result in results:
+            if result['status'] == 'duplicate':
+                original = results[result['duplicate_of']]
+                result.update(id=original['id'], recommendations=original['recommendations'])
+        
+        logger.info(
+            f"Imported {len(reports)} problem report(s) from a batch of {len(items)} "
+            f"with {len(texts)} recommendation call(s) for user {user.email}"
+        )
+        return results
+    
+    @staticmethod
+    def _resolve_batch_owners(user, items):
+        """Look up the customers named by user_email in one query."""
+        from django.contrib.auth import get_user_model
+        emails = {item['user_email'] for item in items if item.get('user_email')}
+        if not emails:
+            return {}
+        return {owner.email: owner for owner in get_user_model().objects.filter(email__in=emails)}
+    
+    def _generate_batch_recommendations(self, texts):
+        """
+        Generate recommendations for unique texts with bounded concurrency.
+        
+        Args:
+            texts: Normalized text -> problem text
+            
+        Returns:
+            dict: Normalized text -> recommendations, or None if generation failed
+        """
+        def generate(text):
+            try:
+                return self.ai_service.generate_recommendations(text)
+            except Exception as e:
+                logger.error(f"Error generating recommendations in batch: {str(e)}")
+                return None
+        
+        concurrency = min(getattr(settings, 'PROBLEM_BATCH_CONCURRENCY', DEFAULT_BATCH_CONCURRENCY), len(texts))
+        if concurrency <= 1:
+            return {key: generate(text) for key, text in texts.items()}
+        
+        def generate_in_thread(text):
+            try:
+                return generate(text)
+            finally:
+                # The AI service may use the database (e.g. the recommendation cache)
+                connection.close()
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='problem-batch') as executor:
+            return dict(zip(texts, executor.map(generate_in_thread, texts.values())))
+    
     def get_user_problem_reports(self, user, limit: int = None):
         """
         Get all problem reports for a specific user.
@@ -113,3 +702,16 @@ class ProblemReportService:
         except ProblemReport.DoesNotExist:
             logger.warning(f"Problem report {report_id} not found for user {user.email}")
             raise
+    
+    async def aget_problem_report_by_id(self, report_id: int, user) -> ProblemReport:
+        """
+        Get a specific problem report by ID from async code.
+        
+        Same as get_problem_report_by_id(); the report's user is selected
+        so it can be serialized without further queries.
+        """
+        try:
+            return await ProblemReport.objects.select_related('user').aget(id=report_id, user=user)
+        except ProblemReport.DoesNotExist:
+            logger.warning(f"Problem report {report_id} not found for user {user.email}")
+            raise
@@ -0,0 +1,110 @@
+"""
+Streaming of AI recommendations as Server-Sent Events.
+
+The OpenAI completion is read token by token. RecommendationStreamParser
+recognises each recommendation as soon as its Description line is complete,
+so clients can show the first recommendation long before the completion
+ends. Events are written in the text/event-stream format:
+
+    event: recommendation
+    data: {"index": 0, "title": "...", "description": "..."}
+"""
+import json
+from typing import Dict, List
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+FALLBACK_TITLE = 'AI Recommendation'
+
+
+def format_sse(event: str, data) -> str:
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: The event, terminated by a blank line
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f'event: {event}\ndata: {payload}\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accept text/event-stream in content negotiation.
+
+    Streaming views return a StreamingHttpResponse themselves; this renderer
+    only renders their error responses, as a single 'error' event.
+    """
+
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_sse('error', data).encode(self.charset)
+
+
+class RecommendationStreamParser:
+    """
+    Incremental parser for the recommendation format asked of the model.
+
+    Feed it text as it arrives; it returns the recommendations completed by
+    each piece. Parsing the whole text at once gives exactly what
+    AIRecommendationService._parse_openai_response returns.
+    """
+
+    def __init__(self):
+        self.recommendations = []
+        self._content = []
+        self._line = ''
+        self._current = {}
+
+    def feed(self, text: str) -> List[Dict[str, str]]:
+        """
+        Parse the next piece of the completion.
+
+        Returns:
+            Recommendations completed by this piece
+        """
+        self._content.append(text)
+        *lines, self._line = (self._line + text).split('\n')
+        return [recommendation for recommendation in map(self._parse_line, lines) if recommendation]
+
+    def close(self) -> List[Dict[str, str]]:
+        """
+        Parse the final line once the completion has ended.
+
+        If no recommendation was recognised at all, the whole completion
+        becomes a single recommendation.
+
+        Returns:
+            Recommendations completed by the final line
+        """
+        completed = [self._parse_line(self._line)] if self._line else []
+        self._line = ''
+        completed = [recommendation for recommendation in completed if recommendation]
+        if not self.recommendations:
+            recommendation = {'title': FALLBACK_TITLE, 'description': ''.join(self._content).strip()}
+            self.recommendations.append(recommendation)
+            completed.append(recommendation)
+        return completed
+
+    def _parse_line(self, line):
+        line = line.strip()
+
+        if line.startswith('Title:'):
+            self._current['title'] = line.replace('Title:', '').strip()
+        elif line.startswith('Description:'):
+            self._current['description'] = line.replace('Description:', '').strip()
+
+            # If we have both title and description, the recommendation is complete
+            if 'title' in self._current and 'description' in self._current:
+                recommendation, self._current = self._current, {}
+                self.recommendations.append(recommendation)
+                return recommendation
+        return None
@@ -0,0 +1,304 @@
+"""
+Transcription engines and the registry that routes recordings to them.
+
+VoiceTranscriptionService decides what to transcribe (validation, silence
+segmentation); an engine turns one audio file into text:
+
+- whisper: the OpenAI Whisper API. Needs OPENAI_API_KEY, and is skipped while
+  the 'openai-audio' circuit in resilience.py is open.
+- local: Vosk speech recognition on the CPU, without network access. Needs
+  the vosk package and a model directory in TRANSCRIPTION_LOCAL_MODEL_PATH.
+  Vosk reads mono 16-bit PCM WAV; other recordings, such as the Opus files
+  AUDIO_NORMALIZATION stores when ffmpeg is installed, are decoded to WAV
+  with ffmpeg first.
+- fake: deterministic stand-in for tests (apps/problems/fakes.py).
+
+TRANSCRIPTION_ENGINES maps engine names to dotted class paths. Recordings of
+at most TRANSCRIPTION_SHORT_MAX_SECONDS try the engines in
+TRANSCRIPTION_SHORT_ENGINES in order; longer ones, and recordings whose
+length cannot be read from the file, use TRANSCRIPTION_LONG_ENGINES. Engines
+that are not available or cannot decode the format are skipped, and if an
+engine fails, the next one is tried.
+
+No file larger than TRANSCRIPTION_MAX_FILE_SIZE (Whisper's 25 MB by default)
+is sent to an engine whole; VoiceTranscriptionService splits larger ones.
+
+Each engine is instantiated once per process, so a local model loaded for
+one request stays warm for the next.
+"""
+import json
+import os
+import threading
+import wave
+from typing import Iterable, Iterator, List, Optional
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .audio import SNIFF_BYTES, sniff_audio_format
+from .normalization import decode_to_wav, ffmpeg_binary
+from .openai_client import get_openai_client
+from .resilience import get_ai_dependency
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ENGINES = {
+    'whisper': 'apps.problems.transcription_engines.WhisperAPIEngine',
+    'local': 'apps.problems.transcription_engines.VoskEngine',
+    'fake': 'apps.problems.fakes.FakeTranscriptionEngine',
+}
+DEFAULT_SHORT_ENGINES = ['local', 'whisper']
+DEFAULT_LONG_ENGINES = ['whisper', 'local']
+DEFAULT_SHORT_MAX_SECONDS = 30
+# Whisper API limit on the size of one request
+DEFAULT_MAX_FILE_SIZE = 25 * 1024 * 1024
+
+
+class TranscriptionEngine:
+    """
+    Base class for transcription engines.
+
+    Subclasses implement transcribe() and, if they have requirements,
+    is_available() and supports().
+    """
+
+    name = ''
+
+    def is_available(self) -> bool:
+        """Whether the engine can be used in this process."""
+        return True
+
+    def supports(self, audio_format: Optional[str]) -> bool:
+        """
+        Whether the engine can decode a format.
+
+        Args:
+            audio_format: Key of audio.AUDIO_CONTENT_TYPES, or None if unknown
+        """
+        return True
+
+    def transcribe(self, audio_file) -> str:
+        """
+        Transcribe one recording.
+
+        Args:
+            audio_file: Seekable audio file with a name
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            ValueError: If the transcription is empty
+        """
+        raise NotImplementedError
+
+    def transcribe_segment(self, segment_file) -> str:
+        """
+        Transcribe one of several segments of a recording sent in parallel.
+
+        Engines with a concurrency limit wait for a slot here rather than
+        fail the whole recording.
+        """
+        return self.transcribe(segment_file)
+
+
+class WhisperAPIEngine(TranscriptionEngine):
+    """Transcribe with the OpenAI Whisper API."""
+
+    name = 'whisper'
+
+    def is_available(self) -> bool:
+        return bool(settings.OPENAI_API_KEY) and get_ai_dependency('openai-audio').is_available()
+
+    def transcribe(self, audio_file) -> str:
+        return get_ai_dependency('openai-audio').call(lambda timeout: self._transcribe(audio_file, timeout))
+
+    def transcribe_segment(self, segment_file) -> str:
+        # Segments outnumbering the free slots queue for up to one call's timeout
+        dependency = get_ai_dependency('openai-audio')
+        return dependency.call(lambda timeout: self._transcribe(segment_file, timeout), wait=dependency.timeout)
+
+    def _transcribe(self, audio_file, timeout: float) -> str:
+        try:
+            # Reset file pointer to beginning
+            audio_file.seek(0)
+
+            # Call Whisper API; the file name tells it the format
+            response = get_openai_client().audio.transcriptions.create(
+                model="whisper-1",
+                file=(os.path.basename(audio_file.name or 'recording'), audio_file),
+                language="en",  # Can be made configurable
+                timeout=timeout
+            )
+
+            transcription = (response.text or '').strip()
+
+            if not transcription:
+                raise ValueError("Transcription resulted in empty text")
+
+            logger.info(f"Successfully transcribed audio file: {audio_file.name}")
+            return transcription
+
+        except Exception as e:
+            logger.error(f"Whisper API error: {str(e)}")
+            raise
+
+
+class VoskEngine(TranscriptionEngine):
+    """
+    Transcribe on the CPU with a Vosk model.
+
+    The model is loaded on first use and kept for the life of the process;
+    recognizers are cheap and created per recording, so one model serves
+    concurrent transcriptions.
+    """
+
+    name = 'local'
+
+    # Frames fed to the recognizer per call
+    CHUNK_FRAMES = 4000
+
+    def __init__(self):
+        self.model_path = getattr(settings, 'TRANSCRIPTION_LOCAL_MODEL_PATH', '')
+        self._model = None
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        if not self.model_path or not os.path.isdir(self.model_path):
+            return False
+        try:
+            import vosk  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def supports(self, audio_format: Optional[str]) -> bool:
+        return audio_format == 'wav' or (audio_format is not None and ffmpeg_binary() is not None)
+
+    def get_model(self):
+        """Load the model once; later calls return the loaded model."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import vosk
+
+                    logger.info(f"Loading local transcription model from {self.model_path}")
+                    self._model = vosk.Model(self.model_path)
+        return self._model
+
+    def transcribe(self, audio_file) -> str:
+        audio_file.seek(0)
+        if sniff_audio_format(audio_file.read(SNIFF_BYTES)) == 'wav':
+            audio_file.seek(0)
+            try:
+                with wave.open(audio_file, 'rb') as reader:
+                    pcm = reader.getnchannels() == 1 and reader.getsampwidth() == 2
+            except (wave.Error, EOFError):
+                # e.g. float samples, which the wave module cannot read
+                pcm = False
+            if pcm:
+                return self._transcribe_wav(audio_file)
+        if not ffmpeg_binary():
+            raise ValueError("Local transcription needs mono 16-bit WAV audio")
+
+        decoded = decode_to_wav(audio_file)
+        try:
+            return self._transcribe_wav(decoded, audio_file.name)
+        finally:
+            decoded.close()
+
+    def _transcribe_wav(self, audio_file, name=None) -> str:
+        """Transcribe mono 16-bit PCM WAV."""
+        import vosk
+
+        audio_file.seek(0)
+        with wave.open(audio_file, 'rb') as reader:
+            recognizer = vosk.KaldiRecognizer(self.get_model(), reader.getframerate())
+            parts = []
+            while True:
+                frames = reader.readframes(self.CHUNK_FRAMES)
+                if not frames:
+                    break
+                if recognizer.AcceptWaveform(frames):
+                    # End of an utterance; its text is only returned once
+                    parts.append(json.loads(recognizer.Result()).get('text', ''))
+            parts.append(json.loads(recognizer.FinalResult()).get('text', ''))
+
+        transcription = ' '.join(part for part in parts if part).strip()
+        if not transcription:
+            raise ValueError("Transcription resulted in empty text")
+
+        logger.info(f"Transcribed {name or audio_file.name} locally")
+        return transcription
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_transcription_engine(name: str) -> TranscriptionEngine:
+    """
+    Return the process-wide instance of a registered engine.
+
+    Args:
+        name: Key of TRANSCRIPTION_ENGINES
+
+    Raises:
+        KeyError: If no engine is registered under name
+    """
+    with _engines_lock:
+        if name not in _engines:
+            path = getattr(settings, 'TRANSCRIPTION_ENGINES', DEFAULT_ENGINES)[name]
+            _engines[name] = import_string(path)()
+        return _engines[name]
+
+
+def reset_transcription_engines():
+    """Drop every engine instance, e.g. after settings change in tests."""
+    with _engines_lock:
+        _engines.clear()
+
+
+def route_engine_names(duration: Optional[float]) -> List[str]:
+    """
+    Engine names to try for a recording, in order.
+
+    Args:
+        duration: Length in seconds, or None if unknown
+    """
+    short_max = getattr(settings, 'TRANSCRIPTION_SHORT_MAX_SECONDS', DEFAULT_SHORT_MAX_SECONDS)
+    if duration is not None and duration <= short_max:
+        return list(getattr(settings, 'TRANSCRIPTION_SHORT_ENGINES', DEFAULT_SHORT_ENGINES))
+    return list(getattr(settings, 'TRANSCRIPTION_LONG_ENGINES', DEFAULT_LONG_ENGINES))
+
+
+def max_file_size() -> int:
+    """Largest recording, in bytes, an engine is given in one piece."""
+    return getattr(settings, 'TRANSCRIPTION_MAX_FILE_SIZE', DEFAULT_MAX_FILE_SIZE)
+
+
+def candidate_engines(names: Iterable[str], audio_format: Optional[str]) -> Iterator[TranscriptionEngine]:
+    """
+    Engines in names that are available and decode audio_format, in order.
+
+    Availability is checked as each engine is reached, so an engine whose
+    circuit opened while an earlier one was tried is skipped.
+    """
+    for name in names:
+        try:
+            engine = get_transcription_engine(name)
+        except KeyError:
+            logger.warning(f"Unknown transcription engine: {name}")
+            continue
+        if engine.is_available() and engine.supports(audio_format):
+            yield engine
+
+
+def select_engine(names: Iterable[str], audio_format: Optional[str]) -> Optional[TranscriptionEngine]:
+    """
+    First engine in names that is available and decodes audio_format.
+
+    Returns:
+        TranscriptionEngine, or None if none can be used
+    """
+    return next(candidate_engines(names, audio_format), None)
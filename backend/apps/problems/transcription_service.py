@@ -1,9 +1,22 @@
 """
 Voice Transcription Service for converting audio to text.
+
+Each recording is routed by its length to a transcription engine (see
+transcription_engines.py). Long PCM WAV recordings are split on silence into
+segments of about AUDIO_SEGMENT_SECONDS, which are transcribed in parallel
+and joined. Compressed recordings larger than TRANSCRIPTION_MAX_FILE_SIZE are
+decoded to WAV with ffmpeg first, and refused if it is not installed.
 """
-from typing import Optional
+import os
+import tempfile
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
+from .audio import SNIFF_BYTES, plan_wav_segments, sniff_audio_format, write_wav_segment
+from .normalization import decode_to_wav, ffmpeg_binary
+from .transcription_engines import TranscriptionEngine, candidate_engines, max_file_size, route_engine_names
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,8 +35,19 @@ class VoiceTranscriptionService:
     # Maximum file size (10 MB)
     MAX_FILE_SIZE = 10 * 1024 * 1024
     
-    def __init__(self):
-        self.api_key = settings.OPENAI_API_KEY
+    DEFAULT_SEGMENT_SECONDS = 60
+    DEFAULT_SEGMENT_MAX_SECONDS = 120
+    DEFAULT_CONCURRENCY = 4
+    
+    UNAVAILABLE_MESSAGE = (
+        "Voice transcription is currently unavailable. "
+        "Please use text input or contact support."
+    )
+    
+    TOO_LARGE_MESSAGE = (
+        "Compressed recordings may be at most {max_size_mb:.0f}MB. "
+        "Please upload longer recordings as WAV."
+    )
     
     def validate_audio_file(self, audio_file: UploadedFile) -> tuple[bool, Optional[str]]:
         """
@@ -51,38 +75,30 @@ class VoiceTranscriptionService:
         
         return True, None
     
-    def transcribe_audio(self, audio_file: UploadedFile) -> str:
+    def transcribe_audio(self, audio_file: UploadedFile, validate: bool = True) -> str:
         """
         Transcribe audio file to text.
         
         Args:
-            audio_file: The uploaded audio file
+            audio_file: The uploaded audio file, or a stored FieldFile
+            validate: Whether to validate the file first; pass False for files
+                that were validated when they were uploaded
             
         Returns:
             Transcribed text
             
         Raises:
-            ValueError: If audio file validation fails
+            ValueError: If audio file validation fails or no engine is available
             Exception: If transcription fails
         """
         # Validate audio file
-        is_valid, error_message = self.validate_audio_file(audio_file)
-        if not is_valid:
-            raise ValueError(error_message)
+        if validate:
+            is_valid, error_message = self.validate_audio_file(audio_file)
+            if not is_valid:
+                raise ValueError(error_message)
         
         try:
-            if self.api_key:
-                # Use OpenAI Whisper API for transcription
-                transcription = self._transcribe_with_whisper(audio_file)
-            else:
-                # Fallback error when API key is not configured
-                logger.error("OpenAI API key not configured for transcription")
-                raise ValueError(
-                    "Voice transcription is currently unavailable. "
-                    "Please use text input or contact support."
-                )
-            
-            return transcription
+            return self._transcribe(audio_file)
             
         except ValueError:
             # Re-raise validation errors
@@ -94,42 +110,133 @@ class VoiceTranscriptionService:
                 "Please try again or use text input instead."
             )
     
-    def _transcribe_with_whisper(self, audio_file: UploadedFile) -> str:
+    def engine_names(self, duration: Optional[float]) -> List[str]:
         """
-        Transcribe audio using OpenAI Whisper API.
+        Names of the engines to try for a recording, in order.
         
         Args:
-            audio_file: The uploaded audio file
+            duration: Length in seconds, or None if unknown
+        """
+        return route_engine_names(duration)
+    
+    def _transcribe(self, audio_file) -> str:
+        """
+        Transcribe a recording, in parallel segments if it is a long WAV file.
+        
+        Compressed recordings too large for an engine are decoded to WAV
+        with ffmpeg so that they can be split.
+        
+        Args:
+            audio_file: Seekable audio file
             
         Returns:
             Transcribed text
+            
+        Raises:
+            ValueError: If no engine can transcribe the recording, or it is
+                too large and ffmpeg is not installed
         """
+        audio_file.seek(0)
+        audio_format = sniff_audio_format(audio_file.read(SNIFF_BYTES))
+        audio_file.seek(0, os.SEEK_END)
+        size = audio_file.tell()
+        audio_file.seek(0)
+        
+        if audio_format == 'wav' or size <= max_file_size():
+            return self._transcribe_file(audio_file, audio_format)
+        if not ffmpeg_binary():
+            logger.error(f"Cannot split {audio_file.name}: {size} bytes of {audio_format or 'unknown'} audio without ffmpeg")
+            raise ValueError(self.TOO_LARGE_MESSAGE.format(max_size_mb=max_file_size() / (1024 * 1024)))
+        
+        decoded = decode_to_wav(audio_file)
         try:
-            import openai
-            
-            openai.api_key = self.api_key
-            
-            # Reset file pointer to beginning
-            audio_file.seek(0)
-            
-            # Call Whisper API
-            response = openai.Audio.transcribe(
-                model="whisper-1",
-                file=audio_file,
-                language="en"  # Can be made configurable
-            )
-            
-            transcription = response.get('text', '').strip()
-            
-            if not transcription:
-                raise ValueError("Transcription resulted in empty text")
+            return self._transcribe_file(decoded, 'wav')
+        finally:
+            decoded.close()
+    
+    def _transcribe_file(self, audio_file, audio_format: Optional[str]) -> str:
+        """
+        Transcribe a recording whose format is known, splitting long WAV files.
+        
+        Engines are tried in route order until one succeeds.
+        """
+        segments = []
+        duration = None
+        if audio_format == 'wav':
+            try:
+                segments, frame_rate = plan_wav_segments(
+                    audio_file,
+                    getattr(settings, 'AUDIO_SEGMENT_SECONDS', self.DEFAULT_SEGMENT_SECONDS),
+                    getattr(settings, 'AUDIO_SEGMENT_MAX_SECONDS', self.DEFAULT_SEGMENT_MAX_SECONDS)
+                )
+                duration = segments[-1][1] / frame_rate if frame_rate else None
+            except (wave.Error, EOFError) as e:
+                # Not PCM (e.g. float samples); let the engine handle it whole
+                logger.info(f"Not splitting {audio_file.name}: {str(e)}")
+                segments = []
+        
+        error = None
+        for engine in candidate_engines(self.engine_names(duration), audio_format):
+            try:
+                if len(segments) <= 1:
+                    audio_file.seek(0)
+                    return engine.transcribe(audio_file)
+                return self._transcribe_segments(audio_file, segments, engine)
+            except Exception as e:
+                # Try the next routed engine; report the last failure if none is left
+                logger.warning(f"The {engine.name} engine failed on {audio_file.name}: {str(e)}")
+                error = e
+        
+        if error is not None:
+            raise error
+        logger.error(f"No transcription engine available for {audio_format or 'unknown'} audio")
+        raise ValueError(self.UNAVAILABLE_MESSAGE)
+    
+    def _transcribe_segments(self, audio_file, segments, engine: TranscriptionEngine) -> str:
+        """
+        Transcribe WAV segments in parallel and join the text in order.
+        
+        Args:
+            audio_file: Seekable WAV file
+            segments: List of (start_frame, end_frame)
+            engine: Engine chosen for the whole recording
             
-            logger.info(f"Successfully transcribed audio file: {audio_file.name}")
-            return transcription
+        Returns:
+            Transcribed text
+        """
+        segment_files = []
+        try:
+            # Write every segment first; the source file cannot be shared between threads
+            for index, (start, end) in enumerate(segments):
+                segment_file = tempfile.NamedTemporaryFile(prefix=f'segment-{index}-', suffix='.wav')
+                segment_files.append(segment_file)
+                write_wav_segment(audio_file, start, end, segment_file)
+                segment_file.seek(0)
             
-        except ImportError:
-            logger.error("OpenAI library not installed. Install with: pip install openai")
-            raise Exception("Voice transcription service is not properly configured")
-        except Exception as e:
-            logger.error(f"Whisper API error: {str(e)}")
-            raise
+            workers = min(getattr(settings, 'AUDIO_TRANSCRIPTION_CONCURRENCY', self.DEFAULT_CONCURRENCY), len(segment_files))
+            with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='transcription') as executor:
+                try:
+                    texts = list(executor.map(lambda segment_file: self._transcribe_segment(engine, segment_file), segment_files))
+                except Exception:
+                    # One failed segment fails the engine; drop the segments not yet started
+                    executor.shutdown(cancel_futures=True)
+                    raise
+        finally:
+            for segment_file in segment_files:
+                segment_file.close()
+        
+        transcription = ' '.join(text for text in texts if text)
+        if not transcription:
+            raise ValueError("Transcription resulted in empty text")
+        
+        logger.info(f"Transcribed {audio_file.name} in {len(segments)} segments with the {engine.name} engine")
+        return transcription
+    
+    @staticmethod
+    def _transcribe_segment(engine: TranscriptionEngine, segment_file) -> str:
+        """Transcribe one segment; silent segments may yield no text."""
+        try:
+            return engine.transcribe_segment(segment_file).strip()
+        except ValueError:
+            # Empty transcription of a segment that was all silence
+            return ''
@@ -0,0 +1,280 @@
+"""
+Resumable chunked uploads of voice recordings.
+
+A client declares the recording's size, then sends it in chunks with the
+offset each chunk starts at. Chunks are streamed from the request straight to
+a temporary file in AUDIO_UPLOAD_DIR in small pieces, never held in memory
+whole. If a connection drops, the client asks for the current offset and
+resends from there. The format is detected from the file's magic bytes when
+the first chunk arrives; the client's content type is never trusted. Once
+every byte has arrived, completing the upload turns it into a voice problem
+report. Compressed recordings too large to transcribe whole can only be split
+after ffmpeg decodes them, so without ffmpeg they are refused at the first
+chunk rather than after the whole file has arrived.
+
+``manage.py purge_audio_uploads`` removes uploads abandoned part way.
+"""
+import os
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+from .audio import AUDIO_CONTENT_TYPES, SNIFF_BYTES, sniff_audio_format
+from .models import AudioUpload
+from .normalization import ffmpeg_binary
+from .transcription_engines import max_file_size
+from .transcription_service import VoiceTranscriptionService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+DEFAULT_MAX_CHUNK_SIZE = 5 * 1024 * 1024
+DEFAULT_EXPIRY_HOURS = 24
+
+# Bytes copied from the request per read
+COPY_BUFFER_SIZE = 64 * 1024
+
+UNSUPPORTED_FORMAT_MESSAGE = 'Unsupported audio format. Supported formats: MP3, WAV, OGG, WEBM, M4A, FLAC'
+
+
+class UploadOffsetMismatch(Exception):
+    """A chunk did not start where the upload left off."""
+
+    def __init__(self, offset):
+        self.offset = offset
+        super().__init__(f'Upload is at offset {offset}')
+
+
+class AudioUploadService:
+    """Service for resumable audio uploads."""
+
+    @staticmethod
+    def max_size():
+        return getattr(settings, 'AUDIO_UPLOAD_MAX_SIZE', DEFAULT_MAX_SIZE)
+
+    @staticmethod
+    def max_chunk_size():
+        return getattr(settings, 'AUDIO_UPLOAD_MAX_CHUNK_SIZE', DEFAULT_MAX_CHUNK_SIZE)
+
+    @staticmethod
+    def upload_dir():
+        """Directory holding partial uploads, created on demand."""
+        path = getattr(settings, 'AUDIO_UPLOAD_DIR', '') or os.path.join(tempfile.gettempdir(), 'audio_uploads')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @classmethod
+    def file_path(cls, upload):
+        """Path of the temporary file an upload is assembled in."""
+        return os.path.join(cls.upload_dir(), f'{upload.id}.part')
+
+    @classmethod
+    def create_upload(cls, user, filename, size):
+        """
+        Start an upload.
+
+        Args:
+            user: The uploading user
+            filename: Client file name, used for the stored recording
+            size: Total size in bytes
+
+        Returns:
+            AudioUpload: The new upload at offset 0
+
+        Raises:
+            ValueError: If size exceeds AUDIO_UPLOAD_MAX_SIZE
+        """
+        if size > cls.max_size():
+            raise ValueError(f"Audio file size exceeds maximum limit of {cls.max_size() / (1024 * 1024):.0f}MB")
+
+        upload = AudioUpload.objects.create(user=user, filename=os.path.basename(filename), size=size)
+        open(cls.file_path(upload), 'wb').close()
+        logger.info(f"Started audio upload {upload.id} of {size} bytes for user {user.email}")
+        return upload
+
+    @staticmethod
+    def get_upload(upload_id, user):
+        """
+        Get one of a user's uploads.
+
+        Raises:
+            AudioUpload.DoesNotExist: If not found or owned by someone else
+        """
+        return AudioUpload.objects.get(id=upload_id, user=user)
+
+    @classmethod
+    def append_chunk(cls, upload_id, user, offset, stream, length):
+        """
+        Write a chunk to an upload, streaming it from the request.
+
+        The upload row stays locked while the chunk is written, so concurrent
+        retries of a chunk cannot interleave. A chunk cut short by a dropped
+        connection still advances the offset by the bytes that arrived.
+
+        Args:
+            upload_id: Upload ID
+            user: The uploading user
+            offset: Where the chunk starts; must equal the upload's offset
+            stream: File-like request body
+            length: Chunk length from Content-Length
+
+        Returns:
+            AudioUpload: The upload with its new offset
+
+        Raises:
+            AudioUpload.DoesNotExist: If the upload is not found
+            UploadOffsetMismatch: If offset is not the upload's offset
+            ValueError: If the chunk is too large, overruns the declared size,
+                or the upload is finished; or if the first bytes are not audio,
+                or are a compressed recording that cannot be transcribed,
+                which aborts the upload
+        """
+        if length > cls.max_chunk_size():
+            raise ValueError(f'Chunks may be at most {cls.max_chunk_size()} bytes')
+
+        with transaction.atomic():
+            upload = AudioUpload.objects.select_for_update().get(id=upload_id, user=user)
+            if upload.status != 'UPLOADING':
+                raise ValueError(f'Upload is {upload.status.lower()}')
+            if offset != upload.offset:
+                raise UploadOffsetMismatch(upload.offset)
+            if offset + length > upload.size:
+                raise ValueError(f'Chunk ends past the declared size of {upload.size} bytes')
+
+            received = 0
+            with open(cls.file_path(upload), 'r+b') as part:
+                part.seek(offset)
+                # Drop anything a failed earlier attempt left past the offset
+                part.truncate()
+                while received < length:
+                    try:
+                        data = stream.read(min(COPY_BUFFER_SIZE, length - received))
+                    except UnreadablePostError:
+                        # Client went away; keep what arrived so it can resume
+                        break
+                    if not data:
+                        break
+                    part.write(data)
+                    received += len(data)
+
+            upload.offset = offset + received
+            error = None
+            if offset < SNIFF_BYTES <= upload.offset or upload.offset == upload.size:
+                upload.audio_format = cls._sniff(upload) or ''
+                error = cls._format_error(upload)
+                if error:
+                    # Refuse the rest of it
+                    upload.status = 'ABORTED'
+            upload.save(update_fields=['offset', 'audio_format', 'status', 'updated_at'])
+
+        if error:
+            cls._remove_file(upload)
+            raise ValueError(error)
+        if received < length:
+            logger.warning(f"Audio upload {upload.id} chunk cut short at {received} of {length} bytes")
+        return upload
+
+    @classmethod
+    def _sniff(cls, upload):
+        with open(cls.file_path(upload), 'rb') as part:
+            return sniff_audio_format(part.read(SNIFF_BYTES))
+
+    @staticmethod
+    def _format_error(upload):
+        """Why an upload of the sniffed format cannot be transcribed, or None."""
+        if not upload.audio_format:
+            return UNSUPPORTED_FORMAT_MESSAGE
+        if upload.audio_format != 'wav' and upload.size > max_file_size() and not ffmpeg_binary():
+            return VoiceTranscriptionService.TOO_LARGE_MESSAGE.format(max_size_mb=max_file_size() / (1024 * 1024))
+        return None
+
+    @classmethod
+    def complete_upload(cls, upload_id, user, process_async=False):
+        """
+        Turn a fully received upload into a voice problem report.
+
+        Args:
+            upload_id: Upload ID
+            user: The uploading user
+            process_async: Process the report in the background
+
+        Returns:
+            ProblemReport: PROCESSING if process_async, else processed
+
+        Raises:
+            AudioUpload.DoesNotExist: If the upload is not found
+            ValueError: If bytes are missing or the upload is not in progress
+        """
+        from .services import ProblemReportService
+
+        with transaction.atomic():
+            upload = AudioUpload.objects.select_for_update().get(id=upload_id, user=user)
+            if upload.status != 'UPLOADING':
+                raise ValueError(f'Upload is {upload.status.lower()}')
+            if upload.offset != upload.size:
+                raise ValueError(f'Upload is incomplete: {upload.offset} of {upload.size} bytes received')
+            audio_format = upload.audio_format or cls._sniff(upload)
+            if audio_format not in AUDIO_CONTENT_TYPES:
+                raise ValueError(UNSUPPORTED_FORMAT_MESSAGE)
+
+            stem = os.path.splitext(upload.filename)[0] or 'recording'
+            service = ProblemReportService()
+            with open(cls.file_path(upload), 'rb') as recording:
+                report = service.submit_recording(user, recording, f'{stem}.{audio_format}', process_async)
+
+            upload.status = 'COMPLETED'
+            upload.problem_report = report
+            upload.save(update_fields=['status', 'problem_report', 'updated_at'])
+        cls._remove_file(upload)
+
+        if not process_async:
+            report = service.process_problem_report(report.id) or report
+        return report
+
+    @classmethod
+    def abort_upload(cls, upload_id, user):
+        """
+        Abandon an upload and delete its data.
+
+        Raises:
+            AudioUpload.DoesNotExist: If the upload is not found
+        """
+        with transaction.atomic():
+            # Same lock as append_chunk, so a chunk being written finishes first
+            upload = AudioUpload.objects.select_for_update().get(id=upload_id, user=user)
+            if upload.status != 'UPLOADING':
+                return upload
+            upload.status = 'ABORTED'
+            upload.save(update_fields=['status', 'updated_at'])
+        cls._remove_file(upload)
+        return upload
+
+    @classmethod
+    def _remove_file(cls, upload):
+        try:
+            os.remove(cls.file_path(upload))
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def purge_expired(cls, max_age=None):
+        """
+        Abort uploads with no chunk for AUDIO_UPLOAD_EXPIRY_HOURS.
+
+        Args:
+            max_age: Optional timedelta overriding the setting
+
+        Returns:
+            int: Number of uploads aborted
+        """
+        if max_age is None:
+            max_age = timedelta(hours=getattr(settings, 'AUDIO_UPLOAD_EXPIRY_HOURS', DEFAULT_EXPIRY_HOURS))
+        expired = list(AudioUpload.objects.filter(status='UPLOADING', updated_at__lt=timezone.now() - max_age))
+        for upload in expired:
+            cls._remove_file(upload)
+        AudioUpload.objects.filter(id__in=[upload.id for upload in expired]).update(status='ABORTED')
+        return len(expired)
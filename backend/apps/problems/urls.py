@@ -1,7 +1,17 @@
 from django.urls import path
+from core.async_views import select_view
 from .views import (
+    AIStatusView,
+    AsyncProblemReportCreateView,
+    AsyncProblemReportDetailView,
+    AsyncProblemReportStreamView,
+    AudioUploadCompleteView,
+    AudioUploadCreateView,
+    AudioUploadDetailView,
+    ProblemReportBatchCreateView,
     ProblemReportCreateView,
     ProblemReportListView,
+    ProblemReportStreamView,
     ProblemReportDetailView
 )
 
@@ -9,6 +19,24 @@ app_name = 'problems'
 
 urlpatterns = [
     path('', ProblemReportListView.as_view(), name='problem-list'),
-    path('create/', ProblemReportCreateView.as_view(), name='problem-create'),
-    path('<int:pk>/', ProblemReportDetailView.as_view(), name='problem-detail'),
+    path(
+        'create/',
+        select_view(ProblemReportCreateView.as_view(), AsyncProblemReportCreateView.as_view()),
+        name='problem-create'
+    ),
+    path(
+        'stream/',
+        select_view(ProblemReportStreamView.as_view(), AsyncProblemReportStreamView.as_view()),
+        name='problem-stream'
+    ),
+    path('batch/', ProblemReportBatchCreateView.as_view(), name='problem-batch-create'),
+    path(
+        '<int:pk>/',
+        select_view(ProblemReportDetailView.as_view(), AsyncProblemReportDetailView.as_view()),
+        name='problem-detail'
+    ),
+    path('uploads/', AudioUploadCreateView.as_view(), name='audio-upload-create'),
+    path('uploads/<uuid:pk>/', AudioUploadDetailView.as_view(), name='audio-upload-detail'),
+    path('uploads/<uuid:pk>/complete/', AudioUploadCompleteView.as_view(), name='audio-upload-complete'),
+    path('ai-status/', AIStatusView.as_view(), name='ai-status'),
 ]
@@ -1,23 +1,70 @@
 """
 API views for problem reporting.
 """
+import asyncio
+import time
+from contextlib import aclosing
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import JSONRenderer
 from django.core.exceptions import ValidationError as DjangoValidationError
-from .models import ProblemReport
+from core.async_views import AsyncAPIView
+from core.permissions import IsAdmin
+from .models import AudioUpload, ProblemReport
 from .serializers import (
+    AudioUploadCreateSerializer,
+    AudioUploadSerializer,
+    ProblemBatchCreateSerializer,
+    ProblemBatchItemSerializer,
     ProblemReportCreateSerializer,
     ProblemReportSerializer,
-    ProblemReportListSerializer
+    ProblemReportListSerializer,
+    ProblemReportStreamSerializer
 )
+from .resilience import dependency_snapshots
 from .services import ProblemReportService
+from .streaming import EventStreamRenderer, format_sse
+from .uploads import AudioUploadService, UploadOffsetMismatch
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_MAX_WAIT = 3
+DEFAULT_ASYNC_MAX_WAIT = 25
+DEFAULT_BATCH_MAX_ITEMS = 100
+
+# Seconds between status checks while a detail request long-polls
+POLL_INTERVAL = 0.25
+
+
+def wants_async_processing(request):
+    """
+    Check whether a report should be processed in the background.
+    
+    PROBLEM_REPORTS_ASYNC sets the default; clients can override it with
+    ``?async=true`` or ``?async=false``.
+    """
+    value = request.query_params.get('async')
+    if value is None:
+        return getattr(settings, 'PROBLEM_REPORTS_ASYNC', False)
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def requested_wait(request, limit):
+    """Parse ?wait=N seconds, clamped to limit."""
+    try:
+        wait = float(request.query_params.get('wait', 0))
+    except ValueError:
+        return 0
+    return max(0, min(wait, limit))
+
+
 class ProblemReportCreateView(generics.CreateAPIView):
     """
     API endpoint for creating problem reports.
@@ -26,6 +73,10 @@ class ProblemReportCreateView(generics.CreateAPIView):
     - Accepts text or voice input
     - Generates AI recommendations
     - Returns problem report with recommendations
+    
+    In async mode (PROBLEM_REPORTS_ASYNC or ?async=true) the report is
+    returned at once with status PROCESSING and 202 Accepted; poll the
+    detail endpoint for the recommendations.
     """
     serializer_class = ProblemReportCreateSerializer
     permission_classes = [IsAuthenticated]
@@ -42,8 +93,20 @@ class ProblemReportCreateView(generics.CreateAPIView):
             problem_text = serializer.validated_data.get('problem_text')
             audio_file = serializer.validated_data.get('audio_file')
             
-            # Create problem report using service
             service = ProblemReportService()
+            if wants_async_processing(request):
+                problem_report = service.submit_problem_report(
+                    user=request.user,
+                    input_type=input_type,
+                    problem_text=problem_text,
+                    audio_file=audio_file
+                )
+                return Response(
+                    ProblemReportSerializer(problem_report).data,
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
+            # Create problem report using service
             problem_report = service.create_problem_report(
                 user=request.user,
                 input_type=input_type,
@@ -73,6 +136,196 @@ class ProblemReportCreateView(generics.CreateAPIView):
             )
 
 
+class AsyncProblemReportCreateView(AsyncAPIView):
+    """
+    ProblemReportCreateView for ASGI servers.
+    
+    POST /api/problems/create/
+    Same requests and responses; the AI call of a text report is awaited
+    instead of holding a worker thread.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    
+    async def post(self, request, *args, **kwargs):
+        """Handle problem report creation."""
+        serializer = ProblemReportCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        
+        input_type = serializer.validated_data.get('input_type')
+        problem_text = serializer.validated_data.get('problem_text')
+        audio_file = serializer.validated_data.get('audio_file')
+        
+        service = ProblemReportService()
+        try:
+            if wants_async_processing(request):
+                problem_report = await sync_to_async(service.submit_problem_report)(
+                    user=request.user,
+                    input_type=input_type,
+                    problem_text=problem_text,
+                    audio_file=audio_file
+                )
+                return Response(
+                    ProblemReportSerializer(problem_report).data,
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
+            problem_report = await service.acreate_problem_report(
+                user=request.user,
+                input_type=input_type,
+                problem_text=problem_text,
+                audio_file=audio_file
+            )
+            return Response(
+                ProblemReportSerializer(problem_report).data,
+                status=status.HTTP_201_CREATED
+            )
+            
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error creating problem report: {str(e)}")
+            return Response(
+                {'error': 'Failed to process problem report. Please try again.'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ProblemReportStreamView(generics.GenericAPIView):
+    """
+    API endpoint streaming the recommendations for a text problem.
+    
+    POST /api/problems/stream/
+    - Accepts {"problem_text": "..."}
+    - Responds with Server-Sent Events: 'report' with the new report's id,
+      'token' for each piece of the AI completion, 'recommendation' as soon
+      as each recommendation is complete, and 'done' with the final list,
+      which is also saved to the report
+    """
+    serializer_class = ProblemReportStreamSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, FormParser]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    
+    def post(self, request, *args, **kwargs):
+        """Stream a new report's recommendations."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        events = ProblemReportService().stream_problem_report(
+            request.user,
+            serializer.validated_data['problem_text']
+        )
+        response = StreamingHttpResponse(
+            (format_sse(event, payload) for event, payload in events),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class AsyncProblemReportStreamView(AsyncAPIView):
+    """
+    ProblemReportStreamView for ASGI servers.
+    
+    POST /api/problems/stream/
+    Same events; the completion is read from the AsyncOpenAI client and each
+    event is sent as it arrives. Django would read the sync view's generator
+    to the end before sending anything under ASGI.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, FormParser]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    
+    async def post(self, request, *args, **kwargs):
+        """Stream a new report's recommendations."""
+        serializer = ProblemReportStreamSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        events = ProblemReportService().astream_problem_report(
+            request.user,
+            serializer.validated_data['problem_text']
+        )
+        response = StreamingHttpResponse(self._format(events), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @staticmethod
+    async def _format(events):
+        # Close the OpenAI stream as soon as the client goes away
+        async with aclosing(events):
+            async for event, payload in events:
+                yield format_sse(event, payload)
+
+
+class ProblemReportBatchCreateView(generics.GenericAPIView):
+    """
+    API endpoint for importing text problem reports in bulk.
+    
+    POST /api/problems/batch/
+    - Admin only; accepts up to PROBLEM_BATCH_MAX_ITEMS problems
+    - Each item may name the customer it belongs to with user_email
+    - Identical texts share one recommendation call and repeated texts for
+      the same customer are saved once
+    - Returns a result per item in input order; invalid items do not
+      reject the rest of the batch
+    """
+    serializer_class = ProblemBatchCreateSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['max_items'] = getattr(settings, 'PROBLEM_BATCH_MAX_ITEMS', DEFAULT_BATCH_MAX_ITEMS)
+        return context
+    
+    def post(self, request, *args, **kwargs):
+        """Handle a batch import."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        results = []
+        valid_items = []
+        valid_indexes = []
+        for index, item in enumerate(serializer.validated_data['problems']):
+            item_serializer = ProblemBatchItemSerializer(data=item)
+            if item_serializer.is_valid():
+                valid_indexes.append(index)
+                valid_items.append(item_serializer.validated_data)
+                results.append(None)
+            else:
+                results.append({
+                    'index': index,
+                    'reference': item.get('reference'),
+                    'status': 'invalid',
+                    'errors': item_serializer.errors
+                })
+        
+        if valid_items:
+            service = ProblemReportService()
+            for result in service.create_problem_report_batch(request.user, valid_items):
+                # Map positions among valid items back to request positions
+                result['index'] = valid_indexes[result['index']]
+                if 'duplicate_of' in result:
+                    result['duplicate_of'] = valid_indexes[result['duplicate_of']]
+                results[result['index']] = result
+        
+        summary = {
+            outcome: sum(1 for result in results if result['status'] == outcome)
+            for outcome in ('created', 'duplicate', 'failed', 'invalid')
+        }
+        return Response(
+            {**summary, 'results': results},
+            status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK
+        )
+
+
 class ProblemReportListView(generics.ListAPIView):
     """
     API endpoint for listing user's problem reports.
@@ -97,6 +350,10 @@ class ProblemReportDetailView(generics.RetrieveAPIView):
     GET /api/problems/{id}/
     - Returns detailed problem report with recommendations
     - Users can only access their own reports
+    - ?wait=N holds the request for up to N seconds (capped at
+      PROBLEM_REPORT_MAX_WAIT) while the report is still PROCESSING.
+      The wait occupies a worker thread, so the cap is kept short; see
+      AsyncProblemReportDetailView for long waits
     """
     serializer_class = ProblemReportSerializer
     permission_classes = [IsAuthenticated]
@@ -107,7 +364,191 @@ class ProblemReportDetailView(generics.RetrieveAPIView):
         service = ProblemReportService()
         
         try:
-            return service.get_problem_report_by_id(report_id, self.request.user)
+            report = service.get_problem_report_by_id(report_id, self.request.user)
+        except ProblemReport.DoesNotExist:
+            from rest_framework.exceptions import NotFound
+            raise NotFound('Problem report not found or you do not have access to it.')
+        
+        if report.status == 'PROCESSING' and self._wait_seconds():
+            self._wait_for_processing(report)
+        return report
+    
+    def _wait_seconds(self):
+        """Parse ?wait=N, clamped to PROBLEM_REPORT_MAX_WAIT."""
+        return requested_wait(self.request, getattr(settings, 'PROBLEM_REPORT_MAX_WAIT', DEFAULT_MAX_WAIT))
+    
+    def _wait_for_processing(self, report):
+        """Long-poll until the report leaves PROCESSING or the wait expires."""
+        deadline = time.monotonic() + self._wait_seconds()
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            if not ProblemReport.objects.filter(id=report.id, status='PROCESSING').exists():
+                report.refresh_from_db()
+                return
+
+
+class AsyncProblemReportDetailView(AsyncAPIView):
+    """
+    ProblemReportDetailView for ASGI servers.
+    
+    GET /api/problems/{id}/
+    Same responses; ?wait=N long-polls on the event loop without holding a
+    thread, so it is capped by the longer PROBLEM_REPORT_ASYNC_MAX_WAIT.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    async def get(self, request, pk):
+        """Get the report, waiting while it is PROCESSING if asked to."""
+        try:
+            report = await ProblemReportService().aget_problem_report_by_id(pk, request.user)
         except ProblemReport.DoesNotExist:
             from rest_framework.exceptions import NotFound
             raise NotFound('Problem report not found or you do not have access to it.')
+        
+        wait = requested_wait(
+            request,
+            getattr(settings, 'PROBLEM_REPORT_ASYNC_MAX_WAIT', DEFAULT_ASYNC_MAX_WAIT)
+        )
+        if report.status == 'PROCESSING' and wait:
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(POLL_INTERVAL)
+                if not await ProblemReport.objects.filter(id=report.id, status='PROCESSING').aexists():
+                    await report.arefresh_from_db()
+                    break
+        
+        return Response(ProblemReportSerializer(report).data)
+
+
+class AudioUploadCreateView(generics.GenericAPIView):
+    """
+    API endpoint for starting a chunked voice recording upload.
+    
+    POST /api/problems/uploads/
+    - Body: {"filename": "...", "size": total_bytes}
+    - Returns the upload with its id, offset 0 and max_chunk_size
+    """
+    serializer_class = AudioUploadCreateSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = AudioUploadService.create_upload(
+                request.user,
+                serializer.validated_data['filename'],
+                serializer.validated_data['size']
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = AudioUploadSerializer(upload).data
+        data['max_chunk_size'] = AudioUploadService.max_chunk_size()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class AudioUploadDetailView(generics.GenericAPIView):
+    """
+    API endpoint for one chunked upload.
+    
+    GET /api/problems/uploads/{id}/
+    - Returns the upload; offset is where the next chunk must start
+    
+    PATCH /api/problems/uploads/{id}/
+    - Raw chunk bytes as the body, with an Upload-Offset header giving the
+      offset it starts at
+    - 409 Conflict with the current offset if the chunk does not start there
+    
+    DELETE /api/problems/uploads/{id}/
+    - Abandons the upload
+    """
+    serializer_class = AudioUploadSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def _not_found(self):
+        from rest_framework.exceptions import NotFound
+        return NotFound('Upload not found or you do not have access to it.')
+    
+    def get(self, request, pk):
+        try:
+            upload = AudioUploadService.get_upload(pk, request.user)
+        except AudioUpload.DoesNotExist:
+            raise self._not_found()
+        return Response(AudioUploadSerializer(upload).data)
+    
+    def patch(self, request, pk):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Upload-Offset and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            # The body is read from the raw stream, never through request.data
+            upload = AudioUploadService.append_chunk(pk, request.user, offset, request.stream, length)
+        except AudioUpload.DoesNotExist:
+            raise self._not_found()
+        except UploadOffsetMismatch as e:
+            return Response(
+                {'error': 'Chunk does not start at the upload offset.', 'offset': e.offset},
+                status=status.HTTP_409_CONFLICT
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AudioUploadSerializer(upload).data)
+    
+    def delete(self, request, pk):
+        try:
+            AudioUploadService.abort_upload(pk, request.user)
+        except AudioUpload.DoesNotExist:
+            raise self._not_found()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AudioUploadCompleteView(generics.GenericAPIView):
+    """
+    API endpoint for turning a finished upload into a voice problem report.
+    
+    POST /api/problems/uploads/{id}/complete/
+    - Returns the problem report like the create endpoint (202 Accepted in
+      async mode, 201 Created otherwise)
+    """
+    serializer_class = ProblemReportSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, pk):
+        process_async = wants_async_processing(request)
+        try:
+            report = AudioUploadService.complete_upload(pk, request.user, process_async=process_async)
+        except AudioUpload.DoesNotExist:
+            from rest_framework.exceptions import NotFound
+            raise NotFound('Upload not found or you do not have access to it.')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if report.status == 'FAILED':
+            return Response({'error': report.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(
+            ProblemReportSerializer(report).data,
+            status=status.HTTP_202_ACCEPTED if process_async else status.HTTP_201_CREATED
+        )
+
+
+class AIStatusView(generics.GenericAPIView):
+    """
+    API endpoint reporting the health of the external AI APIs.
+    
+    GET /api/problems/ai-status/
+    - Admin only
+    - Per dependency called by this process: circuit state, call and
+      rejection counts, and a latency histogram
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request, *args, **kwargs):
+        """Return the state of every AI dependency."""
+        return Response({'dependencies': dependency_snapshots()})
@@ -1,10 +1,15 @@
 """
 Service layer for service request management business logic.
 """
+from asgiref.sync import sync_to_async
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from core.email_service import EmailNotificationService
 from core.exceptions import ValidationException, NotFoundException, PermissionDeniedException
+from core.identity import get_identity
+from apps.analytics.counters import CounterService
+from apps.notifications.services import NotificationDigestService, NotificationPreferenceService
 from .models import ServiceRequest
 from apps.services.models import Service
 
@@ -30,7 +35,7 @@ class ServiceRequestService:
             NotFoundException: If service not found
         """
         # Validate requester role
-        if requester.role != 'REGULAR':
+        if not get_identity(requester).is_regular:
             raise ValidationException(
                 "Only regular users can create service requests.",
                 details={'role': 'Invalid user role'}
@@ -38,19 +43,23 @@ class ServiceRequestService:
         
         # Get service
         try:
-            service = Service.objects.select_related('provider').get(id=service_id, is_active=True)
+            service = Service.objects.select_related(
+                'provider__provider_profile'
+            ).get(id=service_id, is_active=True)
         except Service.DoesNotExist:
             raise NotFoundException(f"Service with ID {service_id} not found or is inactive.")
         
+        provider_identity = get_identity(service.provider)
+        
         # Validate provider is approved
-        if service.provider.role != 'PROVIDER':
+        if not provider_identity.is_provider:
             raise ValidationException(
                 "Service provider is not valid.",
                 details={'provider': 'Invalid provider'}
             )
         
         # Check if provider has an approved profile
-        if not hasattr(service.provider, 'provider_profile') or service.provider.provider_profile.approval_status != 'APPROVED':
+        if not provider_identity.is_approved_provider:
             raise ValidationException(
                 "Service provider is not approved.",
                 details={'provider': 'Provider not approved'}
@@ -65,6 +74,7 @@ class ServiceRequestService:
                 message=message,
                 status='PENDING'
             )
+            CounterService.record_request_status_change(None, service_request.status)
             
             # Send notification to provider
             ServiceRequestNotificationService.notify_provider_new_request(service_request)
@@ -123,6 +133,30 @@ class ServiceRequestService:
         except ServiceRequest.DoesNotExist:
             raise NotFoundException(f"Service request with ID {request_id} not found.")
     
+    @staticmethod
+    async def aget_request_by_id(request_id):
+        """
+        Get a service request by ID from async code.
+        
+        The service's provider is loaded too, so the request can be
+        serialized without further queries.
+        
+        Args:
+            request_id: ID of the service request
+            
+        Returns:
+            ServiceRequest instance
+            
+        Raises:
+            NotFoundException: If request not found
+        """
+        try:
+            return await ServiceRequest.objects.select_related(
+                'service__provider', 'provider', 'requester'
+            ).aget(id=request_id)
+        except ServiceRequest.DoesNotExist:
+            raise NotFoundException(f"Service request with ID {request_id} not found.")
+    
     @staticmethod
     def can_user_access_request(user, service_request):
         """
@@ -140,8 +174,8 @@ class ServiceRequestService:
         
         return service_request.requester == user or service_request.provider == user
     
-    @staticmethod
-    def accept_service_request(service_request, provider):
+    @classmethod
+    def accept_service_request(cls, service_request, provider):
         """
         Accept a service request.
         
@@ -156,29 +190,33 @@ class ServiceRequestService:
             PermissionDeniedException: If user is not the provider
             ValidationException: If request cannot be accepted
         """
-        # Validate provider
-        if service_request.provider != provider:
-            raise PermissionDeniedException("Only the service provider can accept this request.")
-        
-        # Validate current status
-        if service_request.status != 'PENDING':
-            raise ValidationException(
-                f"Cannot accept request with status '{service_request.status}'. Only pending requests can be accepted.",
-                details={'status': 'Invalid status'}
-            )
-        
-        # Update status
-        with transaction.atomic():
-            service_request.status = 'ACCEPTED'
-            service_request.save()
-            
-            # Send notification to requester
-            ServiceRequestNotificationService.notify_requester_request_accepted(service_request)
+        cls._check_pending_transition(service_request, provider, 'accept')
+        cls._save_transition(
+            service_request,
+            'ACCEPTED',
+            'accept',
+            ServiceRequestNotificationService.notify_requester_request_accepted
+        )
+        return service_request
+    
+    @classmethod
+    async def aaccept_service_request(cls, service_request, provider):
+        """
+        Accept a service request from async code.
         
+        Same as accept_service_request(); the transaction runs in a worker thread.
+        """
+        cls._check_pending_transition(service_request, provider, 'accept')
+        await sync_to_async(cls._save_transition)(
+            service_request,
+            'ACCEPTED',
+            'accept',
+            ServiceRequestNotificationService.notify_requester_request_accepted
+        )
         return service_request
     
-    @staticmethod
-    def reject_service_request(service_request, provider):
+    @classmethod
+    def reject_service_request(cls, service_request, provider):
         """
         Reject a service request.
         
@@ -193,42 +231,113 @@ class ServiceRequestService:
             PermissionDeniedException: If user is not the provider
             ValidationException: If request cannot be rejected
         """
+        cls._check_pending_transition(service_request, provider, 'reject')
+        cls._save_transition(
+            service_request,
+            'REJECTED',
+            'reject',
+            ServiceRequestNotificationService.notify_requester_request_rejected
+        )
+        return service_request
+    
+    @classmethod
+    async def areject_service_request(cls, service_request, provider):
+        """
+        Reject a service request from async code.
+        
+        Same as reject_service_request(); the transaction runs in a worker thread.
+        """
+        cls._check_pending_transition(service_request, provider, 'reject')
+        await sync_to_async(cls._save_transition)(
+            service_request,
+            'REJECTED',
+            'reject',
+            ServiceRequestNotificationService.notify_requester_request_rejected
+        )
+        return service_request
+    
+    @staticmethod
+    def _check_pending_transition(service_request, provider, action):
+        """
+        Check that the provider may accept or reject a pending request.
+        
+        Raises:
+            PermissionDeniedException: If user is not the provider
+            ValidationException: If the request is no longer pending
+        """
         # Validate provider
-        if service_request.provider != provider:
-            raise PermissionDeniedException("Only the service provider can reject this request.")
+        if service_request.provider_id != provider.pk:
+            raise PermissionDeniedException(f"Only the service provider can {action} this request.")
         
         # Validate current status
         if service_request.status != 'PENDING':
             raise ValidationException(
-                f"Cannot reject request with status '{service_request.status}'. Only pending requests can be rejected.",
+                f"Cannot {action} request with status '{service_request.status}'. "
+                f"Only pending requests can be {action}ed.",
                 details={'status': 'Invalid status'}
             )
+    
+    @staticmethod
+    def _save_transition(service_request, new_status, action, notify):
+        """
+        Save the new status, its counters and the requester's email in one transaction.
+        
+        The status changes only if the request is still pending in the
+        database, so of two concurrent transitions only one takes effect.
         
-        # Update status
+        Raises:
+            ValidationException: If the request is no longer pending
+        """
         with transaction.atomic():
-            service_request.status = 'REJECTED'
-            service_request.save()
+            updated_at = timezone.now()
+            updated = ServiceRequest.objects.filter(
+                pk=service_request.pk,
+                status='PENDING'
+            ).update(status=new_status, updated_at=updated_at)
+            if updated != 1:
+                current = ServiceRequest.objects.filter(pk=service_request.pk).values_list('status', flat=True).first()
+                raise ValidationException(
+                    f"Cannot {action} request with status '{current}'. "
+                    f"Only pending requests can be {action}ed.",
+                    details={'status': 'Invalid status'}
+                )
+            
+            service_request.status = new_status
+            service_request.updated_at = updated_at
+            CounterService.record_request_status_change('PENDING', new_status)
             
             # Send notification to requester
-            ServiceRequestNotificationService.notify_requester_request_rejected(service_request)
-        
-        return service_request
+            notify(service_request)
 
 
 class ServiceRequestNotificationService:
-    """Service for handling service request email notifications."""
+    """Service for queueing service request email notifications."""
     
     @staticmethod
     def notify_provider_new_request(service_request):
         """
         Send email notification to provider when they receive a new service request.
         
+        Providers with digest delivery enabled get the notification in their
+        next digest instead.
+        
         Args:
             service_request: ServiceRequest instance
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued or added to a digest successfully
         """
+        if NotificationPreferenceService.wants_digest(service_request.provider):
+            NotificationDigestService.add(
+                recipient=service_request.provider,
+                service_request=service_request,
+                context={
+                    'service_name': service_request.service.name,
+                    'requester_name': service_request.requester.full_name,
+                }
+            )
+            return True
+        
         return EmailNotificationService.send_service_request_notification(
             provider_email=service_request.provider.email,
             provider_name=service_request.provider.full_name,
@@ -245,7 +354,7 @@ class ServiceRequestNotificationService:
             service_request: ServiceRequest instance
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         return EmailNotificationService.send_request_accepted_email(
             requester_email=service_request.requester.email,
@@ -263,7 +372,7 @@ class ServiceRequestNotificationService:
             service_request: ServiceRequest instance
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         return EmailNotificationService.send_request_rejected_email(
             requester_email=service_request.requester.email,
@@ -1,9 +1,24 @@
 from django.urls import path
+from core.async_views import select_view
 from . import views
 
 urlpatterns = [
     path('', views.service_request_list_create, name='service-request-list-create'),
     path('<int:request_id>/', views.service_request_detail, name='service-request-detail'),
-    path('<int:request_id>/accept/', views.accept_service_request, name='service-request-accept'),
-    path('<int:request_id>/reject/', views.reject_service_request, name='service-request-reject'),
+    path(
+        '<int:request_id>/accept/',
+        select_view(
+            views.accept_service_request,
+            views.AsyncServiceRequestActionView.as_view(action='accept')
+        ),
+        name='service-request-accept'
+    ),
+    path(
+        '<int:request_id>/reject/',
+        select_view(
+            views.reject_service_request,
+            views.AsyncServiceRequestActionView.as_view(action='reject')
+        ),
+        name='service-request-reject'
+    ),
 ]
@@ -5,8 +5,9 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from core.async_views import AsyncAPIView
 from core.exceptions import ValidationException, PermissionDeniedException, NotFoundException
-from core.pagination import StandardResultsSetPagination
+from core.pagination import get_paginator
 from .models import ServiceRequest
 from .serializers import (
     ServiceRequestSerializer,
@@ -46,7 +47,7 @@ def service_request_list_create(request):
                 requests_queryset = requests_queryset.filter(status=status_filter.upper())
         
         # Paginate results
-        paginator = StandardResultsSetPagination()
+        paginator = get_paginator(request)
         paginated_requests = paginator.paginate_queryset(requests_queryset, request)
         serializer = ServiceRequestListSerializer(paginated_requests, many=True)
         
@@ -278,3 +279,70 @@ def reject_service_request(request, request_id):
             },
             status=http_status
         )
+
+
+class AsyncServiceRequestActionView(AsyncAPIView):
+    """
+    Accept or reject a service request, for ASGI servers.
+    
+    POST /api/requests/{id}/accept/
+    POST /api/requests/{id}/reject/
+    
+    Responses match accept_service_request and reject_service_request. The
+    request is loaded with the async ORM; the status change and the queued
+    email are saved in one transaction, in a worker thread.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    # 'accept' or 'reject', passed to as_view()
+    action = None
+    
+    TRANSITIONS = {
+        'accept': (ServiceRequestService.aaccept_service_request, 'accepted'),
+        'reject': (ServiceRequestService.areject_service_request, 'rejected'),
+    }
+    
+    async def post(self, request, request_id):
+        """Accept or reject the service request."""
+        transition, past_tense = self.TRANSITIONS[self.action]
+        
+        # Check if user is a provider
+        if request.user.role != 'PROVIDER':
+            return self._error(
+                'FORBIDDEN',
+                f'Only service providers can {self.action} requests.',
+                status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            service_request = await ServiceRequestService.aget_request_by_id(request_id)
+        except NotFoundException as e:
+            return self._error('NOT_FOUND', str(e), status.HTTP_404_NOT_FOUND)
+        
+        try:
+            updated_request = await transition(service_request=service_request, provider=request.user)
+        except ValidationException as e:
+            return self._error('VALIDATION_ERROR', str(e), status.HTTP_400_BAD_REQUEST, e.details)
+        except PermissionDeniedException as e:
+            return self._error('FORBIDDEN', str(e), status.HTTP_403_FORBIDDEN)
+        
+        return Response(
+            {
+                'message': f'Service request {past_tense} successfully',
+                'request': ServiceRequestSerializer(updated_request).data
+            },
+            status=status.HTTP_200_OK
+        )
+    
+    @staticmethod
+    def _error(code, message, http_status, details=None):
+        return Response(
+            {
+                'error': {
+                    'code': code,
+                    'message': message,
+                    'details': details or {}
+                }
+            },
+            status=http_status
+        )
@@ -0,0 +1,241 @@
+"""
+Geographic helpers for service proximity search.
+
+Services store latitude/longitude plus a geohash of them. A geohash is a
+base-32 string where every shared prefix is a shared rectangular cell, so a
+radius search becomes a handful of B-tree range scans on the geohash column
+(``geohash >= 'sy3' AND geohash < 'sy3{'``) followed by an exact distance
+filter. This works on any database, including SQLite.
+
+Free-text locations are resolved to coordinates with a small local gazetteer
+(data/gazetteer.json), so no external geocoding service is needed.
+"""
+import json
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import ExpressionWrapper
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+
+# Sorts after every geohash character, so [prefix, prefix + '{') is a prefix range
+GEOHASH_PREFIX_END = '{'
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Approximate (height, width at the equator) of a geohash cell in km by precision
+GEOHASH_CELL_KM = {
+    1: (5000.0, 5000.0),
+    2: (625.0, 1250.0),
+    3: (156.0, 156.0),
+    4: (19.5, 39.1),
+    5: (4.89, 4.89),
+    6: (0.61, 1.22),
+    7: (0.153, 0.153),
+    8: (0.019, 0.038),
+}
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.json'
+
+
+class Place(NamedTuple):
+    """A gazetteer entry."""
+    name: str
+    latitude: float
+    longitude: float
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode coordinates as a geohash.
+
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        precision: Number of characters
+
+    Returns:
+        str: Geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits = bits << 1
+            bounds[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance between two points in km."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell_precision(latitude, radius_km):
+    """Return the finest precision whose cells are at least radius_km across."""
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    precision = 1
+    for candidate, (height, width) in sorted(GEOHASH_CELL_KM.items()):
+        if height >= radius_km and width * shrink >= radius_km:
+            precision = candidate
+    return precision
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Get the geohash prefixes of the cells covering a search circle.
+
+    Cells are chosen at least as large as the radius, so the circle's bounding
+    box spans at most a few cells in each direction.
+
+    Returns:
+        set: Geohash prefixes
+    """
+    precision = _cell_precision(latitude, radius_km)
+    height, width = GEOHASH_CELL_KM[precision]
+    d_lat = radius_km / KM_PER_DEGREE
+    d_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+
+    # Sample the bounding box at half-cell steps so no covering cell is skipped
+    step_lat = height / KM_PER_DEGREE / 2
+    step_lon = width / KM_PER_DEGREE / 2
+    south, north = max(latitude - d_lat, -90.0), min(latitude + d_lat, 90.0)
+    west, east = longitude - d_lon, longitude + d_lon
+
+    cells = set()
+    lat = south
+    while True:
+        lon = west
+        while True:
+            wrapped = (lon + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(min(lat, 89.999999), wrapped, precision))
+            if lon >= east:
+                break
+            lon = min(lon + step_lon, east)
+        if lat >= north:
+            break
+        lat = min(lat + step_lat, north)
+    return cells
+
+
+def filter_within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Restrict a queryset to rows within radius_km of a point.
+
+    Candidates are found with geohash prefix range scans, then filtered by an
+    equirectangular distance that needs only arithmetic, so no database math
+    functions are required. It is accurate to well under 1% at city scale; it
+    does not handle searches that cross the antimeridian.
+
+    Args:
+        queryset: Queryset of a model with latitude, longitude and geohash fields
+        latitude: Search centre latitude
+        longitude: Search centre longitude
+        radius_km: Search radius in km
+
+    Returns:
+        QuerySet: Matching rows annotated with ``distance_sq`` (squared degrees
+        of latitude; see distance_from_annotation), ordered nearest first
+    """
+    cells = Q()
+    for cell in covering_cells(latitude, longitude, radius_km):
+        cells |= Q(geohash__gte=cell, geohash__lt=cell + GEOHASH_PREFIX_END)
+
+    # Longitude degrees shrink with latitude; scale them to latitude degrees
+    lon_scale = math.cos(math.radians(latitude))
+    distance_sq = ExpressionWrapper(
+        (F('latitude') - Value(latitude)) * (F('latitude') - Value(latitude)) +
+        (F('longitude') - Value(longitude)) * Value(lon_scale) *
+        (F('longitude') - Value(longitude)) * Value(lon_scale),
+        output_field=FloatField()
+    )
+    max_sq = (radius_km / KM_PER_DEGREE) ** 2
+
+    return queryset.filter(cells).annotate(
+        distance_sq=distance_sq
+    ).filter(distance_sq__lte=max_sq).order_by('distance_sq')
+
+
+def distance_from_annotation(distance_sq):
+    """Convert a ``distance_sq`` annotation to km."""
+    return math.sqrt(distance_sq) * KM_PER_DEGREE
+
+
+def normalize_place_name(text):
+    """
+    Normalize a place name for gazetteer lookup.
+
+    Folds case and diacritics, unifies Arabic letter variants, drops
+    punctuation and a leading definite article ("Al-", "El ", "ال").
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = text.translate(str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ى': 'ي', 'ة': 'ه', "'": None}))
+    words = re.findall(r'\w+', text)
+    if len(words) > 1 and words[0] in ('al', 'el', 'as', 'ar', 'ad'):
+        words = words[1:]
+    if words and words[0].startswith('ال') and len(words[0]) > 3:
+        words[0] = words[0][2:]
+    return ' '.join(words)
+
+
+@lru_cache(maxsize=1)
+def _gazetteer_index():
+    with open(GAZETTEER_PATH, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    index = {}
+    for entry in entries:
+        place = Place(entry['name'], entry['latitude'], entry['longitude'])
+        for name in [entry['name'], *entry.get('aliases', [])]:
+            index.setdefault(normalize_place_name(name), place)
+    return index
+
+
+def lookup_place(text):
+    """
+    Resolve free text such as "Damascus", "دمشق" or "Mezzeh, Damascus" to a place.
+
+    The full text is tried first, then each comma-separated part.
+
+    Args:
+        text: Location text
+
+    Returns:
+        Place or None: The matching gazetteer entry
+    """
+    index = _gazetteer_index()
+    for candidate in [text, *reversed((text or '').split(','))]:
+        place = index.get(normalize_place_name(candidate))
+        if place:
+            return place
+    return None
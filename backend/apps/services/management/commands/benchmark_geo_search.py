@@ -0,0 +1,117 @@
+"""
+Benchmark geohash radius search against a full-table distance scan.
+
+Usage:
+    python manage.py benchmark_geo_search --services 1000000 --radius 10
+"""
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import ExpressionWrapper
+from django.utils import timezone
+from apps.users.models import User
+from apps.services.geo import KM_PER_DEGREE, encode_geohash, lookup_place
+from apps.services.models import Service
+from apps.services.services import ServiceSearchService
+
+
+# Rough bounding box of Syria
+LATITUDE_RANGE = (32.3, 37.3)
+LONGITUDE_RANGE = (35.7, 42.4)
+
+
+class Command(BaseCommand):
+    help = 'Compare geohash radius search with a full-table distance scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--services', type=int, default=1000000,
+                            help='Number of synthetic services to seed')
+        parser.add_argument('--radius', type=float, default=10,
+                            help='Search radius in km')
+        parser.add_argument('--near', default='Damascus',
+                            help='Gazetteer place used as the search centre')
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Number of timed calls per strategy')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        place = lookup_place(options['near'])
+        if place is None:
+            self.stderr.write(f"Unknown place: {options['near']}")
+            return
+
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            self._seed(options['services'], options['batch_size'])
+            centre = (place.latitude, place.longitude)
+            radius = options['radius']
+
+            def geohash_search():
+                return list(ServiceSearchService.search_services(
+                    latitude=centre[0], longitude=centre[1], radius_km=radius
+                ).values_list('id', flat=True))
+
+            def full_scan():
+                distance_sq = ExpressionWrapper(
+                    (F('latitude') - Value(centre[0])) * (F('latitude') - Value(centre[0])) +
+                    (F('longitude') - Value(centre[1])) * (F('longitude') - Value(centre[1])),
+                    output_field=FloatField()
+                )
+                return list(Service.objects.filter(is_active=True).annotate(
+                    distance_sq=distance_sq
+                ).filter(
+                    distance_sq__lte=(radius / KM_PER_DEGREE) ** 2
+                ).order_by('distance_sq').values_list('id', flat=True))
+
+            self.stdout.write(f'{len(geohash_search())} services within {radius} km of {place.name}')
+            self._run('geohash cells + B-tree', geohash_search, options['iterations'])
+            self._run('full-table distance scan', full_scan, options['iterations'])
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count, batch_size):
+        self.stdout.write(f'Seeding {count} services...')
+        started = time.perf_counter()
+        provider = User.objects.create_user(
+            email=f'bench-geo-{int(time.time())}@example.com',
+            password='!',
+            first_name='Bench',
+            last_name='Provider',
+            role='PROVIDER'
+        )
+        rng = random.Random(42)
+        now = timezone.now()
+        table = Service._meta.db_table
+
+        sql = (
+            f"INSERT INTO {table} (provider_id, name, description, location, cost, is_active, "
+            f"latitude, longitude, geohash, created_at, updated_at) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, count, batch_size):
+                rows = []
+                for i in range(start, min(start + batch_size, count)):
+                    lat = rng.uniform(*LATITUDE_RANGE)
+                    lon = rng.uniform(*LONGITUDE_RANGE)
+                    rows.append((
+                        provider.id, f'Bench service {i}', 'Benchmark service', 'Syria', 100, True,
+                        lat, lon, encode_geohash(lat, lon), now, now
+                    ))
+                cursor.executemany(sql, rows)
+        self.stdout.write(f'  seeded in {time.perf_counter() - started:.1f}s')
+
+    def _run(self, label, search, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            search()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  mean: {statistics.mean(timings):.2f} ms')
+        self.stdout.write(f'  p50:  {statistics.median(timings):.2f} ms')
+        self.stdout.write(f'  max:  {max(timings):.2f} ms')
@@ -0,0 +1,22 @@
+"""
+Recreate the service full-text index and its triggers, and reindex every row.
+
+Run after restoring a database or after a schema change that rebuilt the
+services table (SQLite drops triggers when a table is remade).
+
+Usage:
+    python manage.py rebuild_service_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from apps.services.search import ServiceSearchIndex
+
+
+class Command(BaseCommand):
+    help = 'Recreate the service full-text index and reindex all services'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ServiceSearchIndex.uninstall()
+            ServiceSearchIndex.install()
+        self.stdout.write(self.style.SUCCESS(f'Service search index rebuilt ({connection.vendor}).'))
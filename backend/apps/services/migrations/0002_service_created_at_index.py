@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['-created_at', 'id'], name='services_created_211075_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from apps.services.search import ServiceSearchIndex
+    ServiceSearchIndex.install(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from apps.services.search import ServiceSearchIndex
+    ServiceSearchIndex.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_service_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:19
+
+from django.db import migrations, models
+
+
+def geocode_existing_services(apps, schema_editor):
+    from apps.services.geo import encode_geohash, lookup_place
+    Service = apps.get_model('services', 'Service')
+    for service in Service.objects.filter(latitude__isnull=True).iterator():
+        place = lookup_place(service.location)
+        if place:
+            Service.objects.filter(id=service.id).update(
+                latitude=place.latitude,
+                longitude=place.longitude,
+                geohash=encode_geohash(place.latitude, place.longitude)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_service_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Derived from latitude/longitude for proximity search', max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing_services, migrations.RunPython.noop),
+    ]
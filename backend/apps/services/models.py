@@ -20,6 +20,16 @@ class Service(models.Model):
         validators=[MinValueValidator(0.01)],
         db_index=True
     )
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(
+        max_length=12,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text='Derived from latitude/longitude for proximity search'
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -32,11 +42,24 @@ class Service(models.Model):
         indexes = [
             models.Index(fields=['provider', 'is_active']),
             models.Index(fields=['location', 'cost']),
+            models.Index(fields=['-created_at', 'id']),
         ]
     
     def __str__(self):
         return f"{self.name} by {self.provider.full_name}"
     
+    def save(self, *args, **kwargs):
+        """Keep the geohash in step with the coordinates."""
+        from .geo import encode_geohash
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+    
     def has_pending_requests(self):
         """Check if service has any pending requests."""
         return self.service_requests.filter(status='PENDING').exists()
@@ -1,10 +1,22 @@
+from django.db import transaction
 from django.db.models import Q
+from apps.analytics.counters import CounterService
 from .models import Service
+from .geo import filter_within_radius, lookup_place
+from .search import ServiceSearchIndex
 
 
 class ServiceRepository:
     """Repository for Service data access operations."""
     
+    @staticmethod
+    def _geocode(location):
+        """Return (latitude, longitude) for a location, or (None, None) if unknown."""
+        place = lookup_place(location)
+        if place is None:
+            return None, None
+        return place.latitude, place.longitude
+    
     @staticmethod
     def get_all_active():
         """Get all active services."""
@@ -21,48 +33,71 @@ class ServiceRepository:
     @staticmethod
     def get_by_provider(provider):
         """Get all services by a specific provider."""
-        return Service.objects.filter(provider=provider).order_by('-created_at')
+        return Service.objects.filter(provider=provider).select_related('provider').order_by('-created_at')
     
     @staticmethod
-    def create(provider, name, description, location, cost):
-        """Create a new service."""
+    @transaction.atomic
+    def create(provider, name, description, location, cost, latitude=None, longitude=None):
+        """Create a new service, resolving coordinates from the gazetteer if not given."""
+        if latitude is None or longitude is None:
+            latitude, longitude = ServiceRepository._geocode(location)
         service = Service.objects.create(
             provider=provider,
             name=name,
             description=description,
             location=location,
+            latitude=latitude,
+            longitude=longitude,
             cost=cost
         )
+        CounterService.record_service_active_change(False, service.is_active)
         return service
     
     @staticmethod
+    @transaction.atomic
     def update(service, **kwargs):
-        """Update service fields."""
+        """Update service fields, re-resolving coordinates when only the location changes."""
+        was_active = service.is_active
+        if 'location' in kwargs and kwargs.get('latitude') is None and kwargs.get('longitude') is None:
+            kwargs['latitude'], kwargs['longitude'] = ServiceRepository._geocode(kwargs['location'])
         for field, value in kwargs.items():
             if hasattr(service, field):
                 setattr(service, field, value)
         service.save()
+        CounterService.record_service_active_change(was_active, service.is_active)
         return service
     
     @staticmethod
+    @transaction.atomic
     def delete(service):
         """Delete a service (soft delete by setting is_active to False)."""
+        was_active = service.is_active
         service.is_active = False
         service.save()
+        CounterService.record_service_active_change(was_active, service.is_active)
         return service
     
     @staticmethod
+    @transaction.atomic
     def hard_delete(service):
         """Permanently delete a service."""
+        was_active = service.is_active
         service.delete()
+        CounterService.record_service_active_change(was_active, False)
     
     @staticmethod
-    def search(location=None, min_cost=None, max_cost=None):
-        """Search services with filters."""
+    def search(location=None, min_cost=None, max_cost=None, query=None,
+               latitude=None, longitude=None, radius_km=None):
+        """
+        Search services with filters.
+        
+        Radius searches are ordered nearest first, text queries by relevance,
+        and everything else by cost.
+        """
         queryset = Service.objects.filter(is_active=True).select_related('provider')
         
-        if location:
-            queryset = queryset.filter(location__icontains=location)
+        if location or query:
+            queryset = ServiceSearchIndex.filter(queryset, query=query, location=location)
         
         if min_cost is not None:
             queryset = queryset.filter(cost__gte=min_cost)
@@ -70,6 +105,12 @@ class ServiceRepository:
         if max_cost is not None:
             queryset = queryset.filter(cost__lte=max_cost)
         
+        if latitude is not None:
+            queryset = filter_within_radius(queryset, latitude, longitude, radius_km)
+            return queryset.order_by('distance_sq', 'cost', 'name')
+        
+        if query:
+            return queryset.order_by('-search_rank', 'cost', 'name')
         return queryset.order_by('cost', 'name')
     
     @staticmethod
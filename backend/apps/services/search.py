@@ -0,0 +1,224 @@
+"""
+Full-text search index for services.
+
+Name, description and location are indexed by the database itself:
+
+- PostgreSQL: a weighted ``search_vector`` tsvector column on ``services`` with a
+  GIN index, kept current by a BEFORE INSERT/UPDATE trigger.
+- SQLite: an external-content FTS5 table ``services_fts`` kept current by
+  AFTER INSERT/UPDATE/DELETE triggers.
+
+Because the index is maintained by triggers, every write path (the repository,
+the admin, bulk loads) keeps it in sync. Other backends fall back to
+``icontains`` filters. Terms are matched as word prefixes, so "dam" finds
+"Damascus".
+"""
+import re
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+TABLE = 'services'
+FTS_TABLE = 'services_fts'
+
+# bm25 column weights for the FTS5 table (location, name, description)
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+# tsvector weight labels; location is weighted 'A' so it can be matched alone
+VECTOR_WEIGHTS = {'location': 'A', 'name': 'B', 'description': 'C'}
+
+POSTGRESQL_INSTALL = [
+    f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION {TABLE}_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.location, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {TABLE}_search_vector_trigger ON {TABLE}",
+    f"""
+    CREATE TRIGGER {TABLE}_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, location ON {TABLE}
+    FOR EACH ROW EXECUTE FUNCTION {TABLE}_search_vector_update()
+    """,
+    # Fires the trigger for existing rows
+    f"UPDATE {TABLE} SET name = name",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_search_vector_idx ON {TABLE} USING GIN (search_vector)",
+]
+
+POSTGRESQL_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {TABLE}_search_vector_trigger ON {TABLE}",
+    f"DROP FUNCTION IF EXISTS {TABLE}_search_vector_update()",
+    f"DROP INDEX IF EXISTS {TABLE}_search_vector_idx",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        location, name, description,
+        content='{TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, location, name, description)
+        VALUES (new.id, new.location, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, location, name, description)
+        VALUES ('delete', old.id, old.location, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF location, name, description ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, location, name, description)
+        VALUES ('delete', old.id, old.location, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, location, name, description)
+        VALUES (new.id, new.location, new.name, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _tokens(text):
+    """Split user input into lowercase word tokens, dropping FTS operators."""
+    return re.findall(r'\w+', (text or '').lower())
+
+
+class ServiceSearchIndex:
+    """Build and query the service full-text index."""
+
+    @staticmethod
+    def install(conn=None):
+        """
+        Create the index and its triggers, and index existing rows.
+
+        Safe to re-run; used by the migration and by rebuild_service_search_index.
+        """
+        conn = conn or connection
+        statements = {
+            'postgresql': POSTGRESQL_INSTALL,
+            'sqlite': SQLITE_INSTALL,
+        }.get(conn.vendor, [])
+        with conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    @staticmethod
+    def uninstall(conn=None):
+        """Drop the index and its triggers."""
+        conn = conn or connection
+        statements = {
+            'postgresql': POSTGRESQL_UNINSTALL,
+            'sqlite': SQLITE_UNINSTALL,
+        }.get(conn.vendor, [])
+        with conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    @staticmethod
+    def _postgresql_query(query_tokens, location_tokens):
+        terms = [f"{token}:*" for token in query_tokens]
+        terms += [f"{token}:*{VECTOR_WEIGHTS['location']}" for token in location_tokens]
+        return ' & '.join(terms)
+
+    @staticmethod
+    def _sqlite_query(query_tokens, location_tokens):
+        terms = [f'"{token}"*' for token in query_tokens]
+        terms += [f'location : "{token}"*' for token in location_tokens]
+        return ' AND '.join(terms)
+
+    @classmethod
+    def filter(cls, queryset, query=None, location=None):
+        """
+        Restrict a Service queryset to full-text matches.
+
+        Args:
+            queryset: Service queryset to filter
+            query: Optional free text matched against name, description and location
+            location: Optional text matched against location only
+
+        Returns:
+            QuerySet: Matching services, annotated with ``search_rank``
+            (higher is better) when query is given
+        """
+        query_tokens = _tokens(query)
+        location_tokens = _tokens(location)
+        if not query_tokens and not location_tokens:
+            # Input with no searchable words cannot match anything
+            queryset = queryset.none()
+            if query:
+                queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+            return queryset
+
+        vendor = connections[queryset.db].vendor
+
+        if vendor == 'postgresql':
+            tsquery = cls._postgresql_query(query_tokens, location_tokens)
+            queryset = queryset.alias(
+                search_match=RawSQL(
+                    f"{TABLE}.search_vector @@ to_tsquery('simple', %s)",
+                    [tsquery],
+                    output_field=BooleanField()
+                )
+            ).filter(search_match=True)
+            if query_tokens:
+                # float8, so cursor pagination can compare ranks exactly
+                queryset = queryset.annotate(
+                    search_rank=RawSQL(
+                        f"ts_rank({TABLE}.search_vector, to_tsquery('simple', %s))::float8",
+                        [tsquery],
+                        output_field=FloatField()
+                    )
+                )
+            return queryset
+
+        if vendor == 'sqlite':
+            match = cls._sqlite_query(query_tokens, location_tokens)
+            queryset = queryset.filter(
+                id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+            )
+            if query_tokens:
+                weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+                # bm25 is lower-is-better, so negate it
+                queryset = queryset.annotate(
+                    search_rank=RawSQL(
+                        f"""(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE}
+                        WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id)""",
+                        [match],
+                        output_field=FloatField()
+                    )
+                )
+            return queryset
+
+        # No native index on this backend
+        for token in location_tokens:
+            queryset = queryset.filter(location__icontains=token)
+        for token in query_tokens:
+            queryset = queryset.filter(
+                Q(name__icontains=token) |
+                Q(description__icontains=token) |
+                Q(location__icontains=token)
+            )
+        if query_tokens:
+            queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset
@@ -2,6 +2,7 @@
 Serializers for service management API.
 """
 from rest_framework import serializers
+from .geo import distance_from_annotation, lookup_place
 from .models import Service
 from apps.users.serializers import UserSerializer
 
@@ -11,6 +12,7 @@ class ServiceSerializer(serializers.ModelSerializer):
     
     provider = UserSerializer(read_only=True)
     provider_name = serializers.CharField(source='provider.full_name', read_only=True)
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Service
@@ -21,12 +23,31 @@ class ServiceSerializer(serializers.ModelSerializer):
             'name',
             'description',
             'location',
+            'latitude',
+            'longitude',
+            'distance_km',
             'cost',
             'is_active',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'provider', 'provider_name', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'provider', 'provider_name', 'distance_km', 'is_active', 'created_at', 'updated_at']
+    
+    def get_distance_km(self, obj):
+        """Distance from the search centre, present only in radius searches."""
+        distance_sq = getattr(obj, 'distance_sq', None)
+        if distance_sq is None:
+            return None
+        return round(distance_from_annotation(distance_sq), 3)
+
+
+def _validate_coordinates(data):
+    """Require latitude and longitude together."""
+    if (data.get('latitude') is None) != (data.get('longitude') is None):
+        raise serializers.ValidationError({
+            'coordinates': 'Latitude and longitude must be provided together.'
+        })
+    return data
 
 
 class ServiceCreateSerializer(serializers.Serializer):
@@ -35,6 +56,8 @@ class ServiceCreateSerializer(serializers.Serializer):
     name = serializers.CharField(required=True, max_length=200)
     description = serializers.CharField(required=True, style={'base_template': 'textarea.html'})
     location = serializers.CharField(required=True, max_length=200)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
     cost = serializers.DecimalField(required=True, max_digits=10, decimal_places=2, min_value=0.01)
     
     def validate_name(self, value):
@@ -54,6 +77,10 @@ class ServiceCreateSerializer(serializers.Serializer):
         if len(value.strip()) < 2:
             raise serializers.ValidationError("Service location must be at least 2 characters long.")
         return value
+    
+    def validate(self, data):
+        """Validate that coordinates are provided together."""
+        return _validate_coordinates(data)
 
 
 class ServiceUpdateSerializer(serializers.Serializer):
@@ -62,6 +89,8 @@ class ServiceUpdateSerializer(serializers.Serializer):
     name = serializers.CharField(required=False, max_length=200)
     description = serializers.CharField(required=False, style={'base_template': 'textarea.html'})
     location = serializers.CharField(required=False, max_length=200)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
     cost = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0.01)
     
     def validate_name(self, value):
@@ -81,17 +110,28 @@ class ServiceUpdateSerializer(serializers.Serializer):
         if value and len(value.strip()) < 2:
             raise serializers.ValidationError("Service location must be at least 2 characters long.")
         return value
+    
+    def validate(self, data):
+        """Validate that coordinates are provided together."""
+        return _validate_coordinates(data)
 
 
 class ServiceSearchSerializer(serializers.Serializer):
     """Serializer for service search parameters."""
     
+    q = serializers.CharField(required=False, allow_blank=True)
     location = serializers.CharField(required=False, allow_blank=True)
     min_cost = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
     max_cost = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    lat = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    lng = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    near = serializers.CharField(required=False, allow_blank=True)
+    radius_km = serializers.FloatField(required=False, min_value=0.1, max_value=500)
+    
+    DEFAULT_RADIUS_KM = 10
     
     def validate(self, data):
-        """Validate that min_cost is not greater than max_cost."""
+        """Validate cost range and resolve the radius search centre."""
         min_cost = data.get('min_cost')
         max_cost = data.get('max_cost')
         
@@ -100,4 +140,23 @@ class ServiceSearchSerializer(serializers.Serializer):
                 'cost': 'Minimum cost cannot be greater than maximum cost.'
             })
         
+        if (data.get('lat') is None) != (data.get('lng') is None):
+            raise serializers.ValidationError({
+                'coordinates': 'lat and lng must be provided together.'
+            })
+        
+        if data.get('near'):
+            place = lookup_place(data['near'])
+            if place is None:
+                raise serializers.ValidationError({'near': f"Unknown place: {data['near']}"})
+            data.setdefault('lat', place.latitude)
+            data.setdefault('lng', place.longitude)
+        
+        if data.get('lat') is not None:
+            data.setdefault('radius_km', self.DEFAULT_RADIUS_KM)
+        elif data.get('radius_km') is not None:
+            raise serializers.ValidationError({
+                'radius_km': 'A radius search needs lat/lng or near.'
+            })
+        
         return data
@@ -3,6 +3,7 @@ Service layer for service management business logic.
 """
 from django.db import transaction
 from core.exceptions import ValidationException, PermissionDeniedException, NotFoundException
+from core.identity import get_identity
 from .models import Service
 from .repositories import ServiceRepository
 
@@ -12,7 +13,7 @@ class ServiceManagementService:
     
     @staticmethod
     @transaction.atomic
-    def create_service(provider, name, description, location, cost):
+    def create_service(provider, name, description, location, cost, latitude=None, longitude=None):
         """
         Create a new service.
         
@@ -22,6 +23,8 @@ class ServiceManagementService:
             description: Service description
             location: Service location
             cost: Service cost
+            latitude: Optional latitude; resolved from location if omitted
+            longitude: Optional longitude; resolved from location if omitted
             
         Returns:
             Service: The created service instance
@@ -29,12 +32,14 @@ class ServiceManagementService:
         Raises:
             ValidationException: If validation fails
         """
+        identity = get_identity(provider)
+        
         # Validate provider role
-        if provider.role != 'PROVIDER':
+        if not identity.is_provider:
             raise PermissionDeniedException("Only service providers can create services")
         
         # Validate provider is approved
-        if not hasattr(provider, 'provider_profile') or provider.provider_profile.approval_status != 'APPROVED':
+        if not identity.is_approved_provider:
             raise PermissionDeniedException("Your provider account must be approved before creating services")
         
         # Validate required fields
@@ -68,7 +73,9 @@ class ServiceManagementService:
             name=name.strip(),
             description=description.strip(),
             location=location.strip(),
-            cost=cost
+            cost=cost,
+            latitude=latitude,
+            longitude=longitude
         )
         
         return service
@@ -82,7 +89,7 @@ class ServiceManagementService:
         Args:
             service: Service instance to update
             provider: User instance (must be the service owner)
-            **kwargs: Fields to update (name, description, location, cost)
+            **kwargs: Fields to update (name, description, location, latitude, longitude, cost)
             
         Returns:
             Service: The updated service instance
@@ -208,14 +215,20 @@ class ServiceSearchService:
     """Service for handling service search and filtering."""
     
     @staticmethod
-    def search_services(location=None, min_cost=None, max_cost=None):
+    def search_services(location=None, min_cost=None, max_cost=None, query=None,
+                        latitude=None, longitude=None, radius_km=None):
         """
         Search services with optional filters.
         
         Args:
-            location: Location filter (case-insensitive partial match)
+            location: Location filter (case-insensitive word-prefix match)
             min_cost: Minimum cost filter
             max_cost: Maximum cost filter
+            query: Optional free-text search over name, description and location;
+                results are then ordered by relevance
+            latitude: Radius search centre latitude
+            longitude: Radius search centre longitude
+            radius_km: Radius search distance; results are then ordered nearest first
             
         Returns:
             QuerySet: Filtered services
@@ -239,11 +252,27 @@ class ServiceSearchService:
                 details={'cost': ['Minimum cost cannot be greater than maximum cost.']}
             )
         
+        if (latitude is None) != (longitude is None) or (radius_km is not None and latitude is None):
+            raise ValidationException(
+                "Invalid radius search",
+                details={'coordinates': ['A radius search needs both latitude and longitude.']}
+            )
+        
+        if latitude is not None and (radius_km is None or radius_km <= 0):
+            raise ValidationException(
+                "Invalid radius search",
+                details={'radius_km': ['Radius must be greater than 0.']}
+            )
+        
         # Search services
         services = ServiceRepository.search(
             location=location,
             min_cost=min_cost,
-            max_cost=max_cost
+            max_cost=max_cost,
+            query=query,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km
         )
         
         return services
@@ -7,7 +7,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from core.exceptions import ValidationException, PermissionDeniedException, NotFoundException
 from core.permissions import IsServiceProvider
-from core.pagination import StandardResultsSetPagination
+from core.pagination import get_paginator
 from .models import Service
 from .serializers import (
     ServiceSerializer,
@@ -24,7 +24,8 @@ def service_list_create(request):
     List all services with optional filters (GET) or create a new service (POST).
     
     GET /api/services/
-    Query params: location, min_cost, max_cost
+    Query params: q, location, min_cost, max_cost,
+    lat + lng or near (place name), radius_km (default 10)
     
     POST /api/services/
     Body: {
@@ -54,11 +55,15 @@ def service_list_create(request):
             services = ServiceSearchService.search_services(
                 location=search_serializer.validated_data.get('location'),
                 min_cost=search_serializer.validated_data.get('min_cost'),
-                max_cost=search_serializer.validated_data.get('max_cost')
+                max_cost=search_serializer.validated_data.get('max_cost'),
+                query=search_serializer.validated_data.get('q'),
+                latitude=search_serializer.validated_data.get('lat'),
+                longitude=search_serializer.validated_data.get('lng'),
+                radius_km=search_serializer.validated_data.get('radius_km')
             )
             
             # Paginate results
-            paginator = StandardResultsSetPagination()
+            paginator = get_paginator(request)
             paginated_services = paginator.paginate_queryset(services, request)
             serializer = ServiceSerializer(paginated_services, many=True)
             
@@ -123,7 +128,9 @@ def service_list_create(request):
                 name=create_serializer.validated_data['name'],
                 description=create_serializer.validated_data['description'],
                 location=create_serializer.validated_data['location'],
-                cost=create_serializer.validated_data['cost']
+                cost=create_serializer.validated_data['cost'],
+                latitude=create_serializer.validated_data.get('latitude'),
+                longitude=create_serializer.validated_data.get('longitude')
             )
             
             return Response(
@@ -299,7 +306,7 @@ def my_services(request):
     services = ServiceManagementService.get_provider_services(request.user)
     
     # Paginate results
-    paginator = StandardResultsSetPagination()
+    paginator = get_paginator(request)
     paginated_services = paginator.paginate_queryset(services, request)
     serializer = ServiceSerializer(paginated_services, many=True)
     
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 
@@ -13,7 +13,12 @@ class UserManager(BaseUserManager):
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
+            
+            # Keep platform counters in step with registrations
+            from apps.analytics.counters import CounterService
+            CounterService.record_user_created(user)
         return user
     
     def create_superuser(self, email, password=None, **extra_fields):
@@ -109,18 +114,28 @@ class ProviderProfile(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.approval_status}"
     
+    @transaction.atomic
     def approve(self, admin_user):
         """Approve the provider application."""
+        from apps.analytics.counters import CounterService
+        
+        previous_status = self.approval_status
         self.approval_status = 'APPROVED'
         self.approved_by = admin_user
         self.approved_at = timezone.now()
         self.user.is_active = True
         self.user.save()
         self.save()
+        CounterService.record_provider_status_change(previous_status, self.approval_status)
     
+    @transaction.atomic
     def reject(self, admin_user):
         """Reject the provider application."""
+        from apps.analytics.counters import CounterService
+        
+        previous_status = self.approval_status
         self.approval_status = 'REJECTED'
         self.approved_by = admin_user
         self.approved_at = timezone.now()
         self.save()
+        CounterService.record_provider_status_change(previous_status, self.approval_status)
@@ -6,6 +6,7 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from core.exceptions import ValidationException, BusinessLogicException
 from core.email_service import EmailNotificationService
+from apps.analytics.counters import CounterService
 from .models import User, ProviderProfile
 
 
@@ -116,6 +117,7 @@ class UserRegistrationService:
             service_description=service_description,
             approval_status='PENDING'
         )
+        CounterService.record_provider_status_change(None, provider_profile.approval_status)
         
         return user, provider_profile
 
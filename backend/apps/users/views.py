@@ -8,6 +8,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from core.exceptions import ValidationException, UnauthorizedException
+from core.identity import get_identity
 from .models import User, ProviderProfile
 from .serializers import (
     UserSerializer,
@@ -398,12 +399,12 @@ def current_user(request):
     user_data = UserSerializer(user).data
     
     # Include provider profile if user is a provider
-    if user.role == 'PROVIDER':
-        try:
-            provider_profile = user.provider_profile
-            user_data['provider_profile'] = ProviderProfileSerializer(provider_profile).data
-        except ProviderProfile.DoesNotExist:
-            user_data['provider_profile'] = None
+    identity = get_identity(user)
+    if identity.is_provider:
+        provider_profile = identity.provider_profile
+        user_data['provider_profile'] = (
+            ProviderProfileSerializer(provider_profile).data if provider_profile else None
+        )
     
     return Response(user_data, status=status.HTTP_200_OK)
 
@@ -1,10 +1,14 @@
 """
 ASGI config for Service Marketplace Platform.
+
+ASGI servers route the async versions of I/O-bound views (see
+core/async_views.py); set ASYNC_VIEWS=False to serve the sync views instead.
 """
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     'apps.requests',
     'apps.problems',
     'apps.analytics',
+    'apps.notifications',
 ]
 
 MIDDLEWARE = [
@@ -64,6 +65,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Route the async versions of I/O-bound views (problem creation, request
+# accept/reject, dashboard metrics); config/asgi.py turns this on
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 # Database
 DATABASES = {
     'default': {
@@ -105,6 +110,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Analytics export files hold user data, so they live outside MEDIA_ROOT and
+# are served only by the authenticated download endpoint
+EXPORT_ROOT = config('EXPORT_ROOT', default=str(BASE_DIR / 'private'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -114,7 +123,8 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT authentication that selects the provider profile with the user
+        'core.authentication.JWTIdentityAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -124,6 +134,12 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
 }
 
+# Pagination Configuration
+# Exact page counts are cached per filter set for this many seconds (0 disables)
+PAGINATION_COUNT_CACHE_TTL = config('PAGINATION_COUNT_CACHE_TTL', default=10, cast=int)
+# On PostgreSQL, lists the planner estimates above this size report an approximate count
+PAGINATION_ESTIMATE_THRESHOLD = config('PAGINATION_ESTIMATE_THRESHOLD', default=100000, cast=int)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
@@ -148,8 +164,113 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@servicemarketplace.com')
 
+# Email Outbox Configuration
+# Notifications are queued in the outbox and sent by `manage.py run_email_worker`
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+# Seconds before the first retry, doubled per attempt up to the maximum
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)
+EMAIL_OUTBOX_MAX_RETRY_DELAY = config('EMAIL_OUTBOX_MAX_RETRY_DELAY', default=3600, cast=int)
+# Also send each email from an on_commit hook, without waiting for the worker
+EMAIL_OUTBOX_SEND_ON_COMMIT = config('EMAIL_OUTBOX_SEND_ON_COMMIT', default=False, cast=bool)
+# Default minutes new-request notifications are collected before a digest is sent
+NOTIFICATION_DIGEST_WINDOW_MINUTES = config('NOTIFICATION_DIGEST_WINDOW_MINUTES', default=60, cast=int)
+
 # Frontend URL for email links
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:5173')
 
 # OpenAI API Configuration
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+
+# Problem Reporting Configuration
+# Process new reports in the background by default (clients can pass ?async=)
+PROBLEM_REPORTS_ASYNC = config('PROBLEM_REPORTS_ASYNC', default=False, cast=bool)
+# Background worker threads per process (0 processes reports inline after commit)
+PROBLEM_REPORT_WORKERS = config('PROBLEM_REPORT_WORKERS', default=4, cast=int)
+# Seconds a worker's claim on a report lasts; after that the stale sweep may
+# take the report over, so keep it above the longest transcription
+PROBLEM_REPORT_CLAIM_TIMEOUT = config('PROBLEM_REPORT_CLAIM_TIMEOUT', default=1800, cast=int)
+# Longest a detail request may long-poll with ?wait=. The sync view holds a
+# worker thread while it waits, so keep it short; the async view (ASYNC_VIEWS)
+# waits on the event loop and allows PROBLEM_REPORT_ASYNC_MAX_WAIT
+PROBLEM_REPORT_MAX_WAIT = config('PROBLEM_REPORT_MAX_WAIT', default=3, cast=int)
+PROBLEM_REPORT_ASYNC_MAX_WAIT = config('PROBLEM_REPORT_ASYNC_MAX_WAIT', default=25, cast=int)
+# Batch import (POST /api/problems/batch/): most problems per call, and
+# recommendation calls in flight at once
+PROBLEM_BATCH_MAX_ITEMS = config('PROBLEM_BATCH_MAX_ITEMS', default=100, cast=int)
+PROBLEM_BATCH_CONCURRENCY = config('PROBLEM_BATCH_CONCURRENCY', default=4, cast=int)
+# Chunked voice uploads (POST /api/problems/uploads/): partial files live in
+# AUDIO_UPLOAD_DIR (default: <tmp>/audio_uploads) until completed
+AUDIO_UPLOAD_DIR = config('AUDIO_UPLOAD_DIR', default='')
+AUDIO_UPLOAD_MAX_SIZE = config('AUDIO_UPLOAD_MAX_SIZE', default=100 * 1024 * 1024, cast=int)
+AUDIO_UPLOAD_MAX_CHUNK_SIZE = config('AUDIO_UPLOAD_MAX_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)
+AUDIO_UPLOAD_EXPIRY_HOURS = config('AUDIO_UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+# Long WAV recordings are split on silence into segments of about this many
+# seconds (hard cap AUDIO_SEGMENT_MAX_SECONDS), transcribed in parallel
+AUDIO_SEGMENT_SECONDS = config('AUDIO_SEGMENT_SECONDS', default=60, cast=int)
+AUDIO_SEGMENT_MAX_SECONDS = config('AUDIO_SEGMENT_MAX_SECONDS', default=120, cast=int)
+AUDIO_TRANSCRIPTION_CONCURRENCY = config('AUDIO_TRANSCRIPTION_CONCURRENCY', default=4, cast=int)
+# Recordings are stored as mono 16 kHz: 'auto' uses ffmpeg (Opus at
+# AUDIO_OPUS_BITRATE) when installed, else converts PCM WAV in Python;
+# 'ffmpeg', 'python' or 'off' force one behaviour
+AUDIO_NORMALIZATION = config('AUDIO_NORMALIZATION', default='auto')
+AUDIO_FFMPEG_BINARY = config('AUDIO_FFMPEG_BINARY', default='ffmpeg')
+AUDIO_OPUS_BITRATE = config('AUDIO_OPUS_BITRATE', default='24k')
+# Transcription engines by name; see apps/problems/transcription_engines.py.
+# Recordings up to TRANSCRIPTION_SHORT_MAX_SECONDS try the short engines in
+# order, longer ones the long engines; unavailable engines are skipped
+TRANSCRIPTION_ENGINES = {
+    'whisper': 'apps.problems.transcription_engines.WhisperAPIEngine',
+    'local': 'apps.problems.transcription_engines.VoskEngine',
+    'fake': 'apps.problems.fakes.FakeTranscriptionEngine',
+}
+TRANSCRIPTION_SHORT_ENGINES = config('TRANSCRIPTION_SHORT_ENGINES', default='local,whisper').split(',')
+TRANSCRIPTION_LONG_ENGINES = config('TRANSCRIPTION_LONG_ENGINES', default='whisper,local').split(',')
+TRANSCRIPTION_SHORT_MAX_SECONDS = config('TRANSCRIPTION_SHORT_MAX_SECONDS', default=30, cast=int)
+# Largest file sent to an engine whole (Whisper's limit); larger compressed
+# recordings are decoded to WAV with ffmpeg and split, or refused without it
+TRANSCRIPTION_MAX_FILE_SIZE = config('TRANSCRIPTION_MAX_FILE_SIZE', default=25 * 1024 * 1024, cast=int)
+# Vosk model directory for the 'local' engine (pip install vosk); empty disables it
+TRANSCRIPTION_LOCAL_MODEL_PATH = config('TRANSCRIPTION_LOCAL_MODEL_PATH', default='')
+# Dotted paths of the AI services; see apps/problems/fakes.py for offline stand-ins
+PROBLEM_AI_BACKEND = config('PROBLEM_AI_BACKEND', default='apps.problems.ai_service.AIRecommendationService')
+PROBLEM_TRANSCRIPTION_BACKEND = config(
+    'PROBLEM_TRANSCRIPTION_BACKEND',
+    default='apps.problems.transcription_service.VoiceTranscriptionService'
+)
+
+# Shared OpenAI client (apps/problems/openai_client.py): keep-alive connection
+# pool, and retries by the client itself (the circuit breakers decide instead)
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')
+OPENAI_MAX_RETRIES = config('OPENAI_MAX_RETRIES', default=0, cast=int)
+AI_HTTP_MAX_CONNECTIONS = config('AI_HTTP_MAX_CONNECTIONS', default=20, cast=int)
+AI_HTTP_KEEPALIVE_CONNECTIONS = config('AI_HTTP_KEEPALIVE_CONNECTIONS', default=10, cast=int)
+AI_HTTP_KEEPALIVE_SECONDS = config('AI_HTTP_KEEPALIVE_SECONDS', default=60, cast=int)
+# Outbound AI calls (see apps/problems/resilience.py): consecutive failures
+# that open a dependency's circuit, seconds before a probe call is let
+# through, and calls allowed in flight per dependency and process
+AI_CIRCUIT_FAILURE_THRESHOLD = config('AI_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+AI_CIRCUIT_RECOVERY_SECONDS = config('AI_CIRCUIT_RECOVERY_SECONDS', default=30, cast=int)
+AI_MAX_CONCURRENT_CALLS = config('AI_MAX_CONCURRENT_CALLS', default=8, cast=int)
+AI_TIMEOUTS = {
+    'openai-chat': config('AI_CHAT_TIMEOUT', default=4, cast=float),
+    'openai-audio': config('AI_AUDIO_TIMEOUT', default=60, cast=float),
+}
+
+# Keyword rules for recommendations when OpenAI is unavailable (default: apps/problems/fallback_rules.json)
+PROBLEM_FALLBACK_RULES = config('PROBLEM_FALLBACK_RULES', default='')
+
+# AI recommendation cache; see apps/problems/recommendation_cache.py (empty disables)
+RECOMMENDATION_CACHE_BACKEND = config(
+    'RECOMMENDATION_CACHE_BACKEND',
+    default='apps.problems.recommendation_cache.LocMemRecommendationCacheBackend'
+)
+RECOMMENDATION_CACHE_TTL = config('RECOMMENDATION_CACHE_TTL', default=86400, cast=int)
+RECOMMENDATION_CACHE_MAX_ENTRIES = config('RECOMMENDATION_CACHE_MAX_ENTRIES', default=10000, cast=int)
+# Estimated Jaccard similarity at which a near-duplicate problem reuses an answer
+RECOMMENDATION_CACHE_SIMILARITY = config('RECOMMENDATION_CACHE_SIMILARITY', default=0.75, cast=float)
+
+# Analytics Configuration
+# Use 'apps.analytics.metrics.CounterMetricsBackend' to serve dashboard metrics
+# from precomputed counters (see `manage.py reconcile_counters`)
+ANALYTICS_METRICS_BACKEND = 'apps.analytics.metrics.AggregateMetricsBackend'
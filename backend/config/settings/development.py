@@ -20,3 +20,6 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Email backend for development (console)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Send outbox emails as soon as their transaction commits, so no worker is needed
+EMAIL_OUTBOX_SEND_ON_COMMIT = config('EMAIL_OUTBOX_SEND_ON_COMMIT', default=True, cast=bool)
@@ -13,6 +13,7 @@ urlpatterns = [
     path('api/requests/', include('apps.requests.urls')),
     path('api/problems/', include('apps.problems.urls')),
     path('api/analytics/', include('apps.analytics.urls')),
+    path('api/notifications/', include('apps.notifications.urls')),
 ]
 
 if settings.DEBUG:
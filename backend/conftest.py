@@ -7,10 +7,25 @@ from rest_framework.test import APIClient
 from apps.services.models import Service
 from apps.requests.models import ServiceRequest
 from apps.problems.models import ProblemReport
+from apps.problems.resilience import reset_ai_dependencies
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def exact_page_counts(settings):
+    """Disable cached page counts so lists reflect rows created earlier in a test."""
+    settings.PAGINATION_COUNT_CACHE_TTL = 0
+
+
+@pytest.fixture(autouse=True)
+def closed_ai_circuits():
+    """Start every test with closed circuits, whatever failures earlier tests simulated."""
+    reset_ai_dependencies()
+    yield
+    reset_ai_dependencies()
+
+
 @pytest.fixture
 def api_client():
     """Return an API client for making requests."""
@@ -0,0 +1,92 @@
+"""
+Async API views for I/O-bound endpoints served under ASGI.
+
+DRF 3.14 views are synchronous, so under ASGI Django runs each of them in a
+worker thread via sync_to_async. AsyncAPIView runs its handlers on the event
+loop instead. Authentication, permission and throttle checks still use the
+DRF classes, in a single thread hop. Handlers await async ORM queries and
+async HTTP clients. Requests, responses and errors have the same format as
+those of the sync views.
+
+The async views are routed only when ASYNC_VIEWS is set; config/asgi.py
+sets it for ASGI servers. Under WSGI, Django would have to run every async
+view in an event loop of its own, so the sync views are routed there.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+def select_view(sync_view, async_view):
+    """
+    Pick the view to route, depending on ASYNC_VIEWS.
+
+    Args:
+        sync_view: View for WSGI servers
+        async_view: Equivalent AsyncAPIView view for ASGI servers
+
+    Returns:
+        The view to pass to path()
+    """
+    return async_view if getattr(settings, 'ASYNC_VIEWS', False) else sync_view
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines.
+
+    Subclasses define ``async def get(self, request, ...)`` and friends and
+    return a DRF Response, as in a regular APIView. Django treats the view as
+    async because every handler is a coroutine.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        """Authenticate in one thread hop, then await the handler on the event loop."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self._prepare)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, '__await__'):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        return self._detach(self.finalize_response(request, response, *args, **kwargs))
+
+    def _prepare(self, request, *args, **kwargs):
+        """Run the blocking part of a request: checks and body parsing."""
+        # JWT authentication loads the user with a query
+        self.initial(request, *args, **kwargs)
+        # Large uploads are spooled to disk while parsing
+        request.data
+
+    @staticmethod
+    def _detach(response):
+        """
+        Render a DRF Response into a plain HttpResponse.
+
+        Django renders template responses in a worker thread under ASGI;
+        rendering JSON here, on the event loop, saves that thread hop.
+        Responses that are not DRF Responses, such as streams, pass through.
+        """
+        if not isinstance(response, Response):
+            return response
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
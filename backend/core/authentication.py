@@ -0,0 +1,36 @@
+"""
+Authentication classes for the API.
+"""
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+class _ProfileJoinedUsers:
+    """
+    Stands in for the user model in JWTAuthentication.get_user.
+
+    simplejwt looks the user up through ``user_model.objects`` and catches
+    ``user_model.DoesNotExist``; this supplies both, with the provider profile
+    joined into the lookup.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.DoesNotExist = model.DoesNotExist
+
+    @property
+    def objects(self):
+        return self.model.objects.select_related('provider_profile')
+
+
+class JWTIdentityAuthentication(JWTAuthentication):
+    """
+    JWT authentication that loads the user and their provider profile together.
+
+    The profile is joined into the user query, so permission and approval
+    checks (see core/identity.py) cost no further queries. Token validation
+    and the user checks are simplejwt's own.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_model = _ProfileJoinedUsers(self.user_model)
@@ -0,0 +1,117 @@
+"""
+Count strategies for paginated responses.
+
+Exact counts are cached per normalized query for a short TTL, so repeated page
+loads of the same filtered list do not each run a COUNT(*). On PostgreSQL, lists
+the planner expects to exceed a threshold are counted from planner statistics
+instead and flagged as approximate.
+"""
+import hashlib
+import json
+from typing import NamedTuple
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds an exact count is reused for the same filter set (0 disables caching)
+DEFAULT_COUNT_CACHE_TTL = 10
+
+# Estimated row count above which PostgreSQL counts are served from the planner
+DEFAULT_ESTIMATE_THRESHOLD = 100000
+
+CACHE_KEY_PREFIX = 'pagination-count'
+
+
+class CountResult(NamedTuple):
+    """A row count and whether it is an estimate."""
+    value: int
+    approximate: bool
+
+
+class CountService:
+    """Service for counting paginated querysets."""
+
+    @staticmethod
+    def cache_key(queryset):
+        """
+        Build a cache key from the queryset's SQL with ordering removed.
+
+        Two querysets with the same filters share a key regardless of the order
+        their filters were applied in the view, as long as they compile to the
+        same SQL.
+        """
+        sql, params = queryset.order_by().query.sql_with_params()
+        raw = f"{queryset.db}:{sql}:{params!r}"
+        return f"{CACHE_KEY_PREFIX}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def estimate(queryset):
+        """
+        Get the planner's row estimate for a queryset.
+
+        Unfiltered querysets read pg_class.reltuples; filtered ones read the
+        top-level row estimate from EXPLAIN.
+
+        Returns:
+            int or None: Estimated rows, or None if no estimate is available
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        queryset = queryset.order_by()
+        try:
+            if not queryset.query.where:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                        [queryset.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                # reltuples is -1 until the table has been vacuumed or analyzed
+                if row and row[0] >= 0:
+                    return int(row[0])
+                return None
+
+            plan = json.loads(queryset.explain(format='json'))
+            return int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            logger.warning(f"Could not estimate row count: {str(e)}")
+            return None
+
+    @classmethod
+    def count(cls, queryset):
+        """
+        Count a queryset using the cheapest acceptable strategy.
+
+        Args:
+            queryset: QuerySet being paginated
+
+        Returns:
+            CountResult: The count and whether it is approximate
+        """
+        ttl = getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', DEFAULT_COUNT_CACHE_TTL)
+        threshold = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', DEFAULT_ESTIMATE_THRESHOLD)
+
+        key = cls.cache_key(queryset) if ttl else None
+        if key:
+            cached = cache.get(key)
+            if cached is not None:
+                return CountResult(*cached)
+
+        result = None
+        if threshold:
+            estimate = cls.estimate(queryset)
+            if estimate is not None and estimate >= threshold:
+                result = CountResult(estimate, True)
+
+        if result is None:
+            result = CountResult(queryset.order_by().count(), False)
+
+        if key:
+            cache.set(key, tuple(result), ttl)
+        return result
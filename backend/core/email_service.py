@@ -1,10 +1,12 @@
 """
 Email notification service for sending transactional emails.
+
+Emails are rendered in the calling thread and queued in the transactional outbox
+(apps.notifications.outbox); delivery happens after commit, outside the request.
 """
-from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.db import transaction
+from .email_templates import EmailTemplateRenderer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,7 +18,10 @@ class EmailNotificationService:
     @staticmethod
     def send_email(subject, recipient_email, template_name, context):
         """
-        Send an email using a template.
+        Queue an email rendered from a template.
+        
+        The email is written to the outbox in the caller's transaction and is
+        discarded if that transaction rolls back.
         
         Args:
             subject: Email subject line
@@ -25,28 +30,30 @@ class EmailNotificationService:
             context: Dictionary of context variables for the template
             
         Returns:
-            bool: True if email was sent successfully, False otherwise
+            bool: True if email was queued successfully, False otherwise
         """
+        from apps.notifications.outbox import EmailOutboxService
+        
         try:
-            # Render HTML content from template
-            html_message = render_to_string(f'emails/{template_name}.html', context)
-            plain_message = strip_tags(html_message)
+            # Render HTML and plaintext parts from precompiled templates
+            html_message, plain_message = EmailTemplateRenderer.render(template_name, context)
             
-            # Send email
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[recipient_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
+            # Savepoint, so a failed insert does not break the caller's transaction
+            with transaction.atomic():
+                EmailOutboxService.enqueue(
+                    recipient=recipient_email,
+                    subject=subject,
+                    body=plain_message,
+                    html_body=html_message,
+                    template_name=template_name,
+                    from_email=settings.DEFAULT_FROM_EMAIL
+                )
             
-            logger.info(f"Email sent successfully to {recipient_email}: {subject}")
+            logger.info(f"Email queued for {recipient_email}: {subject}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send email to {recipient_email}: {str(e)}")
+            logger.error(f"Failed to queue email to {recipient_email}: {str(e)}")
             return False
     
     @classmethod
@@ -59,7 +66,7 @@ class EmailNotificationService:
             provider_name: Provider's full name
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         subject = "Your Service Provider Application Has Been Approved"
         context = {
@@ -84,7 +91,7 @@ class EmailNotificationService:
             provider_name: Provider's full name
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         subject = "Update on Your Service Provider Application"
         context = {
@@ -111,7 +118,7 @@ class EmailNotificationService:
             requester_name: Name of the user requesting the service
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         subject = f"New Service Request for {service_name}"
         context = {
@@ -128,6 +135,37 @@ class EmailNotificationService:
             context=context
         )
     
+    @classmethod
+    def send_service_request_digest(cls, provider_email, provider_name, requests, more_count=0):
+        """
+        Send a provider one summary of several new service requests.
+        
+        Args:
+            provider_email: Provider's email address
+            provider_name: Provider's full name
+            requests: List of dicts with service_name and requester_name
+            more_count: Number of further requests not listed individually
+            
+        Returns:
+            bool: True if email was queued successfully
+        """
+        request_count = len(requests) + more_count
+        subject = f"You Have {request_count} New Service Requests"
+        context = {
+            'provider_name': provider_name,
+            'requests': requests,
+            'request_count': request_count,
+            'more_count': more_count,
+            'dashboard_url': f"{settings.FRONTEND_URL}/provider/dashboard" if hasattr(settings, 'FRONTEND_URL') else "http://localhost:5173/provider/dashboard",
+        }
+        
+        return cls.send_email(
+            subject=subject,
+            recipient_email=provider_email,
+            template_name='service_request_digest',
+            context=context
+        )
+    
     @classmethod
     def send_request_accepted_email(cls, requester_email, requester_name, service_name, provider_name):
         """
@@ -140,7 +178,7 @@ class EmailNotificationService:
             provider_name: Provider's full name
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         subject = f"Your Service Request for {service_name} Has Been Accepted"
         context = {
@@ -169,7 +207,7 @@ class EmailNotificationService:
             provider_name: Provider's full name
             
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
         subject = f"Update on Your Service Request for {service_name}"
         context = {
@@ -0,0 +1,146 @@
+"""
+Precompiled email templates.
+
+Each email template under templates/emails/ is compiled once per process into
+two Django templates: the HTML template itself and a plaintext template derived
+from it by stripping markup from the template source. Sending an email is then
+two cheap renders, instead of a render followed by an HTML parse of the output
+with ``strip_tags``.
+
+The plaintext template renders with the same autoescaping as the HTML one, so
+its output is identical to ``strip_tags(html)``, which drops tags but leaves
+entities (including escaped context values) as they are.
+
+Compiled templates are dropped when a template file changes under the
+development autoreloader, or with ``EmailTemplateRenderer.clear()``.
+"""
+import threading
+from typing import NamedTuple
+from django.core.signals import setting_changed
+from django.template import TemplateSyntaxError
+from django.template.base import tag_re
+from django.template.loader import get_template
+from django.utils.autoreload import file_changed
+from django.utils.html import strip_tags
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Private-use characters never appear in templates and contain no markup
+PLACEHOLDER = '\ue000{}\ue001'
+
+
+class RenderedEmail(NamedTuple):
+    """HTML and plaintext parts of an email."""
+    html: str
+    text: str
+
+
+class CompiledEmailTemplate(NamedTuple):
+    """An email template and its derived plaintext template."""
+    html: object
+    text: object
+
+
+def derive_text_source(source):
+    """
+    Derive a plaintext template source from an HTML template source.
+
+    Template tags and variables are swapped for placeholders, markup is stripped
+    from what remains, then the placeholders are restored. Tags that sat inside
+    HTML attributes are dropped along with the attribute, just as the values they
+    render would have been.
+
+    Args:
+        source: HTML template source
+
+    Returns:
+        str: Template source that renders to the HTML template's plain text
+    """
+    tokens = []
+
+    def stash(match):
+        tokens.append(match.group(0))
+        return PLACEHOLDER.format(len(tokens) - 1)
+
+    stripped = strip_tags(tag_re.sub(stash, source))
+    for index, token in enumerate(tokens):
+        stripped = stripped.replace(PLACEHOLDER.format(index), token)
+    return stripped
+
+
+class EmailTemplateRenderer:
+    """Render email templates from an in-process cache of compiled templates."""
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _compile(template_name):
+        html = get_template(f'emails/{template_name}.html')
+        try:
+            text = html.backend.from_string(derive_text_source(html.template.source))
+        except TemplateSyntaxError as e:
+            # Tags split across markup; fall back to stripping rendered HTML
+            logger.warning(f"Could not derive plaintext template for {template_name}: {str(e)}")
+            text = None
+        return CompiledEmailTemplate(html, text)
+
+    @classmethod
+    def get(cls, template_name):
+        """
+        Get the compiled templates for an email template, compiling on first use.
+
+        Args:
+            template_name: Name of the email template (without .html extension)
+
+        Returns:
+            CompiledEmailTemplate: HTML template and plaintext template (or None)
+        """
+        compiled = cls._cache.get(template_name)
+        if compiled is None:
+            with cls._lock:
+                compiled = cls._cache.get(template_name)
+                if compiled is None:
+                    compiled = cls._compile(template_name)
+                    cls._cache[template_name] = compiled
+        return compiled
+
+    @classmethod
+    def render(cls, template_name, context):
+        """
+        Render both parts of an email.
+
+        Args:
+            template_name: Name of the email template (without .html extension)
+            context: Dictionary of context variables for the template
+
+        Returns:
+            RenderedEmail: HTML and plaintext parts
+        """
+        compiled = cls.get(template_name)
+        html = compiled.html.render(context)
+        if compiled.text is None:
+            return RenderedEmail(html, strip_tags(html))
+        return RenderedEmail(html, compiled.text.render(context))
+
+    @classmethod
+    def clear(cls):
+        """Drop all compiled templates."""
+        with cls._lock:
+            cls._cache.clear()
+
+
+def _template_file_changed(sender, file_path, **kwargs):
+    if file_path.suffix != '.py':
+        EmailTemplateRenderer.clear()
+
+
+def _templates_setting_changed(sender, setting, **kwargs):
+    if setting == 'TEMPLATES':
+        EmailTemplateRenderer.clear()
+
+
+file_changed.connect(_template_file_changed, dispatch_uid='email_templates_file_changed')
+setting_changed.connect(_templates_setting_changed, dispatch_uid='email_templates_setting_changed')
@@ -0,0 +1,160 @@
+"""
+HTTP helpers for streamed responses and serving files with byte-range support.
+"""
+import os
+import re
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Bytes read per chunk when streaming a partial response
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def streaming_content(iterable, batch_size=1):
+    """
+    Content for a StreamingHttpResponse that streams under WSGI and ASGI.
+
+    Under ASGI (ASYNC_VIEWS), Django 5.0 reads a sync iterator to the end
+    with sync_to_async(list) before sending the first byte. There the
+    iterable is wrapped in an async iterator that pulls batch_size items per
+    worker thread hop, so the response is sent as it is produced. Under WSGI
+    the iterable is returned as it is.
+
+    Args:
+        iterable: Sync iterable of str or bytes, e.g. a generator reading
+            the database
+        batch_size: Items read per thread hop; larger batches mean fewer hops
+            at the cost of later first bytes
+
+    Returns:
+        The iterable, or an async iterator over it
+    """
+    if not getattr(settings, 'ASYNC_VIEWS', False):
+        return iterable
+    return _aiter_in_thread(iterable, batch_size)
+
+
+async def _aiter_in_thread(iterable, batch_size):
+    iterator = iter(iterable)
+    # Thread-sensitive, so queries run on the request's database connection
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    try:
+        while True:
+            batch = await next_batch()
+            if not batch:
+                break
+            for item in batch:
+                yield item
+    finally:
+        # Run the generator's cleanup (closing files and cursors) when the client leaves early
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def _iter_file_range(path, start, length):
+    """Yield length bytes of a file starting at offset start."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single-range HTTP Range header.
+
+    Args:
+        header: Value of the Range header
+        size: Total size of the resource in bytes
+
+    Returns:
+        tuple: (start, end) inclusive byte offsets, None if the header should be
+        ignored, or False if the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multi-range and non-byte units are not supported; serve the full file
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def ranged_file_response(request, path, filename, content_type, etag=None):
+    """
+    Serve a file, honouring Range and If-Range headers so downloads can resume.
+
+    Args:
+        request: The incoming request
+        path: Filesystem path of the file
+        filename: Download filename for Content-Disposition
+        content_type: MIME type of the file
+        etag: Optional validator for If-Range; derived from size and mtime if omitted
+
+    Returns:
+        HttpResponseBase: 200 with the full file, 206 with the requested range,
+        or 416 if the range cannot be satisfied
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = quote_etag(etag or f"{int(stat.st_mtime)}-{size}")
+    last_modified = http_date(stat.st_mtime)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header:
+        if_range = request.META.get('HTTP_IF_RANGE')
+        # A stale If-Range validator means the client must restart from scratch
+        if not if_range or if_range in (etag, last_modified):
+            byte_range = parse_range_header(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif byte_range or getattr(settings, 'ASYNC_VIEWS', False):
+        # Under ASGI whole files are streamed this way too; a FileResponse
+        # would be read into memory before sending
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            streaming_content(_iter_file_range(path, start, length)),
+            status=206 if byte_range else 200,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(length)
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,81 @@
+"""
+Request-scoped identity of the authenticated user.
+
+JWTIdentityAuthentication (core/authentication.py) loads the user together
+with their provider profile in one query. get_identity() wraps the user in an
+Identity stored on the user instance; a new user instance is loaded for each
+request, so the identity lives exactly as long as the request. Permission
+classes and services ask the identity for role and approval checks instead
+of reading user.provider_profile, which costs a query whenever the profile
+was not loaded with the user (and every time for users without one).
+"""
+from functools import cached_property
+from django.core.exceptions import ObjectDoesNotExist
+
+
+class Identity:
+    """
+    Role and approval checks for one user.
+
+    The provider profile lookup, including a missing profile, is memoized;
+    role checks read the already loaded user.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def is_authenticated(self):
+        return bool(self.user and self.user.is_authenticated)
+
+    @property
+    def role(self):
+        """The user's role, or None for anonymous users."""
+        return self.user.role if self.is_authenticated else None
+
+    @property
+    def is_regular(self):
+        return self.role == 'REGULAR'
+
+    @property
+    def is_provider(self):
+        return self.role == 'PROVIDER'
+
+    @property
+    def is_admin(self):
+        return self.role == 'ADMIN'
+
+    @cached_property
+    def provider_profile(self):
+        """The provider's ProviderProfile, or None for other users and missing profiles."""
+        if not self.is_provider:
+            return None
+        try:
+            return self.user.provider_profile
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def is_approved_provider(self):
+        """Check if the user is a provider whose application was approved."""
+        profile = self.provider_profile
+        return profile is not None and profile.approval_status == 'APPROVED'
+
+
+def get_identity(user):
+    """
+    Return the identity of a user, memoized on the user instance.
+
+    Args:
+        user: User instance, AnonymousUser or None
+
+    Returns:
+        Identity
+    """
+    if user is None:
+        return Identity(None)
+    identity = getattr(user, '_identity', None)
+    if identity is None:
+        identity = Identity(user)
+        user._identity = identity
+    return identity
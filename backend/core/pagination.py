@@ -1,10 +1,39 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.functional import cached_property
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from core.counting import CountService
+from core.exceptions import ValidationException
+
+
+class CountingPaginator(DjangoPaginator):
+    """Django paginator that counts querysets through CountService."""
+    
+    approximate = False
+    
+    @cached_property
+    def count(self):
+        """Return the (possibly cached or estimated) number of objects."""
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        result = CountService.count(self.object_list)
+        self.approximate = result.approximate
+        return result.value
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     """Standard pagination class for API responses."""
     
+    django_paginator_class = CountingPaginator
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -13,6 +42,7 @@ class StandardResultsSetPagination(PageNumberPagination):
         """Return paginated response with metadata."""
         return Response({
             'count': self.page.paginator.count,
+            'count_approximate': self.page.paginator.approximate,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'total_pages': self.page.paginator.num_pages,
@@ -24,6 +54,7 @@ class StandardResultsSetPagination(PageNumberPagination):
 class LargeResultsSetPagination(PageNumberPagination):
     """Pagination class for large result sets."""
     
+    django_paginator_class = CountingPaginator
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 200
@@ -32,9 +63,220 @@ class LargeResultsSetPagination(PageNumberPagination):
         """Return paginated response with metadata."""
         return Response({
             'count': self.page.paginator.count,
+            'count_approximate': self.page.paginator.approximate,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'total_pages': self.page.paginator.num_pages,
             'current_page': self.page.number,
             'results': data
         })
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination that keeps the queryset's ordering.
+    
+    Each page is fetched with a WHERE clause on the ordering values of the last
+    row seen instead of an OFFSET, so page 5,000 costs the same as page 1 and
+    rows inserted between requests never shift a page. The keyset is the
+    queryset's own ordering (e.g. search rank or distance, which may be
+    annotations), or (-created_at, id) for unordered querysets, with id added
+    as a tiebreaker. Cursors are opaque to clients and only valid for the
+    ordering they were issued for.
+    
+    Clients opt in per request with ?pagination=cursor (or by sending a cursor),
+    and can pass ?count=false to skip counting altogether.
+    """
+    
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-created_at', 'id')
+    keyset = None
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of the queryset after the request's cursor."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keyset = self.get_keyset(queryset)
+        self.include_count = request.query_params.get(
+            self.count_query_param, 'true'
+        ).lower() not in ('0', 'false', 'no')
+        self.count = None
+        self.count_approximate = False
+        if self.include_count:
+            self.count, self.count_approximate = CountService.count(queryset)
+        
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[0] == 'p'
+        
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self._beyond(cursor[1], reverse))
+            except (ValueError, TypeError, DjangoValidationError):
+                raise ValidationException('Invalid cursor.')
+        
+        ordering = [self._flip(key) for key in self.keyset] if reverse else self.keyset
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+        
+        # Forward pages always have a way back once a cursor was used, and
+        # backward pages always have a way forward
+        self.has_next = has_more if not reverse else bool(results)
+        self.has_previous = has_more if reverse else cursor is not None and bool(results)
+        self.page = results
+        return results
+    
+    def get_keyset(self, queryset):
+        """
+        Return the ordering pages are keyed on.
+        
+        Raises:
+            ValidationException: If the ordering cannot be keyed, e.g. on a
+                related or nullable field
+        """
+        keyset = list(queryset.query.order_by) or list(self.ordering)
+        for key in keyset:
+            name = key.lstrip('-') if isinstance(key, str) else None
+            if not name or name == '?' or LOOKUP_SEP in name:
+                raise ValidationException('Cursor pagination is not available for this ordering.')
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations and pk
+                continue
+            if field.null:
+                raise ValidationException('Cursor pagination is not available for this ordering.')
+        
+        if not {'id', 'pk'} & {key.lstrip('-') for key in keyset}:
+            keyset.append('id')
+        return tuple(keyset)
+    
+    @staticmethod
+    def _flip(key):
+        return key[1:] if key.startswith('-') else f'-{key}'
+    
+    def _beyond(self, values, reverse):
+        """Match the rows after the cursor's row, or before it when reverse."""
+        condition = Q()
+        equal = {}
+        for key, value in zip(self.keyset, values):
+            name = key.lstrip('-')
+            lookup = 'gt' if key.startswith('-') == reverse else 'lt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        
+        # The redundant bound on the first key lets the planner range-scan its
+        # index instead of evaluating the OR on every row
+        first = self.keyset[0]
+        lookup = 'gte' if first.startswith('-') == reverse else 'lte'
+        return condition & Q(**{f'{first.lstrip("-")}__{lookup}': values[0]})
+    
+    def get_page_size(self, request):
+        """Return the page size, honouring page_size up to max_page_size."""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+    
+    def encode_cursor(self, direction, obj):
+        """Build an opaque cursor pointing at obj."""
+        keyset = self.keyset or self.ordering
+        values = []
+        for key in keyset:
+            value = getattr(obj, key.lstrip('-'))
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        payload = json.dumps({'d': direction, 'k': list(keyset), 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+    
+    def decode_cursor(self, request):
+        """
+        Decode the request's cursor.
+        
+        Returns:
+            tuple: (direction, ordering values), or None if no cursor was sent
+            
+        Raises:
+            ValidationException: If the cursor is malformed or was issued for
+                another ordering
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+            direction, keyset, values = payload['d'], payload['k'], payload['v']
+        except (ValueError, UnicodeDecodeError, binascii.Error, TypeError, KeyError):
+            raise ValidationException('Invalid cursor.')
+        
+        expected = list(self.keyset or self.ordering)
+        if direction not in ('n', 'p') or keyset != expected or not isinstance(values, list):
+            raise ValidationException('Invalid cursor.')
+        if len(values) != len(expected):
+            raise ValidationException('Invalid cursor.')
+        return direction, values
+    
+    def _get_link(self, direction, obj):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(direction, obj))
+        return replace_query_param(url, 'pagination', 'cursor')
+    
+    def get_next_link(self):
+        """Return the URL of the next page, or None."""
+        if not self.has_next:
+            return None
+        return self._get_link('n', self.page[-1])
+    
+    def get_previous_link(self):
+        """Return the URL of the previous page, or None."""
+        if not self.has_previous:
+            return None
+        return self._get_link('p', self.page[0])
+    
+    def get_paginated_response(self, data):
+        """Return paginated response with metadata."""
+        return Response({
+            'count': self.count,
+            'count_approximate': self.count_approximate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+
+def wants_keyset_pagination(request):
+    """Return True if the client asked for cursor pagination on this request."""
+    return (
+        request.query_params.get('pagination') == 'cursor'
+        or bool(request.query_params.get(KeysetPagination.cursor_query_param))
+    )
+
+
+def get_paginator(request, default_class=StandardResultsSetPagination):
+    """
+    Return the paginator a list view should use for this request.
+    
+    Args:
+        request: The incoming request
+        default_class: Page-number paginator used unless the client opts in to cursors
+        
+    Returns:
+        BasePagination: Paginator instance
+    """
+    if wants_keyset_pagination(request):
+        return KeysetPagination()
+    return default_class()
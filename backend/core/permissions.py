@@ -1,39 +1,26 @@
 from rest_framework import permissions
+from .identity import get_identity
 
 
 class IsRegularUser(permissions.BasePermission):
     """Permission class to check if user is a Regular User."""
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.role == 'REGULAR'
-        )
+        return get_identity(request.user).is_regular
 
 
 class IsServiceProvider(permissions.BasePermission):
     """Permission class to check if user is a Service Provider."""
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.role == 'PROVIDER' and
-            hasattr(request.user, 'provider_profile') and
-            request.user.provider_profile.approval_status == 'APPROVED'
-        )
+        return get_identity(request.user).is_approved_provider
 
 
 class IsAdmin(permissions.BasePermission):
     """Permission class to check if user is an Admin."""
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.role == 'ADMIN'
-        )
+        return get_identity(request.user).is_admin
 
 
 class IsOwner(permissions.BasePermission):
@@ -68,8 +55,5 @@ class IsRegularUserOrProvider(permissions.BasePermission):
     """Permission class to check if user is either a Regular User or Service Provider."""
     
     def has_permission(self, request, view):
-        return (
-            request.user and
-            request.user.is_authenticated and
-            request.user.role in ['REGULAR', 'PROVIDER']
-        )
+        identity = get_identity(request.user)
+        return identity.is_regular or identity.is_provider
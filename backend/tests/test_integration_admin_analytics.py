@@ -190,10 +190,7 @@ class TestAdminAnalyticsWorkflow:
         assert 'text/csv' in response['Content-Type']
         
         # Try to parse CSV
-        if isinstance(response.content, bytes):
-            content = response.content.decode('utf-8')
-        else:
-            content = response.content
+        content = b''.join(response.streaming_content).decode('utf-8')
         
         # Verify it's valid CSV
         csv_reader = csv.reader(StringIO(content))
@@ -0,0 +1,193 @@
+"""
+Integration tests for background problem report processing.
+"""
+import pytest
+import time
+from io import BytesIO
+from unittest.mock import patch
+from rest_framework import status
+from apps.problems.models import ProblemReport
+from apps.problems.services import ProblemReportService, ProblemReportWorkerPool
+
+
+@pytest.fixture
+def fake_ai(settings, tmp_path):
+    """Use the offline AI services and process reports inline after commit."""
+    settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+    settings.PROBLEM_TRANSCRIPTION_BACKEND = 'apps.problems.fakes.FakeTranscriptionService'
+    settings.PROBLEM_REPORT_WORKERS = 0
+    settings.PROBLEM_REPORT_MAX_WAIT = 1
+    settings.FAKE_AI_LATENCY = 0
+    settings.MEDIA_ROOT = str(tmp_path)
+    return settings
+
+
+def _recording(text, name='problem.wav'):
+    audio_file = BytesIO(text.encode('utf-8'))
+    audio_file.name = name
+    return audio_file
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAsyncProblemReports:
+    """Test async submission, background processing and polling."""
+
+    def test_text_report_is_processed_after_commit(self, authenticated_client, fake_ai, django_capture_on_commit_callbacks):
+        """The report is returned as PROCESSING and completed in the background."""
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post('/api/problems/create/?async=true', {
+                'input_type': 'TEXT',
+                'problem_text': 'The cleaner was late again'
+            })
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'PROCESSING'
+        assert response.data['recommendations'] == []
+
+        response = authenticated_client.get(f"/api/problems/{response.data['id']}/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'COMPLETED'
+        assert response.data['recommendations'][0]['title'] == 'Contact the Service Provider'
+
+    def test_async_mode_from_settings(self, authenticated_client, fake_ai):
+        """PROBLEM_REPORTS_ASYNC makes async the default; ?async=false opts out."""
+        fake_ai.PROBLEM_REPORTS_ASYNC = True
+        data = {'input_type': 'TEXT', 'problem_text': 'Price too high'}
+
+        response = authenticated_client.post('/api/problems/create/', data)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+
+        response = authenticated_client.post('/api/problems/create/?async=false', data)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == 'COMPLETED'
+
+    def test_voice_report_is_transcribed_in_background(self, authenticated_client, fake_ai, django_capture_on_commit_callbacks):
+        """Voice reports are stored first and transcribed by the worker."""
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post('/api/problems/create/?async=true', {
+                'input_type': 'VOICE',
+                'audio_file': _recording('The quality of the paint job is poor')
+            }, format='multipart')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['problem_text'] == ''
+
+        report = ProblemReport.objects.get(id=response.data['id'])
+        assert report.status == 'COMPLETED'
+        assert report.problem_text == 'The quality of the paint job is poor'
+        assert report.recommendations[0]['title'] == 'Document the Issues'
+
+    def test_invalid_audio_is_rejected_in_request(self, authenticated_client, fake_ai):
+        """Audio validation still happens synchronously."""
+        response = authenticated_client.post('/api/problems/create/?async=true', {
+            'input_type': 'VOICE',
+            'audio_file': _recording('not audio', name='notes.txt')
+        }, format='multipart')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert ProblemReport.objects.count() == 0
+
+    def test_processing_failure_is_recorded(self, authenticated_client, fake_ai, django_capture_on_commit_callbacks):
+        """A crash in the background marks the report FAILED with a safe message."""
+        with patch('apps.problems.fakes.FakeTranscriptionEngine.transcribe', side_effect=RuntimeError('boom')):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = authenticated_client.post('/api/problems/create/?async=true', {
+                    'input_type': 'VOICE',
+                    'audio_file': _recording('anything')
+                }, format='multipart')
+
+        response = authenticated_client.get(f"/api/problems/{response.data['id']}/")
+        assert response.data['status'] == 'FAILED'
+        assert response.data['error'] == 'Failed to process problem report. Please try again.'
+
+    def test_detail_long_polls_while_processing(self, authenticated_client, regular_user, fake_ai):
+        """?wait holds the request until the wait expires if processing never finishes."""
+        report = ProblemReport.objects.create(
+            user=regular_user,
+            input_type='TEXT',
+            problem_text='Slow reply',
+            status='PROCESSING'
+        )
+
+        start = time.monotonic()
+        response = authenticated_client.get(f'/api/problems/{report.id}/?wait=30')
+        elapsed = time.monotonic() - start
+
+        assert response.data['status'] == 'PROCESSING'
+        # Capped by PROBLEM_REPORT_MAX_WAIT
+        assert 0.9 <= elapsed < 3
+
+    def test_stale_reports_are_processed(self, regular_user, fake_ai):
+        """Reports orphaned in PROCESSING are finished by the stale sweep."""
+        report = ProblemReport.objects.create(
+            user=regular_user,
+            input_type='TEXT',
+            problem_text='Provider did not reply',
+            status='PROCESSING'
+        )
+        ProblemReport.objects.filter(id=report.id).update(updated_at=report.updated_at.replace(year=2000))
+
+        assert ProblemReportService().process_stale_reports() == 1
+        report.refresh_from_db()
+        assert report.status == 'COMPLETED'
+
+    def test_claimed_reports_are_not_processed_twice(self, regular_user, fake_ai):
+        """A report claimed by a running worker is left to it until the claim lapses."""
+        report = ProblemReport.objects.create(
+            user=regular_user,
+            input_type='TEXT',
+            problem_text='Provider did not reply',
+            status='PROCESSING'
+        )
+        service = ProblemReportService()
+        assert service._claim_report(report.id) is not None
+        ProblemReport.objects.filter(id=report.id).update(updated_at=report.updated_at.replace(year=2000))
+
+        assert service.process_stale_reports() == 0
+        assert service.process_problem_report(report.id) is None
+        report.refresh_from_db()
+        assert report.status == 'PROCESSING'
+
+        ProblemReport.objects.filter(id=report.id).update(claimed_at=report.claimed_at.replace(year=2000))
+        assert service.process_stale_reports() == 1
+        report.refresh_from_db()
+        assert report.status == 'COMPLETED'
+
+    def test_run_that_lost_its_claim_does_not_save(self, regular_user, fake_ai):
+        """A run whose claim was taken over discards its result."""
+        report = ProblemReport.objects.create(
+            user=regular_user,
+            input_type='TEXT',
+            problem_text='Provider did not reply',
+            status='PROCESSING'
+        )
+        service = ProblemReportService()
+
+        def taken_over(problem_text):
+            # Another run claims the report and completes it meanwhile
+            ProblemReport.objects.filter(id=report.id).update(status='COMPLETED', claim_token=None)
+            raise RuntimeError('OpenAI unavailable')
+
+        with patch.object(service.ai_service, 'generate_recommendations', side_effect=taken_over):
+            assert service.process_problem_report(report.id) is None
+
+        report.refresh_from_db()
+        assert report.status == 'COMPLETED'
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_worker_pool_processes_on_threads(regular_user, fake_ai):
+    """Reports submitted to the pool are processed on worker threads."""
+    fake_ai.PROBLEM_REPORT_WORKERS = 2
+    reports = [
+        ProblemReport.objects.create(user=regular_user, input_type='TEXT', problem_text=text, status='PROCESSING')
+        for text in ['Too expensive', 'Bad quality work']
+    ]
+
+    for report in reports:
+        ProblemReportWorkerPool.submit(report.id)
+    ProblemReportWorkerPool.shutdown(wait=True)
+
+    assert set(ProblemReport.objects.values_list('status', flat=True)) == {'COMPLETED'}
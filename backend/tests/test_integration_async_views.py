@@ -0,0 +1,419 @@
+"""
+Integration tests for the async views routed under ASGI.
+
+The views are called directly with an AsyncRequestFactory and a real JWT, as
+an ASGI server would call them.
+"""
+import asyncio
+import json
+import time
+from datetime import date
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.analytics.metrics import get_metrics_backend
+from apps.analytics.services import AnalyticsService
+from apps.analytics.views import AsyncDashboardMetricsView
+from apps.notifications.models import OutboxEmail
+from apps.problems.ai_service import AIRecommendationService
+from apps.problems.fakes import FakeAIRecommendationService
+from apps.problems.fallback_rules import get_fallback_rules
+from apps.problems.models import ProblemReport
+from apps.problems.resilience import get_ai_dependency
+from apps.problems.views import (
+    AsyncProblemReportCreateView,
+    AsyncProblemReportDetailView,
+    AsyncProblemReportStreamView,
+)
+from apps.requests.views import AsyncServiceRequestActionView
+from core.async_views import select_view
+
+
+factory = AsyncRequestFactory()
+
+
+def _call(view, request, **kwargs):
+    response = async_to_sync(view)(request, **kwargs)
+    return response, json.loads(response.content)
+
+
+def _auth(user):
+    return {'headers': {'Authorization': f'Bearer {AccessToken.for_user(user)}'}}
+
+
+class TestSelectView:
+    """Test routing of the sync or async view."""
+
+    def test_async_view_only_when_enabled(self, settings):
+        settings.ASYNC_VIEWS = False
+        assert select_view('sync', 'async') == 'sync'
+
+        settings.ASYNC_VIEWS = True
+        assert select_view('sync', 'async') == 'async'
+
+    def test_async_views_are_coroutines(self):
+        view = AsyncDashboardMetricsView.as_view()
+
+        assert asyncio.iscoroutinefunction(view)
+        assert view.csrf_exempt
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAsyncDashboard:
+    """Test the async dashboard metrics view."""
+
+    view = staticmethod(AsyncDashboardMetricsView.as_view())
+
+    def test_matches_sync_metrics(self, admin_user, service_request):
+        response, data = _call(self.view, factory.get('/api/analytics/dashboard/', **_auth(admin_user)))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+        assert data == AnalyticsService.get_dashboard_metrics()
+        assert data['pending_requests'] == 1
+
+    @pytest.mark.parametrize('backend', [
+        'apps.analytics.metrics.AggregateMetricsBackend',
+        'apps.analytics.metrics.CounterMetricsBackend',
+    ])
+    def test_backends_await_the_same_metrics(self, backend, service_request):
+        metrics_backend = get_metrics_backend(backend)
+
+        assert async_to_sync(metrics_backend.aget_metrics)() == metrics_backend.get_metrics()
+        assert (
+            async_to_sync(metrics_backend.aget_metrics)(start_date=date(2000, 1, 1))
+            == metrics_backend.get_metrics(start_date=date(2000, 1, 1))
+        )
+
+    def test_regular_user_is_forbidden(self, regular_user):
+        response, data = _call(self.view, factory.get('/api/analytics/dashboard/', **_auth(regular_user)))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_requires_authentication(self, api_client):
+        response, data = _call(self.view, factory.get('/api/analytics/dashboard/'))
+
+        # Same error body as the sync view
+        sync_response = api_client.get('/api/analytics/dashboard/')
+        assert response.status_code == sync_response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert data == sync_response.json()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAsyncRequestActions:
+    """Test async accept and reject of service requests."""
+
+    accept = staticmethod(AsyncServiceRequestActionView.as_view(action='accept'))
+    reject = staticmethod(AsyncServiceRequestActionView.as_view(action='reject'))
+
+    def _post(self, view, user, request_id):
+        request = factory.post(f'/api/requests/{request_id}/', **_auth(user))
+        return _call(view, request, request_id=request_id)
+
+    def test_accept_queues_email(self, provider_user, service_request, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks():
+            response, data = self._post(self.accept, provider_user, service_request.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert data['message'] == 'Service request accepted successfully'
+        assert data['request']['status'] == 'ACCEPTED'
+        assert data['request']['service']['provider']['id'] == provider_user.id
+        service_request.refresh_from_db()
+        assert service_request.status == 'ACCEPTED'
+        assert OutboxEmail.objects.filter(recipient=service_request.requester.email).count() == 1
+
+    def test_reject(self, provider_user, service_request):
+        response, data = self._post(self.reject, provider_user, service_request.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert data['message'] == 'Service request rejected successfully'
+        service_request.refresh_from_db()
+        assert service_request.status == 'REJECTED'
+
+    def test_only_pending_requests(self, provider_user, service_request):
+        self._post(self.accept, provider_user, service_request.id)
+
+        response, data = self._post(self.reject, provider_user, service_request.id)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert data['error']['code'] == 'VALIDATION_ERROR'
+        assert data['error']['message'].endswith('Only pending requests can be rejected.')
+
+    def test_regular_user_is_forbidden(self, regular_user, service_request):
+        response, data = self._post(self.accept, regular_user, service_request.id)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert data['error']['message'] == 'Only service providers can accept requests.'
+
+    def test_other_provider_is_forbidden(self, pending_provider_user, service_request):
+        response, data = self._post(self.accept, pending_provider_user, service_request.id)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert data['error']['code'] == 'FORBIDDEN'
+
+    def test_unknown_request(self, provider_user):
+        response, data = self._post(self.accept, provider_user, 999999)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert data['error']['code'] == 'NOT_FOUND'
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAsyncProblemReportCreate:
+    """Test async problem report creation."""
+
+    view = staticmethod(AsyncProblemReportCreateView.as_view())
+
+    def _post(self, user, payload):
+        request = factory.post(
+            '/api/problems/create/',
+            data=json.dumps(payload),
+            content_type='application/json',
+            **_auth(user)
+        )
+        return _call(self.view, request)
+
+    def test_text_report(self, regular_user, settings):
+        settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+        settings.FAKE_AI_LATENCY = 0
+
+        response, data = self._post(regular_user, {'input_type': 'TEXT', 'problem_text': 'The plumber is late'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert data['recommendations'] == get_fallback_rules().recommend('The plumber is late')
+        report = ProblemReport.objects.get(id=data['id'])
+        assert report.user == regular_user
+        assert report.recommendations == data['recommendations']
+
+    def test_invalid_report(self, regular_user):
+        response, data = self._post(regular_user, {'input_type': 'TEXT', 'problem_text': '  '})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'problem_text' in data['error']['details']
+        assert ProblemReport.objects.count() == 0
+
+    def test_background_processing(self, regular_user, settings):
+        settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+        settings.PROBLEM_REPORT_WORKERS = 0
+        settings.PROBLEM_REPORTS_ASYNC = True
+
+        response, data = self._post(regular_user, {'input_type': 'TEXT', 'problem_text': 'The plumber is late'})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert data['status'] == 'PROCESSING'
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAsyncProblemReportDetail:
+    """Test the async problem report detail view."""
+
+    view = staticmethod(AsyncProblemReportDetailView.as_view())
+
+    @pytest.fixture
+    def report(self, regular_user):
+        return ProblemReport.objects.create(
+            user=regular_user,
+            input_type='TEXT',
+            problem_text='Slow reply',
+            status='PROCESSING'
+        )
+
+    def _get(self, user, report_id, query=''):
+        request = factory.get(f'/api/problems/{report_id}/{query}', **_auth(user))
+        return _call(self.view, request, pk=report_id)
+
+    def test_matches_sync_view(self, regular_user, report, authenticated_client):
+        response, data = self._get(regular_user, report.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert data == authenticated_client.get(f'/api/problems/{report.id}/').json()
+
+    def test_long_poll_uses_the_async_cap(self, regular_user, report, settings):
+        settings.PROBLEM_REPORT_MAX_WAIT = 0
+        settings.PROBLEM_REPORT_ASYNC_MAX_WAIT = 0.5
+
+        start = time.monotonic()
+        response, data = self._get(regular_user, report.id, '?wait=30')
+        elapsed = time.monotonic() - start
+
+        assert data['status'] == 'PROCESSING'
+        assert 0.45 <= elapsed < 2
+
+    def test_other_users_report_is_not_found(self, provider_user, report):
+        response, data = self._get(provider_user, report.id)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class AsyncChunkStream:
+    """Stands in for an openai AsyncStream of chat completion chunks."""
+
+    def __init__(self, pieces, log):
+        self.pieces = pieces
+        self.log = log
+
+        async def aclose():
+            log.append('closed')
+
+        self.response = SimpleNamespace(aclose=aclose)
+
+    async def __aiter__(self):
+        for number, piece in enumerate(self.pieces):
+            self.log.append(f'chunk {number}')
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+def _sse_events(parts):
+    events = []
+    for block in b''.join(parts).decode().strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestAsyncProblemReportStream:
+    """Test the async recommendation stream."""
+
+    view = staticmethod(AsyncProblemReportStreamView.as_view())
+
+    def _stream(self, user, text='The plumber is late'):
+        """Post a problem and return the (unread) streaming response."""
+        request = factory.post(
+            '/api/problems/stream/',
+            data=json.dumps({'problem_text': text}),
+            content_type='application/json',
+            headers={**_auth(user)['headers'], 'Accept': 'text/event-stream'}
+        )
+        return async_to_sync(self.view)(request)
+
+    def test_streams_and_saves_recommendations(self, regular_user, settings):
+        settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+        settings.FAKE_AI_LATENCY = 0
+
+        response = self._stream(regular_user)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        # An async iterator, so ASGI servers send each event as it is produced
+        assert response.is_async
+
+        async def read():
+            return [part async for part in response.streaming_content]
+
+        events = _sse_events(async_to_sync(read)())
+        names = [name for name, _ in events]
+        assert names[0] == 'report' and names[-1] == 'done' and 'token' in names
+        expected = get_fallback_rules().recommend('The plumber is late')
+        assert events[-1][1]['recommendations'] == expected
+        report = ProblemReport.objects.get(id=events[0][1]['id'])
+        assert report.status == 'COMPLETED'
+        assert report.recommendations == expected
+
+    def test_reads_the_async_openai_stream(self, regular_user, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        settings.RECOMMENDATION_CACHE_BACKEND = ''
+        completion = (
+            "RECOMMENDATION 1:\nTitle: Call the provider\nDescription: Ask when they will arrive.\n\n"
+            "RECOMMENDATION 2:\nTitle: Document the delay\nDescription: Note the agreed and actual times.\n\n"
+            "RECOMMENDATION 3:\nTitle: Leave a review\nDescription: Describe what happened."
+        )
+        pieces = [completion[start:start + 10] for start in range(0, len(completion), 10)]
+        log = []
+
+        async def create(**kwargs):
+            assert kwargs['stream'] is True
+            return AsyncChunkStream(pieces, log)
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        with patch('apps.problems.ai_service.get_async_openai_client', return_value=client):
+            response = self._stream(regular_user)
+
+            async def read():
+                parts = []
+                read_at_first_recommendation = None
+                async for part in response.streaming_content:
+                    parts.append(part)
+                    if read_at_first_recommendation is None and part.startswith(b'event: recommendation'):
+                        read_at_first_recommendation = len(log)
+                return parts, read_at_first_recommendation
+
+            parts, read_at_first_recommendation = async_to_sync(read)()
+
+        # The first recommendation was sent while most chunks were still unread
+        assert read_at_first_recommendation < len(pieces) / 2
+        assert log[-1] == 'closed'
+        done = _sse_events(parts)[-1][1]
+        assert [recommendation['title'] for recommendation in done['recommendations']] == [
+            'Call the provider', 'Document the delay', 'Leave a review'
+        ]
+
+    def test_blank_problem_is_rejected(self, regular_user):
+        response = self._stream(regular_user, text='   ')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert ProblemReport.objects.count() == 0
+
+
+def _async_openai(log, content='Title: Call the provider\nDescription: Ask when they will arrive.'):
+    async def create(**kwargs):
+        log.append(kwargs)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return patch('apps.problems.ai_service.get_async_openai_client', return_value=client)
+
+
+class TestAsyncRecommendations:
+    """Test AIRecommendationService.agenerate_recommendations."""
+
+    @pytest.fixture
+    def api_key(self, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        settings.RECOMMENDATION_CACHE_BACKEND = ''
+        return settings
+
+    def test_awaits_openai(self, api_key):
+        log = []
+
+        with _async_openai(log):
+            recommendations = asyncio.run(AIRecommendationService().agenerate_recommendations('Late plumber'))
+
+        assert recommendations == [{'title': 'Call the provider', 'description': 'Ask when they will arrive.'}]
+        assert 0 < log[0]['timeout'] <= 4
+        assert get_ai_dependency('openai-chat').snapshot()['successes'] == 1
+
+    def test_open_circuit_uses_the_rules(self, api_key):
+        log = []
+        breaker = get_ai_dependency('openai-chat').breaker
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+        with _async_openai(log):
+            recommendations = asyncio.run(AIRecommendationService().agenerate_recommendations('Late plumber'))
+
+        assert log == []
+        assert recommendations == get_fallback_rules().recommend('Late plumber')
+
+    def test_waits_do_not_block_each_other(self, settings):
+        settings.FAKE_AI_LATENCY = 0.2
+        service = FakeAIRecommendationService()
+
+        async def many():
+            return await asyncio.gather(*(service.agenerate_recommendations('Late plumber') for _ in range(10)))
+
+        start = time.monotonic()
+        results = asyncio.run(many())
+
+        assert len(results) == 10
+        assert time.monotonic() - start < 1
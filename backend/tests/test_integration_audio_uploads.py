@@ -0,0 +1,273 @@
+"""
+Integration tests for chunked voice uploads and segmented transcription.
+"""
+import io
+import math
+import os
+import struct
+import threading
+import wave
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework import status
+from apps.problems.audio import plan_wav_segments, sniff_audio_format
+from apps.problems.fakes import FakeTranscriptionEngine, FakeTranscriptionService
+from apps.problems.models import AudioUpload, ProblemReport
+from apps.problems.uploads import AudioUploadService
+
+
+RATE = 8000
+
+
+def _wav(*parts):
+    """Build a mono 16-bit WAV from (seconds, is_tone) parts."""
+    samples = []
+    for seconds, tone in parts:
+        for i in range(int(seconds * RATE)):
+            samples.append(int(12000 * math.sin(2 * math.pi * 440 * i / RATE)) if tone else 0)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(struct.pack(f'<{len(samples)}h', *samples))
+    return buffer.getvalue()
+
+
+def _describe_segment(engine, segment_file):
+    """Fake transcription: the segment's length in seconds."""
+    segment_file.seek(0)
+    with wave.open(segment_file, 'rb') as reader:
+        return f'{reader.getnframes() / RATE:.1f}s'
+
+
+@pytest.fixture
+def upload_settings(settings, tmp_path):
+    settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+    settings.PROBLEM_TRANSCRIPTION_BACKEND = 'apps.problems.fakes.FakeTranscriptionService'
+    settings.PROBLEM_REPORT_WORKERS = 0
+    settings.FAKE_AI_LATENCY = 0
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.AUDIO_UPLOAD_DIR = str(tmp_path / 'uploads')
+    settings.AUDIO_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024
+    settings.AUDIO_SEGMENT_SECONDS = 3
+    settings.AUDIO_SEGMENT_MAX_SECONDS = 6
+    settings.AUDIO_TRANSCRIPTION_CONCURRENCY = 3
+    return settings
+
+
+def _start(client, data):
+    response = client.post('/api/problems/uploads/', {'filename': 'call.bin', 'size': len(data)}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.data['id']
+
+
+def _send(client, upload_id, chunk, offset):
+    return client.generic(
+        'PATCH',
+        f'/api/problems/uploads/{upload_id}/',
+        chunk,
+        content_type='application/offset+octet-stream',
+        HTTP_UPLOAD_OFFSET=str(offset)
+    )
+
+
+class TestAudioHelpers:
+    """Test format sniffing and silence splitting."""
+
+    def test_formats_are_sniffed_from_magic_bytes(self):
+        assert sniff_audio_format(_wav((0.1, True))[:16]) == 'wav'
+        assert sniff_audio_format(b'ID3\x04' + bytes(12)) == 'mp3'
+        assert sniff_audio_format(b'\xff\xfb\x90\x00' + bytes(12)) == 'mp3'
+        assert sniff_audio_format(b'OggS' + bytes(12)) == 'ogg'
+        assert sniff_audio_format(b'\x1a\x45\xdf\xa3' + bytes(12)) == 'webm'
+        assert sniff_audio_format(b'\x00\x00\x00\x20ftypM4A ' + bytes(4)) == 'm4a'
+        assert sniff_audio_format(b'The cleaner was late') is None
+
+    def test_segments_end_in_pauses(self):
+        recording = io.BytesIO(_wav((4, True), (1, False), (4, True), (1, False), (2, True)))
+
+        segments, rate = plan_wav_segments(recording, target_seconds=3, max_seconds=6)
+
+        assert rate == RATE
+        assert len(segments) == 3
+        # Cuts fall inside the silent seconds 4-5 and 9-10
+        assert 4 * RATE < segments[0][1] < 5 * RATE
+        assert 9 * RATE < segments[1][1] < 10 * RATE
+        assert segments[-1][1] == 12 * RATE
+
+    def test_segments_without_pauses_are_capped(self):
+        recording = io.BytesIO(_wav((13, True)))
+
+        segments, _ = plan_wav_segments(recording, target_seconds=3, max_seconds=6)
+
+        assert [end - start for start, end in segments][:2] == [6 * RATE, 6 * RATE]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestChunkedAudioUpload:
+    """Test the resumable upload flow."""
+
+    def test_upload_in_chunks_and_transcribe_segments(self, authenticated_client, upload_settings):
+        """Chunks are assembled and long recordings transcribed in parallel segments."""
+        data = _wav((4, True), (1, False), (4, True), (1, False), (2, True))
+        upload_id = _start(authenticated_client, data)
+
+        chunk_size = 64 * 1024
+        for offset in range(0, len(data), chunk_size):
+            response = _send(authenticated_client, upload_id, data[offset:offset + chunk_size], offset)
+            assert response.status_code == status.HTTP_200_OK
+        assert response.data['offset'] == len(data)
+        assert response.data['audio_format'] == 'wav'
+
+        threads = set()
+
+        def transcribe(engine, segment_file):
+            threads.add(threading.current_thread().name)
+            return _describe_segment(engine, segment_file)
+
+        with patch.object(FakeTranscriptionEngine, 'transcribe', autospec=True, side_effect=transcribe):
+            response = authenticated_client.post(f'/api/problems/uploads/{upload_id}/complete/?async=false')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == 'COMPLETED'
+        # Three segments cut in the pauses, stitched in order
+        lengths = [float(part.rstrip('s')) for part in response.data['problem_text'].split()]
+        assert len(lengths) == 3
+        assert 4 < lengths[0] < 5 and 4.5 < lengths[1] < 5.5
+        assert sum(lengths) == pytest.approx(12, abs=0.1)
+        assert threads and all(name.startswith('transcription') for name in threads)
+
+        report = ProblemReport.objects.get(id=response.data['id'])
+        assert report.audio_file.name.endswith('.wav')
+        assert report.audio_file.size == len(data)
+        assert AudioUpload.objects.get(id=upload_id).status == 'COMPLETED'
+
+    def test_resume_after_offset_mismatch(self, authenticated_client, upload_settings):
+        """A chunk sent at the wrong offset gets 409 with the offset to resume from."""
+        data = _wav((1, True))
+        upload_id = _start(authenticated_client, data)
+        _send(authenticated_client, upload_id, data[:1000], 0)
+
+        response = _send(authenticated_client, upload_id, data[2000:3000], 2000)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data['offset'] == 1000
+
+        response = authenticated_client.get(f'/api/problems/uploads/{upload_id}/')
+        response = _send(authenticated_client, upload_id, data[response.data['offset']:], response.data['offset'])
+        assert response.data['offset'] == len(data)
+
+    def test_content_type_is_not_trusted(self, authenticated_client, upload_settings):
+        """Bytes that are not audio abort the upload whatever the client claims."""
+        data = b'The cleaner was late and rude, please help'
+        upload_id = _start(authenticated_client, data)
+
+        response = _send(authenticated_client, upload_id, data, 0)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        upload = AudioUpload.objects.get(id=upload_id)
+        assert upload.status == 'ABORTED'
+        assert not os.path.exists(AudioUploadService.file_path(upload))
+
+    def test_large_compressed_upload_is_refused_without_ffmpeg(self, authenticated_client, upload_settings):
+        """Compressed recordings too large to send whole cannot be split without ffmpeg."""
+        upload_settings.TRANSCRIPTION_MAX_FILE_SIZE = 4096
+        data = b'ID3\x04' + bytes(8192)
+        upload_id = _start(authenticated_client, data)
+
+        with patch('apps.problems.normalization.shutil.which', return_value=None):
+            response = _send(authenticated_client, upload_id, data[:1024], 0)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        upload = AudioUpload.objects.get(id=upload_id)
+        assert upload.status == 'ABORTED'
+        assert not os.path.exists(AudioUploadService.file_path(upload))
+
+    def test_large_wav_upload_is_accepted_without_ffmpeg(self, authenticated_client, upload_settings):
+        """WAV recordings are split in Python, so their size does not matter."""
+        upload_settings.TRANSCRIPTION_MAX_FILE_SIZE = 4096
+        data = _wav((1, True))
+        upload_id = _start(authenticated_client, data)
+
+        with patch('apps.problems.normalization.shutil.which', return_value=None):
+            response = _send(authenticated_client, upload_id, data[:8192], 0)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['audio_format'] == 'wav'
+
+    def test_delete_aborts_upload(self, authenticated_client, upload_settings):
+        data = _wav((1, True))
+        upload_id = _start(authenticated_client, data)
+        _send(authenticated_client, upload_id, data[:1000], 0)
+
+        response = authenticated_client.delete(f'/api/problems/uploads/{upload_id}/')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        upload = AudioUpload.objects.get(id=upload_id)
+        assert upload.status == 'ABORTED'
+        assert not os.path.exists(AudioUploadService.file_path(upload))
+        assert _send(authenticated_client, upload_id, data[1000:2000], 1000).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_incomplete_upload_cannot_be_completed(self, authenticated_client, upload_settings):
+        data = _wav((1, True))
+        upload_id = _start(authenticated_client, data)
+        _send(authenticated_client, upload_id, data[:100], 0)
+
+        response = authenticated_client.post(f'/api/problems/uploads/{upload_id}/complete/')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert ProblemReport.objects.count() == 0
+
+    def test_uploads_are_private(self, authenticated_client, provider_user, upload_settings):
+        upload = AudioUploadService.create_upload(provider_user, 'call.wav', 100)
+
+        assert authenticated_client.get(f'/api/problems/uploads/{upload.id}/').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_abandoned_uploads_are_purged(self, authenticated_client, upload_settings):
+        upload_id = _start(authenticated_client, _wav((1, True)))
+        AudioUpload.objects.filter(id=upload_id).update(updated_at=timezone.now() - timedelta(days=2))
+
+        assert AudioUploadService.purge_expired() == 1
+        assert AudioUpload.objects.get(id=upload_id).status == 'ABORTED'
+
+
+@pytest.mark.integration
+class TestLargeCompressedRecordings:
+    """Test that compressed recordings over the engine limit are split."""
+
+    def test_decoded_with_ffmpeg_and_split(self, upload_settings):
+        upload_settings.TRANSCRIPTION_MAX_FILE_SIZE = 4096
+        recording = SimpleUploadedFile('call.mp3', b'ID3\x04' + bytes(8192), content_type='audio/mpeg')
+        decoded = _wav((4, True), (1, False), (4, True), (1, False), (2, True))
+
+        def decode(args, **kwargs):
+            assert args[args.index('-c:a') + 1] == 'pcm_s16le'
+            with open(args[-1], 'wb') as output:
+                output.write(decoded)
+
+        with patch('apps.problems.normalization.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                patch('apps.problems.normalization.subprocess.run', side_effect=decode), \
+                patch.object(FakeTranscriptionEngine, 'transcribe', autospec=True, side_effect=_describe_segment):
+            text = FakeTranscriptionService().transcribe_audio(recording, validate=False)
+
+        assert len(text.split()) == 3
+
+    def test_refused_without_ffmpeg(self, upload_settings):
+        upload_settings.TRANSCRIPTION_MAX_FILE_SIZE = 4096
+        recording = SimpleUploadedFile('call.mp3', b'ID3\x04' + bytes(8192), content_type='audio/mpeg')
+
+        with patch('apps.problems.normalization.shutil.which', return_value=None), \
+                pytest.raises(ValueError, match='at most'):
+            FakeTranscriptionService().transcribe_audio(recording, validate=False)
+
+    def test_small_compressed_recordings_are_sent_whole(self, upload_settings):
+        recording = SimpleUploadedFile('call.mp3', b'ID3\x04' + bytes(8192), content_type='audio/mpeg')
+
+        with patch('apps.problems.normalization.subprocess.run') as run:
+            FakeTranscriptionService().transcribe_audio(recording, validate=False)
+
+        run.assert_not_called()
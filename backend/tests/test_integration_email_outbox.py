@@ -0,0 +1,155 @@
+"""
+Integration tests for the transactional email outbox.
+"""
+import pytest
+from datetime import timedelta
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from apps.notifications.models import OutboxEmail
+from apps.notifications.outbox import EmailOutboxService
+from core.email_service import EmailNotificationService
+
+
+class CountingBackend(LocmemBackend):
+    """Locmem backend that counts connections opened."""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class RejectingBackend(LocmemBackend):
+    """Locmem backend that rejects mail for one address."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'bounce@example.com' in message.to:
+                raise ConnectionError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def outbox_settings(settings):
+    """Use a deterministic retry policy and no on-commit sending."""
+    settings.EMAIL_OUTBOX_SEND_ON_COMMIT = False
+    settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+    settings.EMAIL_OUTBOX_RETRY_DELAY = 60
+    settings.EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+    return settings
+
+
+def _queue(recipient):
+    return EmailOutboxService.enqueue(recipient=recipient, subject='Hello', body='Body', html_body='<p>Body</p>')
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestEmailOutbox:
+    """Test queueing and delivering outbox emails."""
+
+    def test_service_request_queues_email_without_sending(self, api_client, regular_user, provider_user, service, outbox_settings):
+        """Creating a request writes an outbox row; the worker sends it."""
+        api_client.force_authenticate(user=regular_user)
+        response = api_client.post('/api/requests/', {'service_id': service.id, 'message': 'Need service'})
+        assert response.status_code == status.HTTP_201_CREATED
+
+        email = OutboxEmail.objects.get()
+        assert email.recipient == provider_user.email
+        assert email.template_name == 'service_request_notification'
+        assert email.status == 'PENDING'
+        assert len(mail.outbox) == 0
+
+        assert EmailOutboxService.run_pending() == (1, 0)
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [provider_user.email]
+        assert mail.outbox[0].alternatives[0][1] == 'text/html'
+
+        email.refresh_from_db()
+        assert email.status == 'SENT'
+        assert email.attempts == 1
+        assert email.sent_at is not None
+
+    def test_rolled_back_transaction_discards_email(self, outbox_settings):
+        """An email queued in a rolled-back transaction is never sent."""
+        with transaction.atomic():
+            EmailNotificationService.send_provider_approval_email('provider@example.com', 'Jane Smith')
+            assert OutboxEmail.objects.count() == 1
+            transaction.set_rollback(True)
+
+        assert OutboxEmail.objects.count() == 0
+
+    def test_batch_uses_one_connection(self, outbox_settings):
+        """Each batch is sent over a single connection."""
+        outbox_settings.EMAIL_BACKEND = 'tests.test_integration_email_outbox.CountingBackend'
+        CountingBackend.opened = 0
+        for index in range(5):
+            _queue(f'user{index}@example.com')
+
+        assert EmailOutboxService.run_pending(batch_size=5) == (5, 0)
+        assert CountingBackend.opened == 1
+        assert len(mail.outbox) == 5
+
+    def test_failed_send_backs_off_then_dead_letters(self, outbox_settings):
+        """A failing email is retried with growing delays, then dead-lettered."""
+        outbox_settings.EMAIL_BACKEND = 'tests.test_integration_email_outbox.RejectingBackend'
+        good = _queue('good@example.com')
+        bad = _queue('bounce@example.com')
+
+        assert EmailOutboxService.run_pending() == (1, 1)
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        assert good.status == 'SENT'
+        assert bad.status == 'PENDING'
+        assert bad.attempts == 1
+        assert '550' in bad.last_error
+        first_delay = bad.next_attempt_at - timezone.now()
+        assert timedelta(seconds=50) < first_delay <= timedelta(seconds=60)
+
+        # Not due yet
+        assert EmailOutboxService.run_pending() == (0, 0)
+
+        OutboxEmail.objects.filter(id=bad.id).update(next_attempt_at=timezone.now())
+        assert EmailOutboxService.run_pending() == (0, 1)
+        bad.refresh_from_db()
+        assert bad.attempts == 2
+        assert bad.next_attempt_at - timezone.now() > timedelta(seconds=110)
+
+        OutboxEmail.objects.filter(id=bad.id).update(next_attempt_at=timezone.now())
+        assert EmailOutboxService.run_pending() == (0, 1)
+        bad.refresh_from_db()
+        assert bad.status == 'DEAD'
+        assert bad.attempts == 3
+
+        assert EmailOutboxService.requeue_dead() == 1
+        bad.refresh_from_db()
+        assert bad.status == 'PENDING'
+        assert bad.attempts == 0
+
+    def test_claimed_emails_are_not_claimed_twice(self, outbox_settings):
+        """A second worker does not pick up emails already claimed."""
+        _queue('one@example.com')
+        _queue('two@example.com')
+
+        first = EmailOutboxService.claim_batch(batch_size=10)
+        assert len(first) == 2
+        assert EmailOutboxService.claim_batch(batch_size=10) == []
+
+        OutboxEmail.objects.update(updated_at=timezone.now() - timedelta(minutes=30))
+        assert EmailOutboxService.requeue_stale(timedelta(minutes=10)) == 2
+        assert len(EmailOutboxService.claim_batch(batch_size=10)) == 2
+
+    def test_send_on_commit(self, outbox_settings, django_capture_on_commit_callbacks):
+        """With EMAIL_OUTBOX_SEND_ON_COMMIT the email is sent once the transaction commits."""
+        outbox_settings.EMAIL_OUTBOX_SEND_ON_COMMIT = True
+        with django_capture_on_commit_callbacks(execute=True):
+            email = _queue('commit@example.com')
+            assert len(mail.outbox) == 0
+
+        assert len(mail.outbox) == 1
+        email.refresh_from_db()
+        assert email.status == 'SENT'
@@ -0,0 +1,137 @@
+"""
+Integration tests for background export jobs.
+Tests Requirements: 10.6
+"""
+import csv
+import gzip
+import pytest
+from io import StringIO
+from asgiref.sync import async_to_sync
+from rest_framework import status
+from apps.analytics.export_service import ExportJobService
+from apps.analytics.models import ExportJob
+
+
+@pytest.fixture
+def export_root(settings, tmp_path):
+    """Write export files to a temporary EXPORT_ROOT, apart from MEDIA_ROOT."""
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.EXPORT_ROOT = str(tmp_path / 'private')
+    return tmp_path / 'private'
+
+
+def _download(response):
+    """Read the body of a file or streaming response."""
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestExportJobs:
+    """Test queueing, running and downloading export jobs."""
+
+    def test_export_job_lifecycle(self, admin_client, service_request, export_root):
+        """A queued job runs in the worker and produces a gzip CSV download."""
+        response = admin_client.post('/api/analytics/export/', {'type': 'requests', 'status': 'PENDING'}, format='json')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'PENDING'
+        assert response.data['download_url'] is None
+        job_id = response.data['id']
+
+        # Not downloadable until the worker has run it
+        response = admin_client.get(f'/api/analytics/export/jobs/{job_id}/download/')
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+        assert ExportJobService.run_pending() == 1
+
+        response = admin_client.get(f'/api/analytics/export/jobs/{job_id}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'COMPLETED'
+        assert response.data['progress'] == 100
+        assert response.data['rows_written'] == 1
+        assert response.data['download_url'].endswith(f'/api/analytics/export/jobs/{job_id}/download/')
+
+        response = admin_client.get(f'/api/analytics/export/jobs/{job_id}/download/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/gzip'
+        assert response['Accept-Ranges'] == 'bytes'
+
+        rows = list(csv.reader(StringIO(gzip.decompress(_download(response)).decode('utf-8'))))
+        assert rows[0][0] == 'ID'
+        assert rows[1][0] == str(service_request.id)
+
+    def test_download_supports_range_requests(self, admin_client, service_request, export_root):
+        """Partial downloads can be resumed with Range and If-Range."""
+        job = ExportJobService.enqueue(service_request.provider, 'requests')
+        ExportJobService.run_pending()
+        job.refresh_from_db()
+
+        full = admin_client.get(f'/api/analytics/export/jobs/{job.id}/download/')
+        body = _download(full)
+        etag = full['ETag']
+
+        response = admin_client.get(
+            f'/api/analytics/export/jobs/{job.id}/download/',
+            HTTP_RANGE='bytes=10-',
+            HTTP_IF_RANGE=etag
+        )
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Range'] == f'bytes 10-{len(body) - 1}/{len(body)}'
+        assert _download(response) == body[10:]
+
+        # A stale validator means the client gets the whole file again
+        response = admin_client.get(
+            f'/api/analytics/export/jobs/{job.id}/download/',
+            HTTP_RANGE='bytes=10-',
+            HTTP_IF_RANGE='"stale"'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert _download(response) == body
+
+        response = admin_client.get(
+            f'/api/analytics/export/jobs/{job.id}/download/',
+            HTTP_RANGE=f'bytes={len(body)}-'
+        )
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == f'bytes */{len(body)}'
+
+    def test_download_is_streamed_asynchronously_under_asgi(self, admin_client, service_request, export_root, settings):
+        """Under ASGI whole files are streamed from an async iterator rather than read into memory."""
+        job = ExportJobService.enqueue(service_request.provider, 'requests')
+        ExportJobService.run_pending()
+        body = _download(admin_client.get(f'/api/analytics/export/jobs/{job.id}/download/'))
+        settings.ASYNC_VIEWS = True
+
+        response = admin_client.get(f'/api/analytics/export/jobs/{job.id}/download/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.is_async
+        assert response['Content-Length'] == str(len(body))
+        assert response['Accept-Ranges'] == 'bytes'
+
+        async def read():
+            return b''.join([part async for part in response.streaming_content])
+
+        assert async_to_sync(read)() == body
+
+    def test_export_files_are_private(self, service_request, export_root, settings):
+        """Export files are written outside MEDIA_ROOT and have no public URL."""
+        job = ExportJobService.enqueue(service_request.provider, 'users')
+        ExportJobService.run_pending()
+        job.refresh_from_db()
+
+        assert job.file.path == str(export_root / job.file.name)
+        assert not job.file.path.startswith(settings.MEDIA_ROOT)
+        with pytest.raises(ValueError):
+            job.file.url
+
+    def test_invalid_export_request_is_rejected(self, admin_client):
+        """Unknown export types are rejected without queueing a job."""
+        response = admin_client.post('/api/analytics/export/', {'type': 'everything'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not ExportJob.objects.exists()
+
+    def test_non_admin_cannot_queue_exports(self, authenticated_client):
+        """Only admins can queue export jobs."""
+        response = authenticated_client.post('/api/analytics/export/', {'type': 'users'}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
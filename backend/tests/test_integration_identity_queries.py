@@ -0,0 +1,179 @@
+"""
+Query-count regression tests for request identity checks.
+
+Requests carry a real JWT so the user is loaded by JWTIdentityAuthentication,
+together with the provider profile, in the first query of each request. Role
+and approval checks in permission classes and services must add no queries.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from core.authentication import JWTIdentityAuthentication
+from core.identity import get_identity
+
+
+User = get_user_model()
+
+
+@pytest.fixture
+def jwt_client(api_client):
+    """Return a function authenticating the API client with a JWT for a user."""
+    def authenticate(user):
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return api_client
+    return authenticate
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestEndpointQueryCounts:
+    """Test the number of queries per request of endpoints with identity checks."""
+
+    def test_current_user(self, jwt_client, provider_user, django_assert_num_queries):
+        client = jwt_client(provider_user)
+
+        # User and provider profile
+        with django_assert_num_queries(1):
+            response = client.get('/api/auth/me/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['provider_profile']['approval_status'] == 'APPROVED'
+
+    def test_current_user_without_profile(self, jwt_client, regular_user, django_assert_num_queries):
+        client = jwt_client(regular_user)
+
+        with django_assert_num_queries(1):
+            response = client.get('/api/auth/me/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'provider_profile' not in response.data
+
+    def test_my_services(self, jwt_client, provider_user, service, django_assert_num_queries):
+        client = jwt_client(provider_user)
+
+        # User, page count, services with their provider
+        with django_assert_num_queries(3):
+            response = client.get('/api/services/my-services/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+
+    @pytest.mark.parametrize('user_fixture', ['regular_user', 'pending_provider_user'])
+    def test_my_services_denied(self, request, jwt_client, user_fixture, django_assert_num_queries):
+        client = jwt_client(request.getfixturevalue(user_fixture))
+
+        # Denied on the profile loaded with the user
+        with django_assert_num_queries(1):
+            response = client.get('/api/services/my-services/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_create_service(self, jwt_client, provider_user, django_assert_num_queries):
+        client = jwt_client(provider_user)
+        payload = {
+            'name': 'Window Cleaning',
+            'description': 'Cleaning of all windows',
+            'location': 'New York',
+            'cost': '50.00'
+        }
+
+        # User, then the insert and the services counter update
+        # (with their savepoints); no profile query for the approval check
+        with django_assert_num_queries(12):
+            response = client.post('/api/services/', payload, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_create_service_request(self, jwt_client, regular_user, service, django_assert_num_queries):
+        client = jwt_client(regular_user)
+
+        # User, service with its provider and profile, then the insert, the
+        # counter update and the queued email (with their savepoints)
+        with django_assert_num_queries(17):
+            response = client.post(
+                '/api/requests/',
+                {'service_id': service.id, 'message': 'Next Monday please'},
+                format='json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_dashboard(self, jwt_client, admin_user, django_assert_num_queries):
+        client = jwt_client(admin_user)
+
+        # User and the three metrics queries
+        with django_assert_num_queries(4):
+            response = client.get('/api/analytics/dashboard/')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_dashboard_denied(self, jwt_client, provider_user, django_assert_num_queries):
+        client = jwt_client(provider_user)
+
+        with django_assert_num_queries(1):
+            response = client.get('/api/analytics/dashboard/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestIdentity:
+    """Test memoized identity checks."""
+
+    def _authenticate(self, user, authentication_class=JWTIdentityAuthentication):
+        token = AccessToken.for_user(user)
+        return authentication_class().get_user(token)
+
+    def test_authentication_loads_profile(self, provider_user, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            user = self._authenticate(provider_user)
+            identity = get_identity(user)
+
+            assert identity.is_provider
+            assert identity.is_approved_provider
+            assert identity.provider_profile.approval_status == 'APPROVED'
+
+    def test_user_checks_are_simplejwts(self, regular_user):
+        """Unknown and inactive users are refused with simplejwt's errors."""
+        token = AccessToken.for_user(regular_user)
+        regular_user.is_active = False
+        regular_user.save(update_fields=['is_active'])
+
+        with pytest.raises(AuthenticationFailed) as inactive:
+            JWTIdentityAuthentication().get_user(token)
+        regular_user.delete()
+        with pytest.raises(AuthenticationFailed) as missing:
+            JWTIdentityAuthentication().get_user(token)
+
+        assert inactive.value.detail['code'] == 'user_inactive'
+        assert missing.value.detail['code'] == 'user_not_found'
+
+    def test_missing_profile_is_memoized(self, provider_user, django_assert_num_queries):
+        provider_user.provider_profile.delete()
+        # The stock authentication leaves the profile to a separate query
+        user = self._authenticate(provider_user, JWTAuthentication)
+
+        with django_assert_num_queries(1):
+            identity = get_identity(user)
+            assert not identity.is_approved_provider
+            assert not identity.is_approved_provider
+            assert get_identity(user) is identity
+
+    def test_roles(self, regular_user, pending_provider_user, admin_user):
+        assert get_identity(regular_user).is_regular
+        assert get_identity(admin_user).is_admin
+        assert get_identity(admin_user).provider_profile is None
+
+        identity = get_identity(pending_provider_user)
+        assert identity.is_provider
+        assert not identity.is_approved_provider
+
+    def test_anonymous(self):
+        identity = get_identity(None)
+
+        assert not identity.is_authenticated
+        assert identity.role is None
+        assert not identity.is_approved_provider
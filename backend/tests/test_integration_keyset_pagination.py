@@ -0,0 +1,132 @@
+"""
+Integration tests for opt-in keyset (cursor) pagination.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.utils.urls import remove_query_param
+from apps.requests.models import ServiceRequest
+from apps.services.repositories import ServiceRepository
+
+
+@pytest.fixture
+def many_requests(service, regular_user, provider_user):
+    """Create 25 requests, with pairs sharing a created_at to exercise the id tiebreak."""
+    now = timezone.now()
+    for i in range(25):
+        request = ServiceRequest.objects.create(
+            service=service,
+            requester=regular_user,
+            provider=provider_user
+        )
+        ServiceRequest.objects.filter(id=request.id).update(created_at=now - timedelta(minutes=i // 2))
+    return list(
+        ServiceRequest.objects.order_by('-created_at', 'id').values_list('id', flat=True)
+    )
+
+
+def _walk(client, url, link='next'):
+    """Follow pagination links from url, returning each page's response data."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.data)
+        url = response.data[link]
+    return pages
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cursor pagination on list endpoints."""
+
+    def test_default_pagination_is_unchanged(self, authenticated_client, many_requests):
+        """Without opting in, list endpoints keep page-number pagination."""
+        response = authenticated_client.get('/api/requests/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 25
+        assert response.data['current_page'] == 1
+        assert response.data['total_pages'] == 2
+
+    def test_cursor_pages_cover_every_row_once(self, authenticated_client, many_requests):
+        """Following next links visits every row once, in (-created_at, id) order."""
+        pages = _walk(authenticated_client, '/api/requests/?pagination=cursor&page_size=10')
+
+        assert [len(page['results']) for page in pages] == [10, 10, 5]
+        assert [row['id'] for page in pages for row in page['results']] == many_requests
+        assert all(page['count'] == 25 for page in pages)
+        assert pages[0]['previous'] is None
+        assert 'page=' not in pages[0]['next']
+
+    def test_previous_links_walk_back(self, authenticated_client, many_requests):
+        """Following previous links from the last page returns the same pages."""
+        forward = _walk(authenticated_client, '/api/requests/?pagination=cursor&page_size=10')
+        backward = _walk(authenticated_client, forward[-1]['previous'], link='previous')
+
+        assert [page['results'] for page in backward] == [page['results'] for page in reversed(forward[:-1])]
+        assert backward[-1]['previous'] is None
+
+    def test_count_can_be_skipped(self, authenticated_client, many_requests):
+        """count=false omits the total count."""
+        response = authenticated_client.get('/api/requests/?pagination=cursor&count=false')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] is None
+        assert len(response.data['results']) == 20
+
+    def test_invalid_cursor_is_rejected(self, authenticated_client, many_requests):
+        """A tampered cursor returns a validation error."""
+        response = authenticated_client.get('/api/requests/?cursor=not-a-cursor')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_analytics_search_supports_cursors(self, admin_client, many_requests):
+        """Admin search views accept cursor pagination."""
+        pages = _walk(admin_client, '/api/analytics/requests/search/?pagination=cursor&page_size=10')
+        assert [row['id'] for page in pages for row in page['results']] == many_requests
+
+
+@pytest.fixture
+def catalogue(provider_user):
+    """Services whose search orderings (relevance, distance, cost) all differ from creation order."""
+    rows = [
+        ('Plumbing Repairs', 'Leaks and pipes fixed fast', 'Damascus', '80'),
+        ('Home Cleaning', 'Cleaning, including after plumbing work', 'Damascus', '40'),
+        ('Emergency Plumbing', 'Plumbing around the clock', 'Aleppo', '120'),
+        ('Electrician', 'Wiring and lighting', 'Jaramana', '60'),
+        ('Plumbing Supplies', 'Plumbing parts', 'Douma', '40'),
+        ('Budget Plumbing', 'Cheap plumbing', 'Damascus', '40'),
+    ]
+    return [
+        ServiceRepository.create(provider_user, name, description, location, Decimal(cost))
+        for name, description, location, cost in rows
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestKeysetOrdering:
+    """Test that cursor pages keep the ordering of the endpoint's queryset."""
+
+    @pytest.mark.parametrize('params', [
+        '',
+        'q=plumbing&',
+        'near=Damascus&radius_km=500&',
+    ])
+    def test_cursor_pages_keep_search_ordering(self, authenticated_client, catalogue, params):
+        """Relevance, distance and cost orderings survive cursor pagination, ties included."""
+        expected = authenticated_client.get(f'/api/services/?{params}page_size=100').data['results']
+
+        forward = _walk(authenticated_client, f'/api/services/?{params}pagination=cursor&page_size=2')
+        backward = _walk(authenticated_client, forward[-1]['previous'], link='previous')
+
+        assert [row['id'] for page in forward for row in page['results']] == [row['id'] for row in expected]
+        assert [page['results'] for page in backward] == [page['results'] for page in reversed(forward[:-1])]
+
+    def test_cursor_is_tied_to_its_ordering(self, authenticated_client, catalogue):
+        """A cursor issued for one ordering is rejected under another."""
+        page = authenticated_client.get('/api/services/?q=plumbing&pagination=cursor&page_size=2').data
+
+        response = authenticated_client.get(remove_query_param(page['next'], 'q'))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
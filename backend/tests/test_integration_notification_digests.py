@@ -0,0 +1,129 @@
+"""
+Integration tests for notification preferences and new-request digests.
+"""
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.utils import timezone
+from rest_framework import status
+from apps.notifications.models import DigestItem, NotificationPreference, OutboxEmail
+from apps.notifications.services import NotificationDigestService
+from apps.requests.services import ServiceRequestService
+
+
+@pytest.fixture
+def digest_provider(provider_user, settings):
+    """Enable digest delivery for the provider with the default one-hour window."""
+    settings.NOTIFICATION_DIGEST_WINDOW_MINUTES = 60
+    settings.EMAIL_OUTBOX_SEND_ON_COMMIT = False
+    NotificationPreference.objects.create(user=provider_user, new_request_delivery='DIGEST')
+    return provider_user
+
+
+def _create_requests(user, service, count):
+    return [ServiceRequestService.create_service_request(user, service.id, f'Request {i}') for i in range(count)]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestNotificationPreferencesAPI:
+    """Test the notification preferences endpoint."""
+
+    def test_get_and_update_preferences(self, provider_client):
+        """Preferences default to immediate delivery and can be switched to digest."""
+        response = provider_client.get('/api/notifications/preferences/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['new_request_delivery'] == 'IMMEDIATE'
+        assert response.data['digest_window_minutes'] is None
+
+        response = provider_client.patch(
+            '/api/notifications/preferences/',
+            {'new_request_delivery': 'DIGEST', 'digest_window_minutes': 30},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['new_request_delivery'] == 'DIGEST'
+        assert response.data['digest_window_minutes'] == 30
+
+    def test_invalid_preferences_are_rejected(self, provider_client):
+        """Unknown delivery modes and out-of-range windows return 400."""
+        response = provider_client.patch(
+            '/api/notifications/preferences/',
+            {'new_request_delivery': 'WEEKLY', 'digest_window_minutes': 1},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.data['error']['details']) == {'new_request_delivery', 'digest_window_minutes'}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestNotificationDigests:
+    """Test collecting and sending new-request digests."""
+
+    def test_immediate_delivery_queues_one_email_per_request(self, regular_user, provider_user, service, settings):
+        """Without a preference each request queues its own email."""
+        settings.EMAIL_OUTBOX_SEND_ON_COMMIT = False
+        _create_requests(regular_user, service, 2)
+
+        assert OutboxEmail.objects.filter(recipient=provider_user.email).count() == 2
+        assert DigestItem.objects.count() == 0
+
+    def test_digest_coalesces_requests_into_one_email(self, regular_user, digest_provider, service):
+        """Requests within the window are sent as one summary email."""
+        _create_requests(regular_user, service, 3)
+        assert OutboxEmail.objects.count() == 0
+        assert DigestItem.objects.filter(recipient=digest_provider).count() == 3
+
+        # Window has not elapsed yet
+        assert NotificationDigestService.flush_due() == (0, 0)
+
+        assert NotificationDigestService.flush_due(timezone.now() + timedelta(minutes=61)) == (1, 3)
+        email = OutboxEmail.objects.get()
+        assert email.recipient == digest_provider.email
+        assert email.template_name == 'service_request_digest'
+        assert email.subject == 'You Have 3 New Service Requests'
+        assert email.body.count(service.name) == 3
+        assert regular_user.full_name in email.body
+        assert DigestItem.objects.count() == 0
+
+    def test_single_pending_item_uses_regular_notification(self, regular_user, digest_provider, service):
+        """A digest of one request is sent as the usual notification email."""
+        _create_requests(regular_user, service, 1)
+
+        assert NotificationDigestService.flush_due(timezone.now() + timedelta(hours=2)) == (1, 1)
+        email = OutboxEmail.objects.get()
+        assert email.template_name == 'service_request_notification'
+        assert email.subject == f'New Service Request for {service.name}'
+
+    def test_failed_enqueue_keeps_items(self, regular_user, digest_provider, service):
+        """Items survive a flush whose email could not be queued."""
+        _create_requests(regular_user, service, 2)
+        later = timezone.now() + timedelta(hours=2)
+
+        with patch('apps.notifications.outbox.EmailOutboxService.enqueue', side_effect=Exception('database down')):
+            assert NotificationDigestService.flush_due(later) == (0, 0)
+
+        assert DigestItem.objects.count() == 2
+        assert NotificationDigestService.flush_due(later) == (1, 2)
+        assert OutboxEmail.objects.count() == 1
+
+    def test_per_user_window(self, regular_user, digest_provider, service):
+        """A provider's own digest window overrides the default."""
+        NotificationPreference.objects.filter(user=digest_provider).update(digest_window_minutes=10)
+        _create_requests(regular_user, service, 2)
+
+        assert NotificationDigestService.flush_due(timezone.now() + timedelta(minutes=11)) == (1, 2)
+
+    def test_switching_to_immediate_flushes_pending_items(self, regular_user, digest_provider, service, provider_client):
+        """Turning digests off sends what has been collected so far."""
+        _create_requests(regular_user, service, 2)
+
+        response = provider_client.patch(
+            '/api/notifications/preferences/',
+            {'new_request_delivery': 'IMMEDIATE'},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert OutboxEmail.objects.get().template_name == 'service_request_digest'
+        assert DigestItem.objects.count() == 0
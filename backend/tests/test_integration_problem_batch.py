@@ -0,0 +1,114 @@
+"""
+Integration tests for batch problem report import.
+"""
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from rest_framework import status
+from apps.problems.fakes import FakeAIRecommendationService
+from apps.problems.models import ProblemReport
+
+
+URL = '/api/problems/batch/'
+
+
+@pytest.fixture
+def fake_ai(settings):
+    """Use the offline AI service, one call at a time."""
+    settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+    settings.PROBLEM_BATCH_CONCURRENCY = 1
+    settings.PROBLEM_BATCH_MAX_ITEMS = 10
+    settings.FAKE_AI_LATENCY = 0
+    return settings
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestProblemBatchImport:
+    """Test the batch import endpoint."""
+
+    def test_batch_creates_reports_with_per_item_results(self, admin_client, admin_user, regular_user, fake_ai):
+        """Items are saved for their customers, duplicates are folded and bad items reported."""
+        with patch.object(FakeAIRecommendationService, 'generate_recommendations',
+                          autospec=True, side_effect=FakeAIRecommendationService.generate_recommendations) as generate:
+            response = admin_client.post(URL, {'problems': [
+                {'problem_text': 'The cleaner was late', 'reference': 'ticket-1'},
+                {'problem_text': 'the cleaner was LATE!', 'reference': 'ticket-2'},
+                {'problem_text': 'The cleaner was late', 'user_email': regular_user.email},
+                {'problem_text': '   ', 'reference': 'ticket-4'},
+                {'problem_text': 'Price too high', 'user_email': 'nobody@example.com'},
+            ]}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert (response.data['created'], response.data['duplicate'], response.data['invalid']) == (2, 1, 2)
+        # One recommendation call for the three spellings of the same problem
+        assert generate.call_count == 1
+
+        results = response.data['results']
+        assert [result['status'] for result in results] == ['created', 'duplicate', 'created', 'invalid', 'invalid']
+        assert results[0]['reference'] == 'ticket-1'
+        assert results[1]['duplicate_of'] == 0
+        assert results[1]['id'] == results[0]['id']
+        assert 'problem_text' in results[3]['errors']
+        assert 'user_email' in results[4]['errors']
+
+        assert ProblemReport.objects.get(id=results[0]['id']).user == admin_user
+        report = ProblemReport.objects.get(id=results[2]['id'])
+        assert report.user == regular_user
+        assert report.recommendations[0]['title'] == 'Contact the Service Provider'
+
+    def test_failed_generation_is_recorded_per_item(self, admin_client, fake_ai):
+        """A crash in the AI service fails only the affected items."""
+        def generate(service, text):
+            if 'boom' in text:
+                raise RuntimeError('upstream down')
+            return [{'title': 'ok', 'description': text}]
+
+        with patch.object(FakeAIRecommendationService, 'generate_recommendations', autospec=True, side_effect=generate):
+            response = admin_client.post(URL, {'problems': [
+                {'problem_text': 'boom'},
+                {'problem_text': 'fine'},
+            ]}, format='json')
+
+        assert [result['status'] for result in response.data['results']] == ['failed', 'created']
+        assert ProblemReport.objects.get(id=response.data['results'][0]['id']).status == 'FAILED'
+
+    def test_batch_size_is_limited(self, admin_client, fake_ai):
+        """Batches over PROBLEM_BATCH_MAX_ITEMS are rejected whole."""
+        response = admin_client.post(URL, {'problems': [{'problem_text': f'Problem {i}'} for i in range(11)]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert ProblemReport.objects.count() == 0
+
+    def test_admin_only(self, authenticated_client, fake_ai):
+        """Regular users cannot import batches."""
+        response = authenticated_client.post(URL, {'problems': [{'problem_text': 'Late'}]}, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_recommendations_are_generated_with_bounded_concurrency(admin_client, fake_ai):
+    """Unique texts are fanned out to at most PROBLEM_BATCH_CONCURRENCY threads."""
+    fake_ai.PROBLEM_BATCH_CONCURRENCY = 3
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def generate(service, text):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return [{'title': text, 'description': text}]
+
+    with patch.object(FakeAIRecommendationService, 'generate_recommendations', autospec=True, side_effect=generate):
+        response = admin_client.post(URL, {'problems': [{'problem_text': f'Problem {i}'} for i in range(9)]}, format='json')
+
+    assert response.data['created'] == 9
+    assert peak == 3
+    assert [result['recommendations'][0]['title'] for result in response.data['results']] == [f'Problem {i}' for i in range(9)]
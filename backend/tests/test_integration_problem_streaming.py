@@ -0,0 +1,167 @@
+"""
+Integration tests for streaming recommendations over Server-Sent Events.
+"""
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from rest_framework import status
+from apps.problems.ai_service import AIRecommendationService
+from apps.problems.fallback_rules import get_fallback_rules
+from apps.problems.models import ProblemReport
+from apps.problems.recommendation_cache import get_recommendation_cache
+from apps.problems.streaming import RecommendationStreamParser
+
+
+COMPLETION = (
+    "Here is what you can do.\n\n"
+    "RECOMMENDATION 1:\nTitle: Call the provider\nDescription: Ask when they will arrive.\n\n"
+    "RECOMMENDATION 2:\nTitle: Document the delay\nDescription: Note the agreed and actual times.\n\n"
+    "RECOMMENDATION 3:\nTitle: Leave a review\nDescription: Describe what happened."
+)
+
+
+def _events(response):
+    """Parse a streamed text/event-stream body into (event, data) pairs."""
+    body = b''.join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class FakeStream:
+    """Stands in for an openai Stream of chat completion chunks."""
+
+    def __init__(self, pieces, log, fail_after=None):
+        self.pieces = pieces
+        self.log = log
+        self.fail_after = fail_after
+        self.response = SimpleNamespace(close=lambda: log.append('closed'))
+
+    def __iter__(self):
+        for number, piece in enumerate(self.pieces):
+            if number == self.fail_after:
+                raise RuntimeError('connection reset')
+            self.log.append(f'chunk {number}')
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+def _openai_streaming(pieces, log, fail_after=None):
+    create = lambda **kwargs: FakeStream(pieces, log, fail_after)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return patch('apps.problems.ai_service.get_openai_client', return_value=client)
+
+
+class TestRecommendationStreamParser:
+    """Test incremental parsing."""
+
+    def test_matches_parsing_the_whole_completion(self):
+        expected = AIRecommendationService()._parse_openai_response(COMPLETION)
+        parser = RecommendationStreamParser()
+
+        for character in COMPLETION:
+            parser.feed(character)
+        parser.close()
+
+        assert parser.recommendations == expected
+        assert len(expected) == 3
+
+    def test_recommendation_is_emitted_once_its_description_line_ends(self):
+        parser = RecommendationStreamParser()
+
+        assert parser.feed('RECOMMENDATION 1:\nTitle: Call the provider\nDescription: Ask when') == []
+        assert parser.feed(' they will arrive.\nRECOMM') == [
+            {'title': 'Call the provider', 'description': 'Ask when they will arrive.'}
+        ]
+
+    def test_unstructured_completion_becomes_one_recommendation(self):
+        parser = RecommendationStreamParser()
+        parser.feed('Just call them')
+
+        assert parser.close() == [{'title': 'AI Recommendation', 'description': 'Just call them'}]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+class TestStreamingEndpoint:
+    """Test POST /api/problems/stream/."""
+
+    def _stream(self, client, text='The plumber is late'):
+        return client.post(
+            '/api/problems/stream/',
+            {'problem_text': text},
+            format='json',
+            HTTP_ACCEPT='text/event-stream'
+        )
+
+    def test_streams_and_saves_recommendations(self, authenticated_client, settings):
+        settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+        settings.FAKE_AI_LATENCY = 0
+
+        response = self._stream(authenticated_client)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        events = _events(response)
+        names = [name for name, _ in events]
+        assert names[0] == 'report' and names[-1] == 'done'
+        assert 'token' in names
+        streamed = [data for name, data in events if name == 'recommendation']
+        assert [data['index'] for data in streamed] == list(range(len(streamed)))
+
+        expected = get_fallback_rules().recommend('The plumber is late')
+        done = events[-1][1]
+        assert done['status'] == 'COMPLETED'
+        assert done['recommendations'] == expected
+        report = ProblemReport.objects.get(id=events[0][1]['id'])
+        assert report.status == 'COMPLETED'
+        assert report.recommendations == expected
+
+    def test_recommendations_arrive_before_the_completion_ends(self, authenticated_client, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        settings.RECOMMENDATION_CACHE_BACKEND = 'apps.problems.recommendation_cache.LocMemRecommendationCacheBackend'
+        pieces = [COMPLETION[start:start + 20] for start in range(0, len(COMPLETION), 20)]
+        log = []
+
+        with _openai_streaming(pieces, log):
+            response = self._stream(authenticated_client)
+            stream = iter(response.streaming_content)
+            while not next(stream).startswith(b'event: recommendation'):
+                pass
+            # The first recommendation was sent while most chunks were still unread
+            assert len(log) < len(pieces) / 2
+            rest = list(stream)
+
+        assert log[-1] == 'closed'
+        done = json.loads(rest[-1].decode().split('data: ', 1)[1])
+        assert [recommendation['title'] for recommendation in done['recommendations']] == [
+            'Call the provider', 'Document the delay', 'Leave a review'
+        ]
+        # The streamed answer is cached like a regular one
+        assert get_recommendation_cache().lookup('the plumber is LATE')[0] == done['recommendations']
+
+    def test_failed_stream_falls_back_to_the_rules(self, authenticated_client, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        settings.RECOMMENDATION_CACHE_BACKEND = ''
+        log = []
+
+        with _openai_streaming(['RECOMMENDATION 1:\n', 'Title: Call'], log, fail_after=1):
+            events = _events(self._stream(authenticated_client))
+
+        done = events[-1][1]
+        assert done['status'] == 'COMPLETED'
+        assert done['recommendations'] == get_fallback_rules().recommend('The plumber is late')
+        assert log[-1] == 'closed'
+
+    def test_blank_problem_is_rejected(self, authenticated_client):
+        response = self._stream(authenticated_client, text='   ')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert ProblemReport.objects.count() == 0
+
+    def test_requires_authentication(self, api_client):
+        response = api_client.post('/api/problems/stream/', {'problem_text': 'Late'}, format='json')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,92 @@
+"""
+Unit tests for the admin search document index.
+"""
+import pytest
+from decimal import Decimal
+from apps.users.models import User, ProviderProfile
+from apps.requests.models import ServiceRequest
+from apps.analytics.models import AdminSearchDocument
+from apps.analytics.search_index import AdminSearchIndex, USER, PROVIDER, REQUEST
+from apps.analytics.services import AnalyticsService
+from apps.services.repositories import ServiceRepository
+
+
+def _ids(queryset):
+    return sorted(queryset.values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+class TestAdminSearchIndex:
+    """Test document maintenance and search on the admin index."""
+
+    def test_documents_follow_writes(self, service_request, provider_user, regular_user):
+        """Inserts on the source tables create one document per row."""
+        profile = provider_user.provider_profile
+        assert AdminSearchDocument.objects.filter(entity_type=USER).count() == User.objects.count()
+        assert AdminSearchDocument.objects.get(entity_type=PROVIDER, object_id=profile.id).text == (
+            'provider@example.com\njane\nsmith\nprofessional cleaning services'
+        )
+        assert AdminSearchDocument.objects.filter(entity_type=REQUEST, object_id=service_request.id).exists()
+
+    def test_search_matches_substrings_of_any_field(self, service_request, regular_user, provider_user):
+        """Searches behave like icontains on each field."""
+        assert _ids(AnalyticsService.search_users('JOHN')) == [regular_user.id]
+        assert _ids(AnalyticsService.search_users('@example.com', role='PROVIDER')) == [provider_user.id]
+        assert _ids(AnalyticsService.search_providers('cleaning')) == [provider_user.provider_profile.id]
+        assert _ids(AnalyticsService.search_requests('house clean')) == [service_request.id]
+        assert _ids(AnalyticsService.search_requests('Smith')) == [service_request.id]
+
+        # Short terms fall back to a plain substring scan
+        assert _ids(AnalyticsService.search_users('oe')) == [regular_user.id]
+
+        # Terms never match across field boundaries
+        assert not AnalyticsService.search_users('john doe').exists()
+
+    def test_renames_fan_out(self, service_request, provider_user):
+        """A user's new name is reindexed into their profile and requests."""
+        User.objects.filter(id=provider_user.id).update(last_name='Haddad')
+        provider_user.refresh_from_db()
+        provider_user.first_name = 'Rania'
+        provider_user.save()
+
+        assert _ids(AnalyticsService.search_providers('rania')) == [provider_user.provider_profile.id]
+        assert _ids(AnalyticsService.search_requests('haddad')) == [service_request.id]
+        assert not AnalyticsService.search_requests('smith').exists()
+
+        service = service_request.service
+        service.name = 'Window Washing'
+        service.save()
+        assert _ids(AnalyticsService.search_requests('window')) == [service_request.id]
+
+    def test_unchanged_columns_do_not_reindex(self, service_request, provider_user):
+        """Full saves that leave the watched columns alone rewrite no documents."""
+        documents = AdminSearchDocument.objects.filter(entity_type=REQUEST, object_id=service_request.id)
+        documents.update(text='sentinel')
+
+        # save() writes every column, including the unchanged name and email
+        ServiceRepository.update(service_request.service, cost=Decimal('150.00'))
+        provider_user.is_active = True
+        provider_user.save()
+        assert documents.get().text == 'sentinel'
+
+        ServiceRepository.update(service_request.service, name='Window Washing')
+        assert documents.get().text.startswith('window washing\n')
+
+    def test_deletes_remove_documents(self, service_request, provider_user):
+        """Deleting a row deletes its document."""
+        request_id = service_request.id
+        ServiceRequest.objects.filter(id=request_id).delete()
+        assert not AdminSearchDocument.objects.filter(entity_type=REQUEST, object_id=request_id).exists()
+
+        profile_id = provider_user.provider_profile.id
+        ProviderProfile.objects.filter(id=profile_id).delete()
+        assert not AdminSearchDocument.objects.filter(entity_type=PROVIDER, object_id=profile_id).exists()
+
+    def test_rebuild_restores_documents(self, service_request):
+        """A rebuild rewrites every document from the source tables."""
+        expected = set(AdminSearchDocument.objects.values_list('entity_type', 'object_id', 'text'))
+        AdminSearchDocument.objects.all().delete()
+
+        assert AdminSearchIndex.rebuild() == len(expected)
+        assert set(AdminSearchDocument.objects.values_list('entity_type', 'object_id', 'text')) == expected
+        assert _ids(AnalyticsService.search_requests('house')) == [service_request.id]
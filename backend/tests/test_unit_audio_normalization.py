@@ -0,0 +1,194 @@
+"""
+Unit tests for normalizing voice recordings before storage.
+"""
+import io
+import math
+import struct
+import subprocess
+import wave
+import pytest
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from apps.problems.normalization import TARGET_RATE, AudioNormalizer
+from apps.problems.services import ProblemReportService
+
+
+def _wav(seconds=1.0, rate=44100, channels=2, sample_width=2, frequency=440):
+    """A tone, 440 Hz by default, as PCM WAV bytes."""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        value = math.sin(2 * math.pi * frequency * i / rate)
+        if sample_width == 2:
+            sample = struct.pack('<h', int(12000 * value))
+        else:
+            sample = bytes([128 + int(100 * value)])
+        frames += sample * channels
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(rate)
+        writer.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def _read_wav(audio_file):
+    audio_file.seek(0)
+    with wave.open(audio_file, 'rb') as reader:
+        return reader.getnchannels(), reader.getsampwidth(), reader.getframerate(), reader.getnframes()
+
+
+@pytest.fixture
+def no_ffmpeg():
+    with patch('apps.problems.normalization.shutil.which', return_value=None):
+        yield
+
+
+class TestPythonNormalization:
+    """Test the pure-Python WAV path used without ffmpeg."""
+
+    def test_stereo_cd_wav_becomes_mono_16k(self, no_ffmpeg):
+        data = _wav(seconds=2)
+
+        normalized = AudioNormalizer('auto').normalize(io.BytesIO(data), 'call.wav')
+
+        try:
+            assert normalized.method == 'python'
+            assert normalized.audio_format == 'wav'
+            assert normalized.original_size == len(data)
+            channels, sample_width, rate, frames = _read_wav(normalized.file)
+            assert (channels, sample_width, rate) == (1, 2, TARGET_RATE)
+            assert frames == pytest.approx(2 * TARGET_RATE, abs=2)
+            # 44.1 kHz stereo down to 16 kHz mono is about 5.5 times smaller
+            assert normalized.size < len(data) / 5
+        finally:
+            normalized.file.close()
+
+    def test_8_bit_wav_is_widened(self, no_ffmpeg):
+        data = _wav(seconds=1, rate=44100, channels=2, sample_width=1)
+
+        normalized = AudioNormalizer('python').normalize(io.BytesIO(data), 'call.wav')
+
+        try:
+            # Twice the bytes per sample, but a third of the samples
+            assert normalized.method == 'python'
+            assert _read_wav(normalized.file)[:3] == (1, 2, TARGET_RATE)
+        finally:
+            normalized.file.close()
+
+    def test_downsampling_filters_out_aliases(self, no_ffmpeg):
+        """Tones above the new Nyquist frequency are damped, speech-band tones kept."""
+        def level(frequency):
+            data = _wav(seconds=0.5, rate=48000, channels=1, frequency=frequency)
+            normalized = AudioNormalizer('python').normalize(io.BytesIO(data), 'call.wav')
+            try:
+                normalized.file.seek(0)
+                with wave.open(normalized.file, 'rb') as reader:
+                    samples = struct.unpack(f'<{reader.getnframes()}h', reader.readframes(reader.getnframes()))
+            finally:
+                normalized.file.close()
+            return math.sqrt(sum(sample * sample for sample in samples) / len(samples)) / (12000 / math.sqrt(2))
+
+        # 15 kHz would fold back to 1 kHz at 16 kHz without filtering
+        assert level(15000) < 0.15
+        assert level(440) > 0.95
+
+    @pytest.mark.parametrize('data', [
+        _wav(rate=TARGET_RATE, channels=1),
+        _wav(rate=8000, channels=1),
+        b'ID3\x04' + bytes(200),
+        b'not audio at all',
+    ])
+    def test_recordings_that_would_not_shrink_pass_through(self, no_ffmpeg, data):
+        source = io.BytesIO(data)
+
+        normalized = AudioNormalizer('auto').normalize(source, 'call.wav')
+
+        assert normalized.method == 'passthrough'
+        assert normalized.file is source
+        assert normalized.size == normalized.original_size == len(data)
+
+    def test_off_disables_normalization(self, no_ffmpeg):
+        normalized = AudioNormalizer('off').normalize(io.BytesIO(_wav()), 'call.wav')
+
+        assert normalized.method == 'passthrough'
+
+
+class TestFfmpegNormalization:
+    """Test the ffmpeg path with the binary mocked out."""
+
+    def test_any_format_is_encoded_to_opus(self):
+        data = b'ID3\x04' + bytes(4096)
+
+        def encode(args, **kwargs):
+            with open(args[-1], 'wb') as output:
+                output.write(b'OggS' + bytes(60))
+
+        with patch('apps.problems.normalization.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                patch('apps.problems.normalization.subprocess.run', side_effect=encode) as run:
+            normalized = AudioNormalizer('auto').normalize(io.BytesIO(data), 'call.mp3')
+
+        try:
+            args = run.call_args[0][0]
+            assert args[0] == '/usr/bin/ffmpeg'
+            assert args[args.index('-ac') + 1] == '1'
+            assert args[args.index('-ar') + 1] == str(TARGET_RATE)
+            assert args[args.index('-c:a') + 1] == 'libopus'
+            assert normalized.method == 'ffmpeg'
+            assert normalized.name == 'call.ogg'
+            assert (normalized.original_size, normalized.size) == (len(data), 64)
+        finally:
+            normalized.file.close()
+
+    def test_ffmpeg_failure_keeps_the_original(self):
+        source = io.BytesIO(b'OggS' + bytes(4096))
+        error = subprocess.CalledProcessError(1, 'ffmpeg')
+
+        with patch('apps.problems.normalization.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                patch('apps.problems.normalization.subprocess.run', side_effect=error):
+            normalized = AudioNormalizer('auto').normalize(source, 'call.ogg')
+
+        assert normalized.method == 'passthrough'
+        assert normalized.file is source
+
+
+@pytest.mark.django_db
+class TestNormalizedStorage:
+    """Test that voice reports store the normalized recording."""
+
+    @pytest.fixture
+    def fake_settings(self, settings, tmp_path):
+        settings.PROBLEM_AI_BACKEND = 'apps.problems.fakes.FakeAIRecommendationService'
+        settings.PROBLEM_TRANSCRIPTION_BACKEND = 'apps.problems.fakes.FakeTranscriptionService'
+        settings.PROBLEM_REPORT_WORKERS = 0
+        settings.FAKE_AI_LATENCY = 0
+        settings.MEDIA_ROOT = str(tmp_path)
+        return settings
+
+    def test_sync_report_stores_normalized_audio(self, regular_user, fake_settings, no_ffmpeg):
+        data = _wav(seconds=1)
+        upload = SimpleUploadedFile('call.wav', data, content_type='audio/wav')
+
+        report = ProblemReportService().create_problem_report(regular_user, 'VOICE', audio_file=upload)
+
+        assert report.original_audio_size == len(data)
+        assert report.audio_size == report.audio_file.size < len(data)
+        with report.audio_file.open('rb') as stored:
+            assert _read_wav(stored)[:3] == (1, 2, TARGET_RATE)
+
+    def test_background_report_is_normalized_by_the_worker(
+        self, regular_user, fake_settings, no_ffmpeg, django_capture_on_commit_callbacks
+    ):
+        data = _wav(seconds=1)
+        upload = SimpleUploadedFile('call.wav', data, content_type='audio/wav')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            report = ProblemReportService().submit_problem_report(regular_user, 'VOICE', audio_file=upload)
+        original_path = report.audio_file.path
+        report.refresh_from_db()
+
+        assert report.status == 'COMPLETED'
+        assert report.original_audio_size == len(data)
+        assert report.audio_size == report.audio_file.size < len(data)
+        assert report.audio_file.path != original_path
+        assert not report.audio_file.storage.exists(original_path)
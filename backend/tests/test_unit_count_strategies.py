@@ -0,0 +1,76 @@
+"""
+Unit tests for cached and approximate pagination counts.
+"""
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from apps.requests.models import ServiceRequest
+from core.counting import CountService
+
+
+@pytest.fixture
+def count_cache(settings):
+    """Enable count caching with an empty cache."""
+    settings.PAGINATION_COUNT_CACHE_TTL = 60
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestCountService:
+    """Test count caching and estimate fallback."""
+
+    def test_exact_count_is_cached_per_filter_set(self, count_cache, service, regular_user, provider_user):
+        """A repeated count for the same filters is served from the cache."""
+        ServiceRequest.objects.create(service=service, requester=regular_user, provider=provider_user)
+
+        assert CountService.count(ServiceRequest.objects.filter(status='PENDING')) == (1, False)
+
+        ServiceRequest.objects.create(service=service, requester=regular_user, provider=provider_user)
+
+        # Same filters, different ordering: cached
+        cached = ServiceRequest.objects.filter(status='PENDING').order_by('id')
+        assert CountService.count(cached) == (1, False)
+
+        # Different filters: counted
+        assert CountService.count(ServiceRequest.objects.filter(requester=regular_user)) == (2, False)
+
+    def test_caching_can_be_disabled(self, service, regular_user, provider_user):
+        """A TTL of zero counts every time."""
+        queryset = ServiceRequest.objects.all()
+        assert CountService.count(queryset) == (0, False)
+
+        ServiceRequest.objects.create(service=service, requester=regular_user, provider=provider_user)
+        assert CountService.count(queryset) == (1, False)
+
+    def test_estimate_unavailable_without_postgresql(self):
+        """Planner estimates are only read on PostgreSQL."""
+        assert CountService.estimate(ServiceRequest.objects.all()) is None
+
+    def test_large_estimates_are_flagged_approximate(self, monkeypatch, settings):
+        """Estimates above the threshold replace the exact count."""
+        settings.PAGINATION_ESTIMATE_THRESHOLD = 1000
+        monkeypatch.setattr(CountService, 'estimate', staticmethod(lambda queryset: 250000))
+        assert CountService.count(ServiceRequest.objects.all()) == (250000, True)
+
+        monkeypatch.setattr(CountService, 'estimate', staticmethod(lambda queryset: 10))
+        assert CountService.count(ServiceRequest.objects.all()) == (0, False)
+
+    def test_paginated_responses_flag_approximate_counts(self, monkeypatch, settings, admin_client, service_request):
+        """Approximate counts are flagged in paginated responses."""
+        response = admin_client.get('/api/analytics/requests/search/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+        assert response.data['count_approximate'] is False
+
+        settings.PAGINATION_ESTIMATE_THRESHOLD = 1000
+        monkeypatch.setattr(CountService, 'estimate', staticmethod(lambda queryset: 5000))
+
+        response = admin_client.get('/api/analytics/requests/search/')
+        assert response.data['count'] == 5000
+        assert response.data['count_approximate'] is True
+
+        response = admin_client.get('/api/analytics/requests/search/?pagination=cursor')
+        assert response.data['count'] == 5000
+        assert response.data['count_approximate'] is True
@@ -0,0 +1,55 @@
+"""
+Unit tests for the dashboard metrics engine.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from apps.requests.models import ServiceRequest
+from apps.analytics.metrics import METRIC_KEYS, get_metrics_backend
+from apps.analytics.services import AnalyticsService
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAggregateMetricsBackend:
+    """Test the conditional-aggregate metrics backend."""
+
+    def test_metrics_use_at_most_three_queries(self, django_assert_max_num_queries, service_request, pending_provider_user):
+        """Dashboard metrics are computed with one query per table group."""
+        with django_assert_max_num_queries(3):
+            metrics = AnalyticsService.get_dashboard_metrics()
+
+        assert list(metrics.keys()) == METRIC_KEYS
+
+    def test_metrics_match_source_counts(self, service, regular_user, provider_user, pending_provider_user, admin_user):
+        """Each metric matches a direct count over the source table."""
+        for status in ['PENDING', 'ACCEPTED', 'ACCEPTED', 'COMPLETED', 'REJECTED']:
+            ServiceRequest.objects.create(
+                service=service,
+                requester=regular_user,
+                provider=provider_user,
+                status=status
+            )
+
+        metrics = get_metrics_backend().get_metrics()
+
+        assert metrics['total_users'] == 4
+        assert metrics['total_regular_users'] == 1
+        assert metrics['total_providers'] == 2
+        assert metrics['active_providers'] == 1
+        assert metrics['pending_applications'] == 1
+        assert metrics['pending_requests'] == 1
+        assert metrics['accepted_requests'] == 2
+        assert metrics['completed_requests'] == 1
+        assert metrics['rejected_requests'] == 1
+        assert metrics['total_services'] == 1
+
+    def test_date_filter_only_applies_to_user_counts(self, regular_user, provider_user):
+        """Date filters narrow user counts but not provider profile counts."""
+        User.objects.filter(id=regular_user.id).update(created_at='2020-01-01T00:00:00Z')
+
+        metrics = get_metrics_backend().get_metrics(start_date='2021-01-01')
+
+        assert metrics['total_users'] == 1
+        assert metrics['total_regular_users'] == 0
+        assert metrics['active_providers'] == 1
@@ -0,0 +1,72 @@
+"""
+Unit tests for precompiled email templates.
+"""
+import pytest
+from pathlib import Path
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from core import email_templates
+from core.email_templates import EmailTemplateRenderer, derive_text_source
+
+
+TEMPLATE_NAMES = sorted(
+    path.stem for path in (Path(settings.BASE_DIR) / 'templates' / 'emails').glob('*.html')
+)
+
+CONTEXT = {
+    'provider_name': 'Jane & <b>Sons</b>',
+    'requester_name': "O'Brien",
+    'service_name': 'Clean "Everything"',
+    'login_url': 'http://localhost:5173/login?next=/a&b=1',
+    'dashboard_url': 'http://localhost:5173/dashboard',
+    'search_url': 'http://localhost:5173/search',
+    'support_email': 'support@example.com',
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start each test with no compiled templates."""
+    EmailTemplateRenderer.clear()
+    yield
+    EmailTemplateRenderer.clear()
+
+
+class TestEmailTemplateRenderer:
+    """Test the compiled template cache."""
+
+    @pytest.mark.parametrize('template_name', TEMPLATE_NAMES)
+    def test_output_matches_strip_tags(self, template_name):
+        """Both parts are identical to render_to_string and strip_tags."""
+        html = render_to_string(f'emails/{template_name}.html', CONTEXT)
+
+        rendered = EmailTemplateRenderer.render(template_name, CONTEXT)
+
+        assert EmailTemplateRenderer.get(template_name).text is not None
+        assert rendered.html == html
+        assert rendered.text == strip_tags(html)
+
+    def test_templates_are_compiled_once(self):
+        """Repeated renders reuse the compiled templates."""
+        first = EmailTemplateRenderer.get('provider_approval')
+        EmailTemplateRenderer.render('provider_approval', CONTEXT)
+        assert EmailTemplateRenderer.get('provider_approval') is first
+
+        EmailTemplateRenderer.clear()
+        assert EmailTemplateRenderer.get('provider_approval') is not first
+
+    def test_derived_source_keeps_template_tags(self):
+        """Markup is removed and tags outside attributes survive."""
+        source = '<p class="x">Hi {{ name }}{% if vip %} <b>VIP</b>{% endif %}</p><a href="{{ url }}">Go</a>'
+
+        assert derive_text_source(source) == 'Hi {{ name }}{% if vip %} VIP{% endif %}Go'
+
+    def test_falls_back_when_plaintext_template_is_invalid(self, monkeypatch):
+        """A source that cannot be derived falls back to strip_tags on the HTML."""
+        monkeypatch.setattr(email_templates, 'derive_text_source', lambda source: '{% if %}')
+
+        rendered = EmailTemplateRenderer.render('provider_rejection', CONTEXT)
+
+        assert EmailTemplateRenderer.get('provider_rejection').text is None
+        assert rendered.text == strip_tags(rendered.html)
@@ -0,0 +1,88 @@
+"""
+Unit tests for the rule-based fallback recommendations.
+"""
+import json
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from apps.problems.ai_service import AIRecommendationService
+from apps.problems.fallback_rules import FallbackRuleSet, clear_fallback_rules, get_fallback_rules
+
+
+def _titles(recommendations):
+    return [recommendation['title'] for recommendation in recommendations]
+
+
+def _rec(title):
+    return {'title': title, 'description': f'{title} description'}
+
+
+@pytest.fixture
+def rule_set():
+    return FallbackRuleSet(
+        rules=[
+            {'id': 'timing', 'keywords': {'late': 3, 'time': 1, 'no show': 3}, 'recommendations': [_rec('Timing')]},
+            {'id': 'pricing', 'keywords': {'price': 3, 'charge': 2, 'charged': 2}, 'recommendations': [_rec('Pricing')]},
+        ],
+        default=[_rec('Default')],
+        max_recommendations=5
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_rules():
+    clear_fallback_rules()
+    yield
+    clear_fallback_rules()
+
+
+class TestFallbackRuleSet:
+    """Test keyword matching and scoring."""
+
+    def test_keywords_match_whole_words_only(self, rule_set):
+        assert _titles(rule_set.recommend('Sometimes they are LATE.')) == ['Timing']
+        assert _titles(rule_set.recommend('Sometimes the translator is fine')) == ['Default']
+        assert _titles(rule_set.recommend('They overcharged me')) == ['Default']
+        assert _titles(rule_set.recommend('They charged me twice')) == ['Pricing']
+
+    def test_multi_word_keywords_span_whitespace(self, rule_set):
+        assert rule_set.score('A complete no\n  show today') == {'timing': 3.0}
+
+    def test_rules_are_ordered_by_weight(self, rule_set):
+        # time (1) < price (3)
+        assert _titles(rule_set.recommend('Took a long time and the price was high')) == ['Pricing', 'Timing']
+        # late + time (4) > charge (2)
+        assert _titles(rule_set.recommend('Late, a waste of time, and the charge is odd')) == ['Timing', 'Pricing']
+
+    def test_repeated_keywords_count_once(self, rule_set):
+        assert rule_set.score('late late late, price') == {'timing': 3.0, 'pricing': 3.0}
+
+    def test_malformed_rule_is_rejected(self):
+        with pytest.raises(ImproperlyConfigured):
+            FallbackRuleSet(rules=[{'id': 'broken'}], default=[])
+
+
+class TestRulesFile:
+    """Test loading rules from settings."""
+
+    def test_bundled_rules_keep_previous_recommendations(self):
+        service = AIRecommendationService()
+
+        assert _titles(service._generate_fallback_recommendations('The cleaner was late again'))[0] == 'Contact the Service Provider'
+        assert _titles(service._generate_fallback_recommendations('The quality is poor')) == ['Document the Issues', 'Request Corrections']
+        assert len(service._generate_fallback_recommendations('Something else entirely')) == 4
+
+    def test_rules_file_from_settings(self, settings, tmp_path):
+        rules_file = tmp_path / 'rules.json'
+        rules_file.write_text(json.dumps({
+            'rules': [{'id': 'noise', 'keywords': ['loud', 'noisy'], 'recommendations': [_rec('Noise')]}],
+            'default': [_rec('Default')]
+        }))
+        settings.PROBLEM_FALLBACK_RULES = str(rules_file)
+
+        assert _titles(get_fallback_rules().recommend('The workers were very noisy')) == ['Noise']
+
+    def test_unreadable_rules_file(self, settings, tmp_path):
+        settings.PROBLEM_FALLBACK_RULES = str(tmp_path / 'missing.json')
+
+        with pytest.raises(ImproperlyConfigured):
+            get_fallback_rules()
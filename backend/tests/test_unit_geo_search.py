@@ -0,0 +1,135 @@
+"""
+Unit tests for geohash proximity search and the local gazetteer.
+"""
+import math
+import random
+import pytest
+from decimal import Decimal
+from apps.services.geo import (
+    covering_cells,
+    encode_geohash,
+    haversine_km,
+    lookup_place,
+)
+from apps.services.repositories import ServiceRepository
+from apps.services.services import ServiceSearchService
+from core.exceptions import ValidationException
+
+
+DAMASCUS = (33.5138, 36.2765)
+
+
+def _names(services):
+    return [service.name for service in services]
+
+
+class TestGeohash:
+    """Test geohash encoding and cell coverage."""
+
+    def test_encode_known_value(self):
+        """Encoding matches the reference geohash for a known point."""
+        assert encode_geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+    def test_covering_cells_contain_every_point_in_radius(self):
+        """Any point within the radius falls in one of the covering cells."""
+        rng = random.Random(1234)
+        for _ in range(200):
+            lat, lon = rng.uniform(-60, 60), rng.uniform(-170, 170)
+            radius = rng.choice([0.5, 2, 10, 50, 200])
+            cells = covering_cells(lat, lon, radius)
+            assert len(cells) <= 16
+
+            for _ in range(20):
+                bearing = rng.uniform(0, 2 * math.pi)
+                distance = rng.uniform(0, radius) / 111.2
+                point = (lat + distance * math.cos(bearing),
+                         lon + distance * math.sin(bearing) / math.cos(math.radians(lat)))
+                if haversine_km(lat, lon, *point) > radius:
+                    continue
+                geohash = encode_geohash(*point)
+                assert any(geohash.startswith(cell) for cell in cells)
+
+
+class TestGazetteer:
+    """Test location normalization."""
+
+    @pytest.mark.parametrize('text', ['Damascus', ' damascus ', 'Dimashq', 'دمشق', 'Mezzeh, Damascus', 'Damascus, Syria'])
+    def test_variants_resolve_to_one_place(self, text):
+        assert lookup_place(text).name == 'Damascus'
+
+    def test_articles_and_diacritics_are_ignored(self):
+        assert lookup_place('Al-Bab').name == 'Al-Bab'
+        assert lookup_place('el bab').name == 'Al-Bab'
+        assert lookup_place('الباب').name == 'Al-Bab'
+        assert lookup_place('Daráa').name == 'Daraa'
+        assert lookup_place('حماه').name == lookup_place('حماة').name == 'Hama'
+
+    def test_unknown_place(self):
+        assert lookup_place('Atlantis') is None
+        assert lookup_place('') is None
+
+
+@pytest.mark.django_db
+class TestRadiusSearch:
+    """Test radius search through the service layer."""
+
+    @pytest.fixture
+    def services(self, provider_user):
+        return [
+            ServiceRepository.create(provider_user, 'City Centre Plumbing', 'Pipes', 'Damascus', Decimal('50')),
+            ServiceRepository.create(provider_user, 'Jaramana Electric', 'Wiring', 'Jaramana', Decimal('40')),
+            ServiceRepository.create(provider_user, 'Douma Builders', 'Building', 'Douma', Decimal('90')),
+            ServiceRepository.create(provider_user, 'Aleppo Repairs', 'Repairs', 'Aleppo', Decimal('30')),
+            ServiceRepository.create(provider_user, 'Somewhere Else', 'Unknown place', 'Atlantis', Decimal('10')),
+        ]
+
+    def test_repository_resolves_coordinates(self, services):
+        """Known locations get coordinates and a geohash; unknown ones stay empty."""
+        assert (services[0].latitude, services[0].longitude) == DAMASCUS
+        assert services[0].geohash == encode_geohash(*DAMASCUS)
+        assert services[4].latitude is None and services[4].geohash is None
+
+    def test_radius_search_sorted_by_distance(self, services):
+        results = ServiceSearchService.search_services(latitude=DAMASCUS[0], longitude=DAMASCUS[1], radius_km=10)
+        assert _names(results) == ['City Centre Plumbing', 'Jaramana Electric']
+
+        results = list(ServiceSearchService.search_services(latitude=DAMASCUS[0], longitude=DAMASCUS[1], radius_km=20))
+        assert _names(results) == ['City Centre Plumbing', 'Jaramana Electric', 'Douma Builders']
+        assert [s.distance_sq for s in results] == sorted(s.distance_sq for s in results)
+
+    def test_radius_search_honours_other_filters(self, services):
+        results = ServiceSearchService.search_services(
+            latitude=DAMASCUS[0], longitude=DAMASCUS[1], radius_km=20, max_cost=Decimal('60')
+        )
+        assert _names(results) == ['City Centre Plumbing', 'Jaramana Electric']
+
+    def test_location_change_moves_service(self, services):
+        """Changing the location re-resolves coordinates."""
+        aleppo = services[3]
+        ServiceRepository.update(aleppo, location='Damascus')
+        results = ServiceSearchService.search_services(latitude=DAMASCUS[0], longitude=DAMASCUS[1], radius_km=1)
+        assert set(_names(results)) == {'City Centre Plumbing', 'Aleppo Repairs'}
+
+        ServiceRepository.update(aleppo, latitude=36.2, longitude=37.13)
+        assert aleppo.geohash == encode_geohash(36.2, 37.13)
+
+    def test_invalid_radius_search(self):
+        with pytest.raises(ValidationException):
+            ServiceSearchService.search_services(latitude=33.5, radius_km=10)
+        with pytest.raises(ValidationException):
+            ServiceSearchService.search_services(latitude=33.5, longitude=36.3, radius_km=0)
+
+    def test_api_radius_search(self, authenticated_client, services):
+        response = authenticated_client.get('/api/services/', {'near': 'دمشق', 'radius_km': 20})
+        assert response.status_code == 200
+        results = response.data['results']
+        assert [row['name'] for row in results] == ['City Centre Plumbing', 'Jaramana Electric', 'Douma Builders']
+        assert results[0]['distance_km'] == 0
+        assert 6 < results[1]['distance_km'] < 8
+        assert 12 < results[2]['distance_km'] < 14
+
+        response = authenticated_client.get('/api/services/', {'near': 'Atlantis'})
+        assert response.status_code == 400
+
+        response = authenticated_client.get('/api/services/', {'radius_km': 5})
+        assert response.status_code == 400
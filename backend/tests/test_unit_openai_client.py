@@ -0,0 +1,129 @@
+"""
+Unit tests for the shared OpenAI client.
+"""
+import asyncio
+import io
+import json
+import threading
+import httpx
+import pytest
+from unittest.mock import patch
+from apps.problems import openai_client
+from apps.problems.ai_service import AIRecommendationService
+from apps.problems.openai_client import (
+    OpenAINotConfigured,
+    get_async_openai_client,
+    get_openai_client,
+    reset_openai_clients,
+)
+from apps.problems.transcription_engines import WhisperAPIEngine
+
+
+CHAT_RESPONSE = {
+    'id': 'chatcmpl-1',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'gpt-3.5-turbo',
+    'choices': [{
+        'index': 0,
+        'finish_reason': 'stop',
+        'message': {
+            'role': 'assistant',
+            'content': 'Title: Call the provider\nDescription: Ask when they will arrive.'
+        }
+    }],
+}
+
+
+@pytest.fixture
+def api_key(settings):
+    settings.OPENAI_API_KEY = 'test-key'
+    settings.OPENAI_BASE_URL = ''
+    reset_openai_clients()
+    yield settings
+    reset_openai_clients()
+
+
+@pytest.fixture
+def transport(api_key):
+    """Route the shared client's requests to a handler instead of the network."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path.endswith('/chat/completions'):
+            return httpx.Response(200, json=CHAT_RESPONSE)
+        return httpx.Response(200, json={'text': ' The plumber never came. '})
+
+    http_options = openai_client._http_options
+
+    def mocked_http_options():
+        return {**http_options(), 'transport': httpx.MockTransport(handler)}
+
+    with patch.object(openai_client, '_http_options', mocked_http_options):
+        yield requests
+
+
+class TestOpenAIClientFactory:
+    """Test that one client is built and shared."""
+
+    def test_client_is_shared_between_threads(self, api_key):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(get_openai_client())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(client) for client in clients}) == 1
+        assert clients[0].max_retries == 0
+
+    def test_new_key_gets_a_new_client(self, api_key):
+        first = get_openai_client()
+        api_key.OPENAI_API_KEY = 'rotated-key'
+
+        assert get_openai_client() is not first
+        assert get_openai_client().api_key == 'rotated-key'
+
+    def test_missing_key_is_reported(self, api_key):
+        api_key.OPENAI_API_KEY = ''
+
+        with pytest.raises(OpenAINotConfigured):
+            get_openai_client()
+
+    def test_async_client_per_event_loop(self, api_key):
+        async def two_clients():
+            return get_async_openai_client(), get_async_openai_client()
+
+        first, again = asyncio.run(two_clients())
+        other, _ = asyncio.run(two_clients())
+
+        assert first is again
+        assert other is not first
+
+
+class TestServicesUseSharedClient:
+    """Test both services against a mocked HTTP transport."""
+
+    def test_recommendations(self, transport):
+        service = AIRecommendationService()
+
+        for _ in range(2):
+            recommendations = service._generate_with_openai('The plumber is late', timeout=3)
+
+        assert recommendations == [{'title': 'Call the provider', 'description': 'Ask when they will arrive.'}]
+        assert len(transport) == 2
+        request = transport[0]
+        assert request.headers['authorization'] == 'Bearer test-key'
+        assert json.loads(request.content)['model'] == 'gpt-3.5-turbo'
+        assert request.extensions['timeout']['read'] == 3
+
+    def test_transcription(self, transport):
+        recording = io.BytesIO(b'RIFF....WAVEfmt ')
+        recording.name = '/tmp/uploads/call.wav'
+
+        assert WhisperAPIEngine()._transcribe(recording, timeout=30) == 'The plumber never came.'
+
+        request = transport[0]
+        assert request.url.path.endswith('/audio/transcriptions')
+        assert b'filename="call.wav"' in request.content
@@ -0,0 +1,94 @@
+"""
+Unit tests for incrementally maintained platform counters.
+"""
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.exceptions import ValidationException
+from apps.analytics.counters import CounterService, request_status_counter
+from apps.analytics.metrics import AggregateMetricsBackend, CounterMetricsBackend
+from apps.analytics.models import PlatformCounter
+from apps.notifications.models import OutboxEmail
+from apps.requests.models import ServiceRequest
+from apps.requests.services import ServiceRequestService
+from apps.services.repositories import ServiceRepository
+from apps.users.services import UserRegistrationService, ProviderApprovalService
+
+
+@pytest.mark.django_db
+class TestPlatformCounters:
+    """Test that service-layer write paths keep counters in sync."""
+
+    def test_write_paths_keep_counters_in_sync(self, regular_user, provider_user, admin_user, service):
+        """Counters match the source tables after every tracked write path."""
+        # Fixtures create rows directly through the ORM, so start from a clean slate
+        CounterService.reconcile()
+
+        _, profile = UserRegistrationService.register_service_provider(
+            email='new-provider@example.com',
+            password='TestPass123!',
+            first_name='New',
+            last_name='Provider',
+            service_description='Electrical repairs and installs'
+        )
+        ProviderApprovalService.approve_provider(profile, admin_user)
+
+        first = ServiceRequestService.create_service_request(regular_user, service.id)
+        second = ServiceRequestService.create_service_request(regular_user, service.id)
+        ServiceRequestService.accept_service_request(first, provider_user)
+        ServiceRequestService.reject_service_request(second, provider_user)
+
+        ServiceRepository.delete(service)
+
+        assert CounterService.reconcile(apply=False) == {}
+        assert CounterService.get_values()[request_status_counter('ACCEPTED')] == 1
+
+    def test_racing_transitions_count_once(self, provider_user, service_request):
+        """A transition on a stale, still-pending copy is rejected and not counted."""
+        CounterService.reconcile()
+        stale = ServiceRequest.objects.get(id=service_request.id)
+
+        ServiceRequestService.accept_service_request(service_request, provider_user)
+        with pytest.raises(ValidationException, match="status 'ACCEPTED'"):
+            ServiceRequestService.reject_service_request(stale, provider_user)
+
+        assert CounterService.reconcile(apply=False) == {}
+        assert OutboxEmail.objects.count() == 1
+        stale.refresh_from_db()
+        assert stale.status == 'ACCEPTED'
+
+    def test_counter_backend_matches_aggregate_backend(self, service_request, pending_provider_user):
+        """Counter-backed metrics equal the aggregate metrics once reconciled."""
+        CounterService.reconcile()
+
+        assert CounterMetricsBackend().get_metrics() == AggregateMetricsBackend().get_metrics()
+
+    def test_counter_backend_reads_in_one_query(self, django_assert_num_queries, service_request):
+        """Unfiltered counter reads cost a single query."""
+        CounterService.reconcile()
+
+        with django_assert_num_queries(1):
+            CounterMetricsBackend().get_metrics()
+
+    def test_reconcile_locks_counters_before_counting(self, service_request):
+        """Counters are read (and locked) before the source tables are counted."""
+        with CaptureQueriesContext(connection) as queries:
+            CounterService.reconcile(apply=False)
+
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        assert PlatformCounter._meta.db_table in selects[0]
+
+    def test_reconcile_command_reports_and_fixes_drift(self, service_request):
+        """The reconcile command reports drift and rebuilds the counters."""
+        CounterService.reconcile()
+        PlatformCounter.objects.filter(name=request_status_counter('PENDING')).update(value=42)
+
+        out = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        assert 'service_requests.PENDING: stored=42 actual=1' in out.getvalue()
+        assert CounterService.get_values()[request_status_counter('PENDING')] == 42
+
+        call_command('reconcile_counters', stdout=StringIO())
+        assert CounterService.get_values()[request_status_counter('PENDING')] == 1
@@ -0,0 +1,239 @@
+"""
+Unit tests for the AI recommendation cache.
+"""
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from apps.problems.ai_service import AIRecommendationService
+from apps.problems.models import RecommendationCacheEntry
+from apps.problems.recommendation_cache import (
+    DatabaseRecommendationCacheBackend,
+    DjangoCacheRecommendationCacheBackend,
+    LocMemRecommendationCacheBackend,
+    RecommendationCache,
+    estimated_similarity,
+    CacheEntry,
+    band_keys,
+    get_recommendation_cache,
+    minhash_signature,
+    normalize_problem_text,
+    reset_recommendation_caches,
+)
+
+
+ANSWER = [{'title': 'Call the provider', 'description': 'Ask for a new appointment.'}]
+
+BACKENDS = [
+    LocMemRecommendationCacheBackend,
+    DjangoCacheRecommendationCacheBackend,
+    DatabaseRecommendationCacheBackend,
+]
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(settings):
+    """Start each test with empty caches and counters."""
+    settings.RECOMMENDATION_CACHE_TTL = 3600
+    settings.RECOMMENDATION_CACHE_MAX_ENTRIES = 100
+    settings.RECOMMENDATION_CACHE_SIMILARITY = 0.75
+    django_cache.clear()
+    reset_recommendation_caches()
+    yield
+    django_cache.clear()
+    reset_recommendation_caches()
+
+
+class TestSignatures:
+    """Test normalization and MinHash similarity."""
+
+    def test_normalization_ignores_case_punctuation_and_spacing(self):
+        assert normalize_problem_text('  The provider is LATE!!\n') == 'the provider is late'
+        assert normalize_problem_text('Ｃafé—closed?') == 'café closed'
+
+    def test_similar_texts_have_similar_signatures(self):
+        first = minhash_signature(normalize_problem_text('The cleaner arrived two hours late today'))
+        reworded = minhash_signature(normalize_problem_text('the cleaner arrived two hours late today again'))
+        unrelated = minhash_signature(normalize_problem_text('Invoice charges are higher than the quote'))
+
+        assert estimated_similarity(first, first) == 1.0
+        assert estimated_similarity(first, reworded) >= 0.75
+        assert estimated_similarity(first, unrelated) < 0.2
+
+    def test_negations_and_modals_are_not_stopwords(self):
+        shown = minhash_signature(normalize_problem_text('The provider did show up'))
+        not_shown = minhash_signature(normalize_problem_text('The provider did not show up'))
+        can = minhash_signature(normalize_problem_text('The plumber can fix the leak'))
+        should = minhash_signature(normalize_problem_text('The plumber should fix the leak'))
+
+        assert estimated_similarity(shown, not_shown) < 0.75
+        assert estimated_similarity(can, should) < 0.75
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('backend_class', BACKENDS)
+class TestRecommendationCache:
+    """Test lookups against every storage backend."""
+
+    def test_exact_and_near_hits(self, backend_class):
+        cache = RecommendationCache(backend_class())
+        assert cache.lookup('The cleaner arrived two hours late today') == (None, 'miss')
+
+        cache.store('The cleaner arrived two hours late today', ANSWER)
+
+        assert cache.lookup('the cleaner arrived TWO hours late today!') == (ANSWER, 'exact')
+        assert cache.lookup('The cleaner arrived two hours late today again') == (ANSWER, 'near')
+        assert cache.lookup('The invoice is higher than the quote') == (None, 'miss')
+
+        stats = cache.stats()
+        assert (stats['exact_hits'], stats['near_hits'], stats['misses']) == (1, 1, 2)
+        assert stats['hit_rate'] == 0.5
+
+    def test_negated_problem_is_not_a_near_hit(self, backend_class):
+        cache = RecommendationCache(backend_class())
+        cache.store('The cleaner arrived two hours late today and did clean the kitchen', ANSWER)
+
+        assert cache.lookup("The cleaner arrived two hours late today and didn't clean the kitchen") == (None, 'miss')
+        assert cache.lookup('The cleaner arrived two hours late today and did clean the kitchen well') == (ANSWER, 'near')
+
+    def test_clear_removes_entries(self, backend_class):
+        cache = RecommendationCache(backend_class())
+        cache.store('Provider never replied to messages', ANSWER)
+
+        cache.backend.clear()
+
+        assert cache.lookup('Provider never replied to messages') == (None, 'miss')
+
+    def test_entries_from_older_signature_versions_are_not_near_hits(self, backend_class):
+        cache = RecommendationCache(backend_class())
+        normalized = normalize_problem_text('The cleaner arrived two hours late today')
+        signature = minhash_signature(normalized)
+        cache.backend.set(CacheEntry('old', normalized, signature, ANSWER, 1), band_keys(signature))
+
+        assert cache.lookup('The cleaner arrived two hours late today again') == (None, 'miss')
+
+
+class TestLocMemBackend:
+    """Test in-process eviction."""
+
+    def test_least_recently_used_entry_is_evicted(self, settings):
+        settings.RECOMMENDATION_CACHE_MAX_ENTRIES = 2
+        cache = RecommendationCache(LocMemRecommendationCacheBackend())
+        cache.store('Painter was late', ANSWER)
+        cache.store('Plumber overcharged me', ANSWER)
+        cache.lookup('Painter was late')
+        cache.store('Electrician never showed up', ANSWER)
+
+        assert cache.backend.size() == 2
+        assert cache.lookup('Plumber overcharged me') == (None, 'miss')
+        assert cache.lookup('Painter was late') == (ANSWER, 'exact')
+
+    def test_entries_expire(self, settings):
+        settings.RECOMMENDATION_CACHE_TTL = 60
+        cache = RecommendationCache(LocMemRecommendationCacheBackend())
+        with patch('apps.problems.recommendation_cache.time.monotonic', return_value=1000):
+            cache.store('Painter was late', ANSWER)
+        with patch('apps.problems.recommendation_cache.time.monotonic', return_value=1061):
+            assert cache.lookup('Painter was late') == (None, 'miss')
+            assert cache.backend.size() == 0
+
+
+class TestDjangoCacheBackend:
+    """Test the Django-cache backend."""
+
+    def test_clear_leaves_the_rest_of_the_cache(self):
+        cache = RecommendationCache(DjangoCacheRecommendationCacheBackend())
+        cache.store('Provider never replied to messages', ANSWER)
+        django_cache.set('unrelated', 'kept')
+
+        cache.backend.clear()
+
+        assert cache.lookup('Provider never replied to messages') == (None, 'miss')
+        assert django_cache.get('unrelated') == 'kept'
+        cache.store('Provider never replied to messages', ANSWER)
+        assert cache.lookup('Provider never replied to messages') == (ANSWER, 'exact')
+
+
+@pytest.mark.django_db
+class TestCommand:
+    """Test the recommendation_cache management command."""
+
+    def test_process_local_backend_is_refused(self, settings):
+        settings.RECOMMENDATION_CACHE_BACKEND = 'apps.problems.recommendation_cache.LocMemRecommendationCacheBackend'
+        get_recommendation_cache().store('Provider never replied to messages', ANSWER)
+
+        with pytest.raises(CommandError, match='each server process'):
+            call_command('recommendation_cache', '--clear')
+        with pytest.raises(CommandError, match='each server process'):
+            call_command('recommendation_cache')
+
+    def test_shared_backend_is_cleared(self, settings, capsys):
+        settings.RECOMMENDATION_CACHE_BACKEND = 'apps.problems.recommendation_cache.DatabaseRecommendationCacheBackend'
+        get_recommendation_cache().store('Provider never replied to messages', ANSWER)
+
+        call_command('recommendation_cache', '--clear')
+
+        assert 'Cleared the recommendation cache' in capsys.readouterr().out
+        assert not RecommendationCacheEntry.objects.exists()
+
+
+@pytest.mark.django_db
+class TestDatabaseBackend:
+    """Test expiry and pruning of the cache table."""
+
+    def test_expired_rows_are_ignored_and_pruned(self):
+        cache = RecommendationCache(DatabaseRecommendationCacheBackend())
+        cache.store('Painter was late', ANSWER)
+        entry = RecommendationCacheEntry.objects.get()
+        RecommendationCacheEntry.objects.filter(id=entry.id).update(created_at=entry.created_at - timedelta(hours=2))
+
+        assert cache.lookup('Painter was late') == (None, 'miss')
+        assert cache.backend.prune() == 1
+        assert not RecommendationCacheEntry.objects.exists()
+
+    def test_least_recently_used_rows_are_pruned(self, settings):
+        settings.RECOMMENDATION_CACHE_MAX_ENTRIES = 2
+        cache = RecommendationCache(DatabaseRecommendationCacheBackend())
+        cache.store('Painter was late', ANSWER)
+        cache.store('Plumber overcharged me', ANSWER)
+        cache.lookup('Painter was late')
+        cache.store('Electrician never showed up', ANSWER)
+
+        assert set(RecommendationCacheEntry.objects.values_list('normalized_text', flat=True)) == {
+            'painter was late', 'electrician never showed up'
+        }
+        assert RecommendationCacheEntry.objects.get(normalized_text='painter was late').hits == 1
+
+
+class TestAIRecommendationServiceCaching:
+    """Test the cache in front of the OpenAI call."""
+
+    @pytest.fixture
+    def service(self, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        settings.RECOMMENDATION_CACHE_BACKEND = 'apps.problems.recommendation_cache.LocMemRecommendationCacheBackend'
+        return AIRecommendationService()
+
+    def test_repeated_problem_calls_openai_once(self, service):
+        with patch.object(AIRecommendationService, '_generate_with_openai', return_value=ANSWER) as openai_call:
+            assert service.generate_recommendations('The cleaner was late') == ANSWER
+            assert service.generate_recommendations('the cleaner was LATE.') == ANSWER
+
+        assert openai_call.call_count == 1
+        assert get_recommendation_cache().stats()['exact_hits'] == 1
+
+    def test_fallback_answers_are_not_cached(self, service):
+        with patch.object(AIRecommendationService, '_generate_with_openai', side_effect=RuntimeError('down')):
+            service.generate_recommendations('The cleaner was late')
+
+        assert get_recommendation_cache().backend.size() == 0
+
+    def test_cache_can_be_disabled(self, service, settings):
+        settings.RECOMMENDATION_CACHE_BACKEND = ''
+        with patch.object(AIRecommendationService, '_generate_with_openai', return_value=ANSWER) as openai_call:
+            service.generate_recommendations('The cleaner was late')
+            service.generate_recommendations('The cleaner was late')
+
+        assert openai_call.call_count == 2
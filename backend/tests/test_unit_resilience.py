@@ -0,0 +1,253 @@
+"""
+Unit tests for the circuit breaker and limits around outbound AI calls.
+"""
+import threading
+import pytest
+from unittest.mock import patch
+from rest_framework import status
+from apps.problems.ai_service import AIRecommendationService
+from apps.problems.fallback_rules import get_fallback_rules
+from apps.problems.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AIDependency,
+    BudgetExhausted,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyLimitExceeded,
+    LatencyHistogram,
+    get_ai_dependency,
+)
+from apps.problems.transcription_engines import get_transcription_engine, reset_transcription_engines
+
+
+ANSWER = [{'title': 'Call them', 'description': 'Phone the provider.'}]
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail(timeout):
+    raise RuntimeError('API down')
+
+
+class TestCircuitBreaker:
+    """Test circuit state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker('test', failure_threshold=3, recovery_seconds=10, clock=Clock())
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_lets_one_probe_through(self):
+        clock = Clock()
+        breaker = CircuitBreaker('test', failure_threshold=1, recovery_seconds=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow_request()
+
+    def test_failed_probe_reopens(self):
+        clock = Clock()
+        breaker = CircuitBreaker('test', failure_threshold=5, recovery_seconds=10, clock=clock)
+        for _ in range(5):
+            breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert breaker.snapshot()['retry_in_seconds'] == 10
+
+
+class TestAIDependency:
+    """Test guarded calls."""
+
+    def test_open_circuit_rejects_without_calling(self):
+        dependency = AIDependency('test', timeout=4, breaker=CircuitBreaker('test', failure_threshold=2, clock=Clock()))
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                dependency.call(_fail)
+
+        calls = []
+        with pytest.raises(CircuitOpenError):
+            dependency.call(calls.append)
+
+        assert calls == []
+        snapshot = dependency.snapshot()
+        assert snapshot['circuit']['state'] == OPEN
+        assert (snapshot['calls'], snapshot['failures'], snapshot['rejected_open']) == (2, 2, 1)
+
+    def test_ignored_exceptions_do_not_trip_the_circuit(self):
+        dependency = AIDependency('test', timeout=4, breaker=CircuitBreaker('test', failure_threshold=1, clock=Clock()))
+
+        def empty(timeout):
+            raise ValueError('Transcription resulted in empty text')
+
+        with pytest.raises(ValueError):
+            dependency.call(empty)
+        assert dependency.breaker.state == CLOSED
+
+    def test_timeout_is_capped_by_the_budget(self):
+        dependency = AIDependency('test', timeout=4)
+
+        assert dependency.call(lambda timeout: timeout, budget=1.5) == 1.5
+        assert dependency.call(lambda timeout: timeout) == 4
+        with pytest.raises(BudgetExhausted):
+            dependency.call(lambda timeout: timeout, budget=0)
+
+    def test_slow_calls_count_as_failures(self):
+        dependency = AIDependency('test', timeout=1, breaker=CircuitBreaker('test', failure_threshold=1, clock=Clock()))
+
+        with patch('apps.problems.resilience.time.monotonic', side_effect=[0, 3]):
+            # The late answer is still returned
+            assert dependency.call(lambda timeout: 'late') == 'late'
+
+        assert dependency.snapshot()['slow_calls'] == 1
+        assert dependency.breaker.state == OPEN
+
+    def test_concurrency_limit_sheds_extra_calls(self):
+        dependency = AIDependency('test', timeout=4, max_concurrent_calls=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(timeout):
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        thread = threading.Thread(target=dependency.call, args=(slow,))
+        thread.start()
+        started.wait(5)
+        try:
+            assert dependency.snapshot()['in_flight'] == 1
+            with pytest.raises(ConcurrencyLimitExceeded):
+                dependency.call(slow)
+        finally:
+            release.set()
+            thread.join()
+
+        assert dependency.call(lambda timeout: 'next') == 'next'
+        assert dependency.snapshot()['rejected_busy'] == 1
+
+    def test_callers_may_wait_for_a_slot(self):
+        dependency = AIDependency('test', timeout=4, max_concurrent_calls=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(timeout):
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        thread = threading.Thread(target=dependency.call, args=(slow,))
+        thread.start()
+        started.wait(5)
+        try:
+            with pytest.raises(ConcurrencyLimitExceeded):
+                dependency.call(slow, wait=0.05)
+            threading.Timer(0.05, release.set).start()
+            assert dependency.call(lambda timeout: timeout, wait=5) == 4
+        finally:
+            release.set()
+            thread.join()
+
+        assert dependency.snapshot()['rejected_busy'] == 1
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram(buckets=(0.5, 1, 2))
+        for seconds in (0.2, 0.3, 0.7, 1.5, 5):
+            histogram.observe(seconds)
+
+        snapshot = histogram.snapshot()
+        assert snapshot['buckets'] == {'0.5': 2, '1': 3, '2': 4, '+Inf': 5}
+        assert snapshot['count'] == 5
+        assert snapshot['p50'] == 1
+        assert snapshot['p95'] == float('inf')
+
+
+class TestFallbackWithoutWaiting:
+    """Test that callers fall back when a dependency is degraded."""
+
+    @pytest.fixture
+    def service(self, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        settings.RECOMMENDATION_CACHE_BACKEND = ''
+        settings.AI_CIRCUIT_FAILURE_THRESHOLD = 2
+        return AIRecommendationService()
+
+    def test_open_circuit_goes_straight_to_the_rules(self, service):
+        text = 'The cleaner was late'
+        with patch.object(AIRecommendationService, '_generate_with_openai', side_effect=RuntimeError('down')) as openai_call:
+            for _ in range(4):
+                assert service.generate_recommendations(text) == get_fallback_rules().recommend(text)
+
+        # Two failures opened the circuit; the next calls never reached OpenAI
+        assert openai_call.call_count == 2
+        assert get_ai_dependency('openai-chat').snapshot()['rejected_open'] == 2
+
+    def test_openai_gets_the_remaining_budget(self, service):
+        with patch.object(AIRecommendationService, '_generate_with_openai', return_value=ANSWER) as openai_call:
+            assert service.generate_recommendations('The cleaner was late') == ANSWER
+
+        timeout = openai_call.call_args.kwargs['timeout']
+        assert 3 < timeout <= 4
+
+    def test_open_circuit_skips_whisper(self, settings):
+        settings.OPENAI_API_KEY = 'test-key'
+        reset_transcription_engines()
+        whisper = get_transcription_engine('whisper')
+        assert whisper.is_available()
+
+        for _ in range(settings.AI_CIRCUIT_FAILURE_THRESHOLD):
+            with pytest.raises(RuntimeError):
+                get_ai_dependency('openai-audio').call(_fail)
+
+        assert not whisper.is_available()
+        reset_transcription_engines()
+
+
+@pytest.mark.django_db
+class TestAIStatusEndpoint:
+    """Test the admin status endpoint."""
+
+    def test_admin_sees_dependency_state(self, admin_client):
+        get_ai_dependency('openai-chat').call(lambda timeout: 'ok')
+
+        response = admin_client.get('/api/problems/ai-status/')
+
+        assert response.status_code == status.HTTP_200_OK
+        chat = response.data['dependencies'][0]
+        assert chat['name'] == 'openai-chat'
+        assert chat['circuit']['state'] == CLOSED
+        assert chat['successes'] == 1
+        assert chat['latency']['count'] == 1
+
+    def test_customers_cannot_see_it(self, authenticated_client):
+        response = authenticated_client.get('/api/problems/ai-status/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,80 @@
+"""
+Unit tests for the service full-text search index.
+"""
+import pytest
+from decimal import Decimal
+from apps.services.models import Service
+from apps.services.repositories import ServiceRepository
+from apps.services.services import ServiceSearchService
+
+
+def _names(services):
+    return [service.name for service in services]
+
+
+@pytest.fixture
+def catalogue(provider_user):
+    """A small set of services across two cities."""
+    return [
+        ServiceRepository.create(provider_user, 'Plumbing Repairs', 'Leaks and pipes fixed fast', 'Damascus', Decimal('80')),
+        ServiceRepository.create(provider_user, 'Home Cleaning', 'Cleaning, including after plumbing work', 'Damascus', Decimal('40')),
+        ServiceRepository.create(provider_user, 'Emergency Plumbing', 'Around the clock', 'Aleppo', Decimal('120')),
+        ServiceRepository.create(provider_user, 'Electrician', 'Wiring and lighting', 'Aleppo', Decimal('60')),
+    ]
+
+
+@pytest.mark.django_db
+class TestServiceSearch:
+    """Test full-text service search."""
+
+    def test_location_filter_matches_word_prefixes(self, catalogue):
+        """Location matches whole words or word prefixes, case-insensitively."""
+        assert _names(ServiceSearchService.search_services(location='damascus')) == ['Home Cleaning', 'Plumbing Repairs']
+        assert _names(ServiceSearchService.search_services(location='Ale')) == ['Electrician', 'Emergency Plumbing']
+        assert not ServiceSearchService.search_services(location='Homs').exists()
+
+    def test_location_only_matches_location_column(self, provider_user, catalogue):
+        """A location filter ignores names and descriptions mentioning the place."""
+        ServiceRepository.create(provider_user, 'Damascus Tours', 'Old city walks', 'Aleppo', Decimal('30'))
+        assert 'Damascus Tours' not in _names(ServiceSearchService.search_services(location='Damascus'))
+
+    def test_query_ranks_by_relevance(self, catalogue):
+        """Matches in the name outrank matches in the description."""
+        results = _names(ServiceSearchService.search_services(query='plumbing'))
+        assert set(results) == {'Plumbing Repairs', 'Emergency Plumbing', 'Home Cleaning'}
+        assert results[-1] == 'Home Cleaning'
+
+    def test_query_honours_cost_and_location_filters(self, catalogue):
+        """Free text combines with the existing filters."""
+        results = ServiceSearchService.search_services(query='plumb', location='Damascus', max_cost=Decimal('100'))
+        assert _names(results) == ['Plumbing Repairs', 'Home Cleaning']
+
+        results = ServiceSearchService.search_services(query='plumbing', min_cost=Decimal('100'))
+        assert _names(results) == ['Emergency Plumbing']
+
+    def test_index_follows_repository_updates(self, catalogue):
+        """Updated and deleted services are reindexed."""
+        electrician = catalogue[3]
+        ServiceRepository.update(electrician, name='Solar Installer', location='Homs')
+
+        assert _names(ServiceSearchService.search_services(query='solar')) == ['Solar Installer']
+        assert _names(ServiceSearchService.search_services(location='Homs')) == ['Solar Installer']
+        assert not ServiceSearchService.search_services(query='electrician').exists()
+
+        ServiceRepository.hard_delete(electrician)
+        assert not ServiceSearchService.search_services(query='solar').exists()
+
+    def test_index_covers_other_write_paths(self, provider_user):
+        """Services created outside the repository are indexed too."""
+        Service.objects.create(provider=provider_user, name='Tutoring', description='Maths', location='Latakia', cost=25)
+        assert _names(ServiceSearchService.search_services(query='maths')) == ['Tutoring']
+
+    def test_query_without_words_matches_nothing(self, catalogue):
+        """Punctuation-only input cannot inject FTS syntax and matches nothing."""
+        assert not ServiceSearchService.search_services(query='"*:(').exists()
+
+    def test_api_accepts_query(self, authenticated_client, catalogue):
+        """The list endpoint exposes free-text search as q."""
+        response = authenticated_client.get('/api/services/', {'q': 'plumbing', 'location': 'Aleppo'})
+        assert response.status_code == 200
+        assert [row['name'] for row in response.data['results']] == ['Emergency Plumbing']
@@ -0,0 +1,216 @@
+"""
+Unit tests for transcription engine routing and the local engine.
+"""
+import io
+import json
+import struct
+import sys
+import threading
+import time
+import wave
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from apps.problems.fakes import FakeTranscriptionEngine
+from apps.problems.resilience import get_ai_dependency
+from apps.problems.transcription_engines import (
+    VoskEngine,
+    get_transcription_engine,
+    reset_transcription_engines,
+    route_engine_names,
+)
+from apps.problems.transcription_service import VoiceTranscriptionService
+
+
+def _wav(seconds, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(struct.pack('<h', 1000) * int(seconds * rate))
+    buffer.seek(0)
+    buffer.name = 'call.wav'
+    return buffer
+
+
+def _text(text):
+    recording = io.BytesIO(text.encode())
+    recording.name = 'call.txt'
+    return recording
+
+
+@pytest.fixture
+def engine_settings(settings):
+    settings.OPENAI_API_KEY = ''
+    settings.TRANSCRIPTION_LOCAL_MODEL_PATH = ''
+    settings.TRANSCRIPTION_SHORT_MAX_SECONDS = 30
+    settings.TRANSCRIPTION_SHORT_ENGINES = ['local', 'whisper']
+    settings.TRANSCRIPTION_LONG_ENGINES = ['whisper', 'local']
+    settings.AUDIO_SEGMENT_SECONDS = 600
+    reset_transcription_engines()
+    yield settings
+    reset_transcription_engines()
+
+
+class TestRouting:
+    """Test how recordings are routed to engines."""
+
+    def test_routes_by_length(self, engine_settings):
+        assert route_engine_names(10) == ['local', 'whisper']
+        assert route_engine_names(31) == ['whisper', 'local']
+        # Length unknown (not WAV): treated as long
+        assert route_engine_names(None) == ['whisper', 'local']
+
+    def test_engines_are_process_wide_singletons(self, engine_settings):
+        assert get_transcription_engine('fake') is get_transcription_engine('fake')
+
+    def test_no_available_engine_is_reported(self, engine_settings):
+        """Without an API key or local model, transcription is unavailable."""
+        with pytest.raises(ValueError, match='currently unavailable'):
+            VoiceTranscriptionService().transcribe_audio(_wav(2), validate=False)
+
+    def test_unavailable_engines_are_skipped(self, engine_settings):
+        engine_settings.TRANSCRIPTION_SHORT_ENGINES = ['missing', 'local', 'fake']
+
+        with patch.object(FakeTranscriptionEngine, 'transcribe', return_value='short call') as transcribe:
+            assert VoiceTranscriptionService().transcribe_audio(_wav(2), validate=False) == 'short call'
+        transcribe.assert_called_once()
+
+    def test_long_recordings_use_the_long_route(self, engine_settings):
+        engine_settings.TRANSCRIPTION_SHORT_ENGINES = ['whisper']
+        engine_settings.TRANSCRIPTION_LONG_ENGINES = ['fake']
+
+        assert VoiceTranscriptionService().transcribe_audio(_text('Formats of unknown length'), validate=False) == \
+            'Formats of unknown length'
+        with patch.object(FakeTranscriptionEngine, 'transcribe', return_value='long call'):
+            assert VoiceTranscriptionService().transcribe_audio(_wav(31), validate=False) == 'long call'
+        with pytest.raises(ValueError, match='currently unavailable'):
+            VoiceTranscriptionService().transcribe_audio(_wav(5), validate=False)
+
+
+class TestVoskEngine:
+    """Test the local engine against a stubbed vosk module."""
+
+    @pytest.fixture
+    def vosk(self, engine_settings, tmp_path):
+        engine_settings.TRANSCRIPTION_LOCAL_MODEL_PATH = str(tmp_path)
+
+        class Recognizer:
+            def __init__(self, model, rate):
+                self.calls = 0
+
+            def AcceptWaveform(self, frames):
+                self.calls += 1
+                # An utterance ends after the first chunk
+                return self.calls == 1
+
+            def Result(self):
+                return json.dumps({'text': 'the plumber'})
+
+            def FinalResult(self):
+                return json.dumps({'text': 'never came'})
+
+        module = SimpleNamespace(Model=MagicMock(name='Model'), KaldiRecognizer=Recognizer)
+        with patch.dict(sys.modules, {'vosk': module}):
+            yield module
+
+    def test_needs_a_model_directory(self, engine_settings):
+        assert not VoskEngine().is_available()
+
+    def test_model_stays_loaded_between_recordings(self, vosk, tmp_path):
+        engine = get_transcription_engine('local')
+
+        assert engine.is_available()
+        with patch('apps.problems.normalization.shutil.which', return_value=None):
+            assert engine.supports('wav') and not engine.supports('mp3')
+        assert engine.transcribe(_wav(1)) == 'the plumber never came'
+        assert get_transcription_engine('local').transcribe(_wav(1)) == 'the plumber never came'
+        vosk.Model.assert_called_once_with(str(tmp_path))
+
+    def test_short_recordings_are_transcribed_locally(self, vosk):
+        assert VoiceTranscriptionService().transcribe_audio(_wav(2), validate=False) == 'the plumber never came'
+
+    def test_other_formats_are_decoded_with_ffmpeg(self, vosk):
+        """Opus recordings, as stored after ffmpeg normalization, are decoded to WAV first."""
+        recording = io.BytesIO(b'OggS' + bytes(4096))
+        recording.name = 'call.ogg'
+
+        def decode(args, **kwargs):
+            assert args[args.index('-c:a') + 1] == 'pcm_s16le'
+            with open(args[-1], 'wb') as output:
+                output.write(_wav(1).getvalue())
+
+        engine = get_transcription_engine('local')
+        with patch('apps.problems.normalization.shutil.which', return_value='/usr/bin/ffmpeg'), \
+                patch('apps.problems.normalization.subprocess.run', side_effect=decode) as run:
+            assert engine.supports('ogg')
+            assert engine.transcribe(recording) == 'the plumber never came'
+        run.assert_called_once()
+
+    def test_failed_engine_falls_back_to_the_next(self, vosk, engine_settings):
+        engine_settings.TRANSCRIPTION_SHORT_ENGINES = ['local', 'fake']
+
+        with patch.object(VoskEngine, '_transcribe_wav', side_effect=RuntimeError('model crashed')), \
+                patch.object(FakeTranscriptionEngine, 'transcribe', return_value='short call') as transcribe:
+            assert VoiceTranscriptionService().transcribe_audio(_wav(2), validate=False) == 'short call'
+        transcribe.assert_called_once()
+
+    def test_last_engine_failure_is_reported(self, vosk, engine_settings):
+        engine_settings.TRANSCRIPTION_SHORT_ENGINES = ['local', 'fake']
+
+        with patch.object(VoskEngine, '_transcribe_wav', side_effect=RuntimeError('model crashed')), \
+                patch.object(FakeTranscriptionEngine, 'transcribe', side_effect=RuntimeError('fake crashed')), \
+                pytest.raises(Exception, match='fake crashed'):
+            VoiceTranscriptionService().transcribe_audio(_wav(2), validate=False)
+
+
+class TestWhisperSegments:
+    """Test that parallel segments share the Whisper concurrency limit."""
+
+    @pytest.fixture
+    def whisper_settings(self, engine_settings):
+        engine_settings.OPENAI_API_KEY = 'test-key'
+        engine_settings.AI_MAX_CONCURRENT_CALLS = 2
+        engine_settings.AUDIO_TRANSCRIPTION_CONCURRENCY = 4
+        engine_settings.AUDIO_SEGMENT_SECONDS = 1
+        engine_settings.AUDIO_SEGMENT_MAX_SECONDS = 1
+        engine_settings.TRANSCRIPTION_SHORT_ENGINES = ['whisper', 'fake']
+        return engine_settings
+
+    def test_segments_wait_for_a_slot(self, whisper_settings):
+        """Four segments through two slots are all transcribed by Whisper."""
+        lock = threading.Lock()
+        in_flight = []
+
+        def create(**kwargs):
+            with lock:
+                in_flight.append(get_ai_dependency('openai-audio').snapshot()['in_flight'])
+            time.sleep(0.05)
+            return SimpleNamespace(text='part')
+
+        client = MagicMock()
+        client.audio.transcriptions.create.side_effect = create
+        with patch('apps.problems.transcription_engines.get_openai_client', return_value=client):
+            text = VoiceTranscriptionService().transcribe_audio(_wav(4), validate=False)
+
+        assert text == 'part part part part'
+        assert max(in_flight) <= 2
+        assert get_ai_dependency('openai-audio').snapshot()['rejected_busy'] == 0
+
+    def test_rejected_segments_fall_back_to_the_next_engine(self, whisper_settings):
+        whisper_settings.AI_TIMEOUTS = {'openai-audio': 0.05}
+        whisper_settings.AI_MAX_CONCURRENT_CALLS = 1
+        dependency = get_ai_dependency('openai-audio')
+        # Another request holds the only slot throughout
+        dependency._slots.acquire()
+        try:
+            with patch('apps.problems.transcription_engines.get_openai_client') as client, \
+                    patch.object(FakeTranscriptionEngine, 'transcribe', return_value='local part'):
+                text = VoiceTranscriptionService().transcribe_audio(_wav(4), validate=False)
+        finally:
+            dependency._slots.release()
+
+        assert text == 'local part local part local part local part'
+        client.assert_not_called()
+        assert dependency.snapshot()['rejected_busy'] >= 1